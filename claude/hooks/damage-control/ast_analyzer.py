@@ -12,10 +12,16 @@ Decision contract:
   {"decision": "allow"}  - No objection; caller's decision stands
   {"decision": "ask", "reason": "..."}   - Escalate to ask
   {"decision": "block", "reason": "..."}  - Escalate to block
+
+Each input is parsed once per process: the tree and its deduplicated list of
+extracted commands are kept in a small LRU keyed by the command text, so the
+daemon (and nested ``bash -c`` / ``eval`` strings seen again) skip tree-sitter.
 """
 
 import re
 import sys
+import threading
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Any, Optional
@@ -47,6 +53,9 @@ _NESTED_COMMAND_TYPES = {
     "list",
 }
 
+# Parsed inputs kept per analyzer; one-shot hooks only ever fill a few slots.
+PARSE_CACHE_SIZE = 64
+
 
 def _check_tree_sitter() -> bool:
     """Check whether tree-sitter and tree-sitter-bash are importable."""
@@ -91,6 +100,16 @@ def _pattern_applies_to_current_platform(item: dict[str, Any]) -> bool:
     return True
 
 
+class _ParsedInput:
+    """A parsed command string and, once walked, its extracted commands."""
+
+    __slots__ = ("root", "commands")
+
+    def __init__(self, root: Any) -> None:
+        self.root = root
+        self.commands: Optional[list[str]] = None
+
+
 class ASTAnalyzer:
     """Tree-sitter bash AST analyzer — veto-only second pass.
 
@@ -99,8 +118,11 @@ class ASTAnalyzer:
     is unavailable or AST analysis is disabled.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, parse_cache_size: int = PARSE_CACHE_SIZE) -> None:
         self._parser: Any = None
+        self._parse_cache_size = parse_cache_size
+        self._parse_cache: OrderedDict[str, _ParsedInput] = OrderedDict()
+        self._parse_lock = threading.Lock()
 
     def is_available(self) -> bool:
         """Return True if tree-sitter and tree-sitter-bash are importable."""
@@ -121,6 +143,28 @@ class ASTAnalyzer:
         self._parser = Parser(bash_language)
         return self._parser
 
+    def _parse(self, text: str) -> _ParsedInput:
+        """Return the parse of text, reusing a cached tree when it was seen before."""
+        with self._parse_lock:
+            parsed = self._parse_cache.get(text)
+            if parsed is not None:
+                self._parse_cache.move_to_end(text)
+                return parsed
+        parsed = _ParsedInput(self._get_parser().parse(text.encode("utf-8")).root_node)
+        if self._parse_cache_size > 0:
+            with self._parse_lock:
+                self._parse_cache[text] = parsed
+                while len(self._parse_cache) > self._parse_cache_size:
+                    self._parse_cache.popitem(last=False)
+        return parsed
+
+    def _commands_for(self, text: str) -> list[str]:
+        """Deduplicated commands extracted from text, computed once per cached parse."""
+        parsed = self._parse(text)
+        if parsed.commands is None:
+            parsed.commands = self._extract_all_commands(parsed.root)
+        return parsed.commands
+
     def _node_text(self, node: Any) -> str:
         """Decode node text to str."""
         text = node.text
@@ -134,16 +178,15 @@ class ASTAnalyzer:
             return text[1:-1]
         return text
 
-    def _recurse_shell_c(self, node: Any, commands: list, depth: int) -> None:
+    def _recurse_shell_c(self, args: list[str], commands: list, depth: int) -> None:
         """Re-parse the argument after -c in a shell invocation."""
-        args = [self._node_text(c).strip() for c in node.children[1:] if self._node_text(c).strip()]
         for i, arg in enumerate(args):
             if arg == "-c" and i + 1 < len(args):
                 inner = self._strip_quotes(args[i + 1])
                 if inner:
                     try:
-                        inner_tree = self._get_parser().parse(inner.encode("utf-8"))
-                        commands.extend(self._extract_all_commands(inner_tree.root_node, depth + 1))
+                        inner_root = self._parse(inner).root
+                        commands.extend(self._extract_all_commands(inner_root, depth + 1))
                     except Exception:
                         pass
                 break
@@ -151,13 +194,10 @@ class ASTAnalyzer:
     def _collect_command_node(self, node: Any, commands: list, depth: int) -> None:
         """Extract command text from a command node and recurse into shell -c args."""
         cmd_name = self._strip_quotes(self._node_text(node.children[0]).strip())
-        parts = [cmd_name] + [
-            self._node_text(c).strip() for c in node.children[1:] if self._node_text(c).strip()
-        ]
-        if parts:
-            commands.append(" ".join(parts))
+        args = [text for text in (self._node_text(c).strip() for c in node.children[1:]) if text]
+        commands.append(" ".join([cmd_name, *args]))
         if cmd_name in self._SHELL_C_NAMES:
-            self._recurse_shell_c(node, commands, depth)
+            self._recurse_shell_c(args, commands, depth)
 
     def _walk_commands(self, node: Any, commands: list, depth: int) -> None:
         """Recursively collect command strings into commands list."""
@@ -167,22 +207,37 @@ class ASTAnalyzer:
             self._walk_commands(child, commands, depth)
 
     def _extract_all_commands(self, root: Any, _depth: int = 0) -> list[str]:
-        """Walk the full AST and collect text for every command node."""
+        """Walk the full AST and collect text for every command node, first occurrence only."""
         if _depth > 3:
             return []
         commands: list[str] = []
         self._walk_commands(root, commands, _depth)
-        return commands
+        return list(dict.fromkeys(commands))
+
+    def _candidate_patterns(
+        self, commands: list[str], compiled_patterns: list[Any], prefilter: Any
+    ) -> list[Any]:
+        """Patterns that could match any of commands, in original order.
+
+        prefilter is the bash hook's PatternPrefilter over compiled_patterns
+        (config["bashToolPatterns_prefilter"]); without one every pattern runs.
+        """
+        if prefilter is None or prefilter.size != len(compiled_patterns):
+            return compiled_patterns
+        return [compiled_patterns[idx] for idx in prefilter.candidates(commands)]
 
     def _check_extracted_commands(
-        self, commands: list[str], compiled_patterns: list[Any]
+        self, commands: list[str], compiled_patterns: list[Any], prefilter: Any = None
     ) -> Optional[dict]:
         """Run a list of extracted command strings through compiled regex patterns.
 
         Returns a block/ask decision if any pattern matches, else None.
         """
+        if not commands:
+            return None
+        candidates = self._candidate_patterns(commands, compiled_patterns, prefilter)
         for cmd in commands:
-            for item in compiled_patterns:
+            for item in candidates:
                 compiled_regex = item.get("compiled")
                 if not compiled_regex or not _pattern_applies_to_current_platform(item):
                     continue
@@ -322,10 +377,12 @@ class ASTAnalyzer:
         if not inner_text:
             return None
         try:
-            inner_root = self._get_parser().parse(inner_text.encode("utf-8")).root_node
+            inner_root = self._parse(inner_text).root
             if compiled_patterns:
                 result = self._check_extracted_commands(
-                    self._extract_all_commands(inner_root), compiled_patterns
+                    self._commands_for(inner_text),
+                    compiled_patterns,
+                    config.get("bashToolPatterns_prefilter"),
                 )
                 if result:
                     return result
@@ -377,12 +434,21 @@ class ASTAnalyzer:
             return None
         return self._walk_eval_source(root, compiled_patterns, config, depth)
 
-    def _run_analysis(self, command: str, config: dict) -> dict:
-        """Execute the three AST analysis passes and return a decision."""
-        root = self._get_parser().parse(command.encode("utf-8")).root_node
+    def _run_analysis(self, command: str, config: dict, checked: Optional[str] = None) -> dict:
+        """Execute the three AST analysis passes and return a decision.
+
+        checked is a string the caller already ran every bash pattern against
+        (the unwrapped command); an extracted command equal to it is not re-run.
+        """
+        root = self._parse(command).root
         compiled_patterns = self._get_compiled_patterns(config)
         if compiled_patterns:
-            r = self._check_extracted_commands(self._extract_all_commands(root), compiled_patterns)
+            commands = self._commands_for(command)
+            if checked is not None:
+                commands = [cmd for cmd in commands if cmd != checked]
+            r = self._check_extracted_commands(
+                commands, compiled_patterns, config.get("bashToolPatterns_prefilter")
+            )
             if r:
                 return r
         r = self._check_variable_expansion(root, config.get("astAnalysis", {}))
@@ -400,11 +466,13 @@ class ASTAnalyzer:
         cmd_name = command.strip().split()[0] if command.strip() else ""
         return cmd_name in safe_commands
 
-    def _run_with_timeout(self, command: str, config: dict, timeout_sec: float) -> dict:
+    def _run_with_timeout(
+        self, command: str, config: dict, timeout_sec: float, checked: Optional[str] = None
+    ) -> dict:
         """Run analysis in a thread with a timeout, escalating to ask on timeout/error."""
         try:
             with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._run_analysis, command, config)
+                future = executor.submit(self._run_analysis, command, config, checked)
                 return future.result(timeout=timeout_sec)
         except FuturesTimeoutError:
             return {"decision": "ask", "reason": "Command too complex to analyze within timeout"}
@@ -418,8 +486,14 @@ class ASTAnalyzer:
             return timeout_ms / 1000.0
         return None
 
-    def analyze_command_ast(self, command: str, config: dict) -> dict:
-        """Analyze a bash command string via tree-sitter AST (veto-only)."""
+    def analyze_command_ast(
+        self, command: str, config: dict, checked: Optional[str] = None
+    ) -> dict:
+        """Analyze a bash command string via tree-sitter AST (veto-only).
+
+        Pass checked when the caller already matched the bash patterns against
+        that exact string, so the extraction pass does not repeat the work.
+        """
         ast_config = config.get("astAnalysis", {})
         if not ast_config.get("enabled", True) or not self.is_available():
             return {"decision": "allow"}
@@ -427,8 +501,8 @@ class ASTAnalyzer:
             return {"decision": "allow"}
         timeout_sec = self._get_timeout_sec(ast_config)
         if timeout_sec is not None:
-            return self._run_with_timeout(command, config, timeout_sec)
+            return self._run_with_timeout(command, config, timeout_sec, checked)
         try:
-            return self._run_analysis(command, config)
+            return self._run_analysis(command, config, checked)
         except Exception:
             return {"decision": "allow"}
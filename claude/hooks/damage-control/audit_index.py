@@ -0,0 +1,573 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.9"
+# ///
+"""
+Damage Control Audit Index
+==========================
+
+Incrementally loads the damage-control audit logs (daily YYYY-MM-DD.log files
+and the .log.tar.gz archives written by log_rotate.py) into a local SQLite
+database, so "why was this blocked last Tuesday" is a query instead of a grep
+over JSONL and gzip files.
+
+Usage:
+  uv run audit_index.py ingest
+  uv run audit_index.py report top_blocked_patterns [--limit N] [--format table|csv|jsonl]
+  uv run audit_index.py query "SELECT ... FROM audit_entries ..." [--limit N]
+  uv run audit_index.py views
+
+Global options: --logs-dir DIR, --db PATH, --no-ingest (report/query/views
+ingest new lines first unless this is given).
+
+Ingest reads each file once: the byte offset of the last complete line is
+stored per log, so later runs only read appended lines. A log that shrank or
+was replaced is re-read from the start. When a log is archived, the archive
+is read once, starting at the block that holds the stored offset when
+log_rotate.py's sidecar index is present; rows are unique per (log, byte
+offset), so overlap is harmless.
+
+Like pi/analytics/pi_log_query.py, everything is exposed as tables and views
+and queries are bounded, read-only SELECTs:
+
+  audit_entries          one row per audit line; decision, pattern_matched,
+                         context and timestamp are indexed, data holds the
+                         original JSON entry
+  audit_files            per-log ingest state (offset, archive signature)
+  top_blocked_patterns   blocked entries per matched pattern
+  ask_rate_by_day        decisions per day with the share that asked
+  slowest_stages         per-stage wall time from profiled entries (timings_ns)
+  recent_blocks          latest blocked entries, newest first
+
+Environment variables:
+  CLAUDE_DAMAGE_CONTROL_CACHE_DIR - Directory for the index database
+                                    (default: ~/.claude/cache/damage-control)
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import tarfile
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
+log_rotate = importlib.import_module("log_rotate")
+
+DB_FILENAME = "audit-index.sqlite"
+MAX_QUERY_ROWS = 1_000
+TABLE_CELL_CHARS = 120
+BUSY_TIMEOUT_SECONDS = 5.0
+INSERT_BATCH = 1_000
+
+_LOG_NAME = re.compile(r"^\d{4}-\d{2}-\d{2}\.log$")
+_ARCHIVE_SUFFIX = ".tar.gz"
+
+# Entry fields copied into their own columns (the rest stay in data).
+ENTRY_COLUMNS = (
+    "timestamp",
+    "hook",
+    "tool",
+    "decision",
+    "reason",
+    "pattern_matched",
+    "context",
+    "detection_type",
+    "pattern_type",
+    "severity",
+    "command_redacted",
+    "file_path",
+    "cwd",
+    "user",
+)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS audit_files (
+    log_name TEXT PRIMARY KEY, path TEXT NOT NULL, device INTEGER, inode INTEGER,
+    offset INTEGER NOT NULL, archived INTEGER NOT NULL DEFAULT 0,
+    archive_size INTEGER, archive_mtime_ns INTEGER,
+    entries INTEGER NOT NULL DEFAULT 0, malformed INTEGER NOT NULL DEFAULT 0)""",
+    "CREATE TABLE IF NOT EXISTS audit_entries ("
+    "id INTEGER PRIMARY KEY, log_name TEXT NOT NULL, byte_offset INTEGER NOT NULL, day TEXT, "
+    + ", ".join(f'"{column}" TEXT' for column in ENTRY_COLUMNS)
+    + ", timings_ns TEXT, data TEXT NOT NULL, UNIQUE (log_name, byte_offset))",
+    "CREATE INDEX IF NOT EXISTS audit_entries_decision ON audit_entries (decision, timestamp)",
+    "CREATE INDEX IF NOT EXISTS audit_entries_pattern ON audit_entries (pattern_matched)",
+    "CREATE INDEX IF NOT EXISTS audit_entries_context ON audit_entries (context)",
+    "CREATE INDEX IF NOT EXISTS audit_entries_timestamp ON audit_entries (timestamp)",
+)
+
+DERIVED_VIEWS: tuple[tuple[str, str], ...] = (
+    (
+        "top_blocked_patterns",
+        """CREATE VIEW top_blocked_patterns AS
+SELECT coalesce(nullif(pattern_matched, ''), reason) AS pattern, count(*) AS blocked,
+  count(DISTINCT day) AS days, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM audit_entries WHERE decision = 'blocked'
+GROUP BY 1 ORDER BY blocked DESC, last_seen DESC""",
+    ),
+    (
+        "ask_rate_by_day",
+        """CREATE VIEW ask_rate_by_day AS
+SELECT day, count(*) AS decisions, sum(decision = 'ask') AS asked,
+  sum(decision = 'blocked') AS blocked,
+  round(1.0 * sum(decision = 'ask') / count(*), 4) AS ask_rate
+FROM audit_entries WHERE decision IS NOT NULL
+GROUP BY day ORDER BY day DESC""",
+    ),
+    (
+        "slowest_stages",
+        """CREATE VIEW slowest_stages AS
+SELECT stage.key AS stage, count(*) AS samples,
+  round(avg(stage.value) / 1e6, 3) AS avg_ms, round(max(stage.value) / 1e6, 3) AS max_ms
+FROM audit_entries, json_each(audit_entries.timings_ns) AS stage
+WHERE audit_entries.timings_ns IS NOT NULL
+GROUP BY stage.key ORDER BY avg_ms DESC""",
+    ),
+    (
+        "recent_blocks",
+        """CREATE VIEW recent_blocks AS
+SELECT timestamp, tool, coalesce(command_redacted, file_path) AS target, reason,
+  pattern_matched, context, cwd
+FROM audit_entries WHERE decision = 'blocked' ORDER BY timestamp DESC""",
+    ),
+)
+
+REPORTS = tuple(name for name, _ in DERIVED_VIEWS)
+
+
+def default_logs_dir() -> Path:
+    return Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
+
+
+def default_db_path() -> Path:
+    cache_dir = os.environ.get("CLAUDE_DAMAGE_CONTROL_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir) / DB_FILENAME
+    return Path(os.path.expanduser("~")) / ".claude" / "cache" / "damage-control" / DB_FILENAME
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the index database with schema and views."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        for name, statement in DERIVED_VIEWS:
+            connection.execute(f'DROP VIEW IF EXISTS "{name}"')
+            connection.execute(statement)
+    except BaseException:
+        connection.execute("ROLLBACK")
+        connection.close()
+        raise
+    connection.execute("COMMIT")
+    return connection
+
+
+def connect_read_only(db_path: Path) -> sqlite3.Connection:
+    if not db_path.is_file():
+        raise ValueError(f"index database does not exist: {db_path}")
+    return sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+# ============================================================================
+# INGEST
+# ============================================================================
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    skipped: int = 0
+    entries: int = 0
+    malformed: int = 0
+
+
+@dataclass
+class LogState:
+    path: str
+    device: int | None
+    inode: int | None
+    offset: int
+    archived: bool
+    archive_size: int | None
+    archive_mtime_ns: int | None
+
+
+def iter_log_files(logs_dir: Path) -> Iterator[tuple[str, Path]]:
+    """(log name, path) for daily logs and their archives, oldest first.
+
+    A log's archive sorts after the live file, so a log caught mid-rotation
+    is finished from the live file before the archive is consulted.
+    """
+    found: list[tuple[str, int, Path]] = []
+    for path in logs_dir.glob("*.log*"):
+        if path.is_symlink() or not path.is_file():
+            continue
+        if _LOG_NAME.match(path.name):
+            found.append((path.name, 0, path))
+        elif path.name.endswith(_ARCHIVE_SUFFIX):
+            log_name = path.name[: -len(_ARCHIVE_SUFFIX)]
+            if _LOG_NAME.match(log_name):
+                found.append((log_name, 1, path))
+    for log_name, _, path in sorted(found):
+        yield log_name, path
+
+
+def _text(value: Any) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def entry_row(log_name: str, byte_offset: int, line: bytes) -> tuple[Any, ...] | None:
+    """Row for one log line, or None if it is not a JSON object."""
+    try:
+        text = line.decode("utf-8").strip()
+        entry = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict):
+        return None
+    timestamp = entry.get("timestamp")
+    day = timestamp[:10] if isinstance(timestamp, str) else log_name[:10]
+    timings = entry.get("timings_ns")
+    return (
+        log_name,
+        byte_offset,
+        day,
+        *(_text(entry.get(column)) for column in ENTRY_COLUMNS),
+        json.dumps(timings) if isinstance(timings, dict) else None,
+        text,
+    )
+
+
+_INSERT = (
+    "INSERT OR IGNORE INTO audit_entries (log_name, byte_offset, day, "
+    + ", ".join(f'"{column}"' for column in ENTRY_COLUMNS)
+    + ", timings_ns, data) VALUES ("
+    + ", ".join("?" * (len(ENTRY_COLUMNS) + 5))
+    + ")"
+)
+
+
+def _numbered(lines: Iterable[bytes], start: int) -> Iterator[tuple[int, bytes]]:
+    """Pair lines read from byte position start with their offsets."""
+    for line in lines:
+        yield start, line
+        start += len(line)
+
+
+def _load_lines(
+    connection: sqlite3.Connection,
+    log_name: str,
+    lines: Iterable[tuple[int, bytes]],
+    start: int,
+) -> tuple[int, int, int]:
+    """Insert complete (offset, line) pairs; start is the offset before the first.
+
+    Returns (end offset of the last complete line, entries inserted, malformed lines).
+    """
+    position = start
+    inserted = malformed = 0
+    batch: list[tuple[Any, ...]] = []
+    for line_offset, line in lines:
+        if not line.endswith(b"\n"):
+            break  # being written; picked up next run
+        position = line_offset + len(line)
+        if not line.strip():
+            continue
+        row = entry_row(log_name, line_offset, line)
+        if row is None:
+            malformed += 1
+            continue
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            inserted += connection.executemany(_INSERT, batch).rowcount
+            batch.clear()
+    if batch:
+        inserted += connection.executemany(_INSERT, batch).rowcount
+    return position, inserted, malformed
+
+
+def _log_state(connection: sqlite3.Connection, log_name: str) -> LogState | None:
+    row = connection.execute(
+        """SELECT path, device, inode, offset, archived, archive_size, archive_mtime_ns
+        FROM audit_files WHERE log_name = ?""",
+        (log_name,),
+    ).fetchone()
+    return None if row is None else LogState(*row[:4], bool(row[4]), *row[5:])
+
+
+def _save_state(
+    connection: sqlite3.Connection,
+    log_name: str,
+    state: LogState,
+    inserted: int,
+    malformed: int,
+) -> None:
+    connection.execute(
+        """INSERT INTO audit_files (log_name, path, device, inode, offset, archived,
+        archive_size, archive_mtime_ns, entries, malformed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (log_name) DO UPDATE SET path = excluded.path, device = excluded.device,
+        inode = excluded.inode, offset = excluded.offset, archived = excluded.archived,
+        archive_size = excluded.archive_size, archive_mtime_ns = excluded.archive_mtime_ns,
+        entries = entries + excluded.entries, malformed = malformed + excluded.malformed""",
+        (
+            log_name,
+            state.path,
+            state.device,
+            state.inode,
+            state.offset,
+            int(state.archived),
+            state.archive_size,
+            state.archive_mtime_ns,
+            inserted,
+            malformed,
+        ),
+    )
+
+
+def _forget_log(connection: sqlite3.Connection, log_name: str) -> None:
+    connection.execute("DELETE FROM audit_entries WHERE log_name = ?", (log_name,))
+    connection.execute("DELETE FROM audit_files WHERE log_name = ?", (log_name,))
+
+
+def _ingest_live(
+    connection: sqlite3.Connection, log_name: str, path: Path, stats: IngestStats
+) -> None:
+    state = _log_state(connection, log_name)
+    if state is not None and state.archived:
+        stats.skipped += 1  # rotation in progress; the archive has it all
+        return
+    st = path.stat()
+    if state is not None and (
+        (state.device, state.inode) != (st.st_dev, st.st_ino) or st.st_size < state.offset
+    ):
+        _forget_log(connection, log_name)  # rewritten or replaced: start over
+        state = None
+    start = state.offset if state is not None else 0
+    if st.st_size == start:
+        stats.skipped += 1
+        return
+    with open(path, "rb") as f:
+        f.seek(start)
+        end, inserted, malformed = _load_lines(connection, log_name, _numbered(f, start), start)
+    _save_state(
+        connection,
+        log_name,
+        LogState(str(path), st.st_dev, st.st_ino, end, False, None, None),
+        inserted,
+        malformed,
+    )
+    stats.files += 1
+    stats.entries += inserted
+    stats.malformed += malformed
+
+
+def _ingest_archive(
+    connection: sqlite3.Connection, log_name: str, path: Path, stats: IngestStats
+) -> None:
+    state = _log_state(connection, log_name)
+    st = path.stat()
+    if (
+        state is not None
+        and state.archived
+        and (state.archive_size, state.archive_mtime_ns) == (st.st_size, st.st_mtime_ns)
+    ):
+        stats.skipped += 1
+        return
+    skip_until = state.offset if state is not None and not state.archived else 0
+    # The sidecar index lets the archive be opened at the block holding skip_until.
+    end, inserted, malformed = _load_lines(
+        connection, log_name, log_rotate.iter_archive_lines(path, start=skip_until), skip_until
+    )
+    _save_state(
+        connection,
+        log_name,
+        LogState(str(path), None, None, end, True, st.st_size, st.st_mtime_ns),
+        inserted,
+        malformed,
+    )
+    stats.files += 1
+    stats.entries += inserted
+    stats.malformed += malformed
+
+
+def ingest(connection: sqlite3.Connection, logs_dir: Path) -> IngestStats:
+    """Load lines appended since the last run; each log commits on its own."""
+    stats = IngestStats()
+    for log_name, path in iter_log_files(logs_dir):
+        archive = path.name.endswith(_ARCHIVE_SUFFIX)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if archive:
+                _ingest_archive(connection, log_name, path, stats)
+            else:
+                _ingest_live(connection, log_name, path, stats)
+        except (OSError, tarfile.TarError) as e:
+            connection.execute("ROLLBACK")
+            print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+            continue
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    return stats
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+
+def execute_bounded_query(connection: sqlite3.Connection, query: str, limit: int) -> sqlite3.Cursor:
+    """Run one SELECT wrapped in a row limit (the connection should be read-only)."""
+    if limit < 1 or limit > MAX_QUERY_ROWS:
+        raise ValueError(f"limit must be between 1 and {MAX_QUERY_ROWS}")
+    normalized = query.strip().rstrip(";").strip()
+    if not normalized or not sqlite3.complete_statement(normalized + ";"):
+        raise ValueError("query must contain exactly one read-only SELECT statement")
+    try:
+        return connection.execute(f"SELECT * FROM ({normalized}) AS audit_query LIMIT {limit}")
+    except (sqlite3.ProgrammingError, sqlite3.OperationalError) as e:
+        raise ValueError(f"query must contain exactly one read-only SELECT statement: {e}") from e
+
+
+def _cell(value: object) -> str:
+    rendered = "" if value is None else str(value)
+    if len(rendered) <= TABLE_CELL_CHARS:
+        return rendered
+    return f"{rendered[: TABLE_CELL_CHARS - 3]}..."
+
+
+def emit_rows(headers: Sequence[str], rows: Sequence[Sequence[object]], output_format: str) -> None:
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return
+    if output_format == "jsonl":
+        for row in rows:
+            print(json.dumps(dict(zip(headers, row)), default=str, ensure_ascii=True))
+        return
+    if not rows:
+        print("No rows.")
+        return
+    rendered = [[_cell(value) for value in row] for row in rows]
+    widths = [len(header) for header in headers]
+    for row in rendered:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(value))
+    print(" | ".join(header.ljust(widths[index]) for index, header in enumerate(headers)))
+    print("-+-".join("-" * width for width in widths))
+    for row in rendered:
+        print(" | ".join(value.ljust(widths[index]) for index, value in enumerate(row)))
+
+
+def _emit_cursor(cursor: sqlite3.Cursor, output_format: str) -> None:
+    emit_rows([column[0] for column in cursor.description], cursor.fetchall(), output_format)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Query the damage-control audit logs via SQLite")
+    parser.add_argument("--logs-dir", type=Path, help="audit log directory")
+    parser.add_argument("--db", type=Path, help="index database path")
+    parser.add_argument(
+        "--no-ingest", action="store_true", help="query the index without loading new lines"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("ingest", help="load new log lines into the index")
+
+    views = subparsers.add_parser("views", help="list tables and canned views")
+    views.add_argument("--format", choices=("table", "csv", "jsonl"), default="table")
+
+    report = subparsers.add_parser("report", help="run one canned query")
+    report.add_argument("name", choices=REPORTS)
+    report.add_argument("--limit", type=int, default=20)
+    report.add_argument("--format", choices=("table", "csv", "jsonl"), default="table")
+
+    query = subparsers.add_parser("query", help="run one bounded read-only SELECT")
+    query.add_argument("sql", help="SQLite SELECT statement")
+    query.add_argument("--limit", type=int, default=50)
+    query.add_argument("--format", choices=("table", "csv", "jsonl"), default="table")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    logs_dir = (args.logs_dir or default_logs_dir()).expanduser()
+    db_path = (args.db or default_db_path()).expanduser()
+
+    if args.command == "ingest" or not args.no_ingest:
+        try:
+            connection = connect(db_path)
+            try:
+                stats = ingest(connection, logs_dir)
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"ingest error: {e}", file=sys.stderr)
+            return 2
+        print(
+            f"ingested_files={stats.files} unchanged_files={stats.skipped} "
+            f"new_entries={stats.entries} malformed_lines={stats.malformed}",
+            file=sys.stderr,
+        )
+        if args.command == "ingest":
+            return 0
+
+    try:
+        connection = connect_read_only(db_path)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"index error: {e}", file=sys.stderr)
+        return 2
+    try:
+        if args.command == "views":
+            _emit_cursor(
+                connection.execute(
+                    """SELECT name, type FROM sqlite_master
+                    WHERE type IN ('table', 'view') ORDER BY name"""
+                ),
+                args.format,
+            )
+            return 0
+        sql = f'SELECT * FROM "{args.name}"' if args.command == "report" else args.sql
+        try:
+            _emit_cursor(execute_bounded_query(connection, sql, args.limit), args.format)
+        except (ValueError, sqlite3.Error) as e:
+            print(f"query error: {e}", file=sys.stderr)
+            return 2
+        return 0
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
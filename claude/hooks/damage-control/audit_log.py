@@ -0,0 +1,183 @@
+"""
+Audit Log Writer for Damage Control
+===================================
+
+Shared writer behind log_decision()/log_detection() in the damage-control
+hooks. Entries go to ``~/.claude/logs/damage-control/YYYY-MM-DD.log`` as one
+``json.dumps(entry)`` line each, exactly as before, so log_rotate.py and
+existing readers see the same bytes.
+
+By default every entry is written straight away (one-shot hook processes may
+be killed right after they answer). Long-lived callers - the daemon, and the
+dispatcher running several sub-hooks in one process - call enable_buffering():
+entries are then queued and a background thread writes them with a single
+O_APPEND write per log file per batch, when the batch reaches max_entries or
+max_bytes, every flush_interval seconds, and at exit.
+
+The log directory is only created when an append finds it missing, instead of
+mkdir() on every call.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Same permissions open(path, "a") would use.
+_LOG_FILE_MODE = 0o666
+_APPEND_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+def get_log_dir() -> Path:
+    """Directory holding the daily audit logs (not created here)."""
+    return Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
+
+
+def get_log_path(now: Optional[datetime] = None) -> Path:
+    """Daily audit log file for now (default: the current local date)."""
+    return get_log_dir() / f"{(now or datetime.now()).strftime('%Y-%m-%d')}.log"
+
+
+def format_entry(entry: dict[str, Any]) -> bytes:
+    """One JSONL record, byte-for-byte what a text-mode ``json.dumps(entry) + "\\n"`` wrote.
+
+    json.dumps escapes non-ASCII, so the encoding never matters; the newline is
+    translated the way text mode did (CRLF on Windows).
+    """
+    return (json.dumps(entry) + os.linesep).encode("ascii")
+
+
+def append_bytes(path: Path, data: bytes) -> None:
+    """Append data to path with one O_APPEND write, creating the directory if needed."""
+    try:
+        fd = os.open(path, _APPEND_FLAGS, _LOG_FILE_MODE)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, _APPEND_FLAGS, _LOG_FILE_MODE)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+class AuditWriter:
+    """Writes audit entries immediately, or in batches once start() is called."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._pending: list[tuple[Path, bytes]] = []
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def buffered(self) -> bool:
+        return self._thread is not None
+
+    def write(self, entry: dict[str, Any]) -> None:
+        """Log one entry. Unbuffered writes raise on failure, like open()/write() did."""
+        path = get_log_path()
+        data = format_entry(entry)
+        if not self.buffered:
+            append_bytes(path, data)
+            return
+        with self._lock:
+            self._pending.append((path, data))
+            self._pending_bytes += len(data)
+            full = len(self._pending) >= self.max_entries or self._pending_bytes >= self.max_bytes
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write queued entries, one append per run of entries for the same file."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending, self._pending_bytes = self._pending, [], 0
+            batches: list[tuple[Path, list[bytes]]] = []
+            for path, data in pending:
+                if batches and batches[-1][0] == path:
+                    batches[-1][1].append(data)
+                else:
+                    batches.append((path, [data]))
+            for path, chunks in batches:
+                try:
+                    append_bytes(path, b"".join(chunks))
+                except Exception as e:
+                    print(f"Warning: Failed to write audit log: {e}", file=sys.stderr)
+
+    def start(self) -> None:
+        """Switch to batched writes with a background flusher (idempotent)."""
+        if self._thread is not None:
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Flush everything and return to immediate writes."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._closed = True
+        self._wake.set()
+        thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+_writer = AuditWriter()
+
+
+def write_entry(entry: dict[str, Any]) -> None:
+    """Log one entry through the process-wide writer."""
+    _writer.write(entry)
+
+
+def enable_buffering(
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+) -> None:
+    """Batch this process's audit writes until disable_buffering() or exit."""
+    _writer.max_entries = max_entries
+    _writer.max_bytes = max_bytes
+    _writer.flush_interval = flush_interval
+    _writer.start()
+
+
+def disable_buffering() -> None:
+    """Flush queued entries and go back to writing each entry immediately."""
+    _writer.stop()
+
+
+def flush() -> None:
+    _writer.flush()
@@ -0,0 +1,124 @@
+# /// script
+# requires-python = ">=3.8"
+# dependencies = ["pyyaml", "tree-sitter>=0.23.0", "tree-sitter-bash>=0.23.0"]
+# ///
+"""
+Claude Code Security Firewall - Thin Daemon Client
+==================================================
+
+Drop-in replacement for bash-tool-damage-control.py in the PreToolUse hook
+registration. Forwards the hook JSON to the damage-control daemon
+(damage_control_daemon.py) and relays its exit code, stderr and
+permissionDecision JSON unchanged. When the daemon is absent, unhealthy, or a
+project-level patterns.yaml override is in effect, the check runs in-process
+exactly as the regular hook would.
+
+Exit codes:
+  0 = Allow command (or JSON output with permissionDecision)
+  2 = Block command (stderr fed back to Claude)
+
+Environment variables:
+  CLAUDE_DISABLE_HOOKS          - "damage-control" disables this hook (see main hook)
+  CLAUDE_DAMAGE_CONTROL_SOCKET  - Override the daemon socket path
+  CLAUDE_DAMAGE_CONTROL_DAEMON  - Set to "autostart" to spawn the daemon in the
+                                  background when it is not running
+"""
+
+import importlib
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+HOOK_NAME = "damage-control"
+HOOK_DIR = Path(__file__).parent
+
+if str(HOOK_DIR) not in sys.path:
+    sys.path.insert(0, str(HOOK_DIR))
+daemon = importlib.import_module("damage_control_daemon")
+
+
+def is_hook_disabled() -> bool:
+    """Check if this hook is disabled via CLAUDE_DISABLE_HOOKS env var."""
+    disabled_hooks = os.environ.get("CLAUDE_DISABLE_HOOKS", "")
+    return HOOK_NAME in [h.strip() for h in disabled_hooks.split(",")]
+
+
+def _has_project_config_override() -> bool:
+    """True if CLAUDE_PROJECT_DIR supplies its own patterns.yaml (daemon can't serve it)."""
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR")
+    if not project_dir:
+        return False
+    return (Path(project_dir) / ".claude" / "hooks" / "damage-control" / "patterns.yaml").exists()
+
+
+def _relay(reply: dict[str, Any]) -> None:
+    """Reproduce the daemon's hook outcome on this process's streams and exit."""
+    if reply["stdout"]:
+        sys.stdout.write(reply["stdout"])
+        sys.stdout.flush()
+    if reply["stderr"]:
+        sys.stderr.write(reply["stderr"])
+        sys.stderr.flush()
+    sys.exit(reply["exit_code"])
+
+
+def _run_in_process(input_data: dict[str, Any]) -> None:
+    """Fallback: load the full hook and evaluate the payload in this process."""
+    spec = importlib.util.spec_from_file_location(
+        "bash_tool", HOOK_DIR / "bash-tool-damage-control.py"
+    )
+    bash_tool = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(bash_tool)  # type: ignore[union-attr]
+    bash_tool.run_hook(input_data)
+
+
+def daemon_outcome(input_data: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """The daemon's healthy answer for a Bash payload, or None to evaluate in-process.
+
+    Also used by hook-dispatcher.py for its Bash sub-hook.
+    """
+    if not daemon.is_supported() or _has_project_config_override():
+        return None
+    reply = daemon.send_request(
+        {
+            "op": "check",
+            "input": input_data,
+            "cwd": os.getcwd(),
+            "user": os.getenv("USER", "unknown"),
+            "env": daemon.forwarded_env(),
+        }
+    )
+    if daemon.is_valid_outcome(reply):
+        return reply
+    if reply is None and os.environ.get("CLAUDE_DAMAGE_CONTROL_DAEMON") == "autostart":
+        daemon.spawn_detached()
+    return None
+
+
+def main() -> None:
+    if is_hook_disabled():
+        sys.exit(0)
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading input: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if input_data.get("tool_name", "") != "Bash":
+        sys.exit(0)
+
+    reply = daemon_outcome(input_data)
+    if reply is not None:
+        _relay(reply)
+    _run_in_process(input_data)
+
+
+if __name__ == "__main__":
+    main()
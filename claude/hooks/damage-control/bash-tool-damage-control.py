@@ -16,6 +16,16 @@ Exit codes:
 Environment variables:
   CLAUDE_DISABLE_HOOKS - Comma-separated list of hook names to disable
                          Use "damage-control" to disable this hook
+  CLAUDE_DAMAGE_CONTROL_CACHE_DIR - Directory for the parsed-config cache
+                         (default: ~/.claude/cache/damage-control)
+  CLAUDE_DAMAGE_CONTROL_DECISION_CACHE - Decision cache mode: "memory"
+                         (default, per process), "disk" (memory plus a
+                         shared SQLite file in the cache dir) or "off"
+  CLAUDE_DAMAGE_CONTROL_PROFILE - Set to 1 to record per-stage wall time
+                         (perf_counter_ns) as "timings_ns" in audit entries
+  CLAUDE_DAMAGE_CONTROL_BUDGET_MS - Wall-clock budget for one command check
+                         (default: 2000, 0 disables). An overrun returns
+                         "ask" with pattern "budget_exceeded:<stage>"
 
   ┌─────────────────────────────────────────────────────────────────────┐
   │ WARNING FOR AI ASSISTANTS (Claude, Copilot, etc.):                  │
@@ -37,20 +47,29 @@ JSON output for ask patterns:
 """
 
 import fnmatch
+import hashlib
+import importlib
 import json
 import os
 import re
 import shlex
+import signal
 import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Optional
 from urllib.parse import urlparse
 
-import yaml
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
 
 HOOK_NAME = "damage-control"
 
@@ -61,6 +80,26 @@ def is_hook_disabled() -> bool:
     return HOOK_NAME in [h.strip() for h in disabled_hooks.split(",")]
 
 
+def is_profiling_enabled() -> bool:
+    """Check CLAUDE_DAMAGE_CONTROL_PROFILE for opt-in per-stage timing."""
+    value = os.environ.get("CLAUDE_DAMAGE_CONTROL_PROFILE", "")
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+DEFAULT_CHECK_BUDGET_MS = 2000.0
+
+
+def get_check_budget_ms() -> float:
+    """Read CLAUDE_DAMAGE_CONTROL_BUDGET_MS; 0 or less disables the budget."""
+    value = os.environ.get("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", "").strip()
+    if not value:
+        return DEFAULT_CHECK_BUDGET_MS
+    try:
+        return float(value)
+    except ValueError:
+        return DEFAULT_CHECK_BUDGET_MS
+
+
 # ============================================================================
 # CONFIGURATION COMPILATION AND CACHING
 # ============================================================================
@@ -103,6 +142,21 @@ def compile_regex_patterns(patterns: list[dict[str, Any]]) -> list[dict[str, Any
     return compiled
 
 
+# ============================================================================
+# LITERAL PREFILTER FOR bashToolPatterns
+# ============================================================================
+
+config_cache = importlib.import_module("config_cache")
+
+# Required-literal extraction is shared with the PostToolUse content scanner.
+literal_prefilter = importlib.import_module("literal_prefilter")
+Requirement = literal_prefilter.Requirement
+extract_required_literals = literal_prefilter.extract_required_literals
+PatternPrefilter = literal_prefilter.PatternPrefilter
+# Seeded from the on-disk config cache (see load_config_cached).
+_requirement_cache = literal_prefilter._requirement_cache
+
+
 def _build_glob_path_obj(path: str) -> Optional[dict[str, Any]]:
     """Build pre-processed glob path object, or None if invalid."""
     path_obj: dict[str, Any] = {"original": path, "is_glob": True}
@@ -146,23 +200,161 @@ def preprocess_path_list(paths: list[str]) -> list[dict[str, Any]]:
     return processed
 
 
+# ============================================================================
+# SINGLE-SCAN PATH MATCHERS
+# ============================================================================
+
+# Suffix for literal zero-access files so ``.env`` does not match ``.env.example``.
+_LITERAL_FILE_SUFFIX = r"(?![a-zA-Z0-9_.-])"
+
+
+def _literal_alternation(path_obj: dict[str, Any], suffix: str = "") -> Optional[str]:
+    """Regex matching the expanded or original form of a literal path."""
+    forms = [
+        path_obj[key] + suffix
+        for key in ("escaped_expanded", "escaped_original")
+        if path_obj.get(key)
+    ]
+    return "|".join(forms) if forms else None
+
+
+def _glob_entry_regex(path_obj: dict[str, Any]) -> Optional[tuple[str, bool]]:
+    """(regex, ignorecase) for a glob entry; matchers only test for presence.
+
+    A leading ``*`` compiles to ``[^\\s/]*``, which cannot change whether a
+    search succeeds but makes it quadratic on long tokens, so it is dropped.
+    """
+    if not path_obj.get("glob_regex"):
+        return None
+    return glob_to_regex(path_obj["original"].lstrip("*")), True
+
+
+def _zero_access_entry_regex(path_obj: dict[str, Any]) -> Optional[tuple[str, bool]]:
+    """(regex, ignorecase) for a zero-access entry: glob, or literal with file suffix."""
+    if path_obj["is_glob"]:
+        return _glob_entry_regex(path_obj)
+    is_directory = path_obj.get("original", "").endswith("/")
+    source = _literal_alternation(path_obj, "" if is_directory else _LITERAL_FILE_SUFFIX)
+    return (source, False) if source else None
+
+
+def _exclusion_entry_regex(path_obj: dict[str, Any]) -> Optional[tuple[str, bool]]:
+    """(regex, ignorecase) for an exclusion: glob, or either literal form, any case."""
+    if path_obj["is_glob"]:
+        return _glob_entry_regex(path_obj)
+    source = _literal_alternation(path_obj)
+    return (source, True) if source else None
+
+
+def _path_mention_entry_regex(path_obj: dict[str, Any]) -> Optional[tuple[str, bool]]:
+    """(regex, ignorecase) for the {path} part shared by every operation template.
+
+    Every READ_ONLY_BLOCKED / NO_DELETE_BLOCKED template embeds this regex, so
+    a command that does not mention the path cannot match any template.
+    """
+    if path_obj["is_glob"]:
+        return _glob_entry_regex(path_obj)
+    source = _literal_alternation(path_obj)
+    return (source, False) if source else None
+
+
+EntryRegexFn = Callable[[dict[str, Any]], Optional[tuple[str, bool]]]
+
+
+@dataclass
+class PathMatcher:
+    """One combined regex over a preprocessed path list.
+
+    ``gate`` alternates every entry's regex (case-insensitive ones wrapped in
+    ``(?i:...)``), so a command that touches none of the paths is rejected in
+    a single scan regardless of list length. Only on a gate hit are the
+    per-entry regexes consulted to report which original entries matched.
+    """
+
+    entries: list[dict[str, Any]]
+    entry_regexes: list[Optional[re.Pattern[str]]]
+    gate: Optional[re.Pattern[str]]
+
+    @classmethod
+    def build(cls, entries: list[dict[str, Any]], entry_regex_fn: EntryRegexFn) -> "PathMatcher":
+        compiled: list[Optional[re.Pattern[str]]] = []
+        alternatives: list[str] = []
+        for path_obj in entries:
+            spec = entry_regex_fn(path_obj)
+            if spec is None:
+                compiled.append(None)
+                continue
+            source, ignorecase = spec
+            try:
+                compiled.append(re.compile(source, re.IGNORECASE if ignorecase else 0))
+            except re.error:
+                compiled.append(None)
+                continue
+            alternatives.append(f"(?i:{source})" if ignorecase else f"(?:{source})")
+        gate = re.compile("|".join(alternatives)) if alternatives else None
+        return cls(entries=entries, entry_regexes=compiled, gate=gate)
+
+    @classmethod
+    def empty(cls) -> "PathMatcher":
+        return cls(entries=[], entry_regexes=[], gate=None)
+
+    def any_match(self, text: str) -> bool:
+        """True if any entry matches text (single scan)."""
+        return bool(self.gate and self.gate.search(text))
+
+    def matching_indices(self, text: str) -> list[int]:
+        """Indices of entries matching text, in list order."""
+        if not self.any_match(text):
+            return []
+        return [
+            idx
+            for idx, regex in enumerate(self.entry_regexes)
+            if regex is not None and regex.search(text)
+        ]
+
+
+_PATH_MATCHER_KINDS: dict[str, EntryRegexFn] = {
+    "zeroAccessPaths": _zero_access_entry_regex,
+    "zeroAccessExclusions": _exclusion_entry_regex,
+    "readOnlyPaths": _path_mention_entry_regex,
+    "noDeletePaths": _path_mention_entry_regex,
+}
+
+
+def _path_matcher(config: dict[str, Any], key: str, entries: list[dict[str, Any]]) -> PathMatcher:
+    """Return the precompiled matcher for config[key], rebuilding it if stale."""
+    matcher = config.get(f"{key}_matcher")
+    if matcher is None or matcher.entries is not entries:
+        matcher = PathMatcher.build(entries, _PATH_MATCHER_KINDS[key])
+    return matcher
+
+
 def compile_config(config: dict[str, Any]) -> dict[str, Any]:
     """Compile configuration for fast pattern matching.
 
     Pre-processes all patterns and paths at load time:
     - Compiles all regex patterns with IGNORECASE
+    - Builds the required-literal prefilter index over those patterns
     - Pre-processes all path lists (glob-to-regex, expanduser, re.escape)
+    - Builds one single-scan PathMatcher per path list
     """
     compiled = config.copy()
     compiled["bashToolPatterns_compiled"] = compile_regex_patterns(
         config.get("bashToolPatterns", [])
     )
+    compiled["bashToolPatterns_prefilter"] = PatternPrefilter.build(
+        compiled["bashToolPatterns_compiled"]
+    )
     compiled["zeroAccessPaths_compiled"] = preprocess_path_list(config.get("zeroAccessPaths", []))
     compiled["zeroAccessExclusions_compiled"] = preprocess_path_list(
         config.get("zeroAccessExclusions", [])
     )
     compiled["readOnlyPaths_compiled"] = preprocess_path_list(config.get("readOnlyPaths", []))
     compiled["noDeletePaths_compiled"] = preprocess_path_list(config.get("noDeletePaths", []))
+    for key, entry_regex_fn in _PATH_MATCHER_KINDS.items():
+        compiled[f"{key}_matcher"] = PathMatcher.build(
+            compiled[f"{key}_compiled"], entry_regex_fn
+        )
     return compiled
 
 
@@ -171,16 +363,103 @@ def get_compiled_config() -> dict[str, Any]:
     global _compiled_config_cache
 
     if _compiled_config_cache is None:
-        raw_config = load_config()
+        raw_config = load_config_cached()
         _compiled_config_cache = compile_config(raw_config)
 
     return _compiled_config_cache
 
 
+# ============================================================================
+# ON-DISK CONFIG CACHE
+# ============================================================================
+
+# Bump when the cached payload layout changes.
+_CONFIG_CACHE_FORMAT = 2
+
+# Cache key of the config currently loaded; also keys the decision cache.
+# None when the config was loaded without a key (missing patterns.yaml).
+_config_fingerprint: Optional[str] = None
+
+
+def get_config_cache_path() -> Path:
+    """Get path to the marshalled parsed-config cache."""
+    return config_cache.get_cache_path("config.marshal")
+
+
+def _config_cache_key(config_path: Path, hosts_path: Path) -> str:
+    """SHA-256 over patterns.yaml, allowed-hosts.yaml, the checker sources and Python."""
+    ast_source = Path(__file__).parent / "ast_analyzer.py"
+    prefilter_source = Path(__file__).parent / "literal_prefilter.py"
+    return config_cache.cache_key(
+        (config_path, hosts_path, Path(__file__), ast_source, prefilter_source),
+        _CONFIG_CACHE_FORMAT,
+    )
+
+
+def _read_config_cache(cache_path: Path, key: str) -> Optional[dict[str, Any]]:
+    """Return the cached payload if it matches key and has every section."""
+    payload = config_cache.read_cache(cache_path, key)
+    if payload is None:
+        return None
+    if not isinstance(payload.get("config"), dict) or not isinstance(
+        payload.get("allowedHosts"), list
+    ):
+        return None
+    if not isinstance(payload.get("requirements"), dict):
+        return None
+    return payload
+
+
+def load_config_cached() -> dict[str, Any]:
+    """Load patterns.yaml through the on-disk cache (config_cache.py).
+
+    A hit also seeds the allowed-hosts cache and the prefilter literal memo.
+    Stale or corrupt caches are rebuilt from YAML.
+    """
+    global _allowed_hosts_cache, _config_fingerprint
+
+    _config_fingerprint = None
+    config_path = get_config_path()
+    if not config_path.exists():
+        return load_config()
+
+    cache_path = get_config_cache_path()
+    try:
+        key = _config_cache_key(config_path, get_allowed_hosts_path())
+    except OSError:
+        return load_config()
+    _config_fingerprint = key
+
+    cached = _read_config_cache(cache_path, key)
+    if cached is not None:
+        if _allowed_hosts_cache is None:
+            _allowed_hosts_cache = cached["allowedHosts"]
+        _requirement_cache.update(cached["requirements"])
+        return cached["config"]
+
+    config = load_config()
+    requirements = {
+        item["pattern"]: extract_required_literals(item["pattern"])
+        for item in config.get("bashToolPatterns", [])
+        if isinstance(item, dict) and isinstance(item.get("pattern"), str)
+    }
+    payload = {
+        "key": key,
+        "config": config,
+        "allowedHosts": load_allowed_hosts(),
+        "requirements": requirements,
+    }
+    config_cache.write_cache(cache_path, payload)
+    return config
+
+
 # ============================================================================
 # AUDIT LOGGING
 # ============================================================================
 
+# Buffered JSONL writer shared with the Edit/Write and PostToolUse hooks.
+audit_log = importlib.import_module("audit_log")
+
 
 def get_log_path() -> Path:
     """Get path to daily audit log file.
@@ -188,11 +467,9 @@ def get_log_path() -> Path:
     Creates ~/.claude/logs/damage-control/ directory if it doesn't exist.
     Returns path in format: ~/.claude/logs/damage-control/YYYY-MM-DD.log
     """
-    logs_dir = Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    return logs_dir / f"{date_str}.log"
+    log_path = audit_log.get_log_path()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return log_path
 
 
 # Secret-redaction patterns: (regex, flags)
@@ -214,17 +491,43 @@ _REDACTION_PATTERNS: list[tuple[str, int]] = [
 ]
 
 
+def _compile_redactions(
+    patterns: list[tuple[str, int]],
+) -> tuple[Optional[re.Pattern[str]], list[re.Pattern[str]]]:
+    """Compile redaction patterns plus one alternation gate over all of them.
+
+    Each alternative carries its own flags as a scoped inline group. Commands
+    the gate does not match (most of them) are left alone after one search;
+    the rest get the individual substitutions in order, as before.
+    """
+    compiled: list[re.Pattern[str]] = []
+    alternatives: list[str] = []
+    for pattern, flags in patterns:
+        try:
+            compiled.append(re.compile(pattern, flags))
+        except re.error:
+            continue
+        alternatives.append(f"(?{'i' if flags & re.IGNORECASE else ''}:{pattern})")
+    try:
+        gate: Optional[re.Pattern[str]] = re.compile("|".join(alternatives))
+    except re.error:
+        gate = None
+    return gate, compiled
+
+
+_REDACTION_GATE, _REDACTION_REGEXES = _compile_redactions(_REDACTION_PATTERNS)
+
+
 def redact_secrets(command: str) -> str:
     """Redact sensitive information from command string.
 
     Returns the command with secrets replaced by ***REDACTED***.
     """
+    if _REDACTION_GATE is not None and not _REDACTION_GATE.search(command):
+        return command
     redacted = command
-    for pattern, flags in _REDACTION_PATTERNS:
-        try:
-            redacted = re.sub(pattern, "***REDACTED***", redacted, flags=flags)
-        except re.error:
-            pass
+    for regex in _REDACTION_REGEXES:
+        redacted = regex.sub("***REDACTED***", redacted)
     return redacted
 
 
@@ -241,6 +544,7 @@ class DecisionFlags:
 
     unwrapped: bool = False
     semantic_match: bool = False
+    cache_hit: bool = False
 
 
 def log_decision(
@@ -251,11 +555,16 @@ def log_decision(
     pattern_matched: str = "",
     flags: Optional[DecisionFlags] = None,
     context: Optional[str] = None,
+    cwd: Optional[str] = None,
+    user: Optional[str] = None,
+    timings: Optional[dict[str, int]] = None,
 ) -> None:
     """Log security decision to audit log in JSONL format.
 
     One JSON object per line, containing timestamp, tool, command (truncated),
     redacted command, decision (blocked/ask/allowed), reason, flags, and context.
+    ``cwd``/``user`` default to the current process (the daemon passes the client's).
+    ``timings`` (profiling mode only) adds per-stage nanoseconds as ``timings_ns``.
     """
     flags = flags or DecisionFlags()
     try:
@@ -267,14 +576,16 @@ def log_decision(
             "decision": decision,
             "reason": reason,
             "pattern_matched": pattern_matched,
-            "user": os.getenv("USER", "unknown"),
-            "cwd": os.getcwd(),
+            "user": user or os.getenv("USER", "unknown"),
+            "cwd": cwd or os.getcwd(),
             "unwrapped": flags.unwrapped,
             "semantic_match": flags.semantic_match,
+            "cache_hit": flags.cache_hit,
             "context": context,
         }
-        with open(get_log_path(), "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        if timings is not None:
+            log_entry["timings_ns"] = timings
+        audit_log.write_entry(log_entry)
     except Exception as e:
         print(f"Warning: Failed to write audit log: {e}", file=sys.stderr)
 
@@ -393,6 +704,10 @@ def unwrap_command(command: str, depth: int = 0) -> tuple[str, bool]:
 
     Detects bash/sh/zsh/ksh/dash -c, python -c, and env VAR=val wrappers.
     Returns (unwrapped_command, was_unwrapped). Recursion is capped at depth 5.
+
+    Runs on the raw text before lex_shell() and searches all of it, so wrappers
+    that are not a segment's argv[0] (sudo bash -c, a quoted `bash -c` piped to
+    sh) are unwrapped too.
     """
     if depth >= 5:
         return command, depth > 0
@@ -541,7 +856,9 @@ def strip_bash_comments(command: str) -> str:
     """Strip bash comments from a command string.
 
     Removes full-line and inline comments while preserving #-in-quotes,
-    parameter expansion (${var#pattern}) and shebang lines.
+    parameter expansion (${var#pattern}) and shebang lines. Quote state resets
+    on every line, unlike lex_shell(), so a stray apostrophe cannot hide the
+    comments of later lines.
     """
     result_lines = []
     for line in command.split("\n"):
@@ -612,12 +929,6 @@ _DRY_RUN_TOOLS = [
 ]
 
 
-def _has_valid_dry_run(command: str) -> bool:
-    """Check if command uses --dry-run with a tool that actually supports it."""
-    if not re.search(r"--dry-run\b", command):
-        return False
-    return any(re.search(pattern, command, re.IGNORECASE) for pattern in _DRY_RUN_TOOLS)
-
 
 # ============================================================================
 # READ-ONLY SEARCH PIPELINE DETECTION
@@ -763,66 +1074,140 @@ def _flush_segment(current: list[str], segments: list[str]) -> list[str]:
     return []
 
 
-def _consume_escape(buf: list[str], text: str, i: int, state: _QuoteState) -> Optional[int]:
-    """If text[i] starts a backslash escape, append the pair to buf and return new i."""
-    if text[i] == "\\" and not state.in_single and i + 1 < len(text):
-        buf.append(text[i])
-        buf.append(text[i + 1])
-        return i + 2
-    return None
+# ============================================================================
+# SHELL LEXING
+# ============================================================================
 
 
-def _try_split_operator(
-    command: str,
-    i: int,
-    current: list[str],
-    segments: list[str],
-) -> tuple[list[str], int]:
-    """Handle a potential operator at command[i].
+@dataclass
+class ShellSegment:
+    """One &&/||/;/& separated command and its pipe-separated parts.
 
-    Returns ``(buffer, advance)`` where ``buffer`` is the next ``current`` list
-    (a fresh list when an operator was consumed) and ``advance`` is the number
-    of characters to step over.
+    argv and pipeline_argv are the shlex tokens of text and of each pipeline
+    part, split on first use; a part with malformed quotes tokenizes to [].
     """
-    consumed = _consume_operator(command, i, command[i])
-    if consumed == 0:
-        current.append(command[i])
-        return current, 1
-    return _flush_segment(current, segments), consumed
 
+    text: str
+    pipeline: list[str]
+    _argv: Optional[list[str]] = field(default=None, repr=False, compare=False)
+    _pipeline_argv: Optional[list[list[str]]] = field(default=None, repr=False, compare=False)
 
-def _split_on_shell_operators(command: str) -> list[str]:
-    """Split command on &&, ||, ;, & respecting quoted strings.
+    @property
+    def argv(self) -> list[str]:
+        if self._argv is None:
+            self._argv = _shell_split(self.text)
+        return self._argv
 
-    Handles ``&&``, ``||``, ``;``, and ``&`` (background). Pipe chains (|)
-    are kept intact within each segment.
+    @property
+    def pipeline_argv(self) -> list[list[str]]:
+        if self._pipeline_argv is None:
+            self._pipeline_argv = [_shell_split(part) for part in self.pipeline]
+        return self._pipeline_argv
+
+
+@dataclass
+class ShellLex:
+    """Single-pass lexical view of a command shared by every check stage.
+
+    Segments and their pipelines are identical to running
+    _split_on_shell_operators() and then _split_pipe_chain() on each segment,
+    but the command is scanned once.
+    """
+
+    segments: list[ShellSegment] = field(default_factory=list)
+
+    @property
+    def segment_texts(self) -> list[str]:
+        return [seg.text for seg in self.segments]
+
+
+def _shell_split(command: str) -> list[str]:
+    """Split shell text into tokens; return an empty list on malformed quotes."""
+    try:
+        return shlex.split(command)
+    except ValueError:
+        return []
+
+
+def _shell_dash_c_script(argv: list[str]) -> Optional[str]:
+    """If argv is `<shell> -c script [args...]`, return the script and its args joined."""
+    if len(argv) < 3 or argv[0] not in _SHELL_WRAPPERS or argv[1] != "-c":
+        return None
+    return " ".join(argv[2:])
+
+
+def _finish_segment(seg_buf: list[str], part_buf: list[str], parts: list[str]) -> ShellSegment:
+    _flush_segment(part_buf, parts)
+    return ShellSegment(text="".join(seg_buf).strip(), pipeline=[p for p in parts if p])
+
+
+def _is_redirect_ampersand(command: str, i: int) -> bool:
+    """True if the & at i belongs to a redirection such as 2>&1, <&3 or &>file."""
+    return (i > 0 and command[i - 1] in "<>") or command[i + 1 : i + 2] == ">"
+
+
+def _operator_length(command: str, i: int, state: _QuoteState) -> Optional[int]:
+    """None if command[i] is ordinary text, 0 for a bare pipe, else the operator length."""
+    c = command[i]
+    if state.in_quotes or c not in (";", "&", "|"):
+        return None
+    if c == "&" and _is_redirect_ampersand(command, i):
+        return None
+    return _consume_operator(command, i, c)
+
+
+def lex_shell(command: str) -> ShellLex:
+    """Split command on &&, ||, ;, & and on | within each segment, in one pass.
+
+    Quotes and backslash escapes (outside single quotes) suppress operators,
+    and the & of a redirection (2>&1, &>file) is ordinary text.
+    Empty segments are dropped.
     """
-    segments: list[str] = []
-    current: list[str] = []
+    segments: list[ShellSegment] = []
+    seg_buf: list[str] = []
+    part_buf: list[str] = []
+    parts: list[str] = []
     state = _QuoteState()
     i = 0
     n = len(command)
 
     while i < n:
-        new_i = _consume_escape(current, command, i, state)
-        if new_i is not None:
-            i = new_i
-            continue
-
         c = command[i]
-        if state.in_quotes or c not in (";", "&", "|"):
-            current.append(c)
+        if c == "\\" and not state.in_single and i + 1 < n:
+            seg_buf.append(command[i : i + 2])
+            part_buf.append(command[i : i + 2])
+            i += 2
+            continue
+        consumed = _operator_length(command, i, state)
+        if consumed is None:
+            seg_buf.append(c)
+            part_buf.append(c)
             state.update(c)
             i += 1
             continue
+        if consumed == 0:
+            # Bare pipe: stays in the segment text, splits the pipeline.
+            seg_buf.append(c)
+            part_buf = _flush_segment(part_buf, parts)
+            i += 1
+            continue
+        segments.append(_finish_segment(seg_buf, part_buf, parts))
+        seg_buf, part_buf, parts = [], [], []
+        i += consumed
+
+    if seg_buf:
+        segments.append(_finish_segment(seg_buf, part_buf, parts))
 
-        current, advance = _try_split_operator(command, i, current, segments)
-        i += advance
+    return ShellLex(segments=[seg for seg in segments if seg.text])
 
-    if current:
-        segments.append("".join(current).strip())
 
-    return [s for s in segments if s]
+def _split_on_shell_operators(command: str) -> list[str]:
+    """Split command on &&, ||, ;, & respecting quoted strings.
+
+    Handles ``&&``, ``||``, ``;``, and ``&`` (background). Pipe chains (|)
+    are kept intact within each segment.
+    """
+    return lex_shell(command).segment_texts
 
 
 def _consume_operator(command: str, i: int, c: str) -> int:
@@ -846,29 +1231,12 @@ def _split_pipe_chain(segment: str) -> list[str]:
 
     Must be called AFTER _split_on_shell_operators so that || is already removed.
     """
-    parts: list[str] = []
-    current: list[str] = []
-    state = _QuoteState()
-    i = 0
-    n = len(segment)
+    return [part for seg in lex_shell(segment).segments for part in seg.pipeline]
 
-    while i < n:
-        new_i = _consume_escape(current, segment, i, state)
-        if new_i is not None:
-            i = new_i
-            continue
-        c = segment[i]
-        if not state.in_quotes and c == "|":
-            current = _flush_segment(current, parts)
-        else:
-            current.append(c)
-            state.update(c)
-        i += 1
 
-    if current:
-        parts.append("".join(current).strip())
-
-    return [p for p in parts if p]
+# ============================================================================
+# READ-ONLY SEARCH EVALUATION
+# ============================================================================
 
 
 def _matches_any(text: str, patterns: list[str]) -> bool:
@@ -876,9 +1244,8 @@ def _matches_any(text: str, patterns: list[str]) -> bool:
     return any(re.search(p, text, re.IGNORECASE) for p in patterns)
 
 
-def _is_readonly_search_pipeline(segment: str) -> bool:
-    """Check if a pipe chain is a read-only search pipeline."""
-    pipe_parts = _split_pipe_chain(segment)
+def _is_readonly_search_parts(pipe_parts: list[str]) -> bool:
+    """Check if already-split pipe parts form a read-only search pipeline."""
     if not pipe_parts:
         return False
     if not _matches_any(pipe_parts[0], READONLY_SEARCH_COMMANDS):
@@ -886,29 +1253,61 @@ def _is_readonly_search_pipeline(segment: str) -> bool:
     return all(_matches_any(target, READONLY_PIPE_TARGETS) for target in pipe_parts[1:])
 
 
-def is_readonly_search_command(command: str) -> bool:
-    """Check if a compound command is a read-only search operation."""
-    segments = _split_on_shell_operators(command)
-    if not segments:
+def _is_readonly_search_pipeline(segment: str) -> bool:
+    """Check if a pipe chain is a read-only search pipeline."""
+    return _is_readonly_search_parts(_split_pipe_chain(segment))
+
+
+def _is_readonly_search_lex(lex: ShellLex) -> bool:
+    """is_readonly_search_command() over an existing lex."""
+    if not lex.segments:
         return False
 
     has_search = False
-    for seg in segments:
-        if _is_readonly_search_pipeline(seg):
+    for seg in lex.segments:
+        if _is_readonly_search_parts(seg.pipeline):
             has_search = True
-        elif _matches_any(seg.strip(), INERT_COMMANDS):
+        elif _matches_any(seg.text, INERT_COMMANDS):
             continue
         else:
             return False
     return has_search
 
 
-def _shell_split(command: str) -> list[str]:
-    """Split shell text into tokens; return an empty list on malformed quotes."""
-    try:
-        return shlex.split(command)
-    except ValueError:
-        return []
+def is_readonly_search_command(command: str) -> bool:
+    """Check if a compound command is a read-only search operation."""
+    return _is_readonly_search_lex(lex_shell(command))
+
+
+def _is_dry_run_pipeline(segment: ShellSegment) -> bool:
+    """True if segment runs a --dry-run capable tool with --dry-run, piped only to viewers."""
+    if not segment.pipeline or not _matches_any(segment.pipeline[0], _DRY_RUN_TOOLS):
+        return False
+    if not any(
+        token == "--dry-run" or token.startswith("--dry-run=") for token in segment.pipeline_argv[0]
+    ):
+        return False
+    return all(_matches_any(target, READONLY_PIPE_TARGETS) for target in segment.pipeline[1:])
+
+
+def _has_valid_dry_run_lex(lex: ShellLex) -> bool:
+    """_has_valid_dry_run() over an existing lex.
+
+    Every segment must be a dry run or an inert command (cd, export, ...), so
+    `helm upgrade x --dry-run && rm -rf ~` does not skip the pattern checks.
+    """
+    has_dry_run = False
+    for seg in lex.segments:
+        if _is_dry_run_pipeline(seg):
+            has_dry_run = True
+        elif not _matches_any(seg.text, INERT_COMMANDS):
+            return False
+    return has_dry_run
+
+
+def _has_valid_dry_run(command: str) -> bool:
+    """Check if command uses --dry-run with a tool that actually supports it."""
+    return _has_valid_dry_run_lex(lex_shell(command))
 
 
 def _is_local_http_url(token: str) -> bool:
@@ -920,8 +1319,7 @@ def _is_local_http_url(token: str) -> bool:
     }
 
 
-def _is_readonly_kubectl_exec_segment(segment: str) -> bool:
-    tokens = _shell_split(segment)
+def _is_readonly_kubectl_exec_segment(segment: str, tokens: list[str]) -> bool:
     if not tokens:
         return False
     head = tokens[0]
@@ -951,15 +1349,17 @@ def _is_readonly_kubectl_exec_snippet(snippet: str) -> bool:
         return False
     if _has_sensitive_kubectl_exec_read(snippet):
         return False
-    segments = _split_on_shell_operators(snippet)
-    pipe_segments = [part for segment in segments for part in _split_pipe_chain(segment)]
-    return bool(pipe_segments) and all(
-        _is_readonly_kubectl_exec_segment(segment) for segment in pipe_segments
+    pipe_parts = [
+        (part, tokens)
+        for segment in lex_shell(snippet).segments
+        for part, tokens in zip(segment.pipeline, segment.pipeline_argv)
+    ]
+    return bool(pipe_parts) and all(
+        _is_readonly_kubectl_exec_segment(part, tokens) for part, tokens in pipe_parts
     )
 
 
-def _is_readonly_kubectl_exec_invocation(command: str) -> bool:
-    tokens = _shell_split(command)
+def _is_readonly_kubectl_exec_invocation(tokens: list[str]) -> bool:
     if len(tokens) < 3 or tokens[0] != "kubectl" or tokens[1] != "exec":
         return False
     try:
@@ -977,10 +1377,9 @@ def _is_readonly_kubectl_exec_invocation(command: str) -> bool:
     payload = tokens[separator_index + 1 :]
     if not payload:
         return False
-    if payload[0] in {"bash", "sh", "zsh", "ksh", "dash"}:
-        if len(payload) < 3 or payload[1] != "-c":
-            return False
-        return _is_readonly_kubectl_exec_snippet(" ".join(payload[2:]))
+    if payload[0] in _SHELL_WRAPPERS:
+        script = _shell_dash_c_script(payload)
+        return script is not None and _is_readonly_kubectl_exec_snippet(script)
     return _is_readonly_kubectl_exec_snippet(" ".join(payload))
 
 
@@ -989,21 +1388,22 @@ def _is_kubectl_exec_rule(item: dict[str, Any]) -> bool:
     return "kubectl" in text and "exec" in text
 
 
+def _line_segments(command: str) -> list[ShellSegment]:
+    """&&/||/;/& segments of every line of command."""
+    return [segment for line in command.splitlines() for segment in lex_shell(line).segments]
+
+
 def _should_allow_readonly_kubectl_exec_rule(
-    command: str, item: dict[str, Any]
+    segments: list[ShellSegment], item: dict[str, Any]
 ) -> bool:
+    """True if item is a kubectl-exec rule and every kubectl exec in segments is read-only."""
     if not _is_kubectl_exec_rule(item):
         return False
-    segments = [
-        segment.strip()
-        for line in command.splitlines()
-        for segment in _split_on_shell_operators(line)
-    ]
     exec_segments = [
-        segment for segment in segments if re.search(r"\bkubectl\s+exec\b", segment)
+        segment for segment in segments if re.search(r"\bkubectl\s+exec\b", segment.text)
     ]
     return bool(exec_segments) and all(
-        _is_readonly_kubectl_exec_invocation(segment) for segment in exec_segments
+        _is_readonly_kubectl_exec_invocation(segment.argv) for segment in exec_segments
     )
 
 
@@ -1087,6 +1487,34 @@ _GIT_ANALYZERS: dict[str, Callable[[list[str], str], tuple[bool, str]]] = {
 }
 
 
+def _analyze_git_argv(parts: list[str]) -> tuple[bool, str]:
+    """Semantic analysis of one tokenized `git <subcommand> ...` invocation."""
+    if len(parts) < 2 or parts[0] != "git":
+        return False, ""
+
+    subcommand = parts[1]
+    args = parts[2:]
+    analyzer = _GIT_ANALYZERS.get(subcommand)
+    if analyzer is None:
+        return False, ""
+    return analyzer(args, " ".join(args))
+
+
+def _analyze_git_lex(lex: ShellLex) -> tuple[bool, str]:
+    """analyze_git_command() over an existing lex.
+
+    Only a simple command (one segment, no pipes) is analyzed. The semantic
+    verdict is an ask that ends the check, so it must not speak for a chain:
+    `git reset --hard && rm -rf ~` is left to the YAML patterns, which block
+    the rm and still ask about the reset.
+    """
+    if len(lex.segments) != 1 or len(lex.segments[0].pipeline) != 1:
+        return False, ""
+    segment = lex.segments[0]
+    # Malformed quotes leave no argv; fall back to whitespace words.
+    return _analyze_git_argv(segment.argv or segment.text.split())
+
+
 def analyze_git_command(command: str) -> tuple[bool, str]:
     """Analyze git commands for dangerous operations based on semantic understanding.
 
@@ -1098,21 +1526,7 @@ def analyze_git_command(command: str) -> tuple[bool, str]:
     """
     if not command or not command.strip():
         return False, ""
-
-    command = command.strip()
-    if not command.startswith("git "):
-        return False, ""
-
-    parts = command.split()
-    if len(parts) < 2:
-        return False, ""
-
-    subcommand = parts[1]
-    args = parts[2:]
-    analyzer = _GIT_ANALYZERS.get(subcommand)
-    if analyzer is None:
-        return False, ""
-    return analyzer(args, " ".join(args))
+    return _analyze_git_lex(lex_shell(command))
 
 
 def is_glob_pattern(pattern: str) -> bool:
@@ -1239,6 +1653,8 @@ def load_config() -> dict[str, Any]:
             "noDeletePaths": [],
         }
 
+    import yaml
+
     with open(config_path, encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
@@ -1269,6 +1685,8 @@ def load_allowed_hosts() -> list[str]:
         return _allowed_hosts_cache
 
     try:
+        import yaml
+
         with open(config_path, encoding="utf-8") as f:
             config = yaml.safe_load(f) or {}
             _allowed_hosts_cache = config.get("allowedHosts", [])
@@ -1550,10 +1968,11 @@ class CompiledRules:
     """Pre-compiled rules grouped by check stage."""
 
     patterns: list[dict[str, Any]] = field(default_factory=list)
-    zero_access: list[dict[str, Any]] = field(default_factory=list)
-    zero_access_exclusions: list[dict[str, Any]] = field(default_factory=list)
-    read_only: list[dict[str, Any]] = field(default_factory=list)
-    no_delete: list[dict[str, Any]] = field(default_factory=list)
+    prefilter: Optional[PatternPrefilter] = None
+    zero_access: PathMatcher = field(default_factory=PathMatcher.empty)
+    zero_access_exclusions: PathMatcher = field(default_factory=PathMatcher.empty)
+    read_only: PathMatcher = field(default_factory=PathMatcher.empty)
+    no_delete: PathMatcher = field(default_factory=PathMatcher.empty)
 
 
 @dataclass
@@ -1566,25 +1985,37 @@ class CommandContext:
     relaxed_checks: set[str]
     is_readonly_search: bool = False
     has_dry_run: bool = False
+    lex: ShellLex = field(default_factory=ShellLex)
+    _original_line_segments: Optional[list[ShellSegment]] = field(default=None, repr=False)
+
+    def original_line_segments(self) -> list[ShellSegment]:
+        """Per-line segments of the original (pre-unwrap) command, lexed once."""
+        if self._original_line_segments is None:
+            self._original_line_segments = _line_segments(self.original)
+        return self._original_line_segments
 
 
 def _extract_compiled_rules(config: dict[str, Any]) -> CompiledRules:
     """Pull compiled rules out of config, compiling on the fly if needed."""
     if "bashToolPatterns_compiled" in config:
-        return CompiledRules(
-            patterns=config.get("bashToolPatterns_compiled", []),
-            zero_access=config.get("zeroAccessPaths_compiled", []),
-            zero_access_exclusions=config.get("zeroAccessExclusions_compiled", []),
-            read_only=config.get("readOnlyPaths_compiled", []),
-            no_delete=config.get("noDeletePaths_compiled", []),
-        )
-    # Backward compatibility: tests pass raw configs
+        patterns = config.get("bashToolPatterns_compiled", [])
+        prefilter = config.get("bashToolPatterns_prefilter")
+        if prefilter is None or prefilter.size != len(patterns):
+            prefilter = PatternPrefilter.build(patterns)
+        path_lists = {key: config.get(f"{key}_compiled", []) for key in _PATH_MATCHER_KINDS}
+    else:
+        # Backward compatibility: tests pass raw configs
+        patterns = compile_regex_patterns(config.get("bashToolPatterns", []))
+        prefilter = PatternPrefilter.build(patterns)
+        path_lists = {key: preprocess_path_list(config.get(key, [])) for key in _PATH_MATCHER_KINDS}
+    matchers = {key: _path_matcher(config, key, entries) for key, entries in path_lists.items()}
     return CompiledRules(
-        patterns=compile_regex_patterns(config.get("bashToolPatterns", [])),
-        zero_access=preprocess_path_list(config.get("zeroAccessPaths", [])),
-        zero_access_exclusions=preprocess_path_list(config.get("zeroAccessExclusions", [])),
-        read_only=preprocess_path_list(config.get("readOnlyPaths", [])),
-        no_delete=preprocess_path_list(config.get("noDeletePaths", [])),
+        patterns=patterns,
+        prefilter=prefilter,
+        zero_access=matchers["zeroAccessPaths"],
+        zero_access_exclusions=matchers["zeroAccessExclusions"],
+        read_only=matchers["readOnlyPaths"],
+        no_delete=matchers["noDeletePaths"],
     )
 
 
@@ -1681,13 +2112,18 @@ def _is_env_injection(pattern_str: str) -> bool:
 def _stage_yaml_patterns(rules: CompiledRules, ctx: CommandContext) -> Optional[CheckResult]:
     """Stage 1: scan compiled YAML patterns.
 
+    Only patterns whose required literals occur in the command are evaluated
+    (see PatternPrefilter); order and yaml_pattern_{idx} ids are unchanged.
     Skipped for relaxed contexts. However, environment-variable-based attacks
     (LD_PRELOAD, DYLD_INSERT_LIBRARIES, etc.) are ALWAYS checked even if the
     underlying command is readonly, because they affect arbitrary processes.
     """
     skip_patterns = "bashToolPatterns" in ctx.relaxed_checks or ctx.has_dry_run
 
-    for idx, item in enumerate(rules.patterns):
+    texts = [ctx.unwrapped, ctx.original] if ctx.was_unwrapped else [ctx.unwrapped]
+    prefilter = rules.prefilter or PatternPrefilter.build(rules.patterns)
+    for idx in prefilter.candidates(texts):
+        item = rules.patterns[idx]
         # Skip readonly/dry-run relaxation for environment injection patterns
         pattern_str = item.get("pattern", "")
         is_env_injection = _is_env_injection(pattern_str)
@@ -1695,7 +2131,7 @@ def _stage_yaml_patterns(rules: CompiledRules, ctx: CommandContext) -> Optional[
         if skip_patterns and not is_env_injection:
             continue
         if ctx.is_readonly_search and not is_env_injection:
-            if _should_allow_readonly_kubectl_exec_rule(ctx.original, item):
+            if _should_allow_readonly_kubectl_exec_rule(ctx.original_line_segments(), item):
                 continue
             if not _is_kubectl_exec_rule(item):
                 continue
@@ -1706,107 +2142,50 @@ def _stage_yaml_patterns(rules: CompiledRules, ctx: CommandContext) -> Optional[
     return None
 
 
-def _zero_access_glob_match(path_obj: dict[str, Any], ctx: CommandContext) -> Optional[CheckResult]:
-    """Check a single zero-access glob path object against the unwrapped command."""
-    glob_regex_compiled = path_obj.get("glob_regex")
-    if not glob_regex_compiled:
-        return None
-    try:
-        if not glob_regex_compiled.search(ctx.unwrapped):
-            return None
-    except re.error:
-        return None
+def _zero_access_block(path_obj: dict[str, Any], ctx: CommandContext) -> CheckResult:
+    """Block result for a zero-access entry that matched the command."""
+    if path_obj["is_glob"]:
+        return CheckResult(
+            blocked=True,
+            reason=f"Blocked: zero-access pattern {path_obj['original']} (no operations allowed)",
+            pattern_matched="zero_access_glob",
+            was_unwrapped=ctx.was_unwrapped,
+        )
     return CheckResult(
         blocked=True,
-        reason=(f"Blocked: zero-access pattern {path_obj['original']} (no operations allowed)"),
-        pattern_matched="zero_access_glob",
+        reason=f"Blocked: zero-access path {path_obj['original']} (no operations allowed)",
+        pattern_matched="zero_access_literal",
         was_unwrapped=ctx.was_unwrapped,
     )
 
 
-def _build_zero_access_literal_patterns(
-    path_obj: dict[str, Any],
-) -> tuple[Optional[str], Optional[str]]:
-    """Return (expanded, original) regex strings for a literal zero-access path.
-
-    File paths get a non-word suffix to prevent ``.env`` from matching ``.env.example``.
-    Directory paths use no suffix because the trailing ``/`` already delimits.
-    """
-    escaped_expanded = path_obj.get("escaped_expanded", "")
-    escaped_original = path_obj.get("escaped_original", "")
-    if not escaped_expanded and not escaped_original:
-        return None, None
-    is_directory = path_obj.get("original", "").endswith("/")
-    suffix = "" if is_directory else r"(?![a-zA-Z0-9_.-])"
-    pattern_expanded = (escaped_expanded + suffix) if escaped_expanded else None
-    pattern_original = (escaped_original + suffix) if escaped_original else None
-    return pattern_expanded, pattern_original
-
-
-def _zero_access_literal_match(
-    path_obj: dict[str, Any], ctx: CommandContext
-) -> Optional[CheckResult]:
-    """Check a single zero-access literal path object against the unwrapped command."""
-    pattern_expanded, pattern_original = _build_zero_access_literal_patterns(path_obj)
-    if pattern_expanded is None and pattern_original is None:
-        return None
-
-    matched = (pattern_expanded and re.search(pattern_expanded, ctx.unwrapped)) or (
-        pattern_original and re.search(pattern_original, ctx.unwrapped)
-    )
-    if not matched:
-        return None
+def _ssh_inspect_ask(path_obj: dict[str, Any], ctx: CommandContext) -> CheckResult:
+    """Ask result for metadata inspection (ls/stat/file) of an SSH-protected path."""
+    original = path_obj.get("original", "")
     return CheckResult(
-        blocked=True,
-        reason=(f"Blocked: zero-access path {path_obj['original']} (no operations allowed)"),
-        pattern_matched="zero_access_literal",
+        ask=True,
+        reason=f"Inspecting {original} reveals filenames/metadata; confirm before proceeding.",
+        pattern_matched="ssh_inspect_ask",
         was_unwrapped=ctx.was_unwrapped,
     )
 
 
-def _excl_matches_glob(excl: dict[str, Any], command: str) -> bool:
-    """Check if a glob exclusion matches the command."""
-    glob_regex = excl.get("glob_regex")
-    return bool(glob_regex and glob_regex.search(command))
-
-
-def _excl_matches_literal(excl: dict[str, Any], command: str) -> bool:
-    """Check if a literal exclusion matches the command."""
-    try:
-        for key in ("escaped_expanded", "escaped_original"):
-            pattern = excl.get(key, "")
-            if pattern and re.search(pattern, command, re.IGNORECASE):
-                return True
-    except re.error:
-        pass
-    return False
-
-
-def _command_matches_exclusion(exclusions: list[dict[str, Any]], command: str) -> bool:
-    """Check if command references any excluded path."""
-    matcher = {True: _excl_matches_glob, False: _excl_matches_literal}
-    return any(matcher[excl["is_glob"]](excl, command) for excl in exclusions)
-
-
-def _check_single_zero_access(
-    path_obj: dict[str, Any], ctx: CommandContext
+def _classify_ssh_segments(
+    path_obj: dict[str, Any],
+    regex: re.Pattern[str],
+    segments: list[str],
+    ctx: CommandContext,
 ) -> Optional[CheckResult]:
-    """Run the appropriate zero-access matcher for one path_obj/ctx pair."""
-    if path_obj["is_glob"]:
-        return _zero_access_glob_match(path_obj, ctx)
-    return _zero_access_literal_match(path_obj, ctx)
-
-
-def _segment_context(segment: str, parent: CommandContext) -> CommandContext:
-    """Build a CommandContext scoped to one segment of a compound command."""
-    return CommandContext(
-        original=segment,
-        unwrapped=segment,
-        was_unwrapped=parent.was_unwrapped,
-        relaxed_checks=parent.relaxed_checks,
-        is_readonly_search=False,
-        has_dry_run=False,
-    )
+    """Per-segment verdict for an SSH-protected entry: block, ask, or None (allow)."""
+    ask: Optional[CheckResult] = None
+    for seg in segments:
+        if not regex.search(seg) or is_ssh_use_command(seg):
+            continue  # untouched, or silent-allow USE segment
+        if is_ssh_inspect_command(seg):
+            ask = ask or _ssh_inspect_ask(path_obj, ctx)
+            continue
+        return _zero_access_block(path_obj, ctx)
+    return ask
 
 
 def _stage_zero_access(rules: CompiledRules, ctx: CommandContext) -> Optional[CheckResult]:
@@ -1820,101 +2199,105 @@ def _stage_zero_access(rules: CompiledRules, ctx: CommandContext) -> Optional[Ch
     - segment is INSPECT (ls, stat, file) -> queue ask (block wins later)
     - any other segment touching the protected path -> block
 
-    Non-ssh patterns retain the original whole-command behavior.
+    Non-ssh patterns retain the original whole-command behavior. Exclusions
+    and entries are each resolved with one combined-regex scan (PathMatcher);
+    only entries that matched the whole command are classified further.
     """
     if "zeroAccessPaths" in ctx.relaxed_checks or is_readonly_git_command(ctx.unwrapped):
         return None
+    if rules.zero_access_exclusions.any_match(ctx.unwrapped):
+        return None
 
-    has_exclusion = bool(rules.zero_access_exclusions) and _command_matches_exclusion(
-        rules.zero_access_exclusions, ctx.unwrapped
-    )
+    matched = rules.zero_access.matching_indices(ctx.unwrapped)
+    if not matched:
+        return None
 
-    segments: list[str] = _split_on_shell_operators(ctx.unwrapped) or [ctx.unwrapped]
+    segments: list[str] = ctx.lex.segment_texts or [ctx.unwrapped]
     pending_ask: Optional[CheckResult] = None
 
-    for path_obj in rules.zero_access:
-        if has_exclusion:
-            continue
-
+    for idx in matched:
+        path_obj = rules.zero_access.entries[idx]
         if not _is_ssh_protected_pattern(path_obj):
-            result = _check_single_zero_access(path_obj, ctx)
-            if result is not None:
-                return result
-            continue
-
-        # SSH-protected pattern: per-segment classification.
-        for seg in segments:
-            seg_ctx = _segment_context(seg, ctx)
-            seg_result = _check_single_zero_access(path_obj, seg_ctx)
-            if seg_result is None:
-                continue
-            if is_ssh_use_command(seg):
-                continue  # silent allow this segment
-            if is_ssh_inspect_command(seg):
-                if pending_ask is None:
-                    original = path_obj.get("original", "")
-                    pending_ask = CheckResult(
-                        ask=True,
-                        reason=(
-                            f"Inspecting {original} reveals filenames/metadata; "
-                            "confirm before proceeding."
-                        ),
-                        pattern_matched="ssh_inspect_ask",
-                        was_unwrapped=ctx.was_unwrapped,
-                    )
-                continue
-            return seg_result
+            return _zero_access_block(path_obj, ctx)
+        regex = rules.zero_access.entry_regexes[idx]
+        result = _classify_ssh_segments(path_obj, regex, segments, ctx)  # type: ignore[arg-type]
+        if result is not None and result.blocked:
+            return result
+        pending_ask = pending_ask or result
 
     return pending_ask
 
 
-def _stage_read_only(rules: CompiledRules, ctx: CommandContext) -> Optional[CheckResult]:
-    """Stage 3: enforce read-only paths (block all modifications)."""
-    if "readOnlyPaths" in ctx.relaxed_checks:
-        return None
-    for path_obj in rules.read_only:
+def _check_path_stage(
+    matcher: PathMatcher,
+    ctx: CommandContext,
+    templates: list[tuple[str, str]],
+    path_type: str,
+    pattern_id: str,
+) -> Optional[CheckResult]:
+    """Run operation templates only for paths the command actually mentions."""
+    for idx in matcher.matching_indices(ctx.unwrapped):
         blocked, reason = check_path_patterns(
-            ctx.unwrapped, path_obj, READ_ONLY_BLOCKED, "read-only path"
+            ctx.unwrapped, matcher.entries[idx], templates, path_type
         )
         if blocked:
             return CheckResult(
                 blocked=True,
                 reason=reason,
-                pattern_matched="readonly_path",
+                pattern_matched=pattern_id,
                 was_unwrapped=ctx.was_unwrapped,
             )
     return None
 
 
+def _stage_read_only(rules: CompiledRules, ctx: CommandContext) -> Optional[CheckResult]:
+    """Stage 3: enforce read-only paths (block all modifications)."""
+    if "readOnlyPaths" in ctx.relaxed_checks:
+        return None
+    return _check_path_stage(
+        rules.read_only, ctx, READ_ONLY_BLOCKED, "read-only path", "readonly_path"
+    )
+
+
 def _stage_no_delete(rules: CompiledRules, ctx: CommandContext) -> Optional[CheckResult]:
     """Stage 4: enforce no-delete paths (block deletions only)."""
     if "noDeletePaths" in ctx.relaxed_checks:
         return None
-    for path_obj in rules.no_delete:
-        blocked, reason = check_path_patterns(
-            ctx.unwrapped, path_obj, NO_DELETE_BLOCKED, "no-delete path"
-        )
-        if blocked:
-            return CheckResult(
-                blocked=True,
-                reason=reason,
-                pattern_matched="nodelete_path",
-                was_unwrapped=ctx.was_unwrapped,
-            )
-    return None
+    return _check_path_stage(
+        rules.no_delete, ctx, NO_DELETE_BLOCKED, "no-delete path", "nodelete_path"
+    )
+
+
+# Module-level analyzer so the tree-sitter parser stays warm across calls
+# (matters for the long-lived daemon, harmless for one-shot hook runs).
+_ast_analyzer: Optional[Any] = None
+
+
+def _get_ast_analyzer() -> Optional[Any]:
+    """Return the shared ASTAnalyzer, importing it lazily; None if unavailable."""
+    global _ast_analyzer
+    if _ast_analyzer is None:
+        try:
+            from ast_analyzer import ASTAnalyzer  # type: ignore[import-not-found]
+        except Exception:
+            return None
+        _ast_analyzer = ASTAnalyzer()
+    return _ast_analyzer
 
 
 def _run_ast_analyzer(unwrapped: str, config: dict[str, Any]) -> Optional[dict[str, Any]]:
-    """Lazy-load and run the AST analyzer; return raw result dict or None on any failure."""
-    try:
-        from ast_analyzer import ASTAnalyzer  # type: ignore[import-not-found]
-    except Exception:
+    """Lazy-load and run the AST analyzer; return raw result dict or None on any failure.
+
+    Stage 1 already ran every bash pattern against unwrapped, so the analyzer
+    skips re-checking an extracted command identical to it.
+    """
+    analyzer = _get_ast_analyzer()
+    if analyzer is None:
         return None
     try:
-        analyzer = ASTAnalyzer()
         if not analyzer.is_available():
             return None
-        return analyzer.analyze_command_ast(unwrapped, config)
+        return analyzer.analyze_command_ast(unwrapped, config, checked=unwrapped)
     except Exception:
         return None
 
@@ -1964,19 +2347,128 @@ def _build_command_context(
 
     unwrapped_cmd, was_unwrapped = unwrap_command(command)
     unwrapped_cmd = strip_bash_comments(unwrapped_cmd)
+    lex = lex_shell(unwrapped_cmd)
 
     return CommandContext(
         original=command,
         unwrapped=unwrapped_cmd,
         was_unwrapped=was_unwrapped,
         relaxed_checks=relaxed_checks,
-        is_readonly_search=is_readonly_search_command(unwrapped_cmd),
-        has_dry_run=_has_valid_dry_run(unwrapped_cmd),
+        is_readonly_search=_is_readonly_search_lex(lex),
+        has_dry_run=_has_valid_dry_run_lex(lex),
+        lex=lex,
     )
 
 
+# ============================================================================
+# CHECK BUDGET
+# ============================================================================
+
+BUDGET_PATTERN_PREFIX = "budget_exceeded:"
+
+
+class CheckBudgetExceeded(BaseException):
+    """Raised inside check_command() when its wall-clock budget runs out.
+
+    A BaseException so stage code that catches Exception cannot swallow it.
+    """
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(stage)
+        self.stage = stage
+
+
+def _can_preempt() -> bool:
+    """SIGALRM preemption needs setitimer, the main thread, and no timer already set."""
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+        and signal.getitimer(signal.ITIMER_REAL)[0] == 0
+    )
+
+
+class CheckBudget:
+    """Wall-clock deadline for one check_command() call.
+
+    enter() is called between stages, so an overrun is noticed on every
+    platform. Where available, armed() also sets an ITIMER_REAL/SIGALRM timer
+    (as pi/tool-reduction/regex_guard.py does per search) that interrupts a
+    stage mid-regex or mid-recursion. Either way the stage is reported.
+    """
+
+    def __init__(self, budget_ms: float) -> None:
+        self.budget_ms = budget_ms
+        self.deadline = time.perf_counter() + budget_ms / 1000.0
+        self.stage = "start"
+
+    def enter(self, stage: str) -> None:
+        """Fail with the stage that just ran if the deadline passed, then start stage."""
+        if time.perf_counter() >= self.deadline:
+            raise CheckBudgetExceeded(self.stage)
+        self.stage = stage
+
+    @contextmanager
+    def armed(self) -> Iterator[None]:
+        if not _can_preempt():
+            yield
+            return
+
+        def _on_alarm(signum: int, frame: object) -> None:
+            raise CheckBudgetExceeded(self.stage)
+
+        old_handler = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, self.budget_ms / 1000.0)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, old_handler)
+
+    def exceeded_result(self, stage: str) -> CheckResult:
+        """Fail safe: ask the user rather than allow an unchecked command."""
+        return CheckResult(
+            ask=True,
+            reason=(
+                f"Damage control check exceeded its {self.budget_ms:.0f}ms budget "
+                f"in stage '{stage}'; review this command manually"
+            ),
+            pattern_matched=f"{BUDGET_PATTERN_PREFIX}{stage}",
+        )
+
+
+def is_budget_exceeded(result: tuple[bool, bool, str, str, bool, bool]) -> bool:
+    """True if a check_command() result is the budget fail-safe, not a real decision."""
+    return result[3].startswith(BUDGET_PATTERN_PREFIX)
+
+
+def _run_stage(
+    timings: Optional[dict[str, int]],
+    name: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    budget: Optional[CheckBudget] = None,
+) -> Any:
+    """Call fn(*args), recording its wall time under name when profiling.
+
+    With a budget, raises CheckBudgetExceeded before starting if it is spent.
+    """
+    if budget is not None:
+        budget.enter(name)
+    if timings is None:
+        return fn(*args)
+    start = time.perf_counter_ns()
+    try:
+        return fn(*args)
+    finally:
+        timings[name] = time.perf_counter_ns() - start
+
+
 def check_command(
-    command: str, config: dict[str, Any], context: Optional[str] = None
+    command: str,
+    config: dict[str, Any],
+    context: Optional[str] = None,
+    timings: Optional[dict[str, int]] = None,
+    budget_ms: Optional[float] = None,
 ) -> tuple[bool, bool, str, str, bool, bool]:
     """Check if command should be blocked or requires confirmation.
 
@@ -1984,13 +2476,45 @@ def check_command(
       - blocked=True, ask=False: Block the command
       - blocked=False, ask=True: Show confirmation dialog
       - blocked=False, ask=False: Allow the command
+
+    When ``timings`` is given, per-stage wall time (perf_counter_ns) is
+    recorded into it; stages after the deciding one are absent.
+
+    ``budget_ms`` (default: CLAUDE_DAMAGE_CONTROL_BUDGET_MS) bounds the whole
+    check; on overrun the result is an ask with pattern_matched
+    "budget_exceeded:<stage>" naming the stage that ran out of time.
     """
-    ctx = _build_command_context(command, config, context)
-    rules = _extract_compiled_rules(config)
+    if budget_ms is None:
+        budget_ms = get_check_budget_ms()
+    if budget_ms <= 0:
+        return _check_command_stages(command, config, context, timings, None)
+
+    budget = CheckBudget(budget_ms)
+    try:
+        with budget.armed():
+            return _check_command_stages(command, config, context, timings, budget)
+    except CheckBudgetExceeded as e:
+        return budget.exceeded_result(e.stage).as_tuple()
+
+
+def _check_command_stages(
+    command: str,
+    config: dict[str, Any],
+    context: Optional[str],
+    timings: Optional[dict[str, int]],
+    budget: Optional[CheckBudget],
+) -> tuple[bool, bool, str, str, bool, bool]:
+    """Run the check_command() stages in order; the first decision wins."""
+    ctx = _run_stage(
+        timings, "build_context", _build_command_context, command, config, context, budget=budget
+    )
+    rules = _run_stage(timings, "extract_rules", _extract_compiled_rules, config, budget=budget)
 
     # Semantic git analysis runs first (after unwrapping, before regex patterns).
     if "semantic_git" not in ctx.relaxed_checks:
-        is_dangerous_git, git_reason = analyze_git_command(ctx.unwrapped)
+        is_dangerous_git, git_reason = _run_stage(
+            timings, "semantic_git", _analyze_git_lex, ctx.lex, budget=budget
+        )
         if is_dangerous_git:
             return CheckResult(
                 ask=True,
@@ -2000,23 +2524,198 @@ def check_command(
                 semantic_match=True,
             ).as_tuple()
 
-    for stage in (
-        _stage_yaml_patterns,
-        _stage_zero_access,
-        _stage_read_only,
-        _stage_no_delete,
+    for name, stage in (
+        ("yaml_patterns", _stage_yaml_patterns),
+        ("zero_access", _stage_zero_access),
+        ("read_only", _stage_read_only),
+        ("no_delete", _stage_no_delete),
     ):
-        result = stage(rules, ctx)
+        result = _run_stage(timings, name, stage, rules, ctx, budget=budget)
         if result is not None:
             return result.as_tuple()
 
-    ast_result = _stage_ast_analysis(config, ctx)
+    ast_result = _run_stage(
+        timings, "ast_analysis", _stage_ast_analysis, config, ctx, budget=budget
+    )
     if ast_result is not None:
         return ast_result.as_tuple()
 
     return CheckResult(was_unwrapped=ctx.was_unwrapped).as_tuple()
 
 
+# ============================================================================
+# DECISION CACHE
+# ============================================================================
+
+# check_command() is a pure function of (command, context, config, platform),
+# and agents re-run the same commands constantly. Results are cached under
+# the config fingerprint, so editing patterns.yaml or the checker source
+# invalidates every entry without explicit bookkeeping.
+
+DECISION_CACHE_MAX_ENTRIES = 1024
+DECISION_CACHE_TTL = 3600.0
+
+CheckTuple = tuple[bool, bool, str, str, bool, bool]
+
+
+def get_decision_cache_path() -> Path:
+    """Get path to the shared SQLite decision cache (next to the config cache)."""
+    return get_config_cache_path().with_name("decisions.sqlite")
+
+
+def _decision_cache_mode() -> str:
+    mode = os.environ.get("CLAUDE_DAMAGE_CONTROL_DECISION_CACHE", "memory").strip().lower()
+    return mode if mode in ("memory", "disk", "off") else "memory"
+
+
+def decision_cache_key(command: str, context: Optional[str]) -> Optional[str]:
+    """Key for one check, or None when the loaded config has no fingerprint."""
+    if _config_fingerprint is None:
+        return None
+    material = f"{_config_fingerprint}\0{sys.platform}\0{context or ''}\0{command}"
+    return hashlib.sha256(material.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class DecisionCache:
+    """Bounded LRU of check_command() results with a TTL.
+
+    With ``disk_path`` set, misses fall through to a small SQLite table shared
+    by cold hook processes. The disk layer is best-effort: any SQLite error is
+    treated as a miss and never affects the decision itself.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DECISION_CACHE_MAX_ENTRIES,
+        ttl: float = DECISION_CACHE_TTL,
+        disk_path: Optional[Path] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self._entries: OrderedDict[str, tuple[float, CheckTuple]] = OrderedDict()
+        self._db: Optional[Any] = None
+
+    def get(self, key: str) -> Optional[CheckTuple]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, result = entry
+            if time.time() - stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                return result
+            del self._entries[key]
+        disk_entry = self._disk_get(key)
+        if disk_entry is None:
+            return None
+        self._remember(key, *disk_entry)
+        return disk_entry[1]
+
+    def put(self, key: str, result: CheckTuple) -> None:
+        stored_at = time.time()
+        self._remember(key, stored_at, result)
+        self._disk_put(key, stored_at, result)
+
+    def _remember(self, key: str, stored_at: float, result: CheckTuple) -> None:
+        self._entries[key] = (stored_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _connect(self) -> Optional[Any]:
+        if self._db is not None or self.disk_path is None:
+            return self._db
+        try:
+            import sqlite3
+
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.disk_path), timeout=0.2, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions "
+                "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, result TEXT NOT NULL)"
+            )
+        except Exception:
+            self.disk_path = None
+            return None
+        self._db = db
+        return db
+
+    def _disk_get(self, key: str) -> Optional[tuple[float, CheckTuple]]:
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT stored_at, result FROM decisions WHERE key = ? AND stored_at > ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            result = json.loads(row[1])
+        except Exception:
+            return None
+        if not isinstance(result, list) or len(result) != 6:
+            return None
+        return row[0], tuple(result)  # type: ignore[return-value]
+
+    def _disk_put(self, key: str, stored_at: float, result: CheckTuple) -> None:
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO decisions (key, stored_at, result) VALUES (?, ?, ?)",
+                (key, stored_at, json.dumps(list(result))),
+            )
+            # Size eviction: keep the newest max_entries rows, drop expired ones.
+            db.execute(
+                "DELETE FROM decisions WHERE stored_at <= ? OR key NOT IN "
+                "(SELECT key FROM decisions ORDER BY stored_at DESC LIMIT ?)",
+                (stored_at - self.ttl, self.max_entries),
+            )
+        except Exception:
+            pass
+
+
+# One cache per mode: the daemon applies each client's mode to its own check.
+_decision_caches: dict[str, DecisionCache] = {}
+
+
+def get_decision_cache() -> Optional[DecisionCache]:
+    """Return the process-wide decision cache for the current mode, or None when disabled."""
+    mode = _decision_cache_mode()
+    if mode == "off":
+        return None
+    if mode not in _decision_caches:
+        disk_path = get_decision_cache_path() if mode == "disk" else None
+        _decision_caches[mode] = DecisionCache(disk_path=disk_path)
+    return _decision_caches[mode]
+
+
+def check_command_cached(
+    command: str,
+    config: dict[str, Any],
+    context: Optional[str] = None,
+    timings: Optional[dict[str, int]] = None,
+) -> tuple[CheckTuple, bool]:
+    """check_command() through the decision cache; returns (result, cache_hit).
+
+    Only the loaded hook config carries a fingerprint, so ad-hoc configs
+    (tests, callers passing raw dicts) are always evaluated directly.
+    """
+    cache = get_decision_cache()
+    key = decision_cache_key(command, context) if config is _compiled_config_cache else None
+    if cache is None or key is None:
+        return check_command(command, config, context=context, timings=timings), False
+    cached = _run_stage(timings, "decision_cache", cache.get, key)
+    if cached is not None:
+        return cached, True
+    result = check_command(command, config, context=context, timings=timings)
+    if not is_budget_exceeded(result):
+        cache.put(key, result)
+    return result, False
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -2041,18 +2740,26 @@ def _decision_label(is_blocked: bool, should_ask: bool) -> str:
     return "ask" if should_ask else "allowed"
 
 
-def _emit_block(reason: str, command: str) -> None:
-    """Print block reason to stderr and exit with code 2."""
-    print(f"SECURITY: {reason}", file=sys.stderr)
-    print(
-        f"Command: {command[:100]}{'...' if len(command) > 100 else ''}",
-        file=sys.stderr,
+@dataclass
+class HookOutcome:
+    """What the hook process should print and exit with for one tool call."""
+
+    exit_code: int = 0
+    stdout: str = ""
+    stderr: str = ""
+
+
+def _block_outcome(reason: str, command: str) -> HookOutcome:
+    """Block: reason on stderr (fed back to Claude) with exit code 2."""
+    stderr = (
+        f"SECURITY: {reason}\n"
+        f"Command: {command[:100]}{'...' if len(command) > 100 else ''}\n"
     )
-    sys.exit(2)
+    return HookOutcome(exit_code=2, stderr=stderr)
 
 
-def _emit_ask(reason: str) -> None:
-    """Emit JSON to trigger Claude Code's confirmation dialog and exit cleanly."""
+def _ask_outcome(reason: str) -> HookOutcome:
+    """Ask: JSON on stdout to trigger Claude Code's confirmation dialog."""
     output = {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
@@ -2060,31 +2767,35 @@ def _emit_ask(reason: str) -> None:
             "permissionDecisionReason": reason,
         }
     }
-    print(json.dumps(output))
-    sys.exit(0)
+    return HookOutcome(stdout=json.dumps(output) + "\n")
 
 
-def main() -> None:
-    if is_hook_disabled():
-        sys.exit(0)
+def evaluate_hook_input(
+    input_data: dict[str, Any],
+    cwd: Optional[str] = None,
+    user: Optional[str] = None,
+) -> HookOutcome:
+    """Evaluate one PreToolUse payload without touching stdin/stdout or exiting.
 
-    config = get_compiled_config()
-    input_data = _read_hook_input()
+    Shared by the one-shot hook and the long-lived daemon. ``cwd``/``user``
+    override the audit log fields when evaluating on behalf of another process.
+    """
+    timings: Optional[dict[str, int]] = {} if is_profiling_enabled() else None
+    config = _run_stage(timings, "config_load", get_compiled_config)
 
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
 
     if tool_name != "Bash":
-        sys.exit(0)
+        return HookOutcome()
 
     command = tool_input.get("command", "")
     if not command:
-        sys.exit(0)
+        return HookOutcome()
 
     context = detect_context(tool_name, tool_input, config)
-    is_blocked, should_ask, reason, pattern_matched, was_unwrapped, semantic_match = check_command(
-        command, config, context=context
-    )
+    result, cache_hit = check_command_cached(command, config, context=context, timings=timings)
+    is_blocked, should_ask, reason, pattern_matched, was_unwrapped, semantic_match = result
 
     log_decision(
         tool_name=tool_name,
@@ -2092,17 +2803,44 @@ def main() -> None:
         decision=_decision_label(is_blocked, should_ask),
         reason=reason,
         pattern_matched=pattern_matched,
-        flags=DecisionFlags(unwrapped=was_unwrapped, semantic_match=semantic_match),
+        flags=DecisionFlags(
+            unwrapped=was_unwrapped, semantic_match=semantic_match, cache_hit=cache_hit
+        ),
         context=context,
+        cwd=cwd,
+        user=user,
+        timings=timings,
     )
 
     spawn_log_rotation()
 
     if is_blocked:
-        _emit_block(reason, command)
+        return _block_outcome(reason, command)
     if should_ask:
-        _emit_ask(reason)
-    sys.exit(0)
+        return _ask_outcome(reason)
+    return HookOutcome()
+
+
+def _emit(outcome: HookOutcome) -> None:
+    """Write a HookOutcome to stdout/stderr and exit with its code."""
+    if outcome.stdout:
+        sys.stdout.write(outcome.stdout)
+        sys.stdout.flush()
+    if outcome.stderr:
+        sys.stderr.write(outcome.stderr)
+        sys.stderr.flush()
+    sys.exit(outcome.exit_code)
+
+
+def run_hook(input_data: dict[str, Any]) -> None:
+    """Evaluate an already-parsed hook payload in-process and exit."""
+    _emit(evaluate_hook_input(input_data))
+
+
+def main() -> None:
+    if is_hook_disabled():
+        sys.exit(0)
+    run_hook(_read_hook_input())
 
 
 if __name__ == "__main__":
@@ -8,19 +8,31 @@ Damage Control Pattern Matching Benchmark
 
 Benchmarks bash command and path pattern matching performance.
 Run with: uv run benchmark.py [--dry-run] [--note "description"]
+                              [--breakdown | --patterns | --rotation]
 
 Output:
   - Prints statistics (count, avg, min, max, p50, p95, p99) in milliseconds
+  - Reports cold (YAML parse) and warm (on-disk cache) config-load time separately
   - Appends results to BENCHMARKS.md unless --dry-run is specified
+  - --breakdown instead reports p50/p95/p99 per check_command stage
+  - --patterns instead ranks every regex by cost over the corpus plus
+    adversarial inputs, exiting 1 if any exceeds --pattern-budget-ms
+  - --rotation instead times log_rotate.py archiving synthetic logs with
+    1, 2 and 4 workers (more workers only help on a multi-core machine)
 """
 
 from __future__ import annotations
 
 import argparse
 import importlib.util
+import json
+import os
+import re
+import signal
 import sys
+import tempfile
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from statistics import median, quantiles
 from typing import Any
@@ -249,6 +261,276 @@ def run_benchmark(
     return {"bash": calc_stats(bash_times), "path": calc_stats(path_times)}
 
 
+# ============================================================================
+# PER-STAGE BREAKDOWN
+# ============================================================================
+
+# Display order; matches the check_command pipeline.
+STAGE_ORDER = [
+    "config_load",
+    "build_context",
+    "extract_rules",
+    "semantic_git",
+    "yaml_patterns",
+    "zero_access",
+    "read_only",
+    "no_delete",
+    "ast_analysis",
+]
+
+
+def _breakdown_corpus() -> list[str]:
+    """Bash corpus plus the cat/rm/vim path commands used by the path benchmark."""
+    return (
+        BASH_COMMANDS
+        + [f"cat {path}" for path in FILE_PATHS]
+        + [f"rm {path}" for path in FILE_PATHS]
+        + [f"vim {path}" for path in FILE_PATHS]
+    )
+
+
+def run_breakdown_benchmark(passes: int = 10) -> dict[str, dict[str, float]]:
+    """Collect per-stage timings (ms) for check_command over the corpus.
+
+    Stages after the deciding one do not run, so counts differ per stage.
+    config_load is sampled once per pass as a warm (on-disk cache) load.
+    """
+    samples: dict[str, list[float]] = {}
+    for _ in range(passes):
+        bash_tool._compiled_config_cache = None
+        bash_tool._allowed_hosts_cache = None
+        start = time.perf_counter_ns()
+        config = bash_tool.get_compiled_config()
+        samples.setdefault("config_load", []).append((time.perf_counter_ns() - start) / 1e6)
+        for command in _breakdown_corpus():
+            timings: dict[str, int] = {}
+            check_command(command, config, timings=timings)
+            for stage, ns in timings.items():
+                samples.setdefault(stage, []).append(ns / 1e6)
+    ordered = [s for s in STAGE_ORDER if s in samples]
+    ordered += sorted(s for s in samples if s not in STAGE_ORDER)
+    # calc_stats needs at least two samples for its quantiles.
+    return {stage: calc_stats(samples[stage]) for stage in ordered if len(samples[stage]) >= 2}
+
+
+def format_breakdown(breakdown: dict[str, dict[str, float]]) -> str:
+    """Format per-stage stats as an aligned table."""
+    lines = [f"  {'Stage':<14} {'Count':>7} {'Avg':>10} {'P50':>10} {'P95':>10} {'P99':>10}"]
+    for stage, stats in breakdown.items():
+        lines.append(
+            f"  {stage:<14} {stats['count']:>7} {stats['avg']:>10.4f} {stats['p50']:>10.4f}"
+            f" {stats['p95']:>10.4f} {stats['p99']:>10.4f}"
+        )
+    return "\n".join(lines)
+
+
+# ============================================================================
+# PER-PATTERN COST
+# ============================================================================
+
+# Long inputs aimed at backtracking: whitespace runs, unterminated quotes,
+# repeated separators and path segments, and one huge token.
+ADVERSARIAL_INPUTS = {
+    "spaces": "rm" + " " * 4000 + "x",
+    "tabs_spaces": "git" + " \t" * 2000 + "push",
+    "dashes": "rm " + "-" * 4000,
+    "rm_r_spaces": "rm -r" + " " * 4000 + "x",
+    "unterminated_quote": "echo '" + "a " * 2000,
+    "nested_subshells": "$(" * 1000 + "ls" + ")" * 1000,
+    "path_segments": "cat " + "../" * 1500 + "etc/passwd",
+    "semicolons": "ls;" * 1500,
+    "pipes": "cat x" + " | grep y" * 500,
+    "env_assignments": "A=1 " * 1000 + "ls",
+    "long_token": "x" * 8000,
+    "base64_blob": "echo " + "QUJD" * 2000,
+    "newlines": "echo ok\n" * 1000,
+    "ignore_previous": "ignore " * 1000 + "previous",
+}
+
+DEFAULT_PATTERN_BUDGET_MS = 5.0
+
+PatternEntry = tuple[str, str, re.Pattern]
+
+
+def collect_pattern_regexes(compiled: dict[str, Any]) -> list[PatternEntry]:
+    """(group, pattern source, compiled regex) for every regex the hooks run.
+
+    Injection and secret patterns are compiled the way post-tool-injection-
+    detection.py compiles them (IGNORECASE | MULTILINE).
+    """
+    entries: list[PatternEntry] = [
+        ("bash", item["pattern"], item["compiled"])
+        for item in compiled.get("bashToolPatterns_compiled", [])
+    ]
+    matcher = compiled.get("zeroAccessPaths_matcher")
+    if matcher is not None:
+        for path_obj, regex in zip(matcher.entries, matcher.entry_regexes):
+            if regex is not None:
+                entries.append(("zero_access", path_obj["original"], regex))
+    for group, key in (("injection", "injectionPatterns"), ("secret", "secretPatterns")):
+        for item in compiled.get(key, []):
+            source = item.get("pattern", "") if isinstance(item, dict) else ""
+            try:
+                regex = re.compile(source, re.IGNORECASE | re.MULTILINE)
+            except re.error:
+                continue
+            if source:
+                entries.append((group, source, regex))
+    return entries
+
+
+# A catastrophic pattern would otherwise hang the run; searches are cut off
+# here (Unix only, via SIGALRM) and reported at the cap.
+PATTERN_SEARCH_CAP_S = 1.0
+
+
+class _SearchCapExceeded(Exception):
+    pass
+
+
+def _raise_cap_exceeded(signum: int, frame: Any) -> None:
+    raise _SearchCapExceeded
+
+
+def _capped_search(regex: re.Pattern[str], text: str) -> tuple[int, bool]:
+    """One timed search in ns; a search cut off at the cap counts as a miss."""
+    can_cap = hasattr(signal, "setitimer")
+    if can_cap:
+        previous = signal.signal(signal.SIGALRM, _raise_cap_exceeded)
+        signal.setitimer(signal.ITIMER_REAL, PATTERN_SEARCH_CAP_S)
+    start = time.perf_counter_ns()
+    try:
+        hit = regex.search(text) is not None
+    except _SearchCapExceeded:
+        hit = False
+    finally:
+        if can_cap:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return time.perf_counter_ns() - start, hit
+
+
+def _search_cost_ns(regex: re.Pattern[str], text: str, repeats: int) -> tuple[int, bool]:
+    """Best-of-repeats search time in ns (robust to scheduler noise), and hit."""
+    best, hit = _capped_search(regex, text)
+    # Already past the cap: repeating would only burn another second each.
+    for _ in range(repeats - 1 if best < PATTERN_SEARCH_CAP_S * 1e9 else 0):
+        best = min(best, _capped_search(regex, text)[0])
+    return best, hit
+
+
+def run_pattern_cost_benchmark(
+    patterns: list[PatternEntry], inputs: dict[str, str], repeats: int = 3
+) -> list[dict[str, Any]]:
+    """Time every pattern against every input; rows ranked by max cost.
+
+    ``hits`` counts matching inputs; ``worst_input`` names the slowest one.
+    """
+    rows = []
+    for group, source, regex in patterns:
+        costs = []
+        hits = 0
+        worst_input = ""
+        for label, text in inputs.items():
+            cost, hit = _search_cost_ns(regex, text, repeats)
+            hits += hit
+            if not costs or cost > max(costs):
+                worst_input = label
+            costs.append(cost)
+        rows.append(
+            {
+                "group": group,
+                "pattern": source,
+                "mean_ms": sum(costs) / len(costs) / 1e6,
+                "max_ms": max(costs) / 1e6,
+                "hits": hits,
+                "worst_input": worst_input,
+            }
+        )
+    rows.sort(key=lambda row: row["max_ms"], reverse=True)
+    return rows
+
+
+def pattern_cost_inputs() -> dict[str, str]:
+    """Benchmark corpus (labelled by index) plus the adversarial inputs."""
+    inputs = {f"corpus[{i}]": command for i, command in enumerate(_breakdown_corpus())}
+    inputs.update(ADVERSARIAL_INPUTS)
+    return inputs
+
+
+def format_pattern_costs(rows: list[dict[str, Any]], top: int) -> str:
+    """Format the slowest rows as an aligned table."""
+    lines = [
+        f"  {'Group':<12} {'Mean ms':>9} {'Max ms':>9} {'Hits':>5}  {'Worst input':<20} Pattern"
+    ]
+    for row in rows[:top]:
+        pattern = row["pattern"] if len(row["pattern"]) <= 60 else row["pattern"][:57] + "..."
+        lines.append(
+            f"  {row['group']:<12} {row['mean_ms']:>9.4f} {row['max_ms']:>9.4f}"
+            f" {row['hits']:>5}  {row['worst_input']:<20} {pattern}"
+        )
+    return "\n".join(lines)
+
+
+def report_pattern_costs(budget_ms: float, top: int, repeats: int) -> int:
+    """Print the ranked slow-regex report; return 1 if any pattern exceeds budget_ms."""
+    patterns = collect_pattern_regexes(bash_tool.get_compiled_config())
+    inputs = pattern_cost_inputs()
+    print(
+        f"Per-pattern cost: {len(patterns)} patterns x {len(inputs)} inputs "
+        f"({len(ADVERSARIAL_INPUTS)} adversarial), best of {repeats}"
+    )
+    rows = run_pattern_cost_benchmark(patterns, inputs, repeats)
+    print(format_pattern_costs(rows, top))
+    over = [row for row in rows if row["max_ms"] > budget_ms]
+    if not over:
+        print(f"\nAll patterns within budget ({budget_ms} ms per search).")
+        return 0
+    print(f"\nFAIL: {len(over)} pattern(s) exceed the {budget_ms} ms budget:", file=sys.stderr)
+    for row in over:
+        print(
+            f"  [{row['group']}] {row['max_ms']:.2f} ms on {row['worst_input']}: {row['pattern']}",
+            file=sys.stderr,
+        )
+    return 1
+
+
+def _time_config_load(cache_dir: str, cold: bool) -> float:
+    """Time one get_compiled_config() as a fresh hook process would see it, in ms.
+
+    Cold deletes the on-disk cache first so YAML is parsed and the cache rebuilt;
+    warm loads the marshalled cache. re.purge() drops the regex compile cache
+    that a fresh interpreter would not have.
+    """
+    cache_path = Path(cache_dir) / "config.marshal"
+    if cold and cache_path.exists():
+        cache_path.unlink()
+    bash_tool._compiled_config_cache = None
+    bash_tool._allowed_hosts_cache = None
+    re.purge()
+    start = time.perf_counter()
+    bash_tool.get_compiled_config()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_config_load_benchmark(iterations: int = 20) -> dict[str, dict[str, float]]:
+    """Benchmark cold (YAML parse) vs warm (on-disk cache) config loading."""
+    previous = os.environ.get("CLAUDE_DAMAGE_CONTROL_CACHE_DIR")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["CLAUDE_DAMAGE_CONTROL_CACHE_DIR"] = cache_dir
+        try:
+            cold = [_time_config_load(cache_dir, cold=True) for _ in range(iterations)]
+            warm = [_time_config_load(cache_dir, cold=False) for _ in range(iterations)]
+        finally:
+            if previous is None:
+                os.environ.pop("CLAUDE_DAMAGE_CONTROL_CACHE_DIR", None)
+            else:
+                os.environ["CLAUDE_DAMAGE_CONTROL_CACHE_DIR"] = previous
+            bash_tool._compiled_config_cache = None
+            bash_tool._allowed_hosts_cache = None
+    return {"cold": calc_stats(cold), "warm": calc_stats(warm)}
+
+
 def format_stats(stats: dict[str, float]) -> str:
     """Format statistics for display."""
     return (
@@ -413,6 +695,66 @@ def format_ast_stats(label: str, stats: dict[str, float]) -> str:
     )
 
 
+# ============================================================================
+# LOG ROTATION
+# ============================================================================
+
+ROTATION_WORKERS = (1, 2, 4)
+
+
+def _rotation_log_body(file_bytes: int) -> bytes:
+    """About file_bytes of audit-log lines shaped like audit_log.py writes them."""
+    entries = [
+        json.dumps(
+            {
+                "timestamp": f"2026-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                "tool": "Bash",
+                "command": f"{BASH_COMMANDS[i % len(BASH_COMMANDS)]} # {i}",
+                "decision": "allowed",
+            }
+        )
+        for i in range(4096)
+    ]
+    chunk = ("\n".join(entries) + "\n").encode("utf-8")
+    return chunk * max(1, file_bytes // len(chunk))
+
+
+def run_rotation_benchmark(files: int = 4, file_mb: int = 16) -> dict[int, float]:
+    """Seconds to archive `files` logs of file_mb each, per ROTATION_WORKERS count."""
+    import log_rotate
+
+    body = _rotation_log_body(file_mb * 1024 * 1024)
+    oldest = datetime.now() - timedelta(days=log_rotate.ARCHIVE_DAYS + files + 1)
+    saved_workers = log_rotate.WORKERS
+    results: dict[int, float] = {}
+    with tempfile.TemporaryDirectory() as logs_dir:
+        try:
+            for workers in ROTATION_WORKERS:
+                for day in range(files):
+                    name = f"{oldest + timedelta(days=day):%Y-%m-%d}.log"
+                    (Path(logs_dir) / name).write_bytes(body)
+                log_rotate.WORKERS = workers
+                errors: list = []
+                start = time.perf_counter()
+                log_rotate._archive_old_logs(Path(logs_dir), datetime.now(), errors)
+                results[workers] = time.perf_counter() - start
+                if errors:
+                    raise RuntimeError(f"archiving failed: {errors}")
+                for archive in Path(logs_dir).iterdir():
+                    archive.unlink()
+        finally:
+            log_rotate.WORKERS = saved_workers
+    return results
+
+
+def report_rotation(files: int = 4, file_mb: int = 16) -> None:
+    print(f"Log rotation: archiving {files} x {file_mb} MB logs ({os.cpu_count()} CPUs)")
+    results = run_rotation_benchmark(files, file_mb)
+    for workers, seconds in results.items():
+        speedup = results[1] / seconds if seconds > 0 else 0.0
+        print(f"  {workers} worker(s): {seconds:.2f}s  ({speedup:.2f}x)")
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -442,8 +784,49 @@ def main() -> None:
         action="store_true",
         help="Use compiled patterns (Phase 1 optimizations)",
     )
+    parser.add_argument(
+        "--breakdown",
+        action="store_true",
+        help="Report per-stage latency (ms) instead; never appends to BENCHMARKS.md",
+    )
+    parser.add_argument(
+        "--patterns",
+        action="store_true",
+        help="Rank per-pattern regex cost instead; exit 1 if any exceeds the budget",
+    )
+    parser.add_argument(
+        "--pattern-budget-ms",
+        type=float,
+        default=DEFAULT_PATTERN_BUDGET_MS,
+        help=f"Max ms for one search in --patterns mode (default: {DEFAULT_PATTERN_BUDGET_MS})",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=25,
+        help="Rows to show in --patterns mode (default: 25)",
+    )
+    parser.add_argument(
+        "--rotation",
+        action="store_true",
+        help="Time log archiving with 1, 2 and 4 workers instead; never appends",
+    )
     args = parser.parse_args()
 
+    if args.rotation:
+        report_rotation()
+        return
+
+    if args.patterns:
+        sys.exit(report_pattern_costs(args.pattern_budget_ms, args.top, repeats=3))
+
+    if args.breakdown:
+        passes = max(2, args.iterations // 100)
+        corpus_size = len(_breakdown_corpus())
+        print(f"Per-stage breakdown ({passes} passes over {corpus_size} commands, ms):")
+        print(format_breakdown(run_breakdown_benchmark(passes)))
+        return
+
     print("Loading patterns...")
     config = load_patterns()
 
@@ -468,6 +851,14 @@ def main() -> None:
     print("Path Pattern Matching:")
     print(format_stats(stats["path"]))
 
+    load_iters = max(5, args.iterations // 50)
+    print(f"\nConfig Load ({load_iters} iterations):")
+    load_stats = run_config_load_benchmark(load_iters)
+    print("Cold (parse patterns.yaml, rebuild cache):")
+    print(format_stats(load_stats["cold"]))
+    print("Warm (load on-disk cache):")
+    print(format_stats(load_stats["warm"]))
+
     # AST benchmark: regex-only vs regex+AST comparison.
     ast_iters = max(10, args.iterations // 10)
     print(f"\nAST Analysis Benchmark ({ast_iters} iterations):")
@@ -0,0 +1,74 @@
+"""
+Parsed-Config Cache for Damage Control
+======================================
+
+On-disk cache of parsed YAML configs, shared by bash-tool-damage-control.py
+(patterns.yaml) and taint-tracker.py (taint-config.yaml).
+
+Each hook stores a marshal payload keyed by a SHA-256 over the files the
+parsed result depends on, so a hit skips PyYAML entirely (including its
+import) and any edit to those files rebuilds the cache. marshal is used
+instead of pickle so loading the cache cannot run code; its output is only
+stable within one interpreter version, which is part of the key.
+
+Environment variables:
+  CLAUDE_DAMAGE_CONTROL_CACHE_DIR - Directory for the cache files
+                                    (default ~/.claude/cache/damage-control)
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+CACHE_DIR_ENV = "CLAUDE_DAMAGE_CONTROL_CACHE_DIR"
+
+
+def get_cache_path(filename: str) -> Path:
+    """Path of a cache file in the damage-control cache directory."""
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return Path(cache_dir) / filename
+    return Path(os.path.expanduser("~")) / ".claude" / "cache" / "damage-control" / filename
+
+
+def cache_key(paths: Iterable[Path], payload_format: int = 0) -> str:
+    """SHA-256 over each path and its contents, the payload format and Python.
+
+    Also used as a fingerprint of the loaded config for in-process caches.
+    Missing files hash as empty. Raises OSError if a file cannot be read.
+    """
+    digest = hashlib.sha256(f"format={payload_format};python={sys.version}\0".encode())
+    for path in paths:
+        digest.update(str(path).encode("utf-8") + b"\0")
+        digest.update(path.read_bytes() if path.exists() else b"")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def read_cache(cache_path: Path, key: str) -> Optional[dict[str, Any]]:
+    """Return the cached payload if it exists, decodes, and matches key."""
+    try:
+        payload = marshal.loads(cache_path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("key") != key:
+        return None
+    return payload
+
+
+def write_cache(cache_path: Path, payload: dict[str, Any]) -> None:
+    """Atomically replace the cache file (write temp file, then rename)."""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(marshal.dumps(payload))
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError):
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,315 @@
+# /// script
+# requires-python = ">=3.8"
+# dependencies = ["pyyaml", "tree-sitter>=0.23.0", "tree-sitter-bash>=0.23.0"]
+# ///
+"""
+Damage Control Daemon - long-lived server for the Bash PreToolUse hook.
+
+Keeps the compiled patterns.yaml config and the tree-sitter parser warm in one
+per-user process so each Bash tool call only pays for a socket round-trip.
+The thin client (bash-tool-damage-control-client.py) forwards the hook JSON
+and relays exit code, stderr and the permissionDecision JSON verbatim. If the
+daemon is absent or unhealthy the client falls back to the in-process hook.
+
+The daemon is opt-in. Start it by hand with `serve`, or have the hooks start
+it on demand by adding "CLAUDE_DAMAGE_CONTROL_DAEMON": "autostart" to the
+"env" block of ~/.claude/settings.json (or exporting it before launching).
+
+Usage:
+  uv run damage_control_daemon.py serve [--idle-timeout SECONDS]
+  uv run damage_control_daemon.py status
+  uv run damage_control_daemon.py stop
+
+Protocol (local_socket.py: one request per connection, one JSON line each way):
+  {"op": "check", "input": {...hook JSON...}, "cwd": "...", "user": "...",
+   "env": {...FORWARDED_ENV set in the client...}}
+      -> {"exit_code": 0|2, "stdout": "...", "stderr": "..."}
+  {"op": "ping"}      -> {"ok": true, "pid": 1234}
+  {"op": "shutdown"}  -> {"ok": true}
+  Any failure         -> {"error": "..."}
+
+Environment variables:
+  CLAUDE_DAMAGE_CONTROL_SOCKET - Override the socket path
+                                 (default: ~/.claude/run/damage-control.sock)
+
+The client's FORWARDED_ENV settings (disabled hooks, budget, profiling,
+decision cache mode) apply to its own check, not the daemon's startup values.
+
+Unix only: on platforms without AF_UNIX the client always runs in-process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import local_socket
+
+SOCKET_ENV = "CLAUDE_DAMAGE_CONTROL_SOCKET"
+DEFAULT_IDLE_TIMEOUT = 1800.0
+CLIENT_TIMEOUT = 3.0
+
+HOOK_SCRIPT = Path(__file__).parent / "bash-tool-damage-control.py"
+
+# Per-session settings the client sends with each check.
+FORWARDED_ENV = (
+    "CLAUDE_DISABLE_HOOKS",
+    "CLAUDE_DAMAGE_CONTROL_BUDGET_MS",
+    "CLAUDE_DAMAGE_CONTROL_PROFILE",
+    "CLAUDE_DAMAGE_CONTROL_DECISION_CACHE",
+)
+
+is_supported = local_socket.is_supported
+
+
+def get_socket_path() -> Path:
+    """Return the per-user daemon socket path."""
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return Path(override)
+    return Path(os.path.expanduser("~")) / ".claude" / "run" / "damage-control.sock"
+
+
+def send_request(
+    payload: dict[str, Any],
+    socket_path: Path | None = None,
+    timeout: float = CLIENT_TIMEOUT,
+) -> dict[str, Any] | None:
+    """Send one request to the daemon; return the decoded reply or None on any failure."""
+    return local_socket.send_request(payload, socket_path or get_socket_path(), timeout)
+
+
+def forwarded_env() -> dict[str, str]:
+    """This process's FORWARDED_ENV settings, for a check request."""
+    return {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ}
+
+
+def is_valid_outcome(reply: dict[str, Any] | None) -> bool:
+    """Return True if a daemon reply carries a well-formed hook outcome."""
+    if not reply or "error" in reply:
+        return False
+    return (
+        isinstance(reply.get("exit_code"), int)
+        and isinstance(reply.get("stdout"), str)
+        and isinstance(reply.get("stderr"), str)
+    )
+
+
+def ping(socket_path: Path | None = None, timeout: float = 0.5) -> bool:
+    """Return True if a healthy daemon answers on socket_path."""
+    return local_socket.ping(socket_path or get_socket_path(), timeout)
+
+
+def spawn_detached(socket_path: Path | None = None) -> None:
+    """Fire-and-forget start of the daemon in its own session."""
+    if not is_supported():
+        return
+    env = dict(os.environ)
+    if socket_path is not None:
+        env[SOCKET_ENV] = str(socket_path)
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            env=env,
+        )
+    except OSError:
+        pass
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+def load_hook_module() -> ModuleType:
+    """Import bash-tool-damage-control.py (hyphenated filename) as a module."""
+    hook_dir = str(Path(__file__).parent)
+    if hook_dir not in sys.path:
+        sys.path.insert(0, hook_dir)
+    spec = importlib.util.spec_from_file_location("bash_tool", HOOK_SCRIPT)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+@contextmanager
+def request_environment(env: Any) -> Iterator[None]:
+    """Apply a client's forwarded settings for one request, then restore the daemon's.
+
+    Requests are handled serially, so changing os.environ here is safe. A
+    request without "env" (an older client) runs with the daemon's own values.
+    """
+    if not isinstance(env, dict):
+        yield
+        return
+    saved = {name: os.environ.get(name) for name in FORWARDED_ENV}
+    _set_environment({name: env.get(name) for name in FORWARDED_ENV})
+    try:
+        yield
+    finally:
+        _set_environment(saved)
+
+
+def _set_environment(values: dict[str, Any]) -> None:
+    for name, value in values.items():
+        if isinstance(value, str):
+            os.environ[name] = value
+        else:
+            os.environ.pop(name, None)
+
+
+class DamageControlServer(local_socket.UnixStreamServer):
+    """Serial Unix-socket server holding a warm copy of the Bash hook module.
+
+    Requests are handled one at a time: checks are millisecond-scale and the
+    tree-sitter parser is not shared across threads.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        hook: ModuleType | None = None,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        self.socket_path = socket_path
+        self.hook = hook or load_hook_module()
+        self.timeout = idle_timeout
+        self.running = True
+        self._source_stamps = self._stamps(self._source_paths())
+        self._config_stamps = self._stamps(self._config_paths())
+        self.hook.get_compiled_config()
+        local_socket.prepare_socket_path(socket_path, "daemon")
+        super().__init__(str(socket_path), local_socket.JsonLineHandler)
+        os.chmod(socket_path, 0o600)
+
+    def _source_paths(self) -> list[Path]:
+        hook_dir = Path(__file__).parent
+        return [
+            HOOK_SCRIPT,
+            Path(__file__),
+            hook_dir / "ast_analyzer.py",
+            hook_dir / "audit_log.py",
+            hook_dir / "local_socket.py",
+        ]
+
+    def _config_paths(self) -> list[Path]:
+        return [self.hook.get_config_path(), self.hook.get_allowed_hosts_path()]
+
+    @staticmethod
+    def _stamps(paths: list[Path]) -> list[tuple[int, int]]:
+        return [local_socket.file_stamp(p) for p in paths]
+
+    def _refresh(self) -> str | None:
+        """Reload config when YAML changed; return an error if hook code changed."""
+        if self._stamps(self._source_paths()) != self._source_stamps:
+            self.running = False
+            return "stale: hook source changed, daemon exiting"
+        stamps = self._stamps(self._config_paths())
+        if stamps != self._config_stamps:
+            self.hook._compiled_config_cache = None
+            self.hook._allowed_hosts_cache = None
+            self.hook.get_compiled_config()
+            self._config_stamps = stamps
+        return None
+
+    def dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Handle a decoded request and return the reply payload."""
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "shutdown":
+            self.running = False
+            return {"ok": True}
+        if op != "check":
+            return {"error": f"unknown op: {op!r}"}
+
+        stale = self._refresh()
+        if stale:
+            return {"error": stale}
+        with request_environment(request.get("env")):
+            return self._check(request)
+
+    def _check(self, request: dict[str, Any]) -> dict[str, Any]:
+        if self.hook.is_hook_disabled():
+            return {"exit_code": 0, "stdout": "", "stderr": ""}
+        outcome = self.hook.evaluate_hook_input(
+            request.get("input") or {},
+            cwd=request.get("cwd"),
+            user=request.get("user"),
+        )
+        return {"exit_code": outcome.exit_code, "stdout": outcome.stdout, "stderr": outcome.stderr}
+
+    def handle_timeout(self) -> None:
+        """Exit after idle_timeout seconds without a request."""
+        self.running = False
+
+    def serve_until_idle(self) -> None:
+        """Handle requests until shutdown, idle timeout, or a stale-source reply."""
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def serve(socket_path: Path | None = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> int:
+    """Run the daemon in the foreground; return a process exit code."""
+    if not is_supported():
+        print("Error: Unix domain sockets are not supported on this platform", file=sys.stderr)
+        return 1
+    try:
+        server = DamageControlServer(socket_path or get_socket_path(), idle_timeout=idle_timeout)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    # Audit entries are batched by a background writer and flushed on the way out.
+    audit_log = server.hook.audit_log
+    audit_log.enable_buffering()
+    try:
+        server.serve_until_idle()
+    finally:
+        audit_log.disable_buffering()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Damage-control Bash hook daemon")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT:.0f})",
+    )
+    args = parser.parse_args()
+
+    socket_path = get_socket_path()
+    if args.command == "serve":
+        sys.exit(serve(socket_path, args.idle_timeout))
+    if args.command == "status":
+        running = ping(socket_path)
+        print(f"{'running' if running else 'not running'}: {socket_path}")
+        sys.exit(0 if running else 1)
+    reply = send_request({"op": "shutdown"}, socket_path)
+    print("stopped" if reply and reply.get("ok") else "not running")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,34 @@
 from __future__ import annotations
 
 import fnmatch
+import importlib
 import json
 import os
+import random
 import re
 import subprocess
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable
 
 import yaml
 
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
+audit_log = importlib.import_module("audit_log")
+gated_patterns = importlib.import_module("gated_patterns")
+PatternIndex = gated_patterns.PatternIndex
+window_search = gated_patterns.window_search
+
 
 def get_log_path() -> Path:
     """Get the path to the daily JSONL audit log."""
-    logs_dir = Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    return logs_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+    log_path = audit_log.get_log_path()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return log_path
 
 
 def log_decision(
@@ -29,10 +39,13 @@ def log_decision(
     decision: str,
     reason: str = "",
     context: str | None = None,
+    content_scan: dict[str, Any] | None = None,
 ) -> None:
-    """Log a security decision to the audit log in JSONL format."""
+    """Log a security decision to the audit log in JSONL format.
+
+    content_scan records which parts of oversized content were scanned.
+    """
     try:
-        log_path = get_log_path()
         file_path_truncated = file_path[:200]
         if len(file_path) > 200:
             file_path_truncated += "..."
@@ -47,9 +60,10 @@ def log_decision(
             "user": os.getenv("USER", "unknown"),
             "cwd": os.getcwd(),
         }
+        if content_scan is not None:
+            log_entry["content_scan"] = content_scan
 
-        with open(log_path, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        audit_log.write_entry(log_entry)
     except Exception as e:
         print(f"Warning: Failed to write audit log: {e}", file=sys.stderr)
 
@@ -191,21 +205,141 @@ def _path_matches_content_scan(file_path: str, config: dict[str, Any]) -> bool:
     return any(match_path(file_path, path) for path in config.get("contentScanPaths", []))
 
 
+# Defaults for patterns.yaml contentScanLimits. Sizes are in characters of the
+# decoded content (bytes for ASCII). Content up to max_bytes is scanned whole;
+# beyond that only the head, the tail and sample_windows randomly placed
+# windows of the middle are scanned, so latency stays bounded.
+DEFAULT_CONTENT_SCAN_LIMITS = {
+    "max_bytes": 1024 * 1024,
+    "head_bytes": 256 * 1024,
+    "tail_bytes": 256 * 1024,
+    "sample_windows": 8,
+    "window_bytes": 64 * 1024,
+}
+
+# Scanned spans are searched SCAN_CHUNK_CHARS at a time, each search looking
+# SCAN_OVERLAP_CHARS further so matches starting near a chunk end are whole.
+SCAN_CHUNK_CHARS = 256 * 1024
+SCAN_OVERLAP_CHARS = 4 * 1024
+
+_sampler = random.Random()
+
+
+# The matcher for the injectionPatterns seen last, keyed by their contents, so
+# every reload of an unchanged config reuses it and at most one is kept.
+_matcher_cache: dict[str, PatternIndex] = {}
+
+
+def get_injection_matcher(config: dict[str, Any]) -> PatternIndex:
+    """Return the gated matcher for config's injectionPatterns (built once per contents)."""
+    entries = config.get("injectionPatterns", []) or []
+    key = json.dumps(entries, sort_keys=True, default=str)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = PatternIndex(entries, re.IGNORECASE | re.MULTILINE)
+        _matcher_cache.clear()
+        _matcher_cache[key] = matcher
+    return matcher
+
+
+def get_content_scan_limits(config: dict[str, Any]) -> dict[str, int]:
+    """Merge patterns.yaml contentScanLimits over the defaults."""
+    limits = dict(DEFAULT_CONTENT_SCAN_LIMITS)
+    for key, value in (config.get("contentScanLimits") or {}).items():
+        if key in limits and isinstance(value, int) and value >= 0:
+            limits[key] = value
+    return limits
+
+
+def content_scan_spans(size: int, limits: dict[str, int]) -> list[tuple[int, int]]:
+    """(start, end) spans to scan: everything, or head + sampled middle + tail."""
+    if size <= limits["max_bytes"]:
+        return [(0, size)]
+    head_end = min(limits["head_bytes"], size)
+    tail_start = max(size - limits["tail_bytes"], head_end)
+    spans = [(0, head_end)]
+    middle = tail_start - head_end
+    window = min(limits["window_bytes"], middle)
+    count = limits["sample_windows"] if window else 0
+    # One window at a random offset inside each of `count` equal strata.
+    stratum = middle / count if count else 0
+    for i in range(count):
+        low = head_end + int(i * stratum)
+        high = max(low, head_end + int((i + 1) * stratum) - window)
+        start = _sampler.randint(low, high)
+        spans.append((start, min(start + window, tail_start)))
+    spans.append((tail_start, size))
+    return [(start, end) for start, end in spans if end > start]
+
+
+def _first_match_before(
+    matcher: PatternIndex, content: str, window: tuple[int, int], best: int
+) -> int:
+    """Index of the first pattern before best that matches in window, else best."""
+    pos, endpos = window
+    if not matcher.may_match(content, pos, endpos):
+        return best
+    # Only patterns listed before the current best can change the answer.
+    for idx in range(best):
+        if window_search(matcher.compiled[idx][0], content, pos, endpos) is not None:
+            return idx
+    return best
+
+
+class ContentScanResult:
+    """Outcome of scan_content(): the first matching pattern type, and coverage.
+
+    coverage is None when the whole content was scanned; otherwise it records
+    the size and the spans that were scanned, for the audit log.
+    """
+
+    def __init__(self) -> None:
+        self.pattern_type: str | None = None
+        self.coverage: dict[str, Any] | None = None
+
+
+def scan_content(content: str, config: dict[str, Any]) -> ContentScanResult:
+    """Scan content against injectionPatterns within the configured limits.
+
+    Reports the first pattern (in list order) that matches any scanned span,
+    like searching each pattern over the whole text.
+    """
+    result = ContentScanResult()
+    if not content:
+        return result
+    matcher = get_injection_matcher(config)
+    size = len(content)
+    spans = content_scan_spans(size, get_content_scan_limits(config))
+    if spans != [(0, size)]:
+        result.coverage = {
+            "mode": "sampled",
+            "size": size,
+            "scanned": sum(end - start for start, end in spans),
+            "spans": [[start, end] for start, end in spans],
+        }
+    if not matcher.compiled:
+        return result
+
+    best = len(matcher.compiled)
+    for span_start, span_end in spans:
+        for pos in range(span_start, span_end, SCAN_CHUNK_CHARS):
+            endpos = min(pos + SCAN_CHUNK_CHARS + SCAN_OVERLAP_CHARS, size)
+            best = _first_match_before(matcher, content, (pos, endpos), best)
+            if best == 0:
+                break
+        if best == 0:
+            break
+    if best < len(matcher.compiled):
+        result.pattern_type = matcher.compiled[best][1].get("type", "unknown")
+    return result
+
+
 def _scan_content_for_injections(content: str, config: dict[str, Any]) -> str | None:
     """Return the reason for a matching injection pattern, if any."""
-    if not content:
+    pattern_type = scan_content(content, config).pattern_type
+    if pattern_type is None:
         return None
-    for pattern_info in config.get("injectionPatterns", []):
-        pattern_str = pattern_info.get("pattern", "")
-        if not pattern_str:
-            continue
-        try:
-            if re.search(pattern_str, content, re.IGNORECASE | re.MULTILINE):
-                pattern_type = pattern_info.get("type", "unknown")
-                return f"Injection pattern detected ({pattern_type}) in content being written"
-        except re.error:
-            continue
-    return None
+    return f"Injection pattern detected ({pattern_type}) in content being written"
 
 
 def _check_write_confirm(file_path: str, config: dict[str, Any]) -> str | None:
@@ -238,7 +372,7 @@ def check_path(
     return False, ""
 
 
-LogDecision = Callable[[str, str, str, str, Optional[str]], None]
+LogDecision = Callable[..., None]
 
 
 def check_content_injection(
@@ -249,16 +383,37 @@ def check_content_injection(
     context: str | None,
     log_decision_fn: LogDecision = log_decision,
     spawn_log_rotation_fn: Callable[[], None] = spawn_log_rotation,
-) -> None:
-    """Emit the existing ask protocol when scanned content contains an injection."""
+) -> dict[str, Any] | None:
+    """Emit the existing ask protocol when scanned content contains an injection.
+
+    Returns the scan coverage record when oversized content was only sampled.
+    """
     if not content or not _path_matches_content_scan(file_path, config):
-        return
-    reason = _scan_content_for_injections(content, config)
-    if reason:
-        log_decision_fn(tool_name, file_path, "ask", reason, context)
+        return None
+    scan = scan_content(content, config)
+    if scan.pattern_type is not None:
+        reason = f"Injection pattern detected ({scan.pattern_type}) in content being written"
+        _log_with_scan(log_decision_fn, tool_name, file_path, "ask", reason, context, scan.coverage)
         spawn_log_rotation_fn()
         print(json.dumps({"permissionDecision": "ask", "reason": reason}))
         sys.exit(0)
+    return scan.coverage
+
+
+def _log_with_scan(
+    log_decision_fn: LogDecision,
+    tool_name: str,
+    file_path: str,
+    decision: str,
+    reason: str,
+    context: str | None,
+    coverage: dict[str, Any] | None,
+) -> None:
+    """Call log_decision_fn, adding content_scan only when content was sampled."""
+    if coverage is None:
+        log_decision_fn(tool_name, file_path, decision, reason, context)
+    else:
+        log_decision_fn(tool_name, file_path, decision, reason, context, content_scan=coverage)
 
 
 def run_file_operation_hook(
@@ -295,7 +450,7 @@ def run_file_operation_hook(
         print(json.dumps({"permissionDecision": "ask", "reason": confirm_reason}))
         sys.exit(0)
 
-    check_content_injection(
+    coverage = check_content_injection(
         tool_name,
         file_path,
         tool_input.get(content_field, ""),
@@ -307,9 +462,9 @@ def run_file_operation_hook(
 
     blocked, reason = check_path(file_path, config, context=context)
     if blocked:
-        log_decision_fn(tool_name, file_path, "blocked", reason, context)
+        _log_with_scan(log_decision_fn, tool_name, file_path, "blocked", reason, context, coverage)
     else:
-        log_decision_fn(tool_name, file_path, "allowed", "", context)
+        _log_with_scan(log_decision_fn, tool_name, file_path, "allowed", "", context, coverage)
 
     spawn_log_rotation_fn()
     if blocked:
@@ -0,0 +1,97 @@
+"""
+Gated Pattern Matching for Damage Control
+=========================================
+
+Shared by taint-tracker.py (sensitivePaths, networkCommands),
+file_operation_damage_control.py (injectionPatterns in written content) and
+post-tool-injection-detection.py (windowed scan of tool output).
+
+PatternIndex compiles a pattern list once and alternates every pattern that
+can be combined into one gate regex, so text that matches none of them (the
+common case) is rejected in a single scan. window_search() searches a slice
+of a large text without copying it, for scanning in bounded windows.
+"""
+
+import re
+from typing import Any, Optional
+
+# Backreferences are numbered/named per pattern, so they cannot be alternated.
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def is_combinable(pattern: str) -> bool:
+    """True if pattern can be one branch of an alternation without changing meaning."""
+    if _BACKREFERENCE.search(pattern):
+        return False
+    try:
+        re.compile(f"(?:{pattern})|x")
+    except re.error:
+        return False
+    return True
+
+
+def window_search(
+    regex: "re.Pattern[str]", content: str, pos: int, endpos: int
+) -> Optional["re.Match[str]"]:
+    """regex.search over content[pos:endpos] without slicing.
+
+    endpos acts as end-of-string ($, \\b, greedy runs), so a match reaching it
+    is re-run against the full string before it counts.
+    """
+    while pos <= endpos:
+        match = regex.search(content, pos, endpos)
+        if match is None or match.end() < endpos or endpos == len(content):
+            return match
+        full = regex.match(content, match.start())
+        if full is not None:
+            return full
+        pos = match.start() + 1
+    return None
+
+
+class PatternIndex:
+    """Pattern list compiled once, with a single-scan gate.
+
+    ``gate`` alternates every pattern that can be combined. Only on a gate
+    hit, or when some pattern cannot be combined (``ungated``), are the
+    per-entry regexes in ``compiled`` tried in list order. Entries without a
+    pattern or with an invalid one are skipped.
+    """
+
+    def __init__(self, entries: list[dict[str, Any]], flags: int = re.IGNORECASE) -> None:
+        self.entries = entries
+        self.compiled: list[tuple[re.Pattern, dict[str, Any]]] = []
+        self.ungated = False
+        alternatives: list[str] = []
+        for pattern_info in entries:
+            pattern = pattern_info.get("pattern", "") if isinstance(pattern_info, dict) else ""
+            if not pattern:
+                continue
+            try:
+                regex = re.compile(pattern, flags)
+            except re.error:
+                continue
+            self.compiled.append((regex, pattern_info))
+            if is_combinable(pattern):
+                alternatives.append(f"(?:{pattern})")
+            else:
+                self.ungated = True
+        self.gate = re.compile("|".join(alternatives), flags) if alternatives else None
+
+    def may_match(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> bool:
+        """False when no entry can match text[pos:endpos] (see window_search)."""
+        if self.ungated:
+            return True
+        if self.gate is None:
+            return False
+        end = len(text) if endpos is None else endpos
+        return window_search(self.gate, text, pos, end) is not None
+
+    def first_match(self, text: str) -> Optional[dict[str, Any]]:
+        """Return the first entry (in list order) whose pattern matches text."""
+        if not self.may_match(text):
+            return None
+        for regex, pattern_info in self.compiled:
+            if regex.search(text):
+                return pattern_info
+        return None
@@ -0,0 +1,343 @@
+# /// script
+# requires-python = ">=3.8"
+# dependencies = ["pyyaml", "tree-sitter>=0.23.0", "tree-sitter-bash>=0.23.0"]
+# ///
+"""
+Unified PreToolUse/PostToolUse Hook Dispatcher
+==============================================
+
+One registration per event instead of one Python process per hook. The
+dispatcher reads the hook JSON once, picks the sub-hooks for the event and
+tool, imports each of them as a module (once per process), runs them in
+order, and merges their outcomes with the strictest one winning:
+
+  block (exit 2 or permissionDecision "deny")
+    > ask
+    > other stdout (updatedInput, additionalContext)
+    > error (any other non-zero exit)
+    > allow
+
+The winning sub-hook's exit code, stdout and stderr are relayed verbatim, so
+each hook keeps its own exit-code/JSON contract. Sub-hooks that write to
+stdout/stderr and call sys.exit() in main() are run with stdin, stdout and
+stderr redirected and SystemExit caught; an unexpected exception is reported
+like a crashed hook process would be (exit 1, non-blocking).
+
+Audit log entries from all sub-hooks are buffered (audit_log.py) and written
+in one append once dispatch finishes.
+
+Sub-hooks (the hooks settings.json registered separately before):
+  PreToolUse
+    path-normalization         Edit, Write
+    bash-tool-damage-control   Bash (through the daemon when it is running, see
+                               bash-tool-damage-control-client.py)
+    edit-tool-damage-control   Edit
+    write-tool-damage-control  Write
+
+A path fix from path-normalization (updatedInput) is carried into a stricter
+JSON outcome, so an ask from the edit/write check still applies to the
+corrected path.
+
+Usage (settings.json, matcher "Bash|Edit|Write"):
+  python $HOME/.claude/hooks/damage-control/hook-dispatcher.py PreToolUse
+The event may be omitted, in which case hook_event_name from the input is used.
+
+Environment variables:
+  CLAUDE_DISABLE_HOOKS - Comma-separated hook names to disable. Each sub-hook
+                         is disabled by its own name above; hooks that already
+                         honoured a family name ("damage-control",
+                         "path-normalization") still do. "hook-dispatcher"
+                         disables the dispatcher entirely.
+  CLAUDE_DAMAGE_CONTROL_DAEMON - Opt-in: "autostart" starts the damage-control
+                         daemon in the background when the Bash check finds it
+                         not running (see damage_control_daemon.py). Unset by
+                         default, so the check runs in-process unless a daemon
+                         was started by hand.
+"""
+
+import importlib
+import importlib.util
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+HOOK_NAME = "hook-dispatcher"
+HOOK_DIR = Path(__file__).parent
+HOOKS_ROOT = HOOK_DIR.parent
+
+if str(HOOK_DIR) not in sys.path:
+    sys.path.insert(0, str(HOOK_DIR))
+
+audit_log = importlib.import_module("audit_log")
+
+
+def _disabled_hooks() -> set[str]:
+    return {h.strip() for h in os.environ.get("CLAUDE_DISABLE_HOOKS", "").split(",")}
+
+
+def is_hook_disabled() -> bool:
+    """Check if the dispatcher itself is disabled via CLAUDE_DISABLE_HOOKS."""
+    return HOOK_NAME in _disabled_hooks()
+
+
+# ============================================================================
+# OUTCOMES
+# ============================================================================
+
+
+@dataclass
+class HookOutcome:
+    """What one hook process would have printed and exited with."""
+
+    exit_code: int = 0
+    stdout: str = ""
+    stderr: str = ""
+
+
+ALLOW, ERROR, CONTEXT, ASK, BLOCK = range(5)
+
+
+def _json_output(stdout: str) -> Optional[dict[str, Any]]:
+    try:
+        output = json.loads(stdout)
+    except ValueError:
+        return None
+    return output if isinstance(output, dict) else None
+
+
+def _permission_decision(stdout: str) -> Optional[str]:
+    """permissionDecision from hookSpecificOutput or the top-level form the file hooks use."""
+    output = _json_output(stdout)
+    if output is None:
+        return None
+    specific = output.get("hookSpecificOutput")
+    if isinstance(specific, dict) and "permissionDecision" in specific:
+        return specific["permissionDecision"]
+    return output.get("permissionDecision")
+
+
+def strictness(outcome: HookOutcome) -> int:
+    """Rank an outcome; higher is stricter."""
+    if outcome.exit_code == 2:
+        return BLOCK
+    if outcome.exit_code == 0 and outcome.stdout.strip():
+        decision = _permission_decision(outcome.stdout)
+        if decision == "deny":
+            return BLOCK
+        if decision == "ask":
+            return ASK
+        return CONTEXT
+    if outcome.exit_code != 0:
+        return ERROR
+    return ALLOW
+
+
+def _updated_input(outcome: HookOutcome) -> Optional[dict[str, Any]]:
+    output = _json_output(outcome.stdout) if outcome.exit_code == 0 else None
+    specific = (output or {}).get("hookSpecificOutput")
+    return specific.get("updatedInput") if isinstance(specific, dict) else None
+
+
+def _with_updated_input(outcome: HookOutcome, updated: dict[str, Any]) -> HookOutcome:
+    """Add updatedInput to a JSON outcome, moving a top-level decision alongside it."""
+    output = _json_output(outcome.stdout) if outcome.exit_code == 0 else None
+    if output is None:
+        return outcome
+    specific = output.setdefault("hookSpecificOutput", {"hookEventName": "PreToolUse"})
+    if "permissionDecision" in output:
+        specific.setdefault("permissionDecision", output["permissionDecision"])
+        specific.setdefault("permissionDecisionReason", output.get("reason", ""))
+    specific["updatedInput"] = updated
+    return HookOutcome(outcome.exit_code, json.dumps(output) + "\n", outcome.stderr)
+
+
+def merge_outcomes(outcomes: list[HookOutcome]) -> HookOutcome:
+    """Return the strictest outcome; ties go to the earliest sub-hook.
+
+    When a stricter JSON outcome wins over a path fix, the fix's updatedInput
+    is carried into it.
+    """
+    if not outcomes:
+        return HookOutcome()
+    winner = max(outcomes, key=strictness)
+    updated = next((u for u in map(_updated_input, outcomes) if u is not None), None)
+    if updated is None or _updated_input(winner) is not None:
+        return winner
+    return _with_updated_input(winner, updated)
+
+
+# ============================================================================
+# SUB-HOOK LOADING
+# ============================================================================
+
+_modules: dict[str, ModuleType] = {}
+
+
+def load_hook_module(path: Path) -> ModuleType:
+    """Import a hook script (hyphenated filenames allowed) once per process."""
+    key = str(path)
+    if key not in _modules:
+        spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+        module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+        spec.loader.exec_module(module)  # type: ignore[union-attr]
+        _modules[key] = module
+    return _modules[key]
+
+
+def run_main(main: Callable[[], None], input_data: dict[str, Any]) -> HookOutcome:
+    """Run a stdin/stdout/sys.exit style hook main() in-process and capture its outcome."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(json.dumps(input_data))
+    exit_code = 0
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            main()
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            stderr.write(f"{e.code}\n")
+            exit_code = 1
+    finally:
+        sys.stdin = saved_stdin
+    return HookOutcome(exit_code, stdout.getvalue(), stderr.getvalue())
+
+
+# ============================================================================
+# SUB-HOOK ADAPTERS
+# ============================================================================
+
+
+def _path_normalization(input_data: dict[str, Any]) -> HookOutcome:
+    hook = load_hook_module(HOOKS_ROOT / "path-normalization" / "path-normalization-hook.py")
+    return run_main(hook.main, input_data)
+
+
+def _bash_tool(input_data: dict[str, Any]) -> HookOutcome:
+    client = load_hook_module(HOOK_DIR / "bash-tool-damage-control-client.py")
+    reply = client.daemon_outcome(input_data)
+    if reply is not None:
+        return HookOutcome(reply["exit_code"], reply["stdout"], reply["stderr"])
+    hook = load_hook_module(HOOK_DIR / "bash-tool-damage-control.py")
+    if hook.is_hook_disabled():
+        return HookOutcome()
+    outcome = hook.evaluate_hook_input(input_data)
+    return HookOutcome(outcome.exit_code, outcome.stdout, outcome.stderr)
+
+
+def _edit_tool(input_data: dict[str, Any]) -> HookOutcome:
+    return run_main(load_hook_module(HOOK_DIR / "edit-tool-damage-control.py").main, input_data)
+
+
+def _write_tool(input_data: dict[str, Any]) -> HookOutcome:
+    return run_main(load_hook_module(HOOK_DIR / "write-tool-damage-control.py").main, input_data)
+
+
+# ============================================================================
+# ROUTING
+# ============================================================================
+
+ANY_TOOL = "*"
+
+
+@dataclass(frozen=True)
+class SubHook:
+    """One sub-hook: where it runs, how it is disabled, and how to run it."""
+
+    name: str
+    event: str
+    tools: frozenset[str]
+    run: Callable[[dict[str, Any]], HookOutcome]
+    family: str = ""
+
+    def handles(self, event: str, tool_name: str) -> bool:
+        return self.event == event and (ANY_TOOL in self.tools or tool_name in self.tools)
+
+    def is_disabled(self, disabled: set[str]) -> bool:
+        return self.name in disabled or (bool(self.family) and self.family in disabled)
+
+
+SUB_HOOKS: tuple[SubHook, ...] = (
+    SubHook(
+        "path-normalization",
+        "PreToolUse",
+        frozenset({"Edit", "Write"}),
+        _path_normalization,
+        "path-normalization",
+    ),
+    SubHook(
+        "bash-tool-damage-control", "PreToolUse", frozenset({"Bash"}), _bash_tool, "damage-control"
+    ),
+    SubHook("edit-tool-damage-control", "PreToolUse", frozenset({"Edit"}), _edit_tool),
+    SubHook("write-tool-damage-control", "PreToolUse", frozenset({"Write"}), _write_tool),
+)
+
+
+def select_sub_hooks(event: str, tool_name: str) -> list[SubHook]:
+    """Sub-hooks for this event and tool that are not disabled, in registration order."""
+    disabled = _disabled_hooks()
+    return [
+        hook
+        for hook in SUB_HOOKS
+        if hook.handles(event, tool_name) and not hook.is_disabled(disabled)
+    ]
+
+
+def _run_sub_hook(hook: SubHook, input_data: dict[str, Any]) -> HookOutcome:
+    try:
+        return hook.run(input_data)
+    except Exception as e:
+        return HookOutcome(exit_code=1, stderr=f"{hook.name}: {type(e).__name__}: {e}\n")
+
+
+def dispatch(input_data: dict[str, Any], event: Optional[str] = None) -> HookOutcome:
+    """Run every applicable sub-hook for one payload and merge the outcomes."""
+    event = event or input_data.get("hook_event_name", "")
+    tool_name = input_data.get("tool_name", "")
+    hooks = select_sub_hooks(event, tool_name)
+    return merge_outcomes([_run_sub_hook(hook, input_data) for hook in hooks])
+
+
+def _emit(outcome: HookOutcome) -> None:
+    if outcome.stdout:
+        sys.stdout.write(outcome.stdout)
+        sys.stdout.flush()
+    if outcome.stderr:
+        sys.stderr.write(outcome.stderr)
+        sys.stderr.flush()
+    sys.exit(outcome.exit_code)
+
+
+def main() -> None:
+    if is_hook_disabled():
+        sys.exit(0)
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading input: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not isinstance(input_data, dict):
+        sys.exit(0)
+    # Sub-hooks' audit entries go out in one append once they have all run.
+    audit_log.enable_buffering()
+    try:
+        outcome = dispatch(input_data, sys.argv[1] if len(sys.argv) > 1 else None)
+    finally:
+        audit_log.disable_buffering()
+    _emit(outcome)
+
+
+if __name__ == "__main__":
+    main()
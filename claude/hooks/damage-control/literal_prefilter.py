@@ -0,0 +1,156 @@
+"""
+Required-literal extraction for regex prefilters.
+
+Shared by bash-tool-damage-control.py (bashToolPatterns prefilter) and
+post-tool-injection-detection.py (secret/injection content scanner). A
+pattern's requirement is a set of lowercase literals at least one of which
+occurs in every string the pattern matches (ignoring case), so a pattern
+whose literals are all absent from a text cannot match it and need not run.
+PatternPrefilter indexes a pattern list by those literals.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+try:  # Python 3.11+ moved the regex parser behind a private name
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+_REPEAT_OPS = ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+
+# Shorter literals ("n", ">") appear in almost every command; such patterns
+# are cheaper to just run than to index.
+_MIN_PREFILTER_LITERAL = 2
+
+# A requirement is a tuple of lowercase literals, at least one of which must
+# occur in any string the pattern matches.
+Requirement = tuple[str, ...]
+
+
+def _best_requirement(requirements: list[Requirement]) -> Optional[Requirement]:
+    """Pick the most selective requirement: longest shortest-literal, then fewest."""
+    usable = [r for r in requirements if r and all(lit and lit.isascii() for lit in r)]
+    if not usable:
+        return None
+    return max(usable, key=lambda r: (min(len(lit) for lit in r), -len(r)))
+
+
+def _branch_requirement(branches: list[Any]) -> Optional[Requirement]:
+    """An alternation requires one literal from every branch, or nothing at all."""
+    per_branch = [_best_requirement(_required_literals(branch)) for branch in branches]
+    if not all(per_branch):
+        return None
+    return tuple(sorted({lit for req in per_branch for lit in req}))  # type: ignore[union-attr]
+
+
+def _nested_requirements(name: str, av: Any) -> list[Requirement]:
+    """Requirements contributed by a non-literal opcode of a parsed regex."""
+    if name == "SUBPATTERN":
+        return _required_literals(av[-1])
+    if name in _REPEAT_OPS:
+        return _required_literals(av[2]) if av[0] >= 1 else []
+    if name == "ATOMIC_GROUP":
+        return _required_literals(av)
+    if name == "BRANCH":
+        req = _branch_requirement(av[1])
+        return [req] if req else []
+    return []
+
+
+def _required_literals(parsed: Any) -> list[Requirement]:
+    """Walk a parsed regex and collect literal requirements every match satisfies.
+
+    Consecutive LITERAL opcodes form one run; zero-width AT assertions do not
+    break a run. Everything else (classes, lookarounds, optional repeats) ends it.
+    """
+    requirements: list[Requirement] = []
+    run: list[str] = []
+    for op, av in parsed:
+        name = str(op)
+        if name == "LITERAL":
+            run.append(chr(av).lower())
+            continue
+        if name == "AT":
+            continue
+        if run:
+            requirements.append(("".join(run),))
+            run = []
+        requirements.extend(_nested_requirements(name, av))
+    if run:
+        requirements.append(("".join(run),))
+    return requirements
+
+
+# pattern -> requirement memo; seeded from the on-disk config cache because
+# re-parsing every pattern costs about as much as compiling it.
+_requirement_cache: dict[str, Optional[Requirement]] = {}
+
+
+def extract_required_literals(pattern: str) -> Optional[Requirement]:
+    """Return literals of which every match must contain one, or None if unknown."""
+    if pattern in _requirement_cache:
+        return _requirement_cache[pattern]
+    try:
+        parsed = _sre_parse.parse(pattern, re.IGNORECASE)
+    except Exception:
+        return None
+    best = _best_requirement(_required_literals(parsed))
+    if best is not None and min(len(lit) for lit in best) < _MIN_PREFILTER_LITERAL:
+        best = None
+    _requirement_cache[pattern] = best
+    return best
+
+
+# Non-ASCII characters that re.IGNORECASE matches to an ASCII letter but whose
+# str.lower() contains no ASCII letter. Other such characters (e.g. KELVIN
+# SIGN, U+0130) already lower() to a string containing the ASCII letter.
+_ASCII_FOLDS = str.maketrans({"ſ": "s", "ı": "i"})
+
+
+def prefilter_lower(text: str) -> str:
+    """Lowercase text so a required literal occurs in it whenever its pattern can match."""
+    lowered = text.lower()
+    return lowered if lowered.isascii() else lowered.translate(_ASCII_FOLDS)
+
+
+@dataclass
+class PatternPrefilter:
+    """Literal index over a pattern list.
+
+    Maps each required literal to the indices of patterns that need it.
+    Patterns without an extractable literal are always run. Candidates are
+    returned in original order so first-match-wins is preserved.
+    """
+
+    literal_index: dict[str, list[int]] = field(default_factory=dict)
+    always_run: list[int] = field(default_factory=list)
+    size: int = 0
+
+    @classmethod
+    def build(cls, patterns: list[dict[str, Any]]) -> "PatternPrefilter":
+        prefilter = cls(size=len(patterns))
+        for idx, item in enumerate(patterns):
+            requirement = extract_required_literals(item.get("pattern", ""))
+            if requirement is None:
+                prefilter.always_run.append(idx)
+                continue
+            for literal in requirement:
+                prefilter.literal_index.setdefault(literal, []).append(idx)
+        return prefilter
+
+    def candidates(self, texts: list[str]) -> list[int]:
+        """Indices of patterns that could match any of texts, in pattern order."""
+        if not all(text.isascii() for text in texts):
+            # Unicode case folding (e.g. U+017F matches "s") defeats lower().
+            return list(range(self.size))
+        return self.candidates_lowered([text.lower() for text in texts])
+
+    def candidates_lowered(self, lowered: list[str]) -> list[int]:
+        """candidates() for texts already lowercased with prefilter_lower()."""
+        selected = set(self.always_run)
+        for literal, indices in self.literal_index.items():
+            if any(literal in text for text in lowered):
+                selected.update(indices)
+        return sorted(selected)
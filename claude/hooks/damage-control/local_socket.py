@@ -0,0 +1,115 @@
+"""
+Local Socket Protocol for Hook Servers
+======================================
+
+Shared by the damage-control daemon (damage_control_daemon.py) and the
+quality-validation worker pool (../quality-validation/validator_pool.py):
+one request per Unix-socket connection, one newline-terminated JSON line each
+way, and a private socket directory that a new server takes over only when no
+live server answers on the path.
+
+Unix only: without AF_UNIX, is_supported() is False, send_request() returns
+None and UnixStreamServer is a plain object, so servers built on it still
+import (the hooks fall back to in-process work) but must not be started.
+"""
+
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Optional
+
+MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+
+# socketserver only defines the Unix server classes where AF_UNIX exists.
+UnixStreamServer: Any = getattr(socketserver, "UnixStreamServer", object)
+
+
+def is_supported() -> bool:
+    """Return True if this platform supports Unix domain sockets."""
+    return hasattr(socket, "AF_UNIX")
+
+
+def recv_line(sock: socket.socket) -> bytes:
+    """Read bytes up to the first newline, bounded by MAX_MESSAGE_BYTES."""
+    chunks: list[bytes] = []
+    total = 0
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+        if b"\n" in chunk or total > MAX_MESSAGE_BYTES:
+            break
+    return b"".join(chunks).split(b"\n", 1)[0]
+
+
+def send_request(
+    payload: dict[str, Any], socket_path: Path, timeout: float
+) -> Optional[dict[str, Any]]:
+    """Send one request to a server; return the decoded reply or None on any failure."""
+    if not is_supported():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            reply = json.loads(recv_line(sock).decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def ping(socket_path: Path, timeout: float = 0.5) -> bool:
+    """Return True if a healthy server answers on socket_path."""
+    reply = send_request({"op": "ping"}, socket_path, timeout)
+    return bool(reply and reply.get("ok"))
+
+
+def file_stamp(path: Path) -> tuple[int, int]:
+    """Return (mtime_ns, size) for path, or (0, 0) if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return 0, 0
+    return st.st_mtime_ns, st.st_size
+
+
+def prepare_socket_path(socket_path: Path, server_name: str) -> None:
+    """Create the private socket directory and clear a stale socket file.
+
+    Raises RuntimeError if another server is already answering on the path.
+    """
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.chmod(socket_path.parent, 0o700)
+    except OSError:
+        pass
+    if not socket_path.exists():
+        return
+    if ping(socket_path):
+        raise RuntimeError(f"{server_name} already running on {socket_path}")
+    socket_path.unlink()
+
+
+class JsonLineHandler(socketserver.StreamRequestHandler):
+    """Decode one JSON request line, pass it to server.dispatch(), write one reply line.
+
+    A client that gave up waiting (send_request's timeout) has closed its end;
+    its reply is dropped quietly.
+    """
+
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_MESSAGE_BYTES + 1)
+        try:
+            request = json.loads(line.decode("utf-8"))
+            reply = self.server.dispatch(request)  # type: ignore[attr-defined]
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        try:
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+        except OSError:
+            pass
@@ -1,33 +1,60 @@
 #!/usr/bin/env python
 # /// script
-# requires-python = ">=3.8"
+# requires-python = ">=3.9"
 # ///
 """
 Log rotation for damage-control hooks. Run as fire-and-forget subprocess.
 
-Archives .log files older than ARCHIVE_DAYS to tar.gz.
+Archives .log files older than ARCHIVE_DAYS to tar.gz, several at a time.
 Deletes archives older than DELETE_DAYS.
 
+Archives stay ordinary single-member .log.tar.gz files, but the gzip stream
+is cut into independent members: one for the tar header, one per ~BLOCK_BYTES
+of log lines (each starting at a line), one for the tar trailer. Each block is
+read and compressed in one call, and zlib releases the GIL while it deflates,
+so the archive jobs really run side by side. A sidecar
+``<archive>.idx.json`` records the line count, time range and, per block, its
+compressed offset, log byte offset, first line number and first timestamp, so
+iter_archive_lines() can start at a byte offset or time without inflating
+the blocks before it. Archives without a sidecar are read from the start.
+
 Environment Variables:
     DAMAGE_CONTROL_LOG_ARCHIVE_DAYS: Days before archiving (default: 30)
     DAMAGE_CONTROL_LOG_DELETE_DAYS: Days before deleting archives (default: 90, 0=never)
     DAMAGE_CONTROL_LOG_ROTATION: Set to 'disabled' to turn off
     DAMAGE_CONTROL_LOG_DRY_RUN: Set to '1' or 'true' for dry-run mode
+    DAMAGE_CONTROL_LOG_ROTATE_WORKERS: Concurrent archive jobs (default: min(4, CPUs))
 """
 
+import gzip
 import json
 import os
 import re
 import sys
 import tarfile
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import IO, Any, Optional
 
 ARCHIVE_DAYS = int(os.environ.get("DAMAGE_CONTROL_LOG_ARCHIVE_DAYS", "30"))
 DELETE_DAYS = int(os.environ.get("DAMAGE_CONTROL_LOG_DELETE_DAYS", "90"))
 DRY_RUN = os.environ.get("DAMAGE_CONTROL_LOG_DRY_RUN", "").lower() in ("1", "true")
 DISABLED = os.environ.get("DAMAGE_CONTROL_LOG_ROTATION", "").lower() == "disabled"
+WORKERS = max(
+    1, int(os.environ.get("DAMAGE_CONTROL_LOG_ROTATE_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+)
+
+# Uncompressed log bytes per independently decompressible gzip member.
+BLOCK_BYTES = 256 * 1024
+COMPRESS_LEVEL = 6
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+
+# Audit entries start with json.dumps's "timestamp" key; no need to parse the line.
+_TIMESTAMP = re.compile(rb'"timestamp": "([^"\n]*)"')
 
 
 def get_logs_dir() -> Path:
@@ -89,28 +116,199 @@ def validate_log_filename(path: Path, logs_dir: Path) -> bool:
         return False
 
 
+class _BlockGzipWriter:
+    """Write a gzip stream as a series of members, each decompressible on its own."""
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        self.fileobj = fileobj
+        self._compressor: Optional[Any] = None
+
+    def start_block(self) -> int:
+        """Close the current member; return the compressed offset of the next one."""
+        if self._compressor is not None:
+            self.fileobj.write(self._compressor.flush())
+        self._compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+        return self.fileobj.tell()
+
+    def write(self, data: bytes) -> None:
+        self.fileobj.write(self._compressor.compress(data))
+
+    def close(self) -> None:
+        if self._compressor is not None:
+            self.fileobj.write(self._compressor.flush())
+            self._compressor = None
+
+
+def _decode_timestamp(raw: Optional[bytes]) -> Optional[str]:
+    return raw.decode("utf-8", "replace") if raw is not None else None
+
+
+def _read_block(src: IO[bytes], limit: int) -> bytes:
+    """Next block of src: BLOCK_BYTES (at most limit), extended to the end of its last line."""
+    data = src.read(min(BLOCK_BYTES, limit))
+    if data and not data.endswith(b"\n") and len(data) < limit:
+        data += src.readline(limit - len(data))
+    return data
+
+
+def _first_timestamp(data: bytes) -> Optional[bytes]:
+    """Timestamp of the first line in data."""
+    match = _TIMESTAMP.search(data, 0, data.find(b"\n") + 1 or len(data))
+    return match.group(1) if match else None
+
+
+def _write_blocked_archive(log_file: Path, out: IO[bytes]) -> dict:
+    """Stream log_file into out as a block-indexed .tar.gz; return the sidecar index."""
+    with open(log_file, "rb") as src:
+        st = os.fstat(src.fileno())
+        info = tarfile.TarInfo(log_file.name)
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        info.mode = st.st_mode & 0o777
+        writer = _BlockGzipWriter(out)
+        writer.start_block()
+        writer.write(info.tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, "surrogateescape"))
+
+        blocks: list = []
+        stamps: list[bytes] = []
+        lines = 0
+        offset = 0
+        while offset < info.size:
+            # A file that grew while archiving keeps only what was stat'ed.
+            data = _read_block(src, info.size - offset)
+            if not data:
+                raise OSError(f"{log_file} shrank while archiving")
+            blocks.append(
+                {
+                    "offset": writer.start_block(),
+                    "data_offset": offset,
+                    "line": lines,
+                    "timestamp": _decode_timestamp(_first_timestamp(data)),
+                }
+            )
+            writer.write(data)
+            found = _TIMESTAMP.findall(data)
+            if found:
+                stamps += (min(found), max(found))
+            offset += len(data)
+            lines += data.count(b"\n") + (not data.endswith(b"\n"))
+
+        writer.start_block()
+        padding = -info.size % tarfile.BLOCKSIZE
+        writer.write(b"\0" * (padding + 2 * tarfile.BLOCKSIZE))
+        writer.close()
+    return {
+        "version": INDEX_VERSION,
+        "log": log_file.name,
+        "bytes": info.size,
+        "lines": lines,
+        "first_timestamp": _decode_timestamp(min(stamps, default=None)),
+        "last_timestamp": _decode_timestamp(max(stamps, default=None)),
+        "blocks": blocks,
+    }
+
+
+def index_path(archive_path: Path) -> Path:
+    """Sidecar index written next to an archive."""
+    return archive_path.with_name(archive_path.name + INDEX_SUFFIX)
+
+
 def safe_archive(log_file: Path, archive_path: Path) -> bool:
     """Archive with atomic write and verification to prevent data loss."""
     temp_archive = archive_path.with_suffix(".tmp")
+    sidecar = index_path(archive_path)
+    temp_sidecar = sidecar.with_suffix(".tmp")
     try:
         # Write to temp file first
-        with tarfile.open(temp_archive, "w:gz") as tar:
-            tar.add(log_file, arcname=log_file.name)
+        with open(temp_archive, "wb") as out:
+            index = _write_blocked_archive(log_file, out)
 
         # Verify archive is readable
         with tarfile.open(temp_archive, "r:gz") as tar:
-            tar.getmember(log_file.name)
+            if tar.getmember(log_file.name).size != index["bytes"]:
+                raise tarfile.TarError(f"size mismatch in {temp_archive}")
 
-        # Atomic rename
+        temp_sidecar.write_text(json.dumps(index, separators=(",", ":")))
+        # Atomic rename; a reader that sees the archive without a sidecar just reads it whole
         temp_archive.rename(archive_path)
+        temp_sidecar.rename(sidecar)
         return True
     except Exception:
-        # Clean up temp file on failure
-        if temp_archive.exists():
-            temp_archive.unlink()
+        # Clean up temp files on failure
+        for temp in (temp_archive, temp_sidecar):
+            if temp.exists():
+                temp.unlink()
         return False
 
 
+def read_archive_index(archive_path: Path) -> Optional[dict]:
+    """Return an archive's sidecar index, or None if it is missing or stale."""
+    try:
+        index = json.loads(index_path(archive_path).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    if not isinstance(index.get("blocks"), list) or not isinstance(index.get("bytes"), int):
+        return None
+    return index
+
+
+def _start_block(index: dict, start: int, since: Optional[str]) -> Optional[dict]:
+    """Last block starting at or before byte offset start, or at or before time since."""
+    chosen = None
+    for block in index["blocks"]:
+        ts = block.get("timestamp")
+        before_since = since is not None and ts is not None and ts <= since
+        if block["data_offset"] > start and not before_since:
+            break
+        chosen = block
+    return chosen
+
+
+def _iter_tar_lines(archive_path: Path) -> Iterator[bytes]:
+    with tarfile.open(archive_path, "r:gz") as tar:
+        for member in tar:
+            stream = tar.extractfile(member) if member.isfile() else None
+            if stream is not None:
+                yield from stream
+
+
+def iter_archive_lines(
+    archive_path: Path, start: int = 0, since: Optional[str] = None
+) -> Iterator[tuple[int, bytes]]:
+    """Yield (log byte offset, line) for an archived log, beginning near start/since.
+
+    With a sidecar index, decompression begins at the block holding byte
+    offset start (or the last block starting at or before timestamp since),
+    and lines before start are dropped. since only picks the starting block;
+    callers still filter lines by time. Without an index the archive is read
+    from the beginning.
+    """
+    index = read_archive_index(archive_path)
+    block = _start_block(index, start, since) if index is not None else None
+    if block is None:
+        offset = 0
+        for line in _iter_tar_lines(archive_path):
+            if offset >= start:
+                yield offset, line
+            offset += len(line)
+        return
+
+    offset = block["data_offset"]
+    end = index["bytes"]
+    with open(archive_path, "rb") as f:
+        f.seek(block["offset"])
+        with gzip.GzipFile(fileobj=f, mode="rb") as stream:
+            for line in stream:
+                if offset >= end:
+                    break
+                line = line[: end - offset]
+                if offset >= start:
+                    yield offset, line
+                offset += len(line)
+
+
 def log_rotation_event(logs_dir: Path, event: dict) -> None:
     """Log rotation actions to rotation.log for observability."""
     rotation_log = logs_dir / "rotation.log"
@@ -122,28 +320,42 @@ def log_rotation_event(logs_dir: Path, event: dict) -> None:
 
 
 def _archive_old_logs(logs_dir: Path, archive_cutoff: datetime, errors: list) -> int:
-    """Archive .log files older than archive_cutoff. Returns count archived."""
-    archived_count = 0
-    for log_file in logs_dir.glob("*.log"):
+    """Archive .log files older than archive_cutoff, WORKERS at a time. Returns count archived."""
+    pending: list = []
+    for log_file in sorted(logs_dir.glob("*.log")):
         if log_file.name == "rotation.log":
             continue
         if not validate_log_filename(log_file, logs_dir):
             continue
         try:
             file_date = datetime.strptime(log_file.stem, "%Y-%m-%d")
-            if file_date >= archive_cutoff:
-                continue
-            archive_path = log_file.with_suffix(".log.tar.gz")
-            if DRY_RUN:
-                print(f"WOULD archive: {log_file}")
-                continue
-            if safe_archive(log_file, archive_path):
-                log_file.unlink()
-                archived_count += 1
-            else:
-                errors.append(f"Failed to archive {log_file}")
-        except (ValueError, OSError) as e:
+        except ValueError as e:
             errors.append(f"{log_file}: {e}")
+            continue
+        if file_date >= archive_cutoff:
+            continue
+        if DRY_RUN:
+            print(f"WOULD archive: {log_file}")
+            continue
+        pending.append(log_file)
+    if not pending:
+        return 0
+
+    archived_count = 0
+    with ThreadPoolExecutor(max_workers=min(WORKERS, len(pending))) as pool:
+        jobs = [
+            (log_file, pool.submit(safe_archive, log_file, log_file.with_suffix(".log.tar.gz")))
+            for log_file in pending
+        ]
+        for log_file, job in jobs:
+            try:
+                if job.result():
+                    log_file.unlink()
+                    archived_count += 1
+                else:
+                    errors.append(f"Failed to archive {log_file}")
+            except OSError as e:
+                errors.append(f"{log_file}: {e}")
     return archived_count
 
 
@@ -163,6 +375,9 @@ def _delete_old_archives(logs_dir: Path, delete_cutoff: datetime, errors: list)
                 print(f"WOULD delete: {archive}")
                 continue
             archive.unlink()
+            sidecar = index_path(archive)
+            if sidecar.exists():
+                sidecar.unlink()
             deleted_count += 1
         except (ValueError, OSError) as e:
             errors.append(f"{archive}: {e}")
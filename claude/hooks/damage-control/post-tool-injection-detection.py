@@ -9,6 +9,11 @@ PostToolUse Injection Detection Hook
 Scans tool output for prompt injection attempts and secret leakage.
 Runs after Read/Glob/Grep tools to detect malicious content in files.
 
+Output is scanned in bounded windows (see ContentScanner): each window is
+lowercased once, a required-literal prefilter picks the patterns that could
+match it, and counting stops after MAX_MATCHES_PER_TYPE matches per pattern.
+patterns.yaml is compiled once per content hash and process.
+
 Exit codes:
   0 = Allow (optionally with additionalContext warning)
 
@@ -17,16 +22,25 @@ Environment variables:
                          Use "damage-control" to disable this hook
 """
 
+import importlib
 import json
 import os
 import re
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 import yaml
 
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
+literal_prefilter = importlib.import_module("literal_prefilter")
+config_cache = importlib.import_module("config_cache")
+gated_patterns = importlib.import_module("gated_patterns")
+audit_log = importlib.import_module("audit_log")
+
 HOOK_NAME = "damage-control"
 
 
@@ -80,10 +94,9 @@ def load_config() -> dict[str, Any]:
 
 def get_log_path() -> Path:
     """Get path to daily audit log file."""
-    logs_dir = Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    return logs_dir / f"{date_str}.log"
+    log_path = audit_log.get_log_path()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return log_path
 
 
 def log_detection(
@@ -96,8 +109,6 @@ def log_detection(
 ) -> None:
     """Log security detection to audit log."""
     try:
-        log_path = get_log_path()
-
         # Truncate matched text
         matched_truncated = matched_text[:100]
         if len(matched_text) > 100:
@@ -116,8 +127,7 @@ def log_detection(
             "cwd": os.getcwd(),
         }
 
-        with open(log_path, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        audit_log.write_entry(log_entry)
 
     except Exception as e:
         print(f"Warning: Failed to write audit log: {e}", file=sys.stderr)
@@ -143,54 +153,151 @@ def compile_patterns(patterns: list[dict[str, Any]]) -> list[tuple[re.Pattern, d
     return compiled
 
 
+# check_for_secrets() only runs context_required patterns when one of these
+# keywords appears somewhere in the content.
+CONTEXT_KEYWORDS = ("aws", "secret", "key", "token", "password", "credential")
+_CONTEXT_REGEX = re.compile("|".join(CONTEXT_KEYWORDS), re.IGNORECASE)
+
+# Counting stops here; warnings show the count as "<cap>+".
+MAX_MATCHES_PER_TYPE = 100
+
+# Content is scanned SCAN_WINDOW_CHARS at a time. Each window also looks
+# SCAN_WINDOW_OVERLAP characters ahead so matches starting near its end are
+# found whole; matches longer than the overlap may be missed at a boundary.
+SCAN_WINDOW_CHARS = 256 * 1024
+SCAN_WINDOW_OVERLAP = 4 * 1024
+
+
+def _findall_item(match: re.Match) -> Any:
+    """The item re.findall() would return for match (whole match, group, or tuple)."""
+    groups = match.groups("")
+    if not groups:
+        return match.group(0)
+    return groups[0] if len(groups) == 1 else groups
+
+
+class ContentScanner:
+    """Single-pass scanner over one compiled pattern list.
+
+    Reports the same findings as running ``regex.findall(content)`` per
+    pattern, except that ``count`` stops at MAX_MATCHES_PER_TYPE. Patterns
+    whose required literals (see literal_prefilter) are absent from a window
+    are not run on it.
+    """
+
+    def __init__(
+        self,
+        patterns: list[tuple[re.Pattern, dict[str, Any]]],
+        sample_chars: int,
+        honor_context: bool,
+    ) -> None:
+        self.patterns = patterns
+        self.sample_chars = sample_chars
+        self.honor_context = honor_context
+        self.prefilter = literal_prefilter.PatternPrefilter.build([info for _r, info in patterns])
+
+    def scan(self, content: str) -> list[dict[str, Any]]:
+        size = len(content)
+        tally = _Tally(len(self.patterns))
+        has_context: Optional[bool] = None
+
+        for start in range(0, size, SCAN_WINDOW_CHARS):
+            end = min(start + SCAN_WINDOW_CHARS, size)
+            scan_end = min(end + SCAN_WINDOW_OVERLAP, size)
+            lowered = literal_prefilter.prefilter_lower(content[start:scan_end])
+            for idx in self.prefilter.candidates_lowered([lowered]):
+                if tally.counts[idx] >= MAX_MATCHES_PER_TYPE:
+                    continue
+                regex, pattern_info = self.patterns[idx]
+                if self.honor_context and pattern_info.get("context_required"):
+                    if has_context is None:
+                        has_context = bool(_CONTEXT_REGEX.search(content))
+                    if not has_context:
+                        continue
+                tally.count(idx, regex, content, (start, end, scan_end))
+        return self._findings(tally)
+
+    def _findings(self, tally: "_Tally") -> list[dict[str, Any]]:
+        return [
+            {
+                "type": pattern_info.get("type", "unknown"),
+                "severity": pattern_info.get("severity", "medium"),
+                "count": tally.counts[idx],
+                "sample": tally.samples[idx][: self.sample_chars],
+            }
+            for idx, (_regex, pattern_info) in enumerate(self.patterns)
+            if tally.counts[idx]
+        ]
+
+
+class _Tally:
+    """Per-pattern match counts, first samples and resume offsets of one scan."""
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.samples: list[Any] = [None] * size
+        self.resume = [0] * size
+
+    def count(
+        self, idx: int, regex: re.Pattern, content: str, window: tuple[int, int, int]
+    ) -> None:
+        """Count regex matches starting in [start, end), searching up to scan_end."""
+        start, end, scan_end = window
+        pos = max(start, self.resume[idx])
+        while self.counts[idx] < MAX_MATCHES_PER_TYPE:
+            match = gated_patterns.window_search(regex, content, pos, scan_end)
+            if match is None or (match.start() >= end and end < len(content)):
+                return  # none left, or the next window owns it
+            self.counts[idx] += 1
+            if self.samples[idx] is None:
+                self.samples[idx] = _findall_item(match)
+            pos = self.resume[idx] = max(match.end(), match.start() + 1)
+
+
 def check_for_secrets(
     content: str, patterns: list[tuple[re.Pattern, dict[str, Any]]]
 ) -> list[dict[str, Any]]:
     """Check content for secret patterns."""
-    findings = []
-
-    for regex, pattern_info in patterns:
-        # Skip patterns that require context if we don't have it
-        if pattern_info.get("context_required"):
-            # Only match if related keywords are nearby
-            context_keywords = ["aws", "secret", "key", "token", "password", "credential"]
-            has_context = any(kw in content.lower() for kw in context_keywords)
-            if not has_context:
-                continue
-
-        matches = regex.findall(content)
-        if matches:
-            findings.append(
-                {
-                    "type": pattern_info.get("type", "unknown"),
-                    "severity": pattern_info.get("severity", "medium"),
-                    "count": len(matches),
-                    "sample": matches[0][:50] if matches else "",
-                }
-            )
-
-    return findings
+    return ContentScanner(patterns, 50, honor_context=True).scan(content)
 
 
 def check_for_injections(
     content: str, patterns: list[tuple[re.Pattern, dict[str, Any]]]
 ) -> list[dict[str, Any]]:
     """Check content for injection patterns."""
-    findings = []
+    return ContentScanner(patterns, 100, honor_context=False).scan(content)
+
+
+class CompiledConfig:
+    """secretPatterns and injectionPatterns compiled once, with their scanners."""
 
-    for regex, pattern_info in patterns:
-        matches = regex.findall(content)
-        if matches:
-            findings.append(
-                {
-                    "type": pattern_info.get("type", "unknown"),
-                    "severity": pattern_info.get("severity", "medium"),
-                    "count": len(matches),
-                    "sample": matches[0][:100] if matches else "",
-                }
-            )
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.secret_scanner = ContentScanner(
+            compile_patterns(config.get("secretPatterns", [])), 50, honor_context=True
+        )
+        self.injection_scanner = ContentScanner(
+            compile_patterns(config.get("injectionPatterns", [])), 100, honor_context=False
+        )
+
+
+# Keyed by the fingerprint of patterns.yaml (config_cache.cache_key); holds
+# only the config loaded last, so a long-lived process (hook-dispatcher,
+# daemon) parses and compiles each version of the file once.
+_compiled_configs: dict[str, CompiledConfig] = {}
 
-    return findings
+
+def get_compiled_config() -> CompiledConfig:
+    """Return the compiled patterns.yaml, rebuilding it when the file changes."""
+    try:
+        key = config_cache.cache_key((get_config_path(),))
+    except OSError:
+        return CompiledConfig(load_config())
+    compiled = _compiled_configs.get(key)
+    if compiled is None:
+        compiled = CompiledConfig(load_config())
+        _compiled_configs.clear()
+        _compiled_configs[key] = compiled
+    return compiled
 
 
 # ============================================================================
@@ -222,9 +329,12 @@ def _build_warnings(
             file_path=file_path,
             matched_text=finding["sample"],
         )
+        count = finding["count"]
+        if count >= MAX_MATCHES_PER_TYPE:
+            count = f"{MAX_MATCHES_PER_TYPE}+"
         warnings.append(
             f"SECURITY WARNING: Detected {finding['type']} "
-            f"(severity: {finding['severity']}, count: {finding['count']})"
+            f"(severity: {finding['severity']}, count: {count})"
         )
     for finding in injection_findings:
         log_detection(
@@ -246,10 +356,6 @@ def main() -> None:
     if is_hook_disabled():
         sys.exit(0)
 
-    config = load_config()
-    secret_patterns = compile_patterns(config.get("secretPatterns", []))
-    injection_patterns = compile_patterns(config.get("injectionPatterns", []))
-
     try:
         input_data = json.load(sys.stdin)
     except json.JSONDecodeError as e:
@@ -267,11 +373,12 @@ def main() -> None:
     if not content:
         sys.exit(0)
 
+    compiled = get_compiled_config()
     warnings = _build_warnings(
         tool_name,
         file_path,
-        check_for_secrets(content, secret_patterns),
-        check_for_injections(content, injection_patterns),
+        compiled.secret_scanner.scan(content),
+        compiled.injection_scanner.scan(content),
     )
 
     if warnings:
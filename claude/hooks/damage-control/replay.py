@@ -0,0 +1,304 @@
+# /// script
+# requires-python = ">=3.8"
+# dependencies = ["pyyaml", "tree-sitter>=0.23.0", "tree-sitter-bash>=0.23.0"]
+# ///
+"""
+Damage Control Audit Log Replay
+===============================
+
+Replays every Bash command recorded in the damage-control audit logs through
+check_command() under two configs and reports which decisions would change.
+Run this before shipping a patterns.yaml edit.
+
+Usage:
+  uv run replay.py --candidate /tmp/patterns.yaml [--baseline patterns.yaml]
+                   [--workers N] [--limit N] [--fail-on-change] [LOG_PATH ...]
+
+LOG_PATH may be a log directory (default: ~/.claude/logs/damage-control), a
+YYYY-MM-DD.log file, or a .log.tar.gz archive written by log_rotate.py. Logs
+are streamed, identical (command, context) pairs are checked once, and the
+unique commands are fanned out over a process pool.
+
+Commands the audit log truncated (over 200 chars) are skipped, since the
+original text is gone. Decisions compare (allowed/ask/blocked, pattern).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Optional
+
+import yaml
+
+spec = importlib.util.spec_from_file_location(
+    "bash_tool", Path(__file__).parent / "bash-tool-damage-control.py"
+)
+bash_tool = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bash_tool)
+
+# Matches _truncate_for_log(): 200 chars plus "..."
+LOGGED_COMMAND_LIMIT = 200
+CHUNK_SIZE = 64
+
+ReplayKey = tuple[str, Optional[str]]
+Decision = tuple[str, str]
+
+
+# ============================================================================
+# LOG STREAMING
+# ============================================================================
+
+
+def default_logs_dir() -> Path:
+    return Path(os.path.expanduser("~")) / ".claude" / "logs" / "damage-control"
+
+
+def iter_log_files(paths: Iterable[Path]) -> Iterator[Path]:
+    """Expand directories into their daily logs and archives, oldest first."""
+    for path in paths:
+        if path.is_dir():
+            files = [*path.glob("*.log"), *path.glob("*.log.tar.gz")]
+            yield from sorted(f for f in files if f.name != "rotation.log")
+        elif path.exists():
+            yield path
+
+
+def _iter_lines(path: Path) -> Iterator[bytes]:
+    if path.name.endswith(".tar.gz"):
+        with tarfile.open(path, "r:gz") as tar:
+            for member in tar:
+                stream: IO[bytes] | None = tar.extractfile(member) if member.isfile() else None
+                if stream is not None:
+                    yield from stream
+        return
+    with open(path, "rb") as f:
+        yield from f
+
+
+def _is_truncated(command: str) -> bool:
+    return len(command) == LOGGED_COMMAND_LIMIT + 3 and command.endswith("...")
+
+
+@dataclass
+class LogScan:
+    """Deduplicated Bash commands from the audit logs, with occurrence counts."""
+
+    commands: Counter[ReplayKey] = field(default_factory=Counter)
+    files: int = 0
+    entries: int = 0
+    truncated: int = 0
+    malformed: int = 0
+
+
+def scan_logs(paths: Iterable[Path]) -> LogScan:
+    """Stream log lines and collect unique (command, context) pairs for Bash entries."""
+    scan = LogScan()
+    for path in iter_log_files(paths):
+        scan.files += 1
+        try:
+            for line in _iter_lines(path):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    scan.malformed += 1
+                    continue
+                if not isinstance(entry, dict) or entry.get("tool") != "Bash":
+                    continue
+                command = entry.get("command")
+                if not isinstance(command, str) or not command:
+                    continue
+                scan.entries += 1
+                if _is_truncated(command):
+                    scan.truncated += 1
+                    continue
+                scan.commands[(command, entry.get("context"))] += 1
+        except (OSError, tarfile.TarError) as e:
+            print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+    return scan
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+
+def load_compiled_config(path: Path) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return bash_tool.compile_config(yaml.safe_load(f) or {})
+
+
+def decision_of(
+    result: tuple[bool, bool, str, str, bool, bool], config: dict[str, Any]
+) -> Decision:
+    """Reduce a check_command() result to (decision, pattern).
+
+    yaml_pattern_{idx} ids are replaced by the regex itself so inserting or
+    reordering rules in the candidate does not show up as a change.
+    """
+    blocked, ask, _reason, pattern, _unwrapped, _semantic = result
+    prefix = "yaml_pattern_"
+    if pattern.startswith(prefix) and pattern[len(prefix) :].isdigit():
+        patterns = config.get("bashToolPatterns_compiled", [])
+        idx = int(pattern[len(prefix) :])
+        if idx < len(patterns):
+            pattern = patterns[idx]["pattern"]
+    return ("blocked" if blocked else "ask" if ask else "allowed"), pattern
+
+
+_worker_configs: tuple[dict[str, Any], dict[str, Any]] | None = None
+
+
+def _init_worker(baseline: Path, candidate: Path) -> None:
+    global _worker_configs
+    _worker_configs = (load_compiled_config(baseline), load_compiled_config(candidate))
+
+
+def _replay_one(key: ReplayKey) -> tuple[ReplayKey, Decision, Decision]:
+    assert _worker_configs is not None
+    command, context = key
+    base, cand = _worker_configs
+    # No time budget: a loaded machine must not turn decisions into budget asks.
+    return (
+        key,
+        decision_of(bash_tool.check_command(command, base, context, budget_ms=0), base),
+        decision_of(bash_tool.check_command(command, cand, context, budget_ms=0), cand),
+    )
+
+
+@dataclass
+class DecisionChange:
+    command: str
+    context: str | None
+    occurrences: int
+    before: Decision
+    after: Decision
+
+    @property
+    def transition(self) -> str:
+        return f"{self.before[0]} -> {self.after[0]}"
+
+
+@dataclass
+class ReplayReport:
+    scan: LogScan
+    workers: int
+    elapsed: float
+    changes: list[DecisionChange]
+
+    @property
+    def commands_per_second(self) -> float:
+        return len(self.scan.commands) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def replay(scan: LogScan, baseline: Path, candidate: Path, workers: int = 0) -> ReplayReport:
+    """Check every unique command under both configs; workers=0 uses every core."""
+    workers = workers or os.cpu_count() or 1
+    keys = list(scan.commands)
+    start = time.perf_counter()
+    if workers == 1 or len(keys) < CHUNK_SIZE:
+        workers = 1
+        _init_worker(baseline, candidate)
+        results: Iterable[tuple[ReplayKey, Decision, Decision]] = map(_replay_one, keys)
+        changes = _collect_changes(scan, results)
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (baseline, candidate)) as pool:
+            changes = _collect_changes(scan, pool.imap_unordered(_replay_one, keys, CHUNK_SIZE))
+    return ReplayReport(scan, workers, time.perf_counter() - start, changes)
+
+
+def _collect_changes(
+    scan: LogScan, results: Iterable[tuple[ReplayKey, Decision, Decision]]
+) -> list[DecisionChange]:
+    changes = [
+        DecisionChange(key[0], key[1], scan.commands[key], before, after)
+        for key, before, after in results
+        if before != after
+    ]
+    changes.sort(key=lambda c: (-c.occurrences, c.command))
+    return changes
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+
+def _pattern_label(decision: Decision) -> str:
+    return decision[1] or "-"
+
+
+def format_report(report: ReplayReport, limit: int = 20) -> str:
+    scan = report.scan
+    lines = [
+        f"Replayed {scan.entries:,} Bash entries from {scan.files} file(s): "
+        f"{len(scan.commands):,} unique, {scan.truncated:,} truncated (skipped)",
+        f"{report.workers} worker(s), {report.elapsed:.2f}s, "
+        f"{report.commands_per_second:,.0f} commands/s",
+    ]
+    if not report.changes:
+        lines.append("No decision changes.")
+        return "\n".join(lines)
+
+    occurrences = sum(c.occurrences for c in report.changes)
+    lines.append(
+        f"Decision changes: {len(report.changes):,} unique command(s), {occurrences:,} log entries"
+    )
+    transitions: Counter[str] = Counter()
+    for change in report.changes:
+        transitions[change.transition] += change.occurrences
+    for transition, count in transitions.most_common():
+        unique = sum(1 for c in report.changes if c.transition == transition)
+        lines.append(f"  {transition:<20} {unique:>6} unique  {count:>8} entries")
+
+    lines.append("")
+    for change in report.changes[:limit]:
+        command = bash_tool.redact_secrets(change.command).replace("\n", "\\n")
+        context = f" [{change.context}]" if change.context else ""
+        lines.append(f"  {change.transition:<20} x{change.occurrences:<5} {command[:100]}{context}")
+        lines.append(
+            f"  {'':<20} {_pattern_label(change.before)} -> {_pattern_label(change.after)}"
+        )
+    if len(report.changes) > limit:
+        lines.append(f"  ... {len(report.changes) - limit} more")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay audit-logged Bash commands under two damage-control configs"
+    )
+    parser.add_argument("logs", nargs="*", type=Path, help="Log dirs, .log files or archives")
+    parser.add_argument("--candidate", type=Path, required=True, help="Candidate patterns.yaml")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Baseline patterns.yaml (default: the config the hook would load)",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="Processes (default: all cores)")
+    parser.add_argument("--limit", type=int, default=20, help="Changed commands to list")
+    parser.add_argument(
+        "--fail-on-change", action="store_true", help="Exit 1 if any decision changes"
+    )
+    args = parser.parse_args()
+
+    baseline = args.baseline or bash_tool.get_config_path()
+    scan = scan_logs(args.logs or [default_logs_dir()])
+    report = replay(scan, baseline, args.candidate, args.workers)
+    print(format_report(report, args.limit))
+    sys.exit(1 if args.fail_on_change and report.changes else 0)
+
+
+if __name__ == "__main__":
+    main()
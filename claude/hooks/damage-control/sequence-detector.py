@@ -17,8 +17,19 @@ Usage:
 The sequence detector is used by:
   - PreToolUse hooks - to check before tool execution
   - PostToolUse hooks - to record after tool execution
+
+Matching is incremental: every sequence prefix keeps the latest history
+position from which it still matches in order (see SequenceAutomaton). Those
+positions are persisted alongside the history, so recording an event only
+advances the steps for that tool and a check is one lookup per sequence
+instead of a rescan of the window.
+
+History and states live in the shared session store (session_state.py), so
+recording is one locked append rather than a rewrite of the whole state file.
 """
 
+import hashlib
+import importlib
 import json
 import os
 import re
@@ -29,6 +40,11 @@ from typing import Any, Optional
 
 import yaml
 
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
+session_state = importlib.import_module("session_state")
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -75,41 +91,68 @@ def get_state_path(config: dict[str, Any]) -> Path:
 # STATE MANAGEMENT
 # ============================================================================
 
+# History lives in the shared session store (see session_state.py) next to
+# the configured state_file; a JSON file left at that path is migrated once.
+STREAM = "sequence"
+AUTOMATON_META = "sequence.automaton"
 
-def load_history(config: dict[str, Any]) -> list[dict[str, Any]]:
-    """Load tool invocation history from state file."""
+
+def _history_limits(config: dict[str, Any]) -> tuple[float, int]:
+    """Return (history_expiry_seconds, max_history) from config."""
+    cfg = config.get("config", {})
+    return (
+        cfg.get("history_expiry_seconds", DEFAULT_EXPIRY_SECONDS),
+        cfg.get("max_history", DEFAULT_MAX_HISTORY),
+    )
+
+
+def _history_rows(history: list[dict[str, Any]]) -> list[session_state.EventRow]:
+    return [(None, entry.get("timestamp", 0), entry) for entry in history]
+
+
+def _get_store(config: dict[str, Any]) -> session_state.SessionStore:
+    """Open the session store, importing a legacy JSON history file first."""
     state_path = get_state_path(config)
+    store = session_state.open_store(session_state.store_path_for(state_path))
+
+    def import_legacy(data: dict[str, Any]) -> None:
+        history = data.get("history", [])
+        store.replace(STREAM, _history_rows(history if isinstance(history, list) else []))
+        store.set_meta(AUTOMATON_META, data.get("automaton"))
+
+    store.migrate_json(state_path, import_legacy)
+    return store
 
-    if not state_path.exists():
-        return []
 
+def load_history(config: dict[str, Any]) -> list[dict[str, Any]]:
+    """Load tool invocation history from the session store."""
     try:
-        with open(state_path) as f:
-            data = json.load(f)
-            return data.get("history", [])
-    except (OSError, json.JSONDecodeError):
+        return _get_store(config).entries(STREAM)
+    except session_state.STORE_ERRORS:
         return []
 
 
-def save_history(config: dict[str, Any], history: list[dict[str, Any]]) -> None:
-    """Save tool invocation history to state file."""
-    state_path = get_state_path(config)
-
-    # Ensure directory exists
-    state_path.parent.mkdir(parents=True, exist_ok=True)
+def save_history(
+    config: dict[str, Any],
+    history: list[dict[str, Any]],
+    automaton: Optional[dict[str, Any]] = None,
+) -> None:
+    """Replace tool invocation history (and optionally automaton states).
 
+    Saving without automaton states makes the next load rebuild them.
+    """
     try:
-        with open(state_path, "w") as f:
-            json.dump({"history": history, "updated": time.time()}, f, indent=2)
-    except OSError as e:
+        store = _get_store(config)
+        with store.transaction():
+            store.replace(STREAM, _history_rows(history))
+            store.set_meta(AUTOMATON_META, automaton)
+    except session_state.STORE_ERRORS as e:
         print(f"Warning: Failed to save sequence history: {e}", file=sys.stderr)
 
 
 def cleanup_history(config: dict[str, Any], history: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Remove expired and excess history entries."""
-    cfg = config.get("config", {})
-    expiry_seconds = cfg.get("history_expiry_seconds", DEFAULT_EXPIRY_SECONDS)
-    max_history = cfg.get("max_history", DEFAULT_MAX_HISTORY)
+    expiry_seconds, max_history = _history_limits(config)
 
     current_time = time.time()
 
@@ -125,10 +168,31 @@ def cleanup_history(config: dict[str, Any], history: list[dict[str, Any]]) -> li
     return history
 
 
+def _live_history(
+    config: dict[str, Any], store: session_state.SessionStore
+) -> list[dict[str, Any]]:
+    """Unexpired history, newest max_history entries; cleanup_history() done in SQL."""
+    expiry_seconds, max_history = _history_limits(config)
+    return store.entries(STREAM, since=time.time() - expiry_seconds, limit=max_history)
+
+
 # ============================================================================
 # PATTERN MATCHING
 # ============================================================================
 
+# Input field a step pattern is matched against, per tool. Other tools match
+# against the string form of their whole input.
+_MATCH_FIELDS = {"Read": "file_path", "Glob": "pattern", "Grep": "pattern", "Bash": "command"}
+
+
+def _match_value(entry: dict[str, Any]) -> str:
+    """Get the value a step pattern is matched against for this entry."""
+    input_data = entry.get("input", {})
+    field = _MATCH_FIELDS.get(entry.get("tool", ""))
+    if field is None:
+        return str(input_data)
+    return input_data.get(field, "")
+
 
 def matches_step(entry: dict[str, Any], step: dict[str, Any]) -> bool:
     """Check if a history entry matches a sequence step."""
@@ -141,25 +205,8 @@ def matches_step(entry: dict[str, Any], step: dict[str, Any]) -> bool:
     if not pattern:
         return True  # No pattern means any invocation of that tool matches
 
-    # Get the value to match against
-    match_value = ""
-    tool = entry.get("tool", "")
-
-    if tool == "Read":
-        match_value = entry.get("input", {}).get("file_path", "")
-    elif tool == "Glob":
-        match_value = entry.get("input", {}).get("pattern", "")
-    elif tool == "Grep":
-        match_value = entry.get("input", {}).get("pattern", "")
-    elif tool == "Bash":
-        match_value = entry.get("input", {}).get("command", "")
-    else:
-        # Try to find any string in input to match against
-        input_data = entry.get("input", {})
-        match_value = str(input_data)
-
     try:
-        return bool(re.search(pattern, match_value, re.IGNORECASE))
+        return bool(re.search(pattern, _match_value(entry), re.IGNORECASE))
     except re.error:
         return False
 
@@ -194,7 +241,11 @@ def find_sequence_match(
     current_entry: dict[str, Any],
     sequence: dict[str, Any],
 ) -> Optional[dict[str, Any]]:
-    """Check if current entry completes a dangerous sequence."""
+    """Check if current entry completes a dangerous sequence.
+
+    Rescans the window; check_sequences() gets the same answer from
+    SequenceAutomaton without the rescan.
+    """
     steps = sequence.get("steps", [])
     if not steps:
         return None
@@ -212,6 +263,160 @@ def find_sequence_match(
     return None
 
 
+def _window_start(history: list[dict[str, Any]], window: int) -> int:
+    """Index of the first entry _match_previous_steps() would look at."""
+    if len(history) <= window:
+        return 0
+    return slice(-window, None).indices(len(history))[0]
+
+
+# ============================================================================
+# INCREMENTAL MATCHING
+# ============================================================================
+
+_NEVER = re.compile(r"(?!)")
+
+
+def _compile_step(step: dict[str, Any]) -> Optional[re.Pattern]:
+    """Compile a step pattern; None matches anything, invalid patterns never match."""
+    pattern = step.get("pattern", "")
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return _NEVER
+
+
+def sequences_fingerprint(sequences: list[dict[str, Any]]) -> str:
+    """Identify a sequence catalogue so persisted states are discarded when it changes."""
+    material = json.dumps(sequences, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class SequenceAutomaton:
+    """Precompiled sequence catalogue that advances partial matches per event.
+
+    For each sequence with steps s1..sn the state is a list ``starts`` of
+    length n-1: ``starts[k]`` is the largest history ``seq`` at which
+    s1..s(k+1) begins and still matches in order up to the latest event (or
+    None). Because ``window``, expiry and ``max_history`` only drop entries
+    from the front of history, s1..s(n-1) occurs within the window exactly
+    when ``starts[n-2]`` is at or after the window's first ``seq``. This is
+    the same test _match_previous_steps() makes.
+    """
+
+    def __init__(self, sequences: list[dict[str, Any]]) -> None:
+        self.sequences = sequences
+        self.fingerprint = sequences_fingerprint(sequences)
+        self.steps: list[list[tuple[Any, Optional[re.Pattern]]]] = [
+            [(step.get("tool"), _compile_step(step)) for step in seq.get("steps", [])]
+            for seq in sequences
+        ]
+        # tool -> (sequence, prefix step) pairs, highest step first within a
+        # sequence so an event cannot extend a prefix it just started.
+        self.prefix_steps: dict[Any, list[tuple[int, int]]] = {}
+        # tool -> sequences whose final step uses that tool, in config order
+        self.final_steps: dict[Any, list[int]] = {}
+        for i, steps in enumerate(self.steps):
+            for k in range(len(steps) - 2, -1, -1):
+                self.prefix_steps.setdefault(steps[k][0], []).append((i, k))
+            if steps:
+                self.final_steps.setdefault(steps[-1][0], []).append(i)
+
+    @staticmethod
+    def _step_matches(regex: Optional[re.Pattern], value: str) -> bool:
+        return regex is None or bool(regex.search(value))
+
+    def initial_states(self) -> list[list[Optional[int]]]:
+        return [[None] * max(len(steps) - 1, 0) for steps in self.steps]
+
+    def advance(self, states: list[list[Optional[int]]], entry: dict[str, Any]) -> None:
+        """Fold one recorded history entry (with its ``seq``) into states."""
+        candidates = self.prefix_steps.get(entry.get("tool"))
+        if not candidates:
+            return
+        value = _match_value(entry)
+        for i, k in candidates:
+            starts = states[i]
+            start = entry["seq"] if k == 0 else starts[k - 1]
+            if start is None or not self._step_matches(self.steps[i][k][1], value):
+                continue
+            if starts[k] is None or start > starts[k]:
+                starts[k] = start
+
+    def first_match(
+        self,
+        states: list[list[Optional[int]]],
+        history: list[dict[str, Any]],
+        current_entry: dict[str, Any],
+    ) -> Optional[int]:
+        """Index of the first sequence current_entry completes, or None."""
+        candidates = self.final_steps.get(current_entry.get("tool"))
+        if not candidates:
+            return None
+        value = _match_value(current_entry)
+        for i in candidates:
+            if not self._step_matches(self.steps[i][-1][1], value):
+                continue
+            if len(self.steps[i]) == 1:
+                return i
+            start = states[i][-1]
+            if start is None or not history:
+                continue
+            window = self.sequences[i].get("window", 10)
+            if start >= history[_window_start(history, window)]["seq"]:
+                return i
+        return None
+
+
+_automaton_cache: dict[str, SequenceAutomaton] = {}
+
+
+def get_automaton(config: dict[str, Any]) -> SequenceAutomaton:
+    """Compiled automaton for config's dangerousSequences (cached by fingerprint)."""
+    sequences = config.get("dangerousSequences", []) or []
+    fingerprint = sequences_fingerprint(sequences)
+    automaton = _automaton_cache.get(fingerprint)
+    if automaton is None:
+        automaton = _automaton_cache[fingerprint] = SequenceAutomaton(sequences)
+    return automaton
+
+
+def _is_contiguous(history: list[dict[str, Any]], next_seq: int) -> bool:
+    """True if history is exactly the seqs just before next_seq (only the front was dropped)."""
+    seqs = [entry.get("seq") for entry in history]
+    return seqs == list(range(next_seq - len(history), next_seq))
+
+
+def _restore_states(
+    config: dict[str, Any], automaton: SequenceAutomaton, store: session_state.SessionStore
+) -> tuple[list[dict[str, Any]], list[list[Optional[int]]], int, bool]:
+    """Load live history plus matching automaton states and the next ``seq``.
+
+    Persisted states are reused when they belong to this catalogue and expiry
+    only trimmed the front; otherwise they are rebuilt from the history (the
+    last tuple item is then True and the renumbered history must be saved).
+    """
+    history = _live_history(config, store)
+    saved = store.get_meta(AUTOMATON_META) or {}
+    next_seq = saved.get("next_seq")
+    if (
+        saved.get("fingerprint") == automaton.fingerprint
+        and isinstance(next_seq, int)
+        and isinstance(saved.get("states"), list)
+        and len(saved["states"]) == len(automaton.steps)
+        and _is_contiguous(history, next_seq)
+    ):
+        return history, saved["states"], next_seq, False
+
+    states = automaton.initial_states()
+    for seq, entry in enumerate(history):
+        entry["seq"] = seq
+        automaton.advance(states, entry)
+    return history, states, len(history), True
+
+
 # ============================================================================
 # PUBLIC API
 # ============================================================================
@@ -232,18 +437,33 @@ def record_tool_use(
     if config is None:
         config = load_config()
 
-    history = load_history(config)
-    history = cleanup_history(config, history)
-
-    # Add new entry
-    entry = {
-        "tool": tool,
-        "input": input_data,
-        "timestamp": time.time(),
-    }
-    history.append(entry)
-
-    save_history(config, history)
+    automaton = get_automaton(config)
+    expiry_seconds, max_history = _history_limits(config)
+    try:
+        store = _get_store(config)
+        with store.transaction():
+            history, states, next_seq, rebuilt = _restore_states(config, automaton, store)
+
+            # Add new entry and advance partial matches
+            entry = {
+                "tool": tool,
+                "input": input_data,
+                "timestamp": time.time(),
+                "seq": next_seq,
+            }
+            automaton.advance(states, entry)
+            if rebuilt:
+                store.replace(STREAM, _history_rows(history + [entry]))
+            else:
+                store.append(STREAM, entry, entry["timestamp"])
+            store.expire(STREAM, entry["timestamp"] - expiry_seconds)
+            store.trim(STREAM, max_history)
+            store.set_meta(
+                AUTOMATON_META,
+                {"fingerprint": automaton.fingerprint, "next_seq": next_seq + 1, "states": states},
+            )
+    except session_state.STORE_ERRORS as e:
+        print(f"Warning: Failed to save sequence history: {e}", file=sys.stderr)
 
 
 def check_sequences(
@@ -264,10 +484,13 @@ def check_sequences(
     if config is None:
         config = load_config()
 
-    history = load_history(config)
-    history = cleanup_history(config, history)
-
-    sequences = config.get("dangerousSequences", [])
+    automaton = get_automaton(config)
+    try:
+        history, states, _next_seq, _rebuilt = _restore_states(
+            config, automaton, _get_store(config)
+        )
+    except session_state.STORE_ERRORS:
+        return False, False, ""
 
     # Create current entry for matching
     current_entry = {
@@ -276,23 +499,22 @@ def check_sequences(
         "timestamp": time.time(),
     }
 
-    # Check each sequence pattern
-    for sequence in sequences:
-        match = find_sequence_match(history, current_entry, sequence)
-        if match:
-            action = match.get("action", "ask")
-            reason = match.get("reason", "Dangerous sequence detected")
-            severity = match.get("severity", "high")
+    # First sequence (in config order) that this entry completes
+    idx = automaton.first_match(states, history, current_entry)
+    if idx is None:
+        return False, False, ""
 
-            # Add sequence context to reason
-            full_reason = f"[{severity.upper()}] {reason}"
+    sequence = automaton.sequences[idx]
+    action = sequence.get("action", "ask")
+    reason = sequence.get("reason", "Dangerous sequence detected")
+    severity = sequence.get("severity", "high")
 
-            if action == "block":
-                return True, False, full_reason
-            else:
-                return False, True, full_reason
+    # Add sequence context to reason
+    full_reason = f"[{severity.upper()}] {reason}"
 
-    return False, False, ""
+    if action == "block":
+        return True, False, full_reason
+    return False, True, full_reason
 
 
 def get_history(config: Optional[dict[str, Any]] = None) -> list[dict[str, Any]]:
@@ -304,8 +526,10 @@ def get_history(config: Optional[dict[str, Any]] = None) -> list[dict[str, Any]]
     if config is None:
         config = load_config()
 
-    history = load_history(config)
-    return cleanup_history(config, history)
+    try:
+        return _live_history(config, _get_store(config))
+    except session_state.STORE_ERRORS:
+        return []
 
 
 def clear_history(config: Optional[dict[str, Any]] = None) -> None:
@@ -0,0 +1,223 @@
+"""
+Session State Store for Damage Control
+======================================
+
+Append-only event store shared by sequence-detector.py and taint-tracker.py.
+
+Each hook invocation used to load, filter and rewrite a whole JSON state file
+(``state/sequence-history.json``, ``state/taint-session.json``) without any
+locking, so two concurrent tool calls could drop each other's events. Both
+now keep their events in one SQLite database (WAL mode) next to those files:
+
+  - append() is a single INSERT; keyed streams replace the previous row for
+    the same key (taint entries are keyed by file path)
+  - expiry and size limits are DELETEs over the (stream, timestamp) index
+    and row order, instead of re-sorting every entry in Python
+  - transaction() takes the write lock up front (BEGIN IMMEDIATE), so
+    read-modify-write updates from concurrent hooks serialize
+  - the legacy JSON file is imported once by migrate_json() and renamed to
+    ``<name>.migrated``
+
+Small per-stream values (e.g. persisted automaton states) live in a meta table.
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+STORE_FILENAME = "session-state.sqlite"
+BUSY_TIMEOUT_SECONDS = 2.0
+MIGRATED_SUFFIX = ".migrated"
+
+# Failures callers treat like the old unreadable/unwritable state file.
+STORE_ERRORS = (OSError, sqlite3.Error)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, stream TEXT NOT NULL, key TEXT, "
+    "timestamp REAL NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS events_stream_time ON events (stream, timestamp)",
+    "CREATE INDEX IF NOT EXISTS events_stream_key ON events (stream, key)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+EventRow = tuple[Optional[str], float, dict[str, Any]]
+
+
+def store_path_for(state_file: Path) -> Path:
+    """Database path for a configured (legacy) state file: same directory."""
+    return state_file.parent / STORE_FILENAME
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class SessionStore:
+    """SQLite-backed append-only event streams plus a small key/value table."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        self._depth = 0
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction():
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+
+    def close(self) -> None:
+        self._db.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator["SessionStore"]:
+        """Hold the write lock for a read-modify-write sequence (re-entrant)."""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+        self._db.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._depth = 0
+            self._db.execute("ROLLBACK")
+            raise
+        self._depth = 0
+        self._db.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Streams
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        stream: str,
+        data: dict[str, Any],
+        timestamp: float,
+        key: Optional[str] = None,
+    ) -> None:
+        """Append an event; a keyed event replaces earlier events with that key."""
+        with self.transaction():
+            if key is not None:
+                self._db.execute("DELETE FROM events WHERE stream = ? AND key = ?", (stream, key))
+            self._db.execute(
+                "INSERT INTO events (stream, key, timestamp, data) VALUES (?, ?, ?, ?)",
+                (stream, key, timestamp, _dumps(data)),
+            )
+
+    def replace(self, stream: str, rows: Iterable[EventRow]) -> None:
+        """Replace a stream's events with rows of (key, timestamp, data), in order."""
+        with self.transaction():
+            self.clear(stream)
+            self._db.executemany(
+                "INSERT INTO events (stream, key, timestamp, data) VALUES (?, ?, ?, ?)",
+                ((stream, key, timestamp, _dumps(data)) for key, timestamp, data in rows),
+            )
+
+    def rows(
+        self, stream: str, since: Optional[float] = None, limit: Optional[int] = None
+    ) -> list[EventRow]:
+        """Events newer than ``since`` (exclusive), at most the last ``limit``, oldest first."""
+        query = "SELECT key, timestamp, data FROM events WHERE stream = ?"
+        params: list[Any] = [stream]
+        if since is not None:
+            query += " AND timestamp > ?"
+            params.append(since)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(-1 if limit is None else max(limit, 0))
+        found = self._db.execute(query, params).fetchall()
+        return [(key, timestamp, json.loads(data)) for key, timestamp, data in reversed(found)]
+
+    def entries(
+        self, stream: str, since: Optional[float] = None, limit: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Event payloads only; see rows()."""
+        return [data for _key, _timestamp, data in self.rows(stream, since, limit)]
+
+    def expire(self, stream: str, before: float) -> int:
+        """Drop events with timestamp <= before. Returns the number removed."""
+        cursor = self._db.execute(
+            "DELETE FROM events WHERE stream = ? AND timestamp <= ?", (stream, before)
+        )
+        return cursor.rowcount
+
+    def trim(self, stream: str, keep: int) -> int:
+        """Drop all but the newest ``keep`` events. Returns the number removed."""
+        if keep <= 0:
+            return self.clear(stream)
+        cursor = self._db.execute(
+            "DELETE FROM events WHERE stream = ? AND id <= "
+            "(SELECT id FROM events WHERE stream = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (stream, stream, keep),
+        )
+        return cursor.rowcount
+
+    def clear(self, stream: str) -> int:
+        cursor = self._db.execute("DELETE FROM events WHERE stream = ?", (stream,))
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Meta
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Any:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Store a JSON value under key; None deletes it."""
+        if value is None:
+            self._db.execute("DELETE FROM meta WHERE key = ?", (key,))
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value))
+        )
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    def migrate_json(self, legacy: Path, importer: Callable[[dict[str, Any]], None]) -> bool:
+        """Import a legacy JSON state file once, then rename it out of the way.
+
+        The rename happens under the write lock, so concurrent hooks cannot
+        import the same file twice. Unreadable files are renamed without import.
+        """
+        if not legacy.exists():
+            return False
+        with self.transaction():
+            if not legacy.exists():
+                return False
+            try:
+                with open(legacy) as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = None
+            if isinstance(data, dict):
+                importer(data)
+            os.replace(legacy, legacy.with_name(legacy.name + MIGRATED_SUFFIX))
+        return True
+
+
+_store: Optional[SessionStore] = None
+
+
+def open_store(path: Path) -> SessionStore:
+    """Process-wide store for path (reopened when the path changes)."""
+    global _store
+    if _store is not None and _store.path == path:
+        return _store
+    if _store is not None:
+        _store.close()
+    _store = SessionStore(path)
+    return _store
@@ -19,18 +19,30 @@ Usage:
 The taint tracker is used by:
   - PostToolUse:Read - to mark sensitive files when read
   - PreToolUse:Bash - to check for exfiltration before network commands
+
+Taint entries are kept in the shared session store (session_state.py): marking
+a file is one locked upsert, and expiry/size limits are applied in SQL instead
+of re-sorting every entry.
+
+taint-config.yaml is parsed once per content hash into a marshal cache and
+compiled into PatternIndex gates, so the hooks neither import PyYAML nor loop
+over the pattern lists on the common no-match path.
 """
 
 import hashlib
-import json
+import importlib
 import os
-import re
 import sys
 import time
 from pathlib import Path
 from typing import Any, Optional
 
-import yaml
+hook_dir = str(Path(__file__).parent)
+if hook_dir not in sys.path:
+    sys.path.insert(0, hook_dir)
+session_state = importlib.import_module("session_state")
+config_cache = importlib.import_module("config_cache")
+gated_patterns = importlib.import_module("gated_patterns")
 
 # ============================================================================
 # CONFIGURATION
@@ -63,6 +75,8 @@ def load_config() -> dict[str, Any]:
             },
         }
 
+    import yaml
+
     with open(config_path) as f:
         return yaml.safe_load(f) or {}
 
@@ -78,63 +92,122 @@ def get_state_path(config: dict[str, Any]) -> Path:
 
 
 # ============================================================================
-# STATE MANAGEMENT
+# COMPILED CONFIG CACHE
 # ============================================================================
 
+# Bump when the cached payload layout changes.
+_CONFIG_CACHE_FORMAT = 2
 
-def load_state(config: dict[str, Any]) -> dict[str, Any]:
-    """Load session state from file."""
-    state_path = get_state_path(config)
+_compiled_config_cache: Optional[dict[str, Any]] = None
+
+
+def get_config_cache_path() -> Path:
+    """Get path to the marshalled parsed taint-config cache."""
+    return config_cache.get_cache_path("taint-config.marshal")
 
-    if not state_path.exists():
-        return {"tainted_files": {}, "last_cleanup": time.time()}
 
+def load_config_cached() -> dict[str, Any]:
+    """Load taint-config.yaml through the on-disk cache (config_cache.py)."""
+    config_path = get_config_path()
+    if not config_path.exists():
+        return load_config()
+
+    cache_path = get_config_cache_path()
     try:
-        with open(state_path) as f:
-            return json.load(f)
-    except (OSError, json.JSONDecodeError):
-        return {"tainted_files": {}, "last_cleanup": time.time()}
+        key = config_cache.cache_key((config_path,), _CONFIG_CACHE_FORMAT)
+    except OSError:
+        return load_config()
 
+    cached = config_cache.read_cache(cache_path, key)
+    if cached is not None and isinstance(cached.get("config"), dict):
+        return cached["config"]
 
-def save_state(config: dict[str, Any], state: dict[str, Any]) -> None:
-    """Save session state to file."""
-    state_path = get_state_path(config)
+    config = load_config()
+    config_cache.write_cache(cache_path, {"key": key, "config": config})
+    return config
 
-    # Ensure directory exists
-    state_path.parent.mkdir(parents=True, exist_ok=True)
 
-    try:
-        with open(state_path, "w") as f:
-            json.dump(state, f, indent=2)
-    except OSError as e:
-        print(f"Warning: Failed to save taint state: {e}", file=sys.stderr)
+def compile_config(config: dict[str, Any]) -> dict[str, Any]:
+    """Attach a precompiled PatternIndex for each pattern list."""
+    compiled = config.copy()
+    for key in _INDEXED_LISTS:
+        compiled[f"{key}_index"] = PatternIndex(config.get(key, []) or [])
+    return compiled
+
 
+def get_compiled_config() -> dict[str, Any]:
+    """Get compiled configuration, using module-level cache."""
+    global _compiled_config_cache
 
-def cleanup_expired(config: dict[str, Any], state: dict[str, Any]) -> dict[str, Any]:
-    """Remove expired taint entries."""
+    if _compiled_config_cache is None:
+        _compiled_config_cache = compile_config(load_config_cached())
+
+    return _compiled_config_cache
+
+
+# ============================================================================
+# STATE MANAGEMENT
+# ============================================================================
+
+# Taint entries live in the shared session store (see session_state.py) next
+# to the configured state_file, keyed by file path; a JSON file left at that
+# path is migrated once.
+STREAM = "taint"
+
+
+def _session_limits(config: dict[str, Any]) -> tuple[float, int]:
+    """Return (taint_expiry_seconds, max_entries) from config."""
     session_config = config.get("session", {})
-    expiry_seconds = session_config.get("taint_expiry_seconds", DEFAULT_EXPIRY_SECONDS)
-    max_entries = session_config.get("max_entries", DEFAULT_MAX_ENTRIES)
+    return (
+        session_config.get("taint_expiry_seconds", DEFAULT_EXPIRY_SECONDS),
+        session_config.get("max_entries", DEFAULT_MAX_ENTRIES),
+    )
 
-    current_time = time.time()
-    tainted = state.get("tainted_files", {})
 
-    # Remove expired entries
-    tainted = {
-        path: info
-        for path, info in tainted.items()
-        if current_time - info.get("timestamp", 0) < expiry_seconds
-    }
+def _tainted_rows(tainted: dict[str, Any]) -> list[session_state.EventRow]:
+    return [(path, info.get("timestamp", 0), info) for path, info in tainted.items()]
+
+
+def _get_store(config: dict[str, Any]) -> session_state.SessionStore:
+    """Open the session store, importing a legacy JSON state file first."""
+    state_path = get_state_path(config)
+    store = session_state.open_store(session_state.store_path_for(state_path))
+
+    def import_legacy(data: dict[str, Any]) -> None:
+        tainted = data.get("tainted_files", {})
+        store.replace(STREAM, _tainted_rows(tainted if isinstance(tainted, dict) else {}))
 
-    # Trim to max entries (remove oldest)
-    if len(tainted) > max_entries:
-        sorted_entries = sorted(tainted.items(), key=lambda x: x[1].get("timestamp", 0))
-        tainted = dict(sorted_entries[-max_entries:])
+    store.migrate_json(state_path, import_legacy)
+    return store
 
-    state["tainted_files"] = tainted
-    state["last_cleanup"] = current_time
 
-    return state
+def load_state(config: dict[str, Any]) -> dict[str, Any]:
+    """Load all stored taint entries (including expired ones)."""
+    try:
+        rows = _get_store(config).rows(STREAM)
+    except session_state.STORE_ERRORS:
+        rows = []
+    return {"tainted_files": {path: info for path, _timestamp, info in rows}}
+
+
+def save_state(config: dict[str, Any], state: dict[str, Any]) -> None:
+    """Replace all taint entries with state["tainted_files"]."""
+    try:
+        _get_store(config).replace(STREAM, _tainted_rows(state.get("tainted_files", {})))
+    except session_state.STORE_ERRORS as e:
+        print(f"Warning: Failed to save taint state: {e}", file=sys.stderr)
+
+
+def _live_tainted(config: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Unexpired taint entries, newest max_entries, oldest first."""
+    expiry_seconds, max_entries = _session_limits(config)
+    try:
+        rows = _get_store(config).rows(
+            STREAM, since=time.time() - expiry_seconds, limit=max_entries
+        )
+    except session_state.STORE_ERRORS:
+        return {}
+    return {path: info for path, _timestamp, info in rows}
 
 
 # ============================================================================
@@ -142,46 +215,36 @@ def cleanup_expired(config: dict[str, Any], state: dict[str, Any]) -> dict[str,
 # ============================================================================
 
 
-def is_sensitive_path(file_path: str, config: dict[str, Any]) -> Optional[dict[str, Any]]:
-    """Check if file path matches sensitive patterns.
+# Case-insensitive gated matcher, shared with the file-operation hooks.
+PatternIndex = gated_patterns.PatternIndex
 
-    Returns pattern info if match found, None otherwise.
-    """
-    sensitive_patterns = config.get("sensitivePaths", [])
 
-    for pattern_info in sensitive_patterns:
-        pattern = pattern_info.get("pattern", "")
-        if not pattern:
-            continue
+_INDEXED_LISTS = ("sensitivePaths", "networkCommands")
 
-        try:
-            if re.search(pattern, file_path, re.IGNORECASE):
-                return pattern_info
-        except re.error:
-            continue
 
-    return None
+def _pattern_index(config: dict[str, Any], key: str) -> PatternIndex:
+    """Return the precompiled index for config[key], building it if missing or stale."""
+    entries = config.get(key, []) or []
+    index = config.get(f"{key}_index")
+    if index is None or index.entries is not entries:
+        index = PatternIndex(entries)
+    return index
 
 
-def is_network_command(command: str, config: dict[str, Any]) -> Optional[dict[str, Any]]:
-    """Check if command matches network command patterns.
+def is_sensitive_path(file_path: str, config: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Check if file path matches sensitive patterns.
 
     Returns pattern info if match found, None otherwise.
     """
-    network_patterns = config.get("networkCommands", [])
+    return _pattern_index(config, "sensitivePaths").first_match(file_path)
 
-    for pattern_info in network_patterns:
-        pattern = pattern_info.get("pattern", "")
-        if not pattern:
-            continue
 
-        try:
-            if re.search(pattern, command, re.IGNORECASE):
-                return pattern_info
-        except re.error:
-            continue
+def is_network_command(command: str, config: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Check if command matches network command patterns.
 
-    return None
+    Returns pattern info if match found, None otherwise.
+    """
+    return _pattern_index(config, "networkCommands").first_match(command)
 
 
 # ============================================================================
@@ -189,9 +252,20 @@ def is_network_command(command: str, config: dict[str, Any]) -> Optional[dict[st
 # ============================================================================
 
 
+# Characters encoded per hash update, so large reads are never encoded whole.
+HASH_CHUNK_CHARS = 64 * 1024
+
+
 def compute_content_hash(content: str) -> str:
-    """Compute SHA-256 hash of content for tracking."""
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    """Compute SHA-256 hash of content for tracking.
+
+    Encodes in HASH_CHUNK_CHARS slices; UTF-8 is stateless, so the digest is
+    the same as hashing content.encode("utf-8") in one go.
+    """
+    digest = hashlib.sha256()
+    for start in range(0, len(content), HASH_CHUNK_CHARS):
+        digest.update(content[start : start + HASH_CHUNK_CHARS].encode("utf-8"))
+    return digest.hexdigest()[:16]
 
 
 def mark_tainted(
@@ -208,28 +282,30 @@ def mark_tainted(
         True if file was marked as tainted (sensitive), False otherwise
     """
     if config is None:
-        config = load_config()
+        config = get_compiled_config()
 
     # Check if this is a sensitive file
     pattern_match = is_sensitive_path(file_path, config)
     if not pattern_match:
         return False
 
-    # Load current state
-    state = load_state(config)
-    state = cleanup_expired(config, state)
-
-    # Add taint entry
-    tainted = state.get("tainted_files", {})
-    tainted[file_path] = {
-        "timestamp": time.time(),
+    # Add taint entry (replacing any earlier one for this path), then expire
+    expiry_seconds, max_entries = _session_limits(config)
+    now = time.time()
+    info = {
+        "timestamp": now,
         "content_hash": compute_content_hash(content) if content else "",
         "type": pattern_match.get("type", "unknown"),
         "sensitivity": pattern_match.get("sensitivity", "high"),
     }
-
-    state["tainted_files"] = tainted
-    save_state(config, state)
+    try:
+        store = _get_store(config)
+        with store.transaction():
+            store.append(STREAM, info, now, key=file_path)
+            store.expire(STREAM, now - expiry_seconds)
+            store.trim(STREAM, max_entries)
+    except session_state.STORE_ERRORS as e:
+        print(f"Warning: Failed to save taint state: {e}", file=sys.stderr)
 
     return True
 
@@ -247,18 +323,14 @@ def check_exfiltration(command: str, config: Optional[dict[str, Any]] = None) ->
         - reason: Human-readable explanation
     """
     if config is None:
-        config = load_config()
+        config = get_compiled_config()
 
     # Check if this is a network command
     network_match = is_network_command(command, config)
     if not network_match:
         return False, ""
 
-    # Load current state
-    state = load_state(config)
-    state = cleanup_expired(config, state)
-
-    tainted = state.get("tainted_files", {})
+    tainted = _live_tainted(config)
     if not tainted:
         return False, ""
 
@@ -289,12 +361,9 @@ def get_tainted_files(config: Optional[dict[str, Any]] = None) -> list[dict[str,
         List of taint entries with file_path and metadata
     """
     if config is None:
-        config = load_config()
-
-    state = load_state(config)
-    state = cleanup_expired(config, state)
+        config = get_compiled_config()
 
-    tainted = state.get("tainted_files", {})
+    tainted = _live_tainted(config)
 
     return [{"file_path": path, **info} for path, info in tainted.items()]
 
@@ -302,10 +371,9 @@ def get_tainted_files(config: Optional[dict[str, Any]] = None) -> list[dict[str,
 def clear_session(config: Optional[dict[str, Any]] = None) -> None:
     """Clear all taint tracking data."""
     if config is None:
-        config = load_config()
+        config = get_compiled_config()
 
-    state = {"tainted_files": {}, "last_cleanup": time.time()}
-    save_state(config, state)
+    save_state(config, {"tainted_files": {}})
 
 
 # ============================================================================
@@ -8,6 +8,12 @@ import pytest
 os.environ["PYTHONIOENCODING"] = "utf-8"
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_config_cache(tmp_path_factory):
+    """Keep the parsed-config cache out of the real ~/.claude/cache during tests."""
+    os.environ["CLAUDE_DAMAGE_CONTROL_CACHE_DIR"] = str(tmp_path_factory.mktemp("config-cache"))
+
+
 @pytest.fixture
 def tmp_log_dir(tmp_path, monkeypatch):
     """Isolated log directory for tests.
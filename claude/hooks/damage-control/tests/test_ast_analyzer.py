@@ -963,3 +963,59 @@ class TestConfigurationEdgeCases:
         }
         result = analyzer.analyze_command_ast("echo '!@#$%^&*()'", config)
         assert result.get("decision") == "allow"
+
+
+@pytest.mark.skipif(not ASTAnalyzer().is_available(), reason="tree-sitter not available")
+class TestParseReuse:
+    """Tests for the parse LRU and the deduplicated extraction pass."""
+
+    _RM_PATTERNS = [
+        {"pattern": r"\brm\s+-rf\s+/", "reason": "rm root"},
+        {"pattern": r"\bmkfs\b", "reason": "mkfs"},
+    ]
+
+    def _config(self, **extra):
+        config = {"bashToolPatterns": self._RM_PATTERNS, "astAnalysis": {"enabled": True}}
+        config.update(extra)
+        return config
+
+    def test_repeat_input_is_parsed_once(self):
+        analyzer = ASTAnalyzer()
+        parser = analyzer._get_parser()
+        analyzer._parser = MagicMock(wraps=parser)
+        for _ in range(3):
+            analyzer.analyze_command_ast("echo a | bash -c 'ls'", self._config())
+        # Outer command and the bash -c body, each parsed a single time
+        assert analyzer._parser.parse.call_count == 2
+
+    def test_cache_is_bounded(self):
+        analyzer = ASTAnalyzer(parse_cache_size=2)
+        for cmd in ("ls", "pwd", "id"):
+            analyzer._parse(cmd)
+        assert list(analyzer._parse_cache) == ["pwd", "id"]
+
+    def test_extracted_commands_are_deduplicated(self):
+        analyzer = ASTAnalyzer()
+        commands = analyzer._commands_for("ls; ls; bash -c 'ls'")
+        assert commands == ["ls", "bash -c 'ls'"]
+
+    def test_checked_command_is_not_rechecked(self):
+        analyzer = ASTAnalyzer()
+        config = self._config()
+        assert analyzer.analyze_command_ast("rm -rf /", config)["decision"] == "block"
+        result = analyzer.analyze_command_ast("rm -rf /", config, checked="rm -rf /")
+        assert result["decision"] == "allow"
+        result = analyzer.analyze_command_ast("bash -c 'rm -rf /'", config, checked="x")
+        assert result["decision"] == "block"
+
+    def test_prefilter_selects_candidate_patterns(self):
+        analyzer = ASTAnalyzer()
+        compiled = analyzer._get_compiled_patterns(self._config())
+        prefilter = MagicMock(size=len(compiled))
+        prefilter.candidates.return_value = [1]
+        config = self._config(
+            bashToolPatterns_compiled=compiled, bashToolPatterns_prefilter=prefilter
+        )
+        assert analyzer.analyze_command_ast("rm -rf /", config)["decision"] == "allow"
+        assert analyzer.analyze_command_ast("(mkfs /dev/x)", config)["reason"] == "mkfs"
+        prefilter.candidates.assert_called_with(["mkfs /dev/x"])
@@ -0,0 +1,183 @@
+"""Tests for audit_index.py - incremental SQLite index over the audit logs."""
+
+import json
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import audit_index  # noqa: E402
+
+
+def _entry(decision: str, pattern: str = "", day: str = "2026-01-02", **extra) -> dict:
+    return {
+        "timestamp": f"{day}T10:00:00",
+        "tool": "Bash",
+        "command": "cmd",
+        "command_redacted": "cmd",
+        "decision": decision,
+        "reason": f"reason {pattern}",
+        "pattern_matched": pattern,
+        "context": None,
+        **extra,
+    }
+
+
+def _append(path: Path, *entries: dict) -> None:
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+@pytest.fixture
+def logs_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    return log_dir
+
+
+@pytest.fixture
+def index(tmp_path):
+    connection = audit_index.connect(tmp_path / "index.sqlite")
+    yield connection
+    connection.close()
+
+
+def _count(connection, where: str = "1") -> int:
+    return connection.execute(f"SELECT count(*) FROM audit_entries WHERE {where}").fetchone()[0]
+
+
+class TestIngest:
+    def test_only_new_lines_are_read(self, logs_dir, index):
+        log = logs_dir / "2026-01-02.log"
+        _append(log, _entry("allowed"), _entry("blocked", "rm"))
+        stats = audit_index.ingest(index, logs_dir)
+        assert (stats.files, stats.entries) == (1, 2)
+
+        _append(log, _entry("ask"))
+        stats = audit_index.ingest(index, logs_dir)
+        assert (stats.files, stats.entries) == (1, 1)
+        assert audit_index.ingest(index, logs_dir).skipped == 1
+        assert _count(index) == 3
+
+    def test_partial_last_line_waits(self, logs_dir, index):
+        log = logs_dir / "2026-01-02.log"
+        _append(log, _entry("allowed"))
+        with open(log, "a") as f:
+            f.write(json.dumps(_entry("blocked"))[:20])
+        audit_index.ingest(index, logs_dir)
+        assert _count(index) == 1
+        with open(log, "a") as f:
+            f.write(json.dumps(_entry("blocked"))[20:] + "\n")
+        audit_index.ingest(index, logs_dir)
+        assert _count(index, "decision = 'blocked'") == 1
+
+    def test_replaced_log_is_reread(self, logs_dir, index):
+        log = logs_dir / "2026-01-02.log"
+        _append(log, _entry("allowed"), _entry("allowed"))
+        audit_index.ingest(index, logs_dir)
+        log.unlink()
+        _append(log, _entry("blocked"))
+        audit_index.ingest(index, logs_dir)
+        assert [r[0] for r in index.execute("SELECT decision FROM audit_entries")] == ["blocked"]
+
+    def test_archive_adds_only_unseen_lines(self, logs_dir, index, tmp_path):
+        log = logs_dir / "2026-01-01.log"
+        _append(log, _entry("allowed", day="2026-01-01"))
+        audit_index.ingest(index, logs_dir)
+        _append(log, _entry("blocked", "late", day="2026-01-01"))
+        with tarfile.open(logs_dir / "2026-01-01.log.tar.gz", "w:gz") as tar:
+            tar.add(log, arcname=log.name)
+        log.unlink()
+
+        stats = audit_index.ingest(index, logs_dir)
+        assert stats.entries == 1
+        assert _count(index) == 2
+        assert audit_index.ingest(index, logs_dir).skipped == 1
+
+    def test_indexed_archive_resumes_at_offset(self, logs_dir, index, monkeypatch):
+        monkeypatch.setattr(audit_index.log_rotate, "BLOCK_BYTES", 100)
+        log = logs_dir / "2026-01-01.log"
+        _append(log, *[_entry("allowed", day="2026-01-01")] * 10)
+        audit_index.ingest(index, logs_dir)
+        _append(log, _entry("blocked", "late", day="2026-01-01"))
+        archive = logs_dir / "2026-01-01.log.tar.gz"
+        assert audit_index.log_rotate.safe_archive(log, archive)
+        log.unlink()
+
+        assert audit_index.ingest(index, logs_dir).entries == 1
+        assert _count(index) == 11
+
+    def test_malformed_lines_are_counted(self, logs_dir, index):
+        log = logs_dir / "2026-01-02.log"
+        log.write_text("not json\n[1]\n\n" + json.dumps(_entry("ask")) + "\n")
+        stats = audit_index.ingest(index, logs_dir)
+        assert (stats.entries, stats.malformed) == (1, 2)
+
+    def test_unrelated_files_are_ignored(self, logs_dir, index):
+        _append(logs_dir / "rotation.log", {"archived": 1})
+        _append(logs_dir / "notes.log", _entry("blocked"))
+        assert audit_index.ingest(index, logs_dir).files == 0
+
+
+class TestReports:
+    @pytest.fixture
+    def loaded(self, logs_dir, index):
+        _append(
+            logs_dir / "2026-01-01.log",
+            _entry("blocked", "rm -rf", day="2026-01-01"),
+            _entry("ask", "git push", day="2026-01-01"),
+            _entry("allowed", day="2026-01-01"),
+            _entry("allowed", day="2026-01-01"),
+        )
+        _append(
+            logs_dir / "2026-01-02.log",
+            _entry("blocked", "rm -rf", timings_ns={"parse": 2_000_000, "match": 1_000_000}),
+            _entry("blocked", "shred", timings_ns={"parse": 4_000_000}),
+        )
+        audit_index.ingest(index, logs_dir)
+        return index
+
+    def _rows(self, connection, view: str):
+        return connection.execute(f"SELECT * FROM {view}").fetchall()
+
+    def test_top_blocked_patterns(self, loaded):
+        rows = self._rows(loaded, "top_blocked_patterns")
+        assert [(r[0], r[1], r[2]) for r in rows] == [("rm -rf", 2, 2), ("shred", 1, 1)]
+
+    def test_ask_rate_by_day(self, loaded):
+        rows = self._rows(loaded, "ask_rate_by_day")
+        assert rows == [("2026-01-02", 2, 0, 2, 0.0), ("2026-01-01", 4, 1, 1, 0.25)]
+
+    def test_slowest_stages(self, loaded):
+        rows = self._rows(loaded, "slowest_stages")
+        assert rows == [("parse", 2, 3.0, 4.0), ("match", 1, 1.0, 1.0)]
+
+
+class TestCli:
+    def test_report_ingests_then_queries(self, logs_dir, tmp_path, capsys):
+        _append(logs_dir / "2026-01-02.log", _entry("blocked", "rm -rf"))
+        db = tmp_path / "cli.sqlite"
+        argv = ["--logs-dir", str(logs_dir), "--db", str(db)]
+        assert audit_index.main([*argv, "report", "top_blocked_patterns", "--format", "jsonl"]) == 0
+        row = json.loads(capsys.readouterr().out.splitlines()[0])
+        assert (row["pattern"], row["blocked"]) == ("rm -rf", 1)
+
+    def test_query_is_bounded_and_read_only(self, logs_dir, tmp_path, capsys):
+        _append(logs_dir / "2026-01-02.log", *[_entry("allowed")] * 5)
+        argv = ["--logs-dir", str(logs_dir), "--db", str(tmp_path / "cli.sqlite")]
+        assert (
+            audit_index.main([*argv, "query", "SELECT id FROM audit_entries", "--limit", "2"]) == 0
+        )
+        assert capsys.readouterr().out.count("\n") == 4  # header, rule, two rows
+        assert audit_index.main([*argv, "--no-ingest", "query", "DELETE FROM audit_entries"]) == 2
+        assert audit_index.main([*argv, "query", "SELECT 1; SELECT 2"]) == 2
+        assert "query error" in capsys.readouterr().err
+
+    def test_missing_index_without_ingest(self, tmp_path, capsys):
+        argv = ["--db", str(tmp_path / "none.sqlite"), "--no-ingest", "views"]
+        assert audit_index.main(argv) == 2
+        assert "does not exist" in capsys.readouterr().err
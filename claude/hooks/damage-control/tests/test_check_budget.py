@@ -0,0 +1,112 @@
+"""Tests for the check_command() wall-clock budget and its fail-safe ask."""
+
+import importlib.util
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def bash_tool(monkeypatch):
+    module = load_module("bash_tool_budget", "bash-tool-damage-control.py")
+    monkeypatch.delenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", raising=False)
+    monkeypatch.setattr(module, "spawn_log_rotation", lambda: None)
+    return module
+
+
+CONFIG = {"bashToolPatterns": [{"pattern": r"\bshred\b", "reason": "no shred"}]}
+
+
+def _slow_stage(seconds: float):
+    def stage(rules, ctx):
+        time.sleep(seconds)
+        return None
+
+    return stage
+
+
+class TestCheckBudget:
+    def test_preempts_slow_stage(self, bash_tool, monkeypatch):
+        monkeypatch.setattr(bash_tool, "_stage_read_only", _slow_stage(5))
+        start = time.perf_counter()
+        result = bash_tool.check_command("ls", CONFIG, budget_ms=50)
+        assert time.perf_counter() - start < 2
+        blocked, ask, reason, pattern, _, _ = result
+        assert (blocked, ask, pattern) == (False, True, "budget_exceeded:read_only")
+        assert "50ms" in reason
+        assert bash_tool.is_budget_exceeded(result)
+
+    def test_cooperative_check_between_stages(self, bash_tool, monkeypatch):
+        monkeypatch.setattr(bash_tool, "_can_preempt", lambda: False)
+        monkeypatch.setattr(bash_tool, "_stage_zero_access", _slow_stage(0.1))
+        result = bash_tool.check_command("ls", CONFIG, budget_ms=20)
+        assert result[3] == "budget_exceeded:zero_access"
+
+    def test_stage_catching_exception_cannot_swallow_overrun(self, bash_tool, monkeypatch):
+        def swallowing_stage(rules, ctx):
+            try:
+                time.sleep(5)
+            except Exception:
+                pass
+            return None
+
+        monkeypatch.setattr(bash_tool, "_stage_no_delete", swallowing_stage)
+        assert bash_tool.check_command("ls", CONFIG, budget_ms=50)[3] == (
+            "budget_exceeded:no_delete"
+        )
+
+    def test_timer_is_disarmed_after_check(self, bash_tool):
+        import signal
+
+        bash_tool.check_command("ls", CONFIG, budget_ms=1000)
+        assert signal.getitimer(signal.ITIMER_REAL)[0] == 0
+        assert signal.getsignal(signal.SIGALRM) == signal.SIG_DFL
+
+    def test_fast_check_unaffected(self, bash_tool):
+        assert bash_tool.check_command("shred x", CONFIG, budget_ms=1000)[0] is True
+
+    @pytest.mark.parametrize("value", ["0", "-1"])
+    def test_env_zero_disables(self, bash_tool, monkeypatch, value):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", value)
+        monkeypatch.setattr(bash_tool, "_stage_read_only", _slow_stage(0.1))
+        assert bash_tool.get_check_budget_ms() <= 0
+        assert bash_tool.check_command("ls", CONFIG) == (False, False, "", "", False, False)
+
+    def test_invalid_env_uses_default(self, bash_tool, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", "soon")
+        assert bash_tool.get_check_budget_ms() == bash_tool.DEFAULT_CHECK_BUDGET_MS
+
+
+class TestBudgetInHook:
+    def test_overrun_asks_logs_stage_and_is_not_cached(
+        self, bash_tool, monkeypatch, tmp_path, tmp_log_dir
+    ):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", "50")
+        monkeypatch.setattr(bash_tool, "_stage_read_only", _slow_stage(5))
+        payload = {"tool_name": "Bash", "tool_input": {"command": "ls"}}
+
+        outcome = bash_tool.evaluate_hook_input(payload)
+        decision = json.loads(outcome.stdout)["hookSpecificOutput"]
+        assert decision["permissionDecision"] == "ask"
+        assert "read_only" in decision["permissionDecisionReason"]
+
+        monkeypatch.setattr(bash_tool, "_stage_read_only", _slow_stage(0))
+        assert bash_tool.evaluate_hook_input(payload).stdout == ""
+
+        entries = [json.loads(line) for line in next(tmp_log_dir.glob("*.log")).open()]
+        assert entries[0]["pattern_matched"] == "budget_exceeded:read_only"
+        assert entries[0]["decision"] == "ask"
+        assert entries[1]["cache_hit"] is False
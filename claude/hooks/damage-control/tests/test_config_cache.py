@@ -0,0 +1,102 @@
+"""Tests for the on-disk parsed-config cache in bash-tool-damage-control."""
+
+import importlib.util
+import marshal
+import sys
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def bash_tool(tmp_path, monkeypatch):
+    """Fresh hook module with config, hosts and cache redirected into tmp_path."""
+    module = load_module("bash_tool_cache", "bash-tool-damage-control.py")
+    config_path = tmp_path / "patterns.yaml"
+    config_path.write_text("bashToolPatterns:\n  - pattern: '\\brm\\s+-rf'\n    reason: rm -rf\n")
+    hosts_path = tmp_path / "allowed-hosts.yaml"
+    hosts_path.write_text("allowedHosts:\n  - example.com\n")
+    monkeypatch.setattr(module, "get_config_path", lambda: config_path)
+    monkeypatch.setattr(module, "get_allowed_hosts_path", lambda: hosts_path)
+    monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_CACHE_DIR", str(tmp_path / "cache"))
+    return module
+
+
+def _reset(module) -> None:
+    module._compiled_config_cache = None
+    module._allowed_hosts_cache = None
+
+
+class TestConfigCache:
+    def test_cold_load_writes_cache(self, bash_tool):
+        config = bash_tool.load_config_cached()
+        assert config["bashToolPatterns"][0]["reason"] == "rm -rf"
+        assert bash_tool.get_config_cache_path().exists()
+
+    def test_warm_load_skips_yaml(self, bash_tool, monkeypatch):
+        bash_tool.load_config_cached()
+        _reset(bash_tool)
+        monkeypatch.setattr(bash_tool, "load_config", lambda: pytest.fail("YAML re-parsed"))
+        monkeypatch.setitem(sys.modules, "yaml", None)
+        config = bash_tool.load_config_cached()
+        assert config["bashToolPatterns"][0]["reason"] == "rm -rf"
+        assert bash_tool._allowed_hosts_cache == ["example.com"]
+
+    def test_changed_patterns_invalidate_cache(self, bash_tool):
+        bash_tool.load_config_cached()
+        _reset(bash_tool)
+        bash_tool.get_config_path().write_text("bashToolPatterns: []\n")
+        assert bash_tool.load_config_cached()["bashToolPatterns"] == []
+
+    def test_changed_allowed_hosts_invalidate_cache(self, bash_tool):
+        bash_tool.load_config_cached()
+        _reset(bash_tool)
+        bash_tool.get_allowed_hosts_path().write_text("allowedHosts:\n  - other.org\n")
+        bash_tool.load_config_cached()
+        assert bash_tool._allowed_hosts_cache == ["other.org"]
+
+    def test_corrupt_cache_is_rebuilt(self, bash_tool):
+        cache_path = bash_tool.get_config_cache_path()
+        cache_path.parent.mkdir(parents=True)
+        cache_path.write_bytes(b"\x00garbage")
+        config = bash_tool.load_config_cached()
+        assert config["bashToolPatterns"][0]["reason"] == "rm -rf"
+        payload = marshal.loads(cache_path.read_bytes())
+        assert payload["config"] == config
+
+    def test_no_temp_files_left_behind(self, bash_tool):
+        bash_tool.load_config_cached()
+        leftovers = list(bash_tool.get_config_cache_path().parent.glob("*.tmp"))
+        assert leftovers == []
+
+    def test_compiled_config_from_cache_matches(self, bash_tool):
+        cold = bash_tool.get_compiled_config()
+        _reset(bash_tool)
+        warm = bash_tool.get_compiled_config()
+        assert [p["pattern"] for p in warm["bashToolPatterns_compiled"]] == [
+            p["pattern"] for p in cold["bashToolPatterns_compiled"]
+        ]
+
+
+class TestSharedCacheModule:
+    def test_taint_tracker_uses_same_cache_dir(self, bash_tool):
+        taint = load_module("taint_tracker_cache", "taint-tracker.py")
+        assert taint.config_cache is bash_tool.config_cache
+        assert taint.get_config_cache_path().parent == bash_tool.get_config_cache_path().parent
+
+    def test_key_covers_contents_and_format(self, bash_tool, tmp_path):
+        cache = bash_tool.config_cache
+        path = tmp_path / "a.yaml"
+        missing = cache.cache_key([path], 1)
+        path.write_text("x: 1\n")
+        assert cache.cache_key([path], 1) not in {missing, cache.cache_key([path], 2)}
@@ -0,0 +1,137 @@
+"""Tests for the bounded, chunked content scan in file_operation_damage_control.py."""
+
+import importlib
+import io
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+core = importlib.import_module("file_operation_damage_control")
+
+PATTERNS = [
+    {"pattern": r"ignore\s+all\s+previous", "type": "override"},
+    {"pattern": r"sk-ant-", "type": "anthropic_key"},
+    {"pattern": r"(\w)\1{5}", "type": "repeat"},
+    {"pattern": r"^###\s*System$", "type": "header"},
+]
+
+
+GATED_PATTERNS = [item for item in PATTERNS if item["type"] != "repeat"]
+
+
+def _config(patterns=PATTERNS, **limits) -> dict:
+    config = {"injectionPatterns": patterns, "contentScanPaths": ["CLAUDE.md"]}
+    if limits:
+        config["contentScanLimits"] = limits
+    return config
+
+
+def _reference(content: str, patterns=PATTERNS):
+    for item in patterns:
+        if re.search(item["pattern"], content, re.IGNORECASE | re.MULTILINE):
+            return item["type"]
+    return None
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(core, "SCAN_CHUNK_CHARS", 50)
+    monkeypatch.setattr(core, "SCAN_OVERLAP_CHARS", 40)
+
+
+class TestFullScan:
+    @pytest.mark.parametrize("patterns", [PATTERNS, GATED_PATTERNS])
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_whole_text_search(self, small_chunks, seed, patterns):
+        rng = random.Random(seed)
+        pieces = ["ab ", "ignore all previous", "sk-ant-", "zzzzzz", "\n### System\n", "x\n"]
+        weights = [20, 1, 1, 1, 1, 20]
+        content = "".join(rng.choices(pieces, weights, k=rng.randint(0, 150)))
+        result = core.scan_content(content, _config(patterns))
+        assert result.pattern_type == _reference(content, patterns)
+
+    def test_list_order_wins_over_position(self, small_chunks):
+        content = "sk-ant-" + "." * 500 + "ignore all previous"
+        assert core.scan_content(content, _config()).pattern_type == "override"
+
+    def test_match_across_chunk_boundary(self, small_chunks):
+        content = "." * 45 + "ignore all previous" + "." * 100
+        assert core.scan_content(content, _config()).pattern_type == "override"
+
+    def test_anchor_at_chunk_edge_is_rechecked(self, small_chunks):
+        content = "." * 41 + "\n### System" + "tail"
+        assert core.scan_content(content, _config()).pattern_type is None
+
+    def test_small_content_has_no_coverage_record(self):
+        assert core.scan_content("hello", _config()).coverage is None
+
+
+class TestSampledScan:
+    LIMITS = dict(max_bytes=1000, head_bytes=100, tail_bytes=100, sample_windows=4, window_bytes=50)
+
+    def test_spans_are_head_samples_tail(self):
+        spans = core.content_scan_spans(
+            10_000, core.get_content_scan_limits(_config(**self.LIMITS))
+        )
+        assert spans[0] == (0, 100)
+        assert spans[-1] == (9_900, 10_000)
+        middle = spans[1:-1]
+        assert len(middle) == 4
+        assert all(end - start == 50 and 100 <= start and end <= 9_900 for start, end in middle)
+        assert middle == sorted(middle)
+
+    def test_head_and_tail_always_scanned(self):
+        config = _config(**self.LIMITS)
+        assert core.scan_content("sk-ant-" + "." * 9_000, config).pattern_type == "anthropic_key"
+        assert core.scan_content("." * 9_000 + "sk-ant-", config).pattern_type == "anthropic_key"
+
+    def test_coverage_recorded(self):
+        result = core.scan_content("." * 10_000, _config(**self.LIMITS))
+        assert result.coverage["mode"] == "sampled"
+        assert result.coverage["size"] == 10_000
+        assert result.coverage["scanned"] == 400
+        assert len(result.coverage["spans"]) == 6
+
+    def test_invalid_limits_fall_back_to_defaults(self):
+        limits = core.get_content_scan_limits(_config(max_bytes="big", head_bytes=-1, bogus=3))
+        assert limits == core.DEFAULT_CONTENT_SCAN_LIMITS
+
+    def test_sampled_write_logs_coverage(self, monkeypatch, tmp_log_dir, capsys):
+        config = _config(**self.LIMITS)
+        config.update(zeroAccessPaths=[], readOnlyPaths=[], writeConfirmPaths=[], contexts={})
+        payload = {
+            "tool_name": "Write",
+            "tool_input": {"file_path": "CLAUDE.md", "content": "." * 5_000},
+        }
+        monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps(payload)))
+        with pytest.raises(SystemExit) as exc:
+            core.run_file_operation_hook("Write", "content", "write", lambda: config)
+        assert exc.value.code == 0
+        (entry,) = [json.loads(line) for line in next(tmp_log_dir.glob("*.log")).open()]
+        assert entry["decision"] == "allowed"
+        assert entry["content_scan"]["size"] == 5_000
+
+
+class TestMatcher:
+    def test_built_once_per_pattern_list(self):
+        config = _config()
+        assert core.get_injection_matcher(config) is core.get_injection_matcher(config)
+
+    def test_backreference_pattern_is_not_gated(self):
+        matcher = core.get_injection_matcher(_config())
+        assert matcher.ungated
+        assert len(matcher.compiled) == len(PATTERNS)
+        assert not core.get_injection_matcher(_config(GATED_PATTERNS)).ungated
+
+    def test_reloaded_config_reuses_matcher(self):
+        matcher = core.get_injection_matcher(_config())
+        assert core.get_injection_matcher(_config()) is matcher
+        changed = core.get_injection_matcher(_config(GATED_PATTERNS))
+        assert changed is not matcher
+        assert list(core._matcher_cache.values()) == [changed]
@@ -0,0 +1,180 @@
+"""Tests for the damage-control daemon and its thin client."""
+
+import importlib.util
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import damage_control_daemon as daemon  # noqa: E402
+
+HOOK_DIR = Path(__file__).parent.parent
+CLIENT = HOOK_DIR / "bash-tool-damage-control-client.py"
+
+requires_af_unix = pytest.mark.skipif(not daemon.is_supported(), reason="requires AF_UNIX")
+
+
+def _bash_input(command: str) -> dict:
+    return {"tool_name": "Bash", "tool_input": {"command": command}}
+
+
+@pytest.fixture
+def running_daemon(tmp_path, tmp_log_dir):
+    """Serve a daemon on a temporary socket in a background thread."""
+    socket_path = tmp_path / "dc.sock"
+    server = daemon.DamageControlServer(socket_path, idle_timeout=30)
+    server.hook.spawn_log_rotation = lambda: None
+    thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+    thread.start()
+    yield socket_path
+    daemon.send_request({"op": "shutdown"}, socket_path)
+    thread.join(timeout=5)
+
+
+@requires_af_unix
+class TestDaemonProtocol:
+    def test_ping_healthy_daemon(self, running_daemon):
+        assert daemon.ping(running_daemon)
+
+    def test_ping_missing_socket(self, tmp_path):
+        assert not daemon.ping(tmp_path / "absent.sock")
+
+    def test_block_relays_exit_code_and_stderr(self, running_daemon):
+        reply = daemon.send_request(
+            {"op": "check", "input": _bash_input("rm -rf /")}, running_daemon
+        )
+        assert daemon.is_valid_outcome(reply)
+        assert reply["exit_code"] == 2
+        assert reply["stderr"].startswith("SECURITY: Blocked")
+        assert reply["stdout"] == ""
+
+    def test_ask_relays_permission_decision_json(self, running_daemon):
+        reply = daemon.send_request(
+            {"op": "check", "input": _bash_input("git push --force")}, running_daemon
+        )
+        assert reply["exit_code"] == 0
+        output = json.loads(reply["stdout"])
+        assert output["hookSpecificOutput"]["permissionDecision"] == "ask"
+
+    def test_non_bash_tool_allowed(self, running_daemon):
+        reply = daemon.send_request(
+            {"op": "check", "input": {"tool_name": "Read", "tool_input": {}}}, running_daemon
+        )
+        assert reply == {"exit_code": 0, "stdout": "", "stderr": ""}
+
+    def test_audit_log_uses_client_cwd(self, running_daemon, tmp_log_dir):
+        daemon.send_request(
+            {"op": "check", "input": _bash_input("ls"), "cwd": "/client/cwd", "user": "alice"},
+            running_daemon,
+        )
+        entries = [
+            json.loads(line)
+            for log in tmp_log_dir.glob("*.log")
+            for line in log.read_text().splitlines()
+        ]
+        assert entries[-1]["cwd"] == "/client/cwd"
+        assert entries[-1]["user"] == "alice"
+
+    def test_unknown_op_is_error(self, running_daemon):
+        reply = daemon.send_request({"op": "bogus"}, running_daemon)
+        assert "error" in reply
+        assert not daemon.is_valid_outcome(reply)
+
+    def test_shutdown_removes_socket(self, running_daemon):
+        assert daemon.send_request({"op": "shutdown"}, running_daemon) == {"ok": True}
+        for _ in range(50):
+            if not running_daemon.exists():
+                break
+            threading.Event().wait(0.05)
+        assert not running_daemon.exists()
+
+
+@requires_af_unix
+class TestForwardedEnvironment:
+    def test_client_settings_apply_to_their_check(self, running_daemon, monkeypatch):
+        monkeypatch.delenv("CLAUDE_DISABLE_HOOKS", raising=False)
+        request = {"op": "check", "input": _bash_input("rm -rf /")}
+        disabled = {**request, "env": {"CLAUDE_DISABLE_HOOKS": "damage-control"}}
+        assert daemon.send_request(disabled, running_daemon)["exit_code"] == 0
+        assert daemon.send_request({**request, "env": {}}, running_daemon)["exit_code"] == 2
+        assert "CLAUDE_DISABLE_HOOKS" not in os.environ
+
+    def test_request_environment_restores_daemon_values(self, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", "5")
+        monkeypatch.delenv("CLAUDE_DAMAGE_CONTROL_PROFILE", raising=False)
+        env = {"CLAUDE_DAMAGE_CONTROL_PROFILE": "1"}
+        with daemon.request_environment(env):
+            assert os.environ["CLAUDE_DAMAGE_CONTROL_PROFILE"] == "1"
+            assert "CLAUDE_DAMAGE_CONTROL_BUDGET_MS" not in os.environ
+        assert os.environ["CLAUDE_DAMAGE_CONTROL_BUDGET_MS"] == "5"
+        assert "CLAUDE_DAMAGE_CONTROL_PROFILE" not in os.environ
+
+    def test_forwarded_env_only_sends_known_settings(self, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_BUDGET_MS", "50")
+        monkeypatch.setenv("UNRELATED", "x")
+        assert daemon.forwarded_env()["CLAUDE_DAMAGE_CONTROL_BUDGET_MS"] == "50"
+        assert "UNRELATED" not in daemon.forwarded_env()
+
+
+@requires_af_unix
+class TestStaleSocket:
+    def test_stale_socket_file_is_replaced(self, tmp_path, tmp_log_dir):
+        socket_path = tmp_path / "dc.sock"
+        socket_path.write_text("")
+        server = daemon.DamageControlServer(socket_path, idle_timeout=0.1)
+        try:
+            assert socket_path.exists()
+        finally:
+            server.server_close()
+            socket_path.unlink()
+
+
+@requires_af_unix
+class TestClientFallback:
+    def _run_client(self, tmp_path, command: str, socket_path: Path):
+        env = dict(os.environ)
+        env["HOME"] = str(tmp_path)
+        env["CLAUDE_DAMAGE_CONTROL_SOCKET"] = str(socket_path)
+        env.pop("CLAUDE_DAMAGE_CONTROL_DAEMON", None)
+        return subprocess.run(
+            [sys.executable, str(CLIENT)],
+            input=json.dumps(_bash_input(command)),
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=env,
+        )
+
+    def test_falls_back_in_process_without_daemon(self, tmp_path):
+        result = self._run_client(tmp_path, "rm -rf /", tmp_path / "absent.sock")
+        assert result.returncode == 2
+        assert "SECURITY: Blocked" in result.stderr
+
+    def test_falls_back_when_socket_is_not_a_daemon(self, tmp_path):
+        bogus = tmp_path / "bogus.sock"
+        bogus.write_text("not a socket")
+        result = self._run_client(tmp_path, "git push --force", bogus)
+        assert result.returncode == 0
+        assert json.loads(result.stdout)["hookSpecificOutput"]["permissionDecision"] == "ask"
+
+
+class TestWithoutUnixSockets:
+    def test_client_imports_and_runs_in_process(self, monkeypatch):
+        """Windows has no AF_UNIX (nor socketserver's Unix classes)."""
+        monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+        monkeypatch.delattr(socketserver, "UnixStreamServer", raising=False)
+        monkeypatch.delitem(sys.modules, "damage_control_daemon", raising=False)
+        monkeypatch.delitem(sys.modules, "local_socket", raising=False)
+        spec = importlib.util.spec_from_file_location("client", CLIENT)
+        client = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(client)
+        assert not client.daemon.is_supported()
+        assert client.daemon_outcome(_bash_input("ls")) is None
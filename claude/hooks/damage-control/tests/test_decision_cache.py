@@ -0,0 +1,128 @@
+"""Tests for the check_command decision cache in bash-tool-damage-control."""
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def bash_tool(tmp_path, monkeypatch, tmp_log_dir):
+    """Fresh hook module with the config cache dir and logs under tmp_path."""
+    module = load_module("bash_tool_decisions", "bash-tool-damage-control.py")
+    monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("CLAUDE_DAMAGE_CONTROL_DECISION_CACHE", raising=False)
+    monkeypatch.setattr(module, "spawn_log_rotation", lambda: None)
+    return module
+
+
+def _evaluate(module, command: str):
+    return module.evaluate_hook_input({"tool_name": "Bash", "tool_input": {"command": command}})
+
+
+def _log_entries(log_dir: Path) -> list[dict]:
+    return [
+        json.loads(line) for log in log_dir.glob("*.log") for line in log.read_text().splitlines()
+    ]
+
+
+RESULT = (True, False, "Blocked: rm", r"\brm", False, False)
+
+
+class TestDecisionCache:
+    def test_lru_evicts_least_recently_used(self, bash_tool):
+        cache = bash_tool.DecisionCache(max_entries=2)
+        cache.put("a", RESULT)
+        cache.put("b", RESULT)
+        cache.get("a")
+        cache.put("c", RESULT)
+        assert cache.get("a") == RESULT
+        assert cache.get("b") is None
+        assert cache.get("c") == RESULT
+
+    def test_expired_entries_miss(self, bash_tool, monkeypatch):
+        cache = bash_tool.DecisionCache(ttl=10)
+        now = [1000.0]
+        monkeypatch.setattr(bash_tool.time, "time", lambda: now[0])
+        cache.put("a", RESULT)
+        now[0] += 11
+        assert cache.get("a") is None
+
+    def test_disk_layer_shared_across_instances(self, bash_tool, tmp_path):
+        db = tmp_path / "decisions.sqlite"
+        bash_tool.DecisionCache(disk_path=db).put("a", RESULT)
+        assert bash_tool.DecisionCache(disk_path=db).get("a") == RESULT
+
+    def test_disk_layer_size_eviction(self, bash_tool, tmp_path):
+        db = tmp_path / "decisions.sqlite"
+        cache = bash_tool.DecisionCache(max_entries=2, disk_path=db)
+        for key in ("a", "b", "c"):
+            cache.put(key, RESULT)
+        fresh = bash_tool.DecisionCache(disk_path=db)
+        assert fresh.get("a") is None
+        assert fresh.get("c") == RESULT
+
+    def test_corrupt_disk_file_is_a_miss(self, bash_tool, tmp_path):
+        db = tmp_path / "decisions.sqlite"
+        db.write_bytes(b"not a database" * 100)
+        cache = bash_tool.DecisionCache(disk_path=db)
+        assert cache.get("a") is None
+        cache.put("a", RESULT)
+        assert cache.get("a") == RESULT
+
+
+class TestCachedHook:
+    def test_repeat_command_hits_and_still_logs(self, bash_tool, tmp_log_dir):
+        first = _evaluate(bash_tool, "rm -rf /")
+        second = _evaluate(bash_tool, "rm -rf /")
+        assert first == second
+        assert second.exit_code == 2
+        entries = _log_entries(tmp_log_dir)
+        assert [e["cache_hit"] for e in entries] == [False, True]
+        assert entries[0]["decision"] == entries[1]["decision"] == "blocked"
+
+    def test_context_is_part_of_key(self, bash_tool):
+        bash_tool.get_compiled_config()
+        assert bash_tool.decision_cache_key("ls", None) != bash_tool.decision_cache_key(
+            "ls", "commit_message"
+        )
+
+    def test_fingerprint_change_misses(self, bash_tool, tmp_log_dir):
+        _evaluate(bash_tool, "git status")
+        bash_tool._config_fingerprint = "different"
+        _evaluate(bash_tool, "git status")
+        assert [e["cache_hit"] for e in _log_entries(tmp_log_dir)] == [False, False]
+
+    def test_off_mode_never_hits(self, bash_tool, tmp_log_dir, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_DECISION_CACHE", "off")
+        _evaluate(bash_tool, "git status")
+        _evaluate(bash_tool, "git status")
+        assert [e["cache_hit"] for e in _log_entries(tmp_log_dir)] == [False, False]
+
+    def test_disk_mode_serves_cold_process(self, bash_tool, tmp_log_dir, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_DECISION_CACHE", "disk")
+        _evaluate(bash_tool, "git push --force")
+        cold = load_module("bash_tool_cold", "bash-tool-damage-control.py")
+        monkeypatch.setattr(cold, "spawn_log_rotation", lambda: None)
+        outcome = _evaluate(cold, "git push --force")
+        assert json.loads(outcome.stdout)["hookSpecificOutput"]["permissionDecision"] == "ask"
+        assert _log_entries(tmp_log_dir)[-1]["cache_hit"] is True
+        assert bash_tool.get_decision_cache_path().exists()
+
+    def test_ad_hoc_config_bypasses_cache(self, bash_tool):
+        config = {"bashToolPatterns": [{"pattern": r"\bshred\b", "reason": "no shred"}]}
+        result, hit = bash_tool.check_command_cached("shred x", config)
+        assert result[0] is True
+        assert hit is False
+        assert bash_tool.check_command_cached("shred x", config)[1] is False
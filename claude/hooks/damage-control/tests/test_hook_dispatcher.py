@@ -0,0 +1,154 @@
+"""Tests for hook-dispatcher.py - one process for all PreToolUse/PostToolUse hooks."""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def dispatcher(tmp_log_dir, monkeypatch):
+    """Dispatcher with logs and session state under tmp_path."""
+    module = load_module("hook_dispatcher", "hook-dispatcher.py")
+    monkeypatch.delenv("CLAUDE_DISABLE_HOOKS", raising=False)
+    monkeypatch.delenv("CLAUDE_PROJECT_DIR", raising=False)
+    bash_tool = module.load_hook_module(HOOK_DIR / "bash-tool-damage-control.py")
+    monkeypatch.setattr(bash_tool, "spawn_log_rotation", lambda: None)
+    return module
+
+
+def _pre(tool_name: str, **tool_input) -> dict:
+    return {"hook_event_name": "PreToolUse", "tool_name": tool_name, "tool_input": tool_input}
+
+
+def _decision(outcome) -> str:
+    return json.loads(outcome.stdout)["hookSpecificOutput"]["permissionDecision"]
+
+
+class TestMerge:
+    def test_strictness_order(self, dispatcher):
+        Outcome = dispatcher.HookOutcome
+        ask = Outcome(stdout=json.dumps({"permissionDecision": "ask", "reason": "x"}))
+        deny = Outcome(stdout=json.dumps({"hookSpecificOutput": {"permissionDecision": "deny"}}))
+        context = Outcome(stdout=json.dumps({"hookSpecificOutput": {"additionalContext": "y"}}))
+        ranks = [
+            dispatcher.strictness(o)
+            for o in (Outcome(), Outcome(exit_code=1), context, ask, deny, Outcome(exit_code=2))
+        ]
+        assert ranks == [0, 1, 2, 3, 4, 4]
+
+    def test_strictest_wins_and_ties_go_first(self, dispatcher):
+        Outcome = dispatcher.HookOutcome
+        first = Outcome(exit_code=2, stderr="first")
+        merged = dispatcher.merge_outcomes([Outcome(), first, Outcome(exit_code=2, stderr="b")])
+        assert merged is first
+        assert dispatcher.merge_outcomes([]) == Outcome()
+
+    def test_path_fix_is_carried_into_stricter_outcome(self, dispatcher):
+        Outcome = dispatcher.HookOutcome
+        updated = {"file_path": "src/a.py", "content": "x"}
+        path_fix = Outcome(
+            stdout=json.dumps(
+                {"hookSpecificOutput": {"permissionDecision": "allow", "updatedInput": updated}}
+            )
+        )
+        ask = Outcome(stdout=json.dumps({"permissionDecision": "ask", "reason": "injection"}))
+        specific = json.loads(dispatcher.merge_outcomes([path_fix, ask]).stdout)[
+            "hookSpecificOutput"
+        ]
+        assert specific["permissionDecision"] == "ask"
+        assert specific["permissionDecisionReason"] == "injection"
+        assert specific["updatedInput"] == updated
+        assert dispatcher.merge_outcomes([path_fix, Outcome()]) is path_fix
+        block = Outcome(exit_code=2, stderr="SECURITY: x")
+        assert dispatcher.merge_outcomes([path_fix, block]) is block
+
+
+class TestRunMain:
+    def test_captures_stdin_stdout_and_exit(self, dispatcher):
+        def main():
+            data = json.load(sys.stdin)
+            print(data["tool_name"])
+            sys.exit(2)
+
+        stdin = sys.stdin
+        outcome = dispatcher.run_main(main, {"tool_name": "Edit"})
+        assert (outcome.exit_code, outcome.stdout) == (2, "Edit\n")
+        assert sys.stdin is stdin
+
+    def test_sub_hook_crash_is_non_blocking_error(self, dispatcher, monkeypatch):
+        def boom(input_data):
+            raise RuntimeError("kaput")
+
+        hook = dispatcher.SubHook("boom", "PreToolUse", frozenset({"Bash"}), boom)
+        monkeypatch.setattr(dispatcher, "SUB_HOOKS", (hook,))
+        outcome = dispatcher.dispatch(_pre("Bash", command="ls"))
+        assert outcome.exit_code == 1
+        assert "kaput" in outcome.stderr
+
+
+class TestRouting:
+    def test_modules_load_once(self, dispatcher):
+        path = HOOK_DIR / "edit-tool-damage-control.py"
+        assert dispatcher.load_hook_module(path) is dispatcher.load_hook_module(path)
+
+    def test_routes_by_event_and_tool(self, dispatcher):
+        names = [h.name for h in dispatcher.select_sub_hooks("PreToolUse", "Edit")]
+        assert names == ["path-normalization", "edit-tool-damage-control"]
+        names = [h.name for h in dispatcher.select_sub_hooks("PreToolUse", "Bash")]
+        assert names == ["bash-tool-damage-control"]
+        assert dispatcher.select_sub_hooks("PreToolUse", "Read") == []
+        assert dispatcher.select_sub_hooks("PostToolUse", "Read") == []
+        assert dispatcher.select_sub_hooks("Stop", "Bash") == []
+
+    def test_disable_by_sub_hook_name(self, dispatcher, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DISABLE_HOOKS", "path-normalization, edit-tool-damage-control")
+        assert dispatcher.select_sub_hooks("PreToolUse", "Edit") == []
+
+    def test_family_name_only_disables_hooks_that_honoured_it(self, dispatcher, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DISABLE_HOOKS", "damage-control")
+        names = [h.name for h in dispatcher.select_sub_hooks("PreToolUse", "Write")]
+        assert names == ["path-normalization", "write-tool-damage-control"]
+
+
+class TestDispatch:
+    def test_bash_block_contract(self, dispatcher):
+        outcome = dispatcher.dispatch(_pre("Bash", command="rm -rf /"))
+        assert outcome.exit_code == 2
+        assert outcome.stderr.startswith("SECURITY:")
+
+    def test_bash_ask_contract(self, dispatcher):
+        assert _decision(dispatcher.dispatch(_pre("Bash", command="git push --force"))) == "ask"
+
+    def test_bash_uses_daemon_answer(self, dispatcher, monkeypatch):
+        client = dispatcher.load_hook_module(HOOK_DIR / "bash-tool-damage-control-client.py")
+        reply = {"exit_code": 2, "stdout": "", "stderr": "SECURITY: from daemon\n"}
+        monkeypatch.setattr(client, "daemon_outcome", lambda input_data: reply)
+        outcome = dispatcher.dispatch(_pre("Bash", command="ls"))
+        assert (outcome.exit_code, outcome.stderr) == (2, "SECURITY: from daemon\n")
+
+    def test_disabled_bash_hook_allows(self, dispatcher, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DISABLE_HOOKS", "bash-tool-damage-control")
+        assert dispatcher.dispatch(_pre("Bash", command="rm -rf /")).exit_code == 0
+
+    def test_edit_block_beats_path_fix(self, dispatcher):
+        outcome = dispatcher.dispatch(_pre("Edit", file_path="~/.ssh/id_rsa", new_string="x"))
+        assert outcome.exit_code == 2
+        assert "zero-access" in outcome.stderr
+
+    def test_event_argument_overrides_payload(self, dispatcher):
+        payload = {"tool_name": "Bash", "tool_input": {"command": "rm -rf /"}}
+        assert dispatcher.dispatch(payload).exit_code == 0
+        assert dispatcher.dispatch(payload, "PreToolUse").exit_code == 2
@@ -321,6 +321,11 @@ class TestBuildWarnings:
 
 
 class TestMain:
+    @pytest.fixture(autouse=True)
+    def fresh_compiled_config(self, monkeypatch):
+        """main() compiles patterns.yaml once per process; start each test cold."""
+        monkeypatch.setattr(injection_module, "_compiled_configs", {})
+
     def test_exits_0_when_hook_disabled(self, monkeypatch):
         monkeypatch.setenv("CLAUDE_DISABLE_HOOKS", HOOK_NAME)
         with pytest.raises(SystemExit) as exc_info:
@@ -11,11 +11,15 @@ import pytest
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from log_rotate import (
+import log_rotate  # noqa: E402
+from log_rotate import (  # noqa: E402
     ARCHIVE_DAYS,
     DELETE_DAYS,
     acquire_lock,
+    index_path,
+    iter_archive_lines,
     log_rotation_event,
+    read_archive_index,
     release_lock,
     rotate_logs,
     safe_archive,
@@ -134,6 +138,93 @@ class TestSafeArchive:
         assert not archive_path.with_suffix(".tmp").exists()
 
 
+class TestBlockedArchive:
+    """Tests for block-indexed archives and their sidecar."""
+
+    @pytest.fixture
+    def archived(self, logs_dir, monkeypatch):
+        monkeypatch.setattr(log_rotate, "BLOCK_BYTES", 200)
+        log_file = logs_dir / "2026-01-01.log"
+        with open(log_file, "w") as f:
+            for i in range(50):
+                f.write(json.dumps({"timestamp": f"2026-01-01T10:{i:02d}:00", "i": i}) + "\n")
+        archive_path = logs_dir / "2026-01-01.log.tar.gz"
+        assert safe_archive(log_file, archive_path)
+        return log_file, archive_path
+
+    def test_archive_is_plain_tar_gz(self, archived):
+        log_file, archive_path = archived
+        with tarfile.open(archive_path, "r:gz") as tar:
+            assert tar.getnames() == [log_file.name]
+            assert tar.extractfile(log_file.name).read() == log_file.read_bytes()
+
+    def test_sidecar_summarizes_log(self, archived):
+        log_file, archive_path = archived
+        index = read_archive_index(archive_path)
+        assert index["lines"] == 50
+        assert index["bytes"] == log_file.stat().st_size
+        assert (index["first_timestamp"], index["last_timestamp"]) == (
+            "2026-01-01T10:00:00",
+            "2026-01-01T10:49:00",
+        )
+        assert len(index["blocks"]) > 5
+        assert [b["line"] for b in index["blocks"]] == sorted(b["line"] for b in index["blocks"])
+
+    def test_seek_by_offset_matches_full_read(self, archived):
+        _, archive_path = archived
+        full = list(iter_archive_lines(archive_path))
+        middle = full[len(full) // 2][0]
+        assert list(iter_archive_lines(archive_path, start=middle)) == full[len(full) // 2 :]
+
+    def test_seek_by_time_skips_earlier_blocks(self, archived):
+        _, archive_path = archived
+        lines = list(iter_archive_lines(archive_path, since="2026-01-01T10:30:00"))
+        first = json.loads(lines[0][1])["i"]
+        assert 0 < first <= 30
+        assert json.loads(lines[-1][1])["i"] == 49
+
+    def test_missing_sidecar_reads_whole_archive(self, archived):
+        log_file, archive_path = archived
+        index_path(archive_path).unlink()
+        lines = list(iter_archive_lines(archive_path, since="2026-01-01T10:30:00"))
+        assert b"".join(line for _, line in lines) == log_file.read_bytes()
+
+    def test_compresses_whole_blocks(self, logs_dir, monkeypatch):
+        """One compress call per block, not per line, lets zlib release the GIL."""
+        sizes = []
+        write = log_rotate._BlockGzipWriter.write
+        monkeypatch.setattr(
+            log_rotate._BlockGzipWriter,
+            "write",
+            lambda writer, data: sizes.append(len(data)) or write(writer, data),
+        )
+        monkeypatch.setattr(log_rotate, "BLOCK_BYTES", 200)
+        log_file = logs_dir / "2026-01-01.log"
+        log_file.write_text("".join(json.dumps({"i": i}) + "\n" for i in range(100)))
+        archive_path = logs_dir / "2026-01-01.log.tar.gz"
+        assert safe_archive(log_file, archive_path)
+        blocks = read_archive_index(archive_path)["blocks"]
+        # tar header + one per block + tar trailer
+        assert len(sizes) == len(blocks) + 2
+        assert all(size >= 200 for size in sizes[1:-2])
+
+    def test_parallel_rotation_archives_all(self, logs_dir, monkeypatch):
+        monkeypatch.setattr(log_rotate, "WORKERS", 3)
+        monkeypatch.setattr(log_rotate, "DRY_RUN", False)
+        monkeypatch.setattr(log_rotate, "DISABLED", False)
+        old = datetime.now() - timedelta(days=log_rotate.ARCHIVE_DAYS + 5)
+        logs = []
+        for days in range(5):
+            log_file = logs_dir / f"{(old - timedelta(days=days)):%Y-%m-%d}.log"
+            log_file.write_text(json.dumps({"n": days}) + "\n")
+            logs.append(log_file)
+        rotate_logs()
+        for log_file in logs:
+            archive_path = log_file.with_suffix(".log.tar.gz")
+            assert not log_file.exists()
+            assert read_archive_index(archive_path)["lines"] == 1
+
+
 class TestRotateLogs:
     """Tests for main rotation logic."""
 
@@ -162,10 +253,12 @@ class TestRotateLogs:
     def test_deletes_old_archives(self, logs_dir, old_archive, monkeypatch):
         """Archives older than DELETE_DAYS are deleted."""
         monkeypatch.setenv("DAMAGE_CONTROL_LOG_ROTATION", "")
+        index_path(old_archive).write_text("{}")
 
         rotate_logs()
 
         assert not old_archive.exists()
+        assert not index_path(old_archive).exists()
 
     def test_delete_days_zero_skips_deletion(self, logs_dir, old_archive, monkeypatch):
         """DELETE_DAYS=0 disables archive deletion."""
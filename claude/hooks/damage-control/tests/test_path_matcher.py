@@ -0,0 +1,81 @@
+"""Tests for the single-scan PathMatcher used by the path-list stages."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bash_tool = load_module("bash_tool", "bash-tool-damage-control.py")
+
+
+def _matcher(paths: list[str], fn):
+    return bash_tool.PathMatcher.build(bash_tool.preprocess_path_list(paths), fn)
+
+
+class TestPathMatcher:
+    def test_empty_matcher_never_matches(self):
+        matcher = bash_tool.PathMatcher.empty()
+        assert not matcher.any_match("cat ~/.ssh/id_rsa")
+        assert matcher.matching_indices("cat ~/.ssh/id_rsa") == []
+
+    def test_indices_keep_list_order(self):
+        matcher = _matcher(["/etc/", "*.pem", "~/.bashrc"], bash_tool._path_mention_entry_regex)
+        assert matcher.matching_indices("cp key.pem /etc/ssl/") == [0, 1]
+
+    def test_no_mention_rejected_by_gate(self):
+        matcher = _matcher(["/etc/", "*.pem"], bash_tool._path_mention_entry_regex)
+        assert not matcher.any_match("ls -la src/")
+
+    def test_zero_access_literal_file_suffix(self):
+        matcher = _matcher([".env"], bash_tool._zero_access_entry_regex)
+        assert matcher.any_match("cat .env")
+        assert not matcher.any_match("cat .env.example")
+
+    def test_zero_access_literal_is_case_sensitive(self):
+        matcher = _matcher(["~/.aws/"], bash_tool._zero_access_entry_regex)
+        assert not matcher.any_match("cat ~/.AWS/credentials")
+
+    def test_exclusion_literal_is_case_insensitive(self):
+        matcher = _matcher([".env.example"], bash_tool._exclusion_entry_regex)
+        assert matcher.any_match("cat .ENV.EXAMPLE")
+
+    def test_glob_is_case_insensitive(self):
+        matcher = _matcher(["*.pem"], bash_tool._zero_access_entry_regex)
+        assert matcher.matching_indices("cat SERVER.PEM") == [0]
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    return bash_tool.get_compiled_config()
+
+
+class TestCompiledMatchers:
+    @pytest.mark.parametrize(
+        "key", ["zeroAccessPaths", "zeroAccessExclusions", "readOnlyPaths", "noDeletePaths"]
+    )
+    def test_matcher_covers_preprocessed_list(self, compiled, key):
+        matcher = compiled[f"{key}_matcher"]
+        assert matcher.entries is compiled[f"{key}_compiled"]
+        assert len(matcher.entry_regexes) == len(matcher.entries)
+
+    def test_gate_agrees_with_entry_regexes(self, compiled):
+        matcher = compiled["readOnlyPaths_matcher"]
+        for command in ["ls", "cat /etc/passwd", "echo hi > ~/.bashrc", "vim ~/.zshrc"]:
+            indices = [
+                idx
+                for idx, regex in enumerate(matcher.entry_regexes)
+                if regex is not None and regex.search(command)
+            ]
+            assert matcher.matching_indices(command) == indices
+            assert matcher.any_match(command) == bool(indices)
@@ -0,0 +1,55 @@
+"""Tests for the per-pattern cost report in benchmark.py."""
+
+import importlib.util
+import re
+from pathlib import Path
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmark = load_module("damage_control_benchmark", "benchmark.py")
+
+
+class TestPatternCostReport:
+    def test_rows_ranked_by_max_cost_with_hits(self):
+        patterns = [
+            ("bash", "ls", re.compile(r"\bls\b")),
+            ("bash", "slow", re.compile(r"(x+x+)+y")),
+        ]
+        rows = benchmark.run_pattern_cost_benchmark(
+            patterns, {"hit": "ls -la", "adversarial": "x" * 18}, repeats=1
+        )
+        assert [row["pattern"] for row in rows] == ["slow", "ls"]
+        assert rows[0]["worst_input"] == "adversarial"
+        assert rows[1]["hits"] == 1
+
+    def test_catastrophic_pattern_is_cut_off_at_cap(self, monkeypatch):
+        monkeypatch.setattr(benchmark, "PATTERN_SEARCH_CAP_S", 0.05)
+        patterns = [("bash", "redos", re.compile(r"(a+)+$"))]
+        rows = benchmark.run_pattern_cost_benchmark(patterns, {"evil": "a" * 40 + "!"})
+        assert rows[0]["max_ms"] >= 50
+        assert rows[0]["hits"] == 0
+
+    def test_collects_every_pattern_group(self):
+        patterns = benchmark.collect_pattern_regexes(benchmark.bash_tool.get_compiled_config())
+        groups = {group for group, _, _ in patterns}
+        assert groups == {"bash", "zero_access", "injection", "secret"}
+
+
+class TestRuleSetBudget:
+    def test_shipped_patterns_stay_linear_on_adversarial_inputs(self):
+        """Regression gate: no shipped regex may backtrack badly on long inputs."""
+        patterns = benchmark.collect_pattern_regexes(benchmark.bash_tool.get_compiled_config())
+        rows = benchmark.run_pattern_cost_benchmark(
+            patterns, benchmark.ADVERSARIAL_INPUTS, repeats=2
+        )
+        over = [row for row in rows if row["max_ms"] > benchmark.DEFAULT_PATTERN_BUDGET_MS]
+        assert over == [], [(row["pattern"], row["worst_input"]) for row in over]
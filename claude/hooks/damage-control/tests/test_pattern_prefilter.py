@@ -0,0 +1,117 @@
+"""Tests for the required-literal prefilter over bashToolPatterns."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+import yaml
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bash_tool = load_module("bash_tool", "bash-tool-damage-control.py")
+benchmark = load_module("benchmark", "benchmark.py")
+
+
+def _fixture_commands() -> list[str]:
+    """Every Bash command in test_fixtures.yaml plus the benchmark corpus."""
+    with open(Path(__file__).parent / "test_fixtures.yaml", encoding="utf-8") as f:
+        fixtures = yaml.safe_load(f) or {}
+    commands = list(benchmark.BASH_COMMANDS)
+    for suite in fixtures.values():
+        for cases in (suite or {}).values():
+            for case in cases or []:
+                if case.get("tool", "Bash") == "Bash":
+                    commands.append(case["command"])
+    return commands
+
+
+class TestExtractRequiredLiterals:
+    @pytest.mark.parametrize(
+        "pattern,expected",
+        [
+            (r"\brm\s+-rf", ("-rf",)),
+            (r"\bgit\s+push\b", ("push",)),
+            (r"\b(dig|nslookup|host)\s+\S+", ("dig", "host", "nslookup")),
+            (r"(terraform)?\s*destroy", ("destroy",)),
+            (r"LD_PRELOAD=", ("ld_preload=",)),
+            (r"(?:curl|wget)\b.*--upload-file", ("--upload-file",)),
+        ],
+    )
+    def test_extracts_most_selective_literal(self, pattern, expected):
+        assert bash_tool.extract_required_literals(pattern) == expected
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            r"[a-z]+\s*>",
+            r"(foo)?\s*x",
+            r"(?:rm|[a-z]{3})\s",
+            r"(",
+        ],
+    )
+    def test_no_usable_literal(self, pattern):
+        assert bash_tool.extract_required_literals(pattern) is None
+
+
+class TestPatternPrefilter:
+    def _prefilter(self, patterns: list[str]):
+        compiled = bash_tool.compile_regex_patterns([{"pattern": p} for p in patterns])
+        return bash_tool.PatternPrefilter.build(compiled)
+
+    def test_candidates_keep_pattern_order(self):
+        prefilter = self._prefilter([r"\bgit\s+clean", r"[;&]\s*x", r"\brm\s+-rf"])
+        assert prefilter.candidates(["rm -rf / ; git clean"]) == [0, 1, 2]
+
+    def test_absent_literal_skips_pattern(self):
+        prefilter = self._prefilter([r"\bgit\s+clean", r"\brm\s+-rf"])
+        assert prefilter.candidates(["ls -la"]) == []
+
+    def test_case_insensitive(self):
+        prefilter = self._prefilter([r"LD_PRELOAD="])
+        assert prefilter.candidates(["ld_preload=/tmp/x.so ls"]) == [0]
+
+    def test_any_text_selects(self):
+        prefilter = self._prefilter([r"\benv\b", r"\brm\s+-rf"])
+        assert prefilter.candidates(["rm -rf /tmp", "env X=1 rm -rf /tmp"]) == [0, 1]
+
+    def test_non_ascii_text_runs_everything(self):
+        prefilter = self._prefilter([r"\bssh\b", r"\brm\s+-rf"])
+        assert prefilter.candidates(["ſsh host"]) == [0, 1]
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    return bash_tool.get_compiled_config()
+
+
+class TestPrefilterSoundness:
+    """The prefilter must never drop a pattern that actually matches."""
+
+    def test_matching_patterns_are_always_candidates(self, compiled):
+        patterns = compiled["bashToolPatterns_compiled"]
+        prefilter = compiled["bashToolPatterns_prefilter"]
+        for command in _fixture_commands():
+            candidates = set(prefilter.candidates([command]))
+            for idx, item in enumerate(patterns):
+                if item["compiled"].search(command):
+                    assert idx in candidates, (command, item["pattern"])
+
+    def test_check_command_unchanged_without_prefilter(self, compiled):
+        unfiltered = dict(compiled)
+        unfiltered["bashToolPatterns_prefilter"] = bash_tool.PatternPrefilter(
+            always_run=list(range(len(compiled["bashToolPatterns_compiled"]))),
+            size=len(compiled["bashToolPatterns_compiled"]),
+        )
+        for command in _fixture_commands():
+            assert bash_tool.check_command(command, compiled) == bash_tool.check_command(
+                command, unfiltered
+            ), command
@@ -0,0 +1,124 @@
+"""Tests for replay.py - audit log replay under a candidate config."""
+
+import json
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import replay  # noqa: E402
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def _write_log(path: Path, entries: list[dict]) -> Path:
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+    return path
+
+
+def _bash(command: str, context=None) -> dict:
+    return {"tool": "Bash", "command": command, "decision": "allowed", "context": context}
+
+
+@pytest.fixture
+def logs_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    _write_log(
+        log_dir / "2026-01-02.log",
+        [
+            _bash("shred secret.txt"),
+            _bash("shred secret.txt"),
+            _bash("ls -la"),
+            _bash("x" * 200 + "..."),
+            {"tool": "Edit", "command": "shred secret.txt"},
+        ],
+    )
+    old = _write_log(tmp_path / "2026-01-01.log", [_bash("shred secret.txt"), _bash("git status")])
+    with tarfile.open(log_dir / "2026-01-01.log.tar.gz", "w:gz") as tar:
+        tar.add(old, arcname=old.name)
+    (log_dir / "rotation.log").write_text('{"tool": "Bash", "command": "rotation"}\n')
+    return log_dir
+
+
+@pytest.fixture
+def configs(tmp_path):
+    baseline = tmp_path / "baseline.yaml"
+    baseline.write_text("bashToolPatterns:\n  - pattern: '\\bgit\\s+status'\n    reason: test\n")
+    candidate = tmp_path / "candidate.yaml"
+    candidate.write_text(
+        "bashToolPatterns:\n"
+        "  - pattern: '\\bshred\\b'\n    reason: no shred\n"
+        "  - pattern: '\\bgit\\s+status'\n    reason: test\n"
+    )
+    return baseline, candidate
+
+
+class TestScanLogs:
+    def test_streams_logs_and_archives_and_dedupes(self, logs_dir):
+        scan = replay.scan_logs([logs_dir])
+        assert scan.files == 2
+        assert scan.entries == 6
+        assert scan.truncated == 1
+        assert scan.commands[("shred secret.txt", None)] == 3
+        assert ("rotation", None) not in scan.commands
+
+    def test_context_is_part_of_key(self, tmp_path):
+        log = _write_log(tmp_path / "a.log", [_bash("git commit"), _bash("git commit", "x")])
+        assert len(replay.scan_logs([log]).commands) == 2
+
+    def test_malformed_lines_are_counted(self, tmp_path):
+        log = tmp_path / "a.log"
+        log.write_text('not json\n{"tool": "Bash", "command": "ls"}\n')
+        scan = replay.scan_logs([log])
+        assert scan.malformed == 1
+        assert len(scan.commands) == 1
+
+
+class TestReplay:
+    def test_reports_changed_decisions_only(self, logs_dir, configs):
+        report = replay.replay(replay.scan_logs([logs_dir]), *configs, workers=1)
+        assert [(c.command, c.transition, c.occurrences) for c in report.changes] == [
+            ("shred secret.txt", "allowed -> blocked", 3)
+        ]
+        assert report.changes[0].after == ("blocked", r"\bshred\b")
+
+    def test_rule_index_shift_is_not_a_change(self, tmp_path, configs):
+        log = _write_log(tmp_path / "a.log", [_bash("git status")])
+        report = replay.replay(replay.scan_logs([log]), *configs, workers=1)
+        assert report.changes == []
+
+    def test_checks_run_without_time_budget(self, logs_dir, configs, monkeypatch):
+        budgets = []
+        check = replay.bash_tool.check_command
+
+        def recording_check(*args, **kwargs):
+            budgets.append(kwargs.get("budget_ms"))
+            return check(*args, **kwargs)
+
+        monkeypatch.setattr(replay.bash_tool, "check_command", recording_check)
+        replay.replay(replay.scan_logs([logs_dir]), *configs, workers=1)
+        assert budgets and set(budgets) == {0}
+
+    def test_pool_matches_inline(self, tmp_path, configs, monkeypatch):
+        monkeypatch.setattr(replay, "CHUNK_SIZE", 2)
+        log = _write_log(
+            tmp_path / "a.log",
+            [_bash(f"shred f{i}") for i in range(5)] + [_bash(f"ls {i}") for i in range(5)],
+        )
+        scan = replay.scan_logs([log])
+        inline = replay.replay(scan, *configs, workers=1)
+        pooled = replay.replay(scan, *configs, workers=2)
+        assert pooled.workers == 2
+        assert pooled.changes == inline.changes
+        assert len(inline.changes) == 5
+
+    def test_format_report(self, logs_dir, configs):
+        report = replay.replay(replay.scan_logs([logs_dir]), *configs, workers=1)
+        text = replay.format_report(report)
+        assert "commands/s" in text
+        assert "allowed -> blocked" in text
+        assert "shred secret.txt" in text
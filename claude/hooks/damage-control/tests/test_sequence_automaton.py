@@ -0,0 +1,172 @@
+"""Tests for the incremental SequenceAutomaton in sequence-detector.py."""
+
+import importlib.util
+import json
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "sequence_detector", Path(__file__).parent.parent / "sequence-detector.py"
+)
+sequence_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sequence_module)
+
+SequenceAutomaton = sequence_module.SequenceAutomaton
+
+
+@pytest.fixture
+def temp_state_dir(tmp_path, monkeypatch):
+    """Keep ~/.claude/state under tmp_path."""
+    import os.path as path_module
+
+    original_expanduser = path_module.expanduser
+
+    def mock_expanduser(path_str):
+        if path_str.startswith("~"):
+            return path_str.replace("~", str(tmp_path), 1)
+        return original_expanduser(path_str)
+
+    monkeypatch.setattr(path_module, "expanduser", mock_expanduser)
+    return tmp_path / ".claude" / "state"
+
+
+TOOLS = ["Read", "Bash", "Glob", "Edit"]
+VALUES = ["a.env", "b.pem", "curl x", "nc y", "ls", "**/.aws"]
+PATTERNS = ["", r"\.env", r"\.pem$", r"\b(curl|nc)\b", r"aws", "[bad("]
+
+
+def _random_sequence(rng: random.Random, idx: int) -> dict:
+    steps = [
+        {"tool": rng.choice(TOOLS), "pattern": rng.choice(PATTERNS)}
+        for _ in range(rng.randint(1, 4))
+    ]
+    return {"name": f"s{idx}", "steps": steps, "window": rng.randint(1, 6), "action": "ask"}
+
+
+def _random_entry(rng: random.Random) -> dict:
+    tool = rng.choice(TOOLS)
+    key = {"Read": "file_path", "Glob": "pattern", "Bash": "command"}.get(tool, "file_path")
+    return {"tool": tool, "input": {key: rng.choice(VALUES)}, "timestamp": time.time()}
+
+
+def _reference_first_match(sequences, history, current):
+    for idx, sequence in enumerate(sequences):
+        if sequence_module.find_sequence_match(history, current, sequence):
+            return idx
+    return None
+
+
+class TestEquivalence:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_window_rescan(self, seed):
+        rng = random.Random(seed)
+        sequences = [_random_sequence(rng, i) for i in range(rng.randint(1, 12))]
+        max_history = rng.randint(2, 15)
+        automaton = SequenceAutomaton(sequences)
+        states = automaton.initial_states()
+        history: list[dict] = []
+
+        for seq in range(200):
+            current = _random_entry(rng)
+            assert automaton.first_match(states, history, current) == _reference_first_match(
+                sequences, history, current
+            )
+            current["seq"] = seq
+            history.append(current)
+            automaton.advance(states, current)
+            history = history[-max_history:]
+
+
+class TestPersistence:
+    SEQUENCES = [
+        {
+            "name": "env_to_net",
+            "steps": [
+                {"tool": "Read", "pattern": r"\.env$"},
+                {"tool": "Bash", "pattern": r"\bcurl\b"},
+            ],
+            "window": 3,
+            "action": "ask",
+            "reason": "env then network",
+        }
+    ]
+
+    def _config(self, sequences=None) -> dict:
+        return {
+            "dangerousSequences": sequences or self.SEQUENCES,
+            "config": {"max_history": 50, "history_expiry_seconds": 1800},
+        }
+
+    def _state(self, config) -> dict:
+        store = sequence_module._get_store(config)
+        return {
+            "history": store.entries(sequence_module.STREAM),
+            "automaton": store.get_meta(sequence_module.AUTOMATON_META),
+        }
+
+    def test_states_persisted_with_history(self, temp_state_dir):
+        config = self._config()
+        sequence_module.record_tool_use("Read", {"file_path": "/x/.env"}, config)
+        state = self._state(config)
+        assert state["history"][0]["seq"] == 0
+        assert state["automaton"]["next_seq"] == 1
+        assert state["automaton"]["states"] == [[0]]
+        assert sequence_module.check_sequences("Bash", {"command": "curl a"}, config)[1]
+
+    def test_window_still_applies(self, temp_state_dir):
+        config = self._config()
+        sequence_module.record_tool_use("Read", {"file_path": "/x/.env"}, config)
+        for i in range(3):
+            sequence_module.record_tool_use("Bash", {"command": f"echo {i}"}, config)
+        assert sequence_module.check_sequences("Bash", {"command": "curl a"}, config) == (
+            False,
+            False,
+            "",
+        )
+
+    def test_catalogue_change_rebuilds_states(self, temp_state_dir):
+        config = self._config()
+        sequence_module.record_tool_use("Glob", {"pattern": "**/.aws"}, config)
+        changed = self._config(
+            [
+                {
+                    "name": "aws_to_net",
+                    "steps": [{"tool": "Glob", "pattern": "aws"}, {"tool": "Bash"}],
+                    "action": "block",
+                    "reason": "aws then anything",
+                }
+            ]
+        )
+        assert sequence_module.check_sequences("Bash", {"command": "ls"}, changed)[0]
+
+    def test_legacy_history_without_seq(self, temp_state_dir):
+        config = self._config()
+        entry = {"tool": "Read", "input": {"file_path": ".env"}, "timestamp": time.time()}
+        sequence_module.save_history(config, [entry])
+        assert sequence_module.check_sequences("Bash", {"command": "curl a"}, config)[1]
+        sequence_module.record_tool_use("Bash", {"command": "ls"}, config)
+        assert [e["seq"] for e in self._state(config)["history"]] == [0, 1]
+
+    def test_expired_entries_do_not_count(self, temp_state_dir, monkeypatch):
+        config = self._config()
+        config["config"]["history_expiry_seconds"] = 60
+        now = [1000.0]
+        monkeypatch.setattr(sequence_module.time, "time", lambda: now[0])
+        sequence_module.record_tool_use("Read", {"file_path": ".env"}, config)
+        now[0] += 61
+        assert not sequence_module.check_sequences("Bash", {"command": "curl a"}, config)[1]
+
+    def test_legacy_state_file_is_migrated(self, temp_state_dir):
+        config = self._config()
+        legacy = sequence_module.get_state_path(config)
+        legacy.parent.mkdir(parents=True)
+        entry = {"tool": "Read", "input": {"file_path": ".env"}, "timestamp": time.time()}
+        legacy.write_text(json.dumps({"history": [entry]}, indent=2))
+
+        assert sequence_module.check_sequences("Bash", {"command": "curl a"}, config)[1]
+        assert not legacy.exists()
+        assert legacy.with_name(legacy.name + ".migrated").exists()
+        assert sequence_module.get_history(config)[0]["input"] == {"file_path": ".env"}
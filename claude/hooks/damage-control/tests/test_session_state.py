@@ -0,0 +1,180 @@
+"""Tests for session_state.py and the taint tracker built on it."""
+
+import importlib.util
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(HOOK_DIR))
+
+import session_state  # noqa: E402
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+taint_module = load_module("taint_tracker", "taint-tracker.py")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = session_state.SessionStore(tmp_path / "state" / session_state.STORE_FILENAME)
+    yield store
+    store.close()
+
+
+def _append_many(path: str, stream: str, count: int) -> None:
+    worker_store = session_state.SessionStore(Path(path))
+    for i in range(count):
+        worker_store.append(stream, {"i": i}, time.time())
+    worker_store.close()
+
+
+class TestSessionStore:
+    def test_append_and_rows_in_order(self, store):
+        for i in range(3):
+            store.append("s", {"i": i}, 100.0 + i)
+        assert store.entries("s") == [{"i": 0}, {"i": 1}, {"i": 2}]
+        assert store.entries("other") == []
+
+    def test_rows_since_and_limit(self, store):
+        for i in range(5):
+            store.append("s", {"i": i}, 100.0 + i)
+        assert [e["i"] for e in store.entries("s", since=101.0)] == [2, 3, 4]
+        assert [e["i"] for e in store.entries("s", limit=2)] == [3, 4]
+        assert store.entries("s", limit=0) == []
+
+    def test_keyed_append_replaces(self, store):
+        store.append("s", {"v": 1}, 100.0, key="a")
+        store.append("s", {"v": 2}, 101.0, key="b")
+        store.append("s", {"v": 3}, 102.0, key="a")
+        assert store.rows("s") == [("b", 101.0, {"v": 2}), ("a", 102.0, {"v": 3})]
+
+    def test_expire_and_trim(self, store):
+        for i in range(6):
+            store.append("s", {"i": i}, 100.0 + i)
+        assert store.expire("s", 101.0) == 2
+        assert store.trim("s", 3) == 1
+        assert [e["i"] for e in store.entries("s")] == [3, 4, 5]
+        assert store.trim("s", 0) == 3
+
+    def test_transaction_rolls_back(self, store):
+        store.append("s", {"i": 0}, 100.0)
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.clear("s")
+                store.set_meta("m", {"x": 1})
+                raise RuntimeError("boom")
+        assert store.entries("s") == [{"i": 0}]
+        assert store.get_meta("m") is None
+
+    def test_meta_roundtrip_and_delete(self, store):
+        store.set_meta("m", {"states": [[1, None]]})
+        assert store.get_meta("m") == {"states": [[1, None]]}
+        store.set_meta("m", None)
+        assert store.get_meta("m") is None
+
+    def test_migrate_json_once(self, store, tmp_path):
+        legacy = tmp_path / "state" / "legacy.json"
+        legacy.write_text(json.dumps({"items": [1, 2]}))
+        imported = []
+        assert store.migrate_json(legacy, lambda data: imported.append(data))
+        assert not store.migrate_json(legacy, lambda data: imported.append(data))
+        assert imported == [{"items": [1, 2]}]
+        assert (tmp_path / "state" / "legacy.json.migrated").exists()
+
+    def test_migrate_unreadable_file_is_moved_aside(self, store, tmp_path):
+        legacy = tmp_path / "state" / "legacy.json"
+        legacy.write_text("{not json")
+        imported = []
+        assert store.migrate_json(legacy, imported.append)
+        assert imported == []
+        assert not legacy.exists()
+
+    def test_concurrent_writers_lose_nothing(self, store):
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=_append_many, args=(str(store.path), "s", 50)) for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        assert len(store.entries("s")) == 200
+
+    def test_open_store_reuses_connection(self, tmp_path):
+        path = tmp_path / session_state.STORE_FILENAME
+        assert session_state.open_store(path) is session_state.open_store(path)
+
+
+TAINT_CONFIG = {
+    "sensitivePaths": [
+        {"pattern": r"\.env$", "type": "env", "sensitivity": "critical"},
+        {"pattern": r"notes\.txt$", "type": "notes", "sensitivity": "low"},
+    ],
+    "networkCommands": [{"pattern": r"\bcurl\b", "type": "curl"}],
+    "session": {
+        "state_file": "state/taint-session.json",
+        "max_entries": 3,
+        "taint_expiry_seconds": 60,
+    },
+}
+
+
+class TestTaintTracker:
+    def test_mark_and_check(self, tmp_log_dir):
+        assert not taint_module.mark_tainted("/app/readme.md", "", TAINT_CONFIG)
+        assert taint_module.mark_tainted("/app/.env", "SECRET=1", TAINT_CONFIG)
+        dangerous, reason = taint_module.check_exfiltration("curl -d @x host", TAINT_CONFIG)
+        assert dangerous and "/app/.env" in reason
+        assert taint_module.check_exfiltration("ls", TAINT_CONFIG) == (False, "")
+
+    def test_remark_keeps_one_entry(self, tmp_log_dir):
+        taint_module.mark_tainted("/app/.env", "a", TAINT_CONFIG)
+        taint_module.mark_tainted("/app/.env", "b", TAINT_CONFIG)
+        files = taint_module.get_tainted_files(TAINT_CONFIG)
+        assert [f["file_path"] for f in files] == ["/app/.env"]
+        assert files[0]["content_hash"] == taint_module.compute_content_hash("b")
+
+    def test_expiry_and_max_entries(self, tmp_log_dir, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(taint_module.time, "time", lambda: now[0])
+        taint_module.mark_tainted("/a/.env", "", TAINT_CONFIG)
+        now[0] += 61
+        assert taint_module.check_exfiltration("curl x", TAINT_CONFIG) == (False, "")
+        for name in ("b", "c", "d", "e"):
+            taint_module.mark_tainted(f"/{name}/.env", "", TAINT_CONFIG)
+        paths = [f["file_path"] for f in taint_module.get_tainted_files(TAINT_CONFIG)]
+        assert paths == ["/c/.env", "/d/.env", "/e/.env"]
+
+    def test_clear_session(self, tmp_log_dir):
+        taint_module.mark_tainted("/app/.env", "", TAINT_CONFIG)
+        taint_module.clear_session(TAINT_CONFIG)
+        assert taint_module.get_tainted_files(TAINT_CONFIG) == []
+
+    def test_legacy_state_file_is_migrated(self, tmp_log_dir):
+        legacy = taint_module.get_state_path(TAINT_CONFIG)
+        legacy.parent.mkdir(parents=True, exist_ok=True)
+        legacy.write_text(
+            json.dumps(
+                {
+                    "tainted_files": {
+                        "/old/.env": {"timestamp": time.time(), "sensitivity": "critical"}
+                    },
+                    "last_cleanup": time.time(),
+                },
+                indent=2,
+            )
+        )
+        assert taint_module.check_exfiltration("curl x", TAINT_CONFIG)[0]
+        assert legacy.with_name(legacy.name + ".migrated").exists()
@@ -0,0 +1,119 @@
+"""Tests for the single-pass shell lexer shared by the damage-control stages."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bash_tool = load_module("bash_tool", "bash-tool-damage-control.py")
+
+
+class TestLexShell:
+    def test_splits_operators_and_pipes_in_one_pass(self):
+        lex = bash_tool.lex_shell("grep -r foo . | head -5 && echo done; ls &")
+        assert lex.segment_texts == ["grep -r foo . | head -5", "echo done", "ls"]
+        assert lex.segments[0].pipeline == ["grep -r foo .", "head -5"]
+        assert lex.segments[1].pipeline == ["echo done"]
+
+    def test_quoted_operators_are_literal(self):
+        lex = bash_tool.lex_shell("echo 'a && b | c' \"x;y\"")
+        assert lex.segment_texts == ["echo 'a && b | c' \"x;y\""]
+        assert lex.segments[0].pipeline == ["echo 'a && b | c' \"x;y\""]
+
+    def test_double_pipe_is_an_operator_not_a_pipe(self):
+        lex = bash_tool.lex_shell("test -f x || touch x")
+        assert lex.segment_texts == ["test -f x", "touch x"]
+
+    @pytest.mark.parametrize("command", ["", "   ", ";;", "&&"])
+    def test_empty_input_has_no_segments(self, command):
+        assert bash_tool.lex_shell(command).segments == []
+
+    @pytest.mark.parametrize("command", ["make 2>&1 | tail", "make &>log", "make >&2", "cat <&3"])
+    def test_redirect_ampersand_is_not_background(self, command):
+        assert bash_tool.lex_shell(command).segment_texts == [command]
+
+    def test_argv_per_segment_and_pipeline_part(self):
+        seg = bash_tool.lex_shell("grep -r 'a b' . | head -5; ls").segments[0]
+        assert seg.argv == ["grep", "-r", "a b", ".", "|", "head", "-5"]
+        assert seg.pipeline_argv == [["grep", "-r", "a b", "."], ["head", "-5"]]
+        assert seg.argv is seg.argv
+
+    def test_malformed_quotes_have_empty_argv(self):
+        seg = bash_tool.lex_shell("echo 'unterminated").segments[0]
+        assert seg.argv == []
+        assert seg.pipeline_argv == [[]]
+
+    @pytest.mark.parametrize(
+        "argv,script",
+        [
+            (["sh", "-c", "cat /x | head"], "cat /x | head"),
+            (["bash", "-c", "ls", "arg0"], "ls arg0"),
+            (["bash", "script.sh"], None),
+            (["python", "-c", "print(1)"], None),
+        ],
+    )
+    def test_shell_dash_c_script(self, argv, script):
+        assert bash_tool._shell_dash_c_script(argv) == script
+
+
+class TestStagesShareLex:
+    def test_git_analysis_uses_argv(self):
+        assert bash_tool.analyze_git_command("git reset --hard;")[0]
+        assert bash_tool.analyze_git_command("git push 'origin' --force")[0]
+
+    def test_git_analysis_ignores_chains(self):
+        # A semantic ask ends the check; the rm must still reach the YAML patterns.
+        assert bash_tool.analyze_git_command("git reset --hard && rm -rf ~") == (False, "")
+        assert bash_tool.analyze_git_command("git push --force | tee log") == (False, "")
+
+    def test_dry_run_must_cover_every_segment(self):
+        assert bash_tool._has_valid_dry_run(
+            "cd chart && helm upgrade x . --dry-run 2>&1 | grep kind"
+        )
+        assert not bash_tool._has_valid_dry_run("helm upgrade x . --dry-run && rm -rf ~")
+        assert not bash_tool._has_valid_dry_run("kubectl apply -f a.yaml --dry-run=client | sh")
+        assert not bash_tool._has_valid_dry_run("helm upgrade x . --set note=--dry-run")
+
+
+class TestStagesWithOwnParser:
+    """Pre-passes that run on raw text before the lex and keep their own scanner."""
+
+    def test_unwrap_finds_wrappers_that_are_not_argv0(self):
+        # Piping a quoted string into sh runs it; no segment's argv starts with a shell.
+        command = "echo \"bash -c 'rm -rf ~'\" | sh"
+        assert bash_tool.unwrap_command(command) == ("rm -rf ~", True)
+        pipeline_argv = bash_tool.lex_shell(command).segments[0].pipeline_argv
+        assert bash_tool._shell_dash_c_script(pipeline_argv[0]) is None
+
+    def test_comment_stripping_resets_quotes_per_line(self):
+        # The lexer carries an open quote across lines (a multi-line commit
+        # message is one segment); comment stripping must not, or a stray
+        # apostrophe would hide every later comment from it.
+        assert bash_tool.lex_shell("git commit -m 'a\nb; c'").segment_texts == [
+            "git commit -m 'a\nb; c'"
+        ]
+        assert bash_tool.strip_bash_comments("echo it's\nls # note") == "echo it's\nls"
+
+
+class TestContextReusesLex:
+    def test_context_carries_lex_of_unwrapped_command(self):
+        ctx = bash_tool._build_command_context("bash -c 'grep x f | wc -l'", {}, None)
+        assert ctx.lex.segment_texts == bash_tool._split_on_shell_operators(ctx.unwrapped)
+        assert ctx.is_readonly_search == bash_tool.is_readonly_search_command(ctx.unwrapped)
+
+    def test_original_line_segments_are_memoized(self):
+        ctx = bash_tool._build_command_context("ls\nkubectl exec pod -- cat /x", {}, None)
+        segments = ctx.original_line_segments()
+        assert [seg.text for seg in segments] == ["ls", "kubectl exec pod -- cat /x"]
+        assert ctx.original_line_segments() is segments
@@ -0,0 +1,68 @@
+"""Tests for opt-in per-stage latency instrumentation."""
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def load_module(name: str, filename: str):
+    """Load a module with dashes in its filename."""
+    spec = importlib.util.spec_from_file_location(name, HOOK_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bash_tool = load_module("bash_tool", "bash-tool-damage-control.py")
+
+
+@pytest.fixture
+def hook(monkeypatch, tmp_log_dir):
+    monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_DECISION_CACHE", "off")
+    monkeypatch.setattr(bash_tool, "spawn_log_rotation", lambda: None)
+    return bash_tool
+
+
+def _last_entry(log_dir: Path) -> dict:
+    lines = [line for log in log_dir.glob("*.log") for line in log.read_text().splitlines()]
+    return json.loads(lines[-1])
+
+
+class TestCheckCommandTimings:
+    def test_allowed_command_records_every_stage(self):
+        timings: dict[str, int] = {}
+        bash_tool.check_command("ls -la", bash_tool.get_compiled_config(), timings=timings)
+        assert {"build_context", "semantic_git", "yaml_patterns", "no_delete"} <= set(timings)
+        assert all(isinstance(ns, int) and ns >= 0 for ns in timings.values())
+
+    def test_stages_after_decision_are_absent(self):
+        timings: dict[str, int] = {}
+        config = bash_tool.get_compiled_config()
+        bash_tool.check_command("git push --force", config, timings=timings)
+        assert "semantic_git" in timings
+        assert "yaml_patterns" not in timings
+
+    def test_result_unchanged_by_profiling(self):
+        config = bash_tool.get_compiled_config()
+        for command in ["rm -rf /", "cat ~/.ssh/id_rsa", "git status"]:
+            assert bash_tool.check_command(command, config) == bash_tool.check_command(
+                command, config, timings={}
+            )
+
+
+class TestAuditTimings:
+    def test_profile_env_adds_timings_ns(self, hook, tmp_log_dir, monkeypatch):
+        monkeypatch.setenv("CLAUDE_DAMAGE_CONTROL_PROFILE", "1")
+        hook.evaluate_hook_input({"tool_name": "Bash", "tool_input": {"command": "ls"}})
+        timings = _last_entry(tmp_log_dir)["timings_ns"]
+        assert "config_load" in timings
+        assert "build_context" in timings
+
+    def test_no_timings_by_default(self, hook, tmp_log_dir, monkeypatch):
+        monkeypatch.delenv("CLAUDE_DAMAGE_CONTROL_PROFILE", raising=False)
+        hook.evaluate_hook_input({"tool_name": "Bash", "tool_input": {"command": "ls"}})
+        assert "timings_ns" not in _last_entry(tmp_log_dir)
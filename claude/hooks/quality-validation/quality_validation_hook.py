@@ -7,24 +7,67 @@
 Quality Validation Hook - PostToolUse
 Runs linters on files after Write/Edit operations.
 Loads validator config from validators.yaml.
+
+Validator results are cached in a small SQLite database keyed by the file's
+content hash, the validator and its command, the installed tool and the
+project's linter config files, so re-validating unchanged content skips the
+subprocess. Set QUALITY_VALIDATION_CACHE=0 to disable.
+
+Validators are scheduled longest-expected-first on a pool sized from the CPU
+count, using each validator's recorded run time in that project. When the hook
+runs out of its time budget, `priority: low` validators that would not finish
+in time are deferred, noted in the hook's JSON output (additionalContext), and
+expected to take less the next time. `--stats` prints the timing history.
+
+With `incremental: true` in validators.yaml (or `--changed-only` on the
+command line), validators that declare an `incremental` line pattern only
+report findings on the edited lines, taken from the Edit payload or from
+`git diff HEAD`, plus findings that are new since the file's last validation.
+
+With `worker_pool: true`, validators marked `warm: <worker>` are sent to a
+per-project pool of warm workers (validator_pool.py) over a local socket, and
+run as subprocesses whenever the pool cannot answer.
 """
 
 import argparse
 import fnmatch
+import hashlib
 import json
 import os
+import re
 import shutil
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, NamedTuple, Optional
 
+import validator_pool
 import yaml
 
-# Cap for parallel validator execution. Each validator runs in its own thread
-# (subprocess work is I/O-bound), so we don't need many workers.
-MAX_PARALLEL_VALIDATORS = 4
+# Validators run in threads that mostly wait on subprocesses, one worker per
+# CPU by default (QUALITY_VALIDATION_WORKERS overrides).
+DEFAULT_MAX_WORKERS = os.cpu_count() or 4
+
+# Seconds the Write/Edit hook may spend in total; settings.json allows it 15.
+# Overridden by `time_budget_seconds` in validators.yaml.
+DEFAULT_TIME_BUDGET = 12.0
+
+# Assumed run time (per file) of a validator with no recorded history.
+DEFAULT_EXPECTED_SECONDS = 1.0
+# Weight of the newest run in a validator's moving-average duration.
+DURATION_SMOOTHING = 0.3
+# A deferred validator's average is scaled by this, so one that keeps being
+# deferred is soon expected to fit, runs again and refreshes its timing.
+DEFERRAL_DECAY = 0.5
+
+# Longest command line a batched validator run may build. Windows caps a
+# command line at 32767 characters; POSIX limits are far higher.
+MAX_BATCH_ARGV_CHARS = 24_000
 
 HOOK_DIR = Path(__file__).parent
 CONFIG_FILE = HOOK_DIR / "validators.yaml"
@@ -36,6 +79,40 @@ SKIP_FILE = (
     / "skip-validators.txt"
 )
 LOG_DIR = Path(os.path.expanduser("~")) / ".claude" / "logs" / "quality-validation"
+# A log file past this size is renamed to <name>.1 (replacing the previous one).
+MAX_LOG_BYTES = 1024 * 1024
+
+# Bump when the cache key or stored fields change meaning.
+RESULT_CACHE_VERSION = 1
+RESULT_CACHE_MAX_ENTRIES = 5000
+RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Project files (relative to the project root, globs allowed) that can change a
+# validator's verdict without the edited file changing. A validator may
+# override this with `config_files`; its `detect` files are always included.
+DEFAULT_CACHE_CONFIG_FILES = [
+    "pyproject.toml",
+    "ruff.toml",
+    ".ruff.toml",
+    "setup.cfg",
+    ".editorconfig",
+    "package.json",
+    "pnpm-lock.yaml",
+    ".shellcheckrc",
+    ".clang-format",
+    ".rubocop.yml",
+    ".swiftlint.yml",
+    ".swift-format",
+    ".scalafmt.conf",
+    "rustfmt.toml",
+    ".rustfmt.toml",
+    "stylua.toml",
+    ".stylua.toml",
+    ".luacheckrc",
+    ".solhint.json",
+    "phpcs.xml",
+    ".phpcs.xml",
+]
 
 
 def load_config() -> Optional[dict[str, Any]]:
@@ -213,17 +290,463 @@ def run_validator(
         return -1, f"Failed to run validator: {e}"
 
 
-def log_error(message: str) -> None:
-    """Log error to error log file."""
+def append_log(name: str, line: str) -> None:
+    """Append a line to LOG_DIR/name, rotating the file once it exceeds MAX_LOG_BYTES."""
     try:
         LOG_DIR.mkdir(parents=True, exist_ok=True)
-        log_file = LOG_DIR / "errors.log"
+        log_file = LOG_DIR / name
+        try:
+            if log_file.stat().st_size >= MAX_LOG_BYTES:
+                os.replace(log_file, log_file.with_name(f"{name}.1"))
+        except FileNotFoundError:
+            pass
         with open(log_file, "a") as f:
-            f.write(f"{message}\n")
+            f.write(f"{line}\n")
     except OSError:
         pass  # Never crash on log failure
 
 
+def log_error(message: str) -> None:
+    """Log error to error log file."""
+    append_log("errors.log", message)
+
+
+def log_cache_stats(stats: dict[str, int], target: str) -> None:
+    """Append one line of result-cache counters for a hook run to cache.log."""
+    counters = " ".join(f"{name}={count}" for name, count in stats.items())
+    append_log("cache.log", f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {target} {counters}")
+
+
+def get_cache_dir() -> Path:
+    """Directory for the validator result cache (QUALITY_VALIDATION_CACHE_DIR overrides)."""
+    override = os.environ.get("QUALITY_VALIDATION_CACHE_DIR")
+    if override:
+        return Path(override)
+    return Path(os.path.expanduser("~")) / ".claude" / "cache" / "quality-validation"
+
+
+def _sha256_file(path: Path) -> Optional[str]:
+    """Hex SHA-256 of a file's bytes, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _tool_fingerprint(executable: str) -> Optional[list]:
+    """Identify the installed tool by resolved path, size and mtime.
+
+    Stands in for the tool version: an upgrade replaces the executable, and
+    stat() is far cheaper than spawning `tool --version` on every edit.
+    """
+    resolved = shutil.which(executable)
+    if not resolved:
+        return None
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return None
+    return [os.path.realpath(resolved), stat.st_size, stat.st_mtime_ns]
+
+
+def _config_file_hashes(validator: dict, project_root: str) -> list[list[str]]:
+    """[relative path, sha256] for each existing config file the validator depends on."""
+    names = set(validator.get("config_files", DEFAULT_CACHE_CONFIG_FILES))
+    names.update(validator.get("detect", []))
+    root = Path(project_root)
+    hashes = []
+    for name in sorted(names):
+        paths = sorted(root.glob(name)) if "*" in name or "?" in name else [root / name]
+        for path in paths:
+            digest = _sha256_file(path) if path.is_file() else None
+            if digest:
+                hashes.append([path.relative_to(root).as_posix(), digest])
+    return hashes
+
+
+def result_cache_key(
+    validator: dict, cmd: list[str], file_path: str, project_root: str
+) -> Optional[str]:
+    """Cache key for running cmd on file_path, or None when the result is not cacheable.
+
+    Validators that read more than the edited file (type checkers, whole
+    project formatters) opt out with `cache: false` in validators.yaml.
+    """
+    if validator.get("cache", True) is False or not cmd or not project_root:
+        return None
+    content = _sha256_file(Path(file_path))
+    tool = _tool_fingerprint(cmd[0])
+    if content is None or tool is None:
+        return None
+    payload = [
+        RESULT_CACHE_VERSION,
+        validator.get("name", "unknown"),
+        cmd,
+        validator.get("env") or {},
+        tool,
+        _config_file_hashes(validator, project_root),
+        content,
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _connect_cache_db(path: Path, *schema: str) -> sqlite3.Connection:
+    """Open (creating if needed) a SQLite database shared by the hook's threads."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(
+        str(path), timeout=2.0, isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    for statement in schema:
+        connection.execute(statement)
+    return connection
+
+
+class ResultCache:
+    """Persistent LRU of validator (returncode, output) results in SQLite.
+
+    Shared by the validator threads of one hook run. Any SQLite or filesystem
+    error is logged once and turns the cache off for the rest of the run, so
+    validation itself never depends on it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "uncacheable": 0}
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = _connect_cache_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, validator TEXT NOT NULL,"
+                " returncode INTEGER NOT NULL, output TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)",
+            )
+        return self._connection
+
+    def _fail(self, error: Exception) -> None:
+        self._disabled = True
+        log_error(f"Validator result cache disabled: {error}")
+
+    def get(self, key: str) -> Optional[tuple[int, str]]:
+        """Return the stored (returncode, output) for key and mark it recently used."""
+        with self._lock:
+            if self._disabled:
+                return None
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT returncode, output FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+                return None
+            self.stats["hits" if row else "misses"] += 1
+            return (row[0], row[1]) if row else None
+
+    def put(self, key: str, validator_name: str, returncode: int, output: str) -> None:
+        """Store a completed validator run."""
+        with self._lock:
+            if self._disabled:
+                return
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, validator_name, returncode, output, len(output.encode()), time.time()),
+                )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+                return
+            self.stats["stored"] += 1
+
+    def note_uncacheable(self) -> None:
+        with self._lock:
+            self.stats["uncacheable"] += 1
+
+    def prune(self) -> None:
+        """Evict least recently used results beyond max_entries or max_bytes."""
+        with self._lock:
+            if self._disabled or self._connection is None:
+                return
+            try:
+                self._connection.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM ("
+                    " SELECT key, row_number() OVER w AS n, sum(size) OVER w AS total"
+                    " FROM results WINDOW w AS (ORDER BY last_used DESC))"
+                    " WHERE n > ? OR total > ?)",
+                    (self.max_entries, self.max_bytes),
+                )
+            except sqlite3.Error as error:
+                self._fail(error)
+
+    def close(self) -> None:
+        """Prune, then release the database connection."""
+        self.prune()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when QUALITY_VALIDATION_CACHE=0."""
+    global _result_cache
+    if os.environ.get("QUALITY_VALIDATION_CACHE", "1") == "0":
+        return None
+    if _result_cache is None:
+        _result_cache = ResultCache(get_cache_dir() / "results.sqlite")
+    return _result_cache
+
+
+class DurationHistory:
+    """Moving-average run time per file of each validator in each project.
+
+    Only real validator processes are recorded (cache hits are not), so the
+    averages reflect what a cache miss costs. A run is recorded as at most
+    max_seconds (the time budget, when one applies). Errors disable recording.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.max_seconds: Optional[float] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._expected: dict[str, dict[str, float]] = {}
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = _connect_cache_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS durations ("
+                " validator TEXT NOT NULL, project_root TEXT NOT NULL,"
+                " runs INTEGER NOT NULL, seconds REAL NOT NULL,"
+                " last_seconds REAL NOT NULL, last_run REAL NOT NULL,"
+                " PRIMARY KEY (validator, project_root))",
+            )
+        return self._connection
+
+    def _fail(self, error: Exception) -> None:
+        self._disabled = True
+        log_error(f"Validator duration history disabled: {error}")
+
+    def expected(self, validator_name: str, project_root: str) -> Optional[float]:
+        """Average seconds per file for the validator in project_root, if recorded."""
+        with self._lock:
+            if project_root not in self._expected and not self._disabled:
+                try:
+                    rows = self._connect().execute(
+                        "SELECT validator, seconds FROM durations WHERE project_root = ?",
+                        (project_root,),
+                    )
+                    self._expected[project_root] = dict(rows.fetchall())
+                except (sqlite3.Error, OSError) as error:
+                    self._fail(error)
+            return self._expected.get(project_root, {}).get(validator_name)
+
+    def record(self, validator_name: str, project_root: str, seconds: float, files: int) -> None:
+        """Fold one run over files files into the validator's average."""
+        if self.max_seconds is not None:
+            seconds = min(seconds, self.max_seconds)
+        per_file = seconds / max(files, 1)
+        with self._lock:
+            if self._disabled:
+                return
+            try:
+                self._connect().execute(
+                    "INSERT INTO durations VALUES (?, ?, 1, ?, ?, ?)"
+                    " ON CONFLICT (validator, project_root) DO UPDATE SET"
+                    " runs = runs + 1, seconds = seconds + ? * (excluded.seconds - seconds),"
+                    " last_seconds = excluded.last_seconds, last_run = excluded.last_run",
+                    (
+                        validator_name,
+                        project_root,
+                        per_file,
+                        seconds,
+                        time.time(),
+                        DURATION_SMOOTHING,
+                    ),
+                )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+
+    def decay(self, validator_name: str, project_root: str, factor: float) -> None:
+        """Scale the validator's average by factor (after it was deferred)."""
+        with self._lock:
+            if self._disabled:
+                return
+            try:
+                self._connect().execute(
+                    "UPDATE durations SET seconds = seconds * ?"
+                    " WHERE validator = ? AND project_root = ?",
+                    (factor, validator_name, project_root),
+                )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+                return
+            expected = self._expected.get(project_root, {})
+            if validator_name in expected:
+                expected[validator_name] *= factor
+
+    def rows(self) -> list[tuple]:
+        """(validator, project_root, runs, seconds, last_seconds, last_run), slowest first."""
+        with self._lock:
+            return (
+                self._connect()
+                .execute(
+                    "SELECT validator, project_root, runs, seconds, last_seconds, last_run"
+                    " FROM durations ORDER BY seconds DESC, validator, project_root"
+                )
+                .fetchall()
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_duration_history: Optional[DurationHistory] = None
+
+
+def get_duration_history() -> DurationHistory:
+    """Return the process-wide validator duration history."""
+    global _duration_history
+    if _duration_history is None:
+        _duration_history = DurationHistory(get_cache_dir() / "durations.sqlite")
+    return _duration_history
+
+
+class BaselineStore:
+    """Findings each validator last reported for each file, tagged with its content hash.
+
+    A finding is stored as its message without path and position, so a later
+    version of the file can tell an unchanged finding that merely moved from a
+    new one. Errors disable the store, which only makes reporting less quiet.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = _connect_cache_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS baselines ("
+                " path TEXT NOT NULL, validator TEXT NOT NULL,"
+                " content_hash TEXT NOT NULL, findings TEXT NOT NULL,"
+                " updated REAL NOT NULL, PRIMARY KEY (path, validator))",
+            )
+        return self._connection
+
+    def _fail(self, error: Exception) -> None:
+        self._disabled = True
+        log_error(f"Validator baseline store disabled: {error}")
+
+    def get(self, file_path: str, validator_name: str) -> Optional[tuple[str, set[str]]]:
+        """(content hash, findings) last recorded for the file, if any."""
+        with self._lock:
+            if self._disabled:
+                return None
+            try:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT content_hash, findings FROM baselines"
+                        " WHERE path = ? AND validator = ?",
+                        (file_path, validator_name),
+                    )
+                    .fetchone()
+                )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+                return None
+        return (row[0], set(json.loads(row[1]))) if row else None
+
+    def put(
+        self, file_path: str, validator_name: str, content_hash: str, findings: set[str]
+    ) -> None:
+        with self._lock:
+            if self._disabled:
+                return
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?, ?)",
+                    (
+                        file_path,
+                        validator_name,
+                        content_hash,
+                        json.dumps(sorted(findings)),
+                        time.time(),
+                    ),
+                )
+            except (sqlite3.Error, OSError) as error:
+                self._fail(error)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_baseline_store: Optional[BaselineStore] = None
+
+
+def get_baseline_store() -> BaselineStore:
+    """Return the process-wide finding baseline store."""
+    global _baseline_store
+    if _baseline_store is None:
+        _baseline_store = BaselineStore(get_cache_dir() / "baselines.sqlite")
+    return _baseline_store
+
+
+def close_caches(target: str) -> None:
+    """Close the history, baseline and result stores, logging this run's cache counters."""
+    global _result_cache
+    global _duration_history
+    global _baseline_store
+    for store in (_duration_history, _baseline_store):
+        if store is not None:
+            store.close()
+    _duration_history = _baseline_store = None
+    _change_scopes.clear()
+    _deferral_notes.clear()
+    cache, _result_cache = _result_cache, None
+    if cache is None:
+        return
+    cache.close()
+    if any(cache.stats.values()):
+        log_cache_stats(cache.stats, target)
+
+
 def parse_hook_input(input_data: dict[str, Any]) -> Optional[str]:
     """Extract and validate the target file path from the hook payload.
 
@@ -322,29 +845,387 @@ def _filter_runnable_validators(
     return runnable
 
 
-def _run_one_validator(validator: dict, file_path: str, project_root: str) -> Optional[str]:
-    """Run a single validator and return its formatted error (or None on success)."""
-    cmd = build_command(validator.get("command", []), file_path, project_root)
+# Set from `worker_pool` in validators.yaml by main() and run_changed_files().
+_worker_pool_enabled = False
+
+
+def enable_worker_pool(config: dict[str, Any]) -> None:
+    """Send `warm` validators to the project's worker pool when the config asks for it."""
+    global _worker_pool_enabled
+    _worker_pool_enabled = config.get("worker_pool") is True and validator_pool.is_supported()
+
+
+def _run_validator_process(
+    validator: dict, cmd: list[str], project_root: str, timeout: float
+) -> tuple[int, str]:
+    """run_validator() on a warm pool worker when enabled and able, else as a subprocess."""
+    warm = validator.get("warm")
+    if _worker_pool_enabled and warm and not validator.get("env"):
+        result = validator_pool.run_warm(warm, cmd, project_root)
+        if result is not None:
+            return result
+    return run_validator(cmd, timeout=timeout, env=validator.get("env"))
+
+
+def _run_validator_timed(
+    validator: dict, cmd: list[str], project_root: str, timeout: float, files: int = 1
+) -> tuple[int, str]:
+    """Run a validator, recording how long it took when it could start."""
+    started = time.monotonic()
+    returncode, output = _run_validator_process(validator, cmd, project_root, timeout)
+    if returncode >= 0:
+        get_duration_history().record(
+            validator.get("name", "unknown"), project_root, time.monotonic() - started, files
+        )
+    return returncode, output
+
+
+def _is_cacheable_result(returncode: int, output: str, timeout: int) -> bool:
+    """Only runs that completed are cached; timeouts and launch failures are retried."""
+    return returncode >= 0 and output != f"Validator timed out after {timeout}s"
+
+
+def _result_cache_lookup_key(
+    cache: Optional[ResultCache], validator: dict, cmd: list[str], file_path: str, project_root: str
+) -> Optional[str]:
+    """Cache key for this run, counting runs the cache cannot serve."""
+    if cache is None:
+        return None
+    key = result_cache_key(validator, cmd, file_path, project_root)
+    if key is None:
+        cache.note_uncacheable()
+    return key
+
+
+def _run_validator_cached(
+    validator: dict, cmd: list[str], file_path: str, project_root: str
+) -> tuple[int, str]:
+    """run_validator(), answered from the result cache when this exact input was seen."""
     timeout = validator.get("timeout", 8)
-    returncode, output = run_validator(cmd, timeout=timeout, env=validator.get("env"))
+    cache = get_result_cache()
+    key = _result_cache_lookup_key(cache, validator, cmd, file_path, project_root)
+    if cache is None or key is None:
+        return _run_validator_timed(validator, cmd, project_root, timeout)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    returncode, output = _run_validator_timed(validator, cmd, project_root, timeout)
+    if _is_cacheable_result(returncode, output, timeout):
+        cache.put(key, validator.get("name", "unknown"), returncode, output)
+    return returncode, output
+
+
+LineRanges = list[tuple[int, int]]
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@", re.MULTILINE)
+
+
+class ChangeScope(NamedTuple):
+    """What changed in a file: 1-based inclusive line ranges (None if unknown)."""
+
+    ranges: Optional[LineRanges]
+    content_hash: str
+
+
+# Files validated in incremental mode, by normalized path.
+_change_scopes: dict[str, ChangeScope] = {}
+
+
+def parse_diff_line_ranges(diff: str) -> LineRanges:
+    """New-side line ranges of the hunks in a `git diff --unified=0` patch.
+
+    A pure deletion is recorded as the two lines around the removed text.
+    """
+    ranges = []
+    for match in _HUNK_HEADER.finditer(diff):
+        start = int(match.group(1))
+        count = int(match.group(2) or "1")
+        if count == 0:
+            ranges.append((max(start, 1), start + 1))
+        else:
+            ranges.append((start, start + count - 1))
+    return ranges
+
+
+def git_changed_line_ranges(file_path: str) -> Optional[LineRanges]:
+    """Lines of file_path that differ from HEAD; None if git cannot say (untracked, no repo)."""
+    directory, name = os.path.split(file_path)
+
+    def git(*args: str) -> Optional[subprocess.CompletedProcess]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=directory, capture_output=True, text=True, timeout=5
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+
+    diff = git("diff", "--no-color", "--no-ext-diff", "--unified=0", "HEAD", "--", name)
+    if diff is None or diff.returncode != 0:
+        return None
+    if diff.stdout:
+        return parse_diff_line_ranges(diff.stdout)
+    tracked = git("ls-files", "--error-unmatch", "--", name)
+    return [] if tracked is not None and tracked.returncode == 0 else None
+
+
+def edit_line_ranges(content: str, new_string: str) -> Optional[LineRanges]:
+    """Lines where an Edit's new_string now sits in content (every occurrence)."""
+    if not new_string:
+        return None
+    span = new_string.rstrip("\n").count("\n")
+    ranges = []
+    position = content.find(new_string)
+    while position != -1:
+        start = content.count("\n", 0, position) + 1
+        ranges.append((start, start + span))
+        position = content.find(new_string, position + len(new_string))
+    return ranges or None
+
+
+def hook_line_ranges(input_data: dict[str, Any], file_path: str) -> Optional[LineRanges]:
+    """Edited lines for a hook payload: from the Edit strings, else from git."""
+    tool_input = input_data.get("tool_input", {})
+    if input_data.get("tool_name") == "Edit" and tool_input.get("new_string"):
+        try:
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                ranges = edit_line_ranges(f.read(), tool_input["new_string"])
+        except OSError:
+            ranges = None
+        if ranges is not None:
+            return ranges
+    return git_changed_line_ranges(file_path)
+
+
+def set_change_scope(file_path: str, ranges: Optional[LineRanges]) -> None:
+    """Validate file_path incrementally: report only findings on ranges or new ones."""
+    content_hash = _sha256_file(Path(file_path))
+    if content_hash is not None:
+        _change_scopes[file_path] = ChangeScope(ranges, content_hash)
+
+
+def _incremental_pattern(validator: dict) -> Optional[re.Pattern]:
+    """Compiled `incremental.line_pattern` of a validator, if it declares a valid one."""
+    incremental = validator.get("incremental")
+    if not isinstance(incremental, dict):
+        return None
+    try:
+        pattern = re.compile(incremental.get("line_pattern", ""))
+    except re.error:
+        return None
+    return pattern if "line" in pattern.groupindex else None
+
+
+def _finding_lines(match: re.Match) -> tuple[int, int]:
+    """Line span of one finding: line..end, or line plus `length` lines (lizard)."""
+    line = int(match.group("line"))
+    groups = match.groupdict()
+    if groups.get("end"):
+        return line, int(groups["end"])
+    if groups.get("length"):
+        return line, line + max(int(groups["length"]), 1) - 1
+    return line, line
+
+
+def _finding_key(line: str, match: re.Match) -> str:
+    """Position-free identity of a finding: the `message` group, else the text after the match."""
+    message = match.groupdict().get("message")
+    return (message if message is not None else line[match.end() :]).strip()
+
+
+def _overlaps(span: tuple[int, int], ranges: LineRanges) -> bool:
+    return any(start <= span[1] and span[0] <= end for start, end in ranges)
+
+
+Finding = tuple[str, tuple[int, int], str]
+
+
+def _parse_findings(pattern: re.Pattern, returncode: int, output: str) -> list[Finding]:
+    """(output line, line span, identity) for each output line the pattern matches."""
+    findings = []
+    for line in output.splitlines() if returncode else []:
+        match = pattern.search(line)
+        if match:
+            findings.append((line, _finding_lines(match), _finding_key(line, match)))
+    return findings
+
+
+def _is_reported(finding: Finding, scope: ChangeScope, baseline: Optional[set[str]]) -> bool:
+    _, span, key = finding
+    if scope.ranges is not None and _overlaps(span, scope.ranges):
+        return True
+    return key not in baseline if baseline is not None else scope.ranges is None
+
+
+def _swap_baseline(
+    name: str, file_path: str, scope: ChangeScope, findings: list[Finding]
+) -> Optional[set[str]]:
+    """Record this run's findings as the baseline and return the previous one."""
+    store = get_baseline_store()
+    previous = store.get(file_path, name)
+    store.put(file_path, name, scope.content_hash, {key for _, _, key in findings})
+    return previous[1] if previous else None
+
+
+def scope_to_changes(
+    validator: dict, file_path: str, returncode: int, output: str, scope: ChangeScope
+) -> tuple[int, str]:
+    """Narrow a validator result to findings on the changed lines or new since the baseline.
+
+    Each output line the validator's line pattern matches is a finding. A
+    finding is reported if it touches scope.ranges or was not in the file's
+    previous baseline; with neither ranges nor a baseline everything is. When
+    no line matches the pattern (a crash, an unknown format) the result is
+    left untouched.
+    """
+    pattern = _incremental_pattern(validator)
+    if pattern is None:
+        return returncode, output
+    findings = _parse_findings(pattern, returncode, output)
+    baseline = _swap_baseline(validator.get("name", "unknown"), file_path, scope, findings)
+    if not findings:
+        return returncode, output
+    reported = [finding[0] for finding in findings if _is_reported(finding, scope, baseline)]
+    if not reported:
+        return 0, ""
+    hidden = len(findings) - len(reported)
+    if hidden:
+        reported.append(f"({hidden} unchanged finding(s) outside the edited lines not shown)")
+    return returncode, "\n".join(reported)
+
+
+def _format_result(validator: dict, file_path: str, returncode: int, output: str) -> Optional[str]:
+    """Formatted error for a validator run on file_path, or None if it passed."""
+    scope = _change_scopes.get(file_path)
+    if scope is not None:
+        returncode, output = scope_to_changes(validator, file_path, returncode, output, scope)
     if returncode == 0:
         return None
     diagnostic = output or f"validator exited with code {returncode}"
     return format_validator_error(validator.get("name", "unknown"), file_path, diagnostic)
 
 
-def _run_validators_parallel(runnable: list[dict], file_path: str, project_root: str) -> list[str]:
-    """Run multiple validators concurrently; preserve submission order in results."""
-    results: list[Optional[str]] = [None] * len(runnable)
-    max_workers = min(len(runnable), MAX_PARALLEL_VALIDATORS)
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+def _validator_command(validator: dict, file_path: str) -> list[str]:
+    """Command template for file_path; incremental runs may use a parseable variant."""
+    incremental = validator.get("incremental")
+    if file_path in _change_scopes and isinstance(incremental, dict):
+        return incremental.get("command") or validator.get("command", [])
+    return validator.get("command", [])
+
+
+def _run_one_validator(validator: dict, file_path: str, project_root: str) -> Optional[str]:
+    """Run a single validator and return its formatted error (or None on success)."""
+    cmd = build_command(_validator_command(validator, file_path), file_path, project_root)
+    returncode, output = _run_validator_cached(validator, cmd, file_path, project_root)
+    return _format_result(validator, file_path, returncode, output)
+
+
+class ScheduledTask(NamedTuple):
+    """One unit of validator work: run() returns {job index: formatted error or None}."""
+
+    run: Callable[[], dict[int, Optional[str]]]
+    validator: dict
+    label: str
+    expected: float
+    project_root: str = ""
+
+
+def validator_workers(task_count: int) -> int:
+    """Pool size for task_count validator tasks."""
+    try:
+        limit = int(os.environ.get("QUALITY_VALIDATION_WORKERS", DEFAULT_MAX_WORKERS))
+    except ValueError:
+        limit = DEFAULT_MAX_WORKERS
+    return max(1, min(task_count, limit))
+
+
+def expected_seconds(validator: dict, project_root: str, files: int = 1) -> float:
+    """Expected run time from the duration history, or the default guess."""
+    per_file = get_duration_history().expected(validator.get("name", "unknown"), project_root)
+    return (DEFAULT_EXPECTED_SECONDS if per_file is None else per_file) * files
+
+
+# Deferral messages of this run, in task order; the hook returns them in its
+# JSON output and the --files CLI prints them.
+_deferral_notes: list[str] = []
+
+
+def take_deferral_notes() -> list[str]:
+    """Return and clear the deferral messages collected by run_scheduled()."""
+    notes = list(_deferral_notes)
+    _deferral_notes.clear()
+    return notes
+
+
+def _run_within_budget(
+    task: ScheduledTask, deadline: Optional[float], budget: Optional[float]
+) -> tuple[dict[int, Optional[str]], Optional[str]]:
+    """Run task unless it is low priority and would overrun the deadline.
+
+    A deferred task's recorded time decays (DEFERRAL_DECAY), so it is not
+    deferred forever on the strength of one slow run.
+    """
+    if deadline is not None and task.validator.get("priority") == "low":
+        remaining = deadline - time.monotonic()
+        if task.expected > remaining:
+            name = task.validator.get("name", "unknown")
+            if task.project_root:
+                get_duration_history().decay(name, task.project_root, DEFERRAL_DECAY)
+            return {}, (
+                f"[quality-validation] deferred {name} for {task.label}: expected "
+                f"{task.expected:.1f}s, {max(remaining, 0.0):.1f}s left of the "
+                f"{budget:g}s time budget."
+            )
+    return task.run(), None
+
+
+def run_scheduled(
+    tasks: list[ScheduledTask], budget: Optional[float] = None
+) -> dict[int, Optional[str]]:
+    """Run tasks longest-expected-first; return the merged per-job results.
+
+    With a budget (seconds), low-priority tasks that would not finish before it
+    runs out are skipped; their messages are collected in task order for
+    take_deferral_notes(). Runs are recorded as at most the budget.
+    """
+    results: dict[int, Optional[str]] = {}
+    deadline = time.monotonic() + budget if budget else None
+    if budget:
+        get_duration_history().max_seconds = budget
+    notes: list[Optional[str]] = [None] * len(tasks)
+    order = sorted(range(len(tasks)), key=lambda i: -tasks[i].expected)
+    with ThreadPoolExecutor(max_workers=validator_workers(len(tasks))) as executor:
         future_to_index = {
-            executor.submit(_run_one_validator, v, file_path, project_root): i
-            for i, v in enumerate(runnable)
+            executor.submit(_run_within_budget, tasks[i], deadline, budget): i for i in order
         }
         for future in as_completed(future_to_index):
-            results[future_to_index[future]] = future.result()
-    return [r for r in results if r is not None]
+            outcome, notes[future_to_index[future]] = future.result()
+            results.update(outcome)
+    _deferral_notes.extend(note for note in notes if note)
+    return results
+
+
+def _one_validator_task(
+    index: int, validator: dict, file_path: str, project_root: str
+) -> dict[int, Optional[str]]:
+    return {index: _run_one_validator(validator, file_path, project_root)}
+
+
+def _run_validators_parallel(
+    runnable: list[dict], file_path: str, project_root: str, budget: Optional[float] = None
+) -> list[str]:
+    """Run multiple validators concurrently; preserve submission order in results."""
+    tasks = [
+        ScheduledTask(
+            run=partial(_one_validator_task, index, validator, file_path, project_root),
+            validator=validator,
+            label=os.path.basename(file_path),
+            expected=expected_seconds(validator, project_root),
+            project_root=project_root,
+        )
+        for index, validator in enumerate(runnable)
+    ]
+    results = run_scheduled(tasks, budget)
+    return [results[i] for i in range(len(runnable)) if results.get(i) is not None]
 
 
 def run_validator_suite(
@@ -353,15 +1234,16 @@ def run_validator_suite(
     project_root: str,
     lang_config: dict[str, Any],
     skip_list: set,
+    budget: Optional[float] = None,
 ) -> list[str]:
     """Filter and run all applicable validators (parallel when more than one)."""
     runnable = _filter_runnable_validators(validators, file_path, lang_config, skip_list)
     if not runnable:
         return []
-    if len(runnable) == 1:
+    if len(runnable) == 1 and budget is None:
         err = _run_one_validator(runnable[0], file_path, project_root)
         return [err] if err else []
-    return _run_validators_parallel(runnable, file_path, project_root)
+    return _run_validators_parallel(runnable, file_path, project_root, budget)
 
 
 def _cli_runnable_validators(
@@ -415,27 +1297,229 @@ def _build_changed_file_jobs(
     return jobs, missing_tools, immutable_notices
 
 
-def _run_changed_file_jobs(jobs: list[tuple[dict, str, str]]) -> list[str]:
-    """Run validation jobs with bounded parallelism and ordered diagnostics."""
-    results: list[Optional[str]] = [None] * len(jobs)
+def is_batchable(validator: dict) -> bool:
+    """Return True if the validator declares a usable multi-file `batch` block.
+
+    A batch block gives a `command` with a `{files}` argument and a
+    `file_pattern` regex whose `file` group names the file an output line is about.
+    """
+    batch = validator.get("batch")
+    if not isinstance(batch, dict) or "{files}" not in batch.get("command", []):
+        return False
+    try:
+        return "file" in re.compile(batch.get("file_pattern", "")).groupindex
+    except re.error:
+        return False
+
+
+def build_batch_command(
+    cmd_template: list[str], file_paths: list[str], project_root: str = ""
+) -> list[str]:
+    """Expand a batch command: {files} becomes one argument per path."""
+    result = []
+    for arg in cmd_template:
+        if arg == "{files}":
+            result.extend(file_paths)
+        else:
+            result.append(arg.replace("{project_root}", project_root))
+    return result
+
+
+def chunk_batch_files(
+    cmd_template: list[str],
+    file_paths: list[str],
+    project_root: str,
+    max_chars: int = MAX_BATCH_ARGV_CHARS,
+) -> list[list[str]]:
+    """Split file_paths into runs whose expanded command line stays under max_chars."""
+    base = sum(len(arg) + 1 for arg in build_batch_command(cmd_template, [], project_root))
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    size = base
+    for path in file_paths:
+        if current and size + len(path) + 1 > max_chars:
+            chunks.append(current)
+            current, size = [], base
+        current.append(path)
+        size += len(path) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def attribute_batch_output(
+    output: str, file_paths: list[str], file_pattern: str
+) -> dict[str, list[str]]:
+    """Assign each output line that names one of file_paths to that file.
+
+    Tools print paths as given or relative to the working directory, so both
+    sides are compared resolved. Lines naming no known file (summaries such as
+    "Found 3 errors.") are dropped.
+    """
+    by_resolved = {os.path.normcase(os.path.realpath(path)): path for path in file_paths}
+    regex = re.compile(file_pattern)
+    lines: dict[str, list[str]] = {path: [] for path in file_paths}
+    for line in output.splitlines():
+        match = regex.search(line)
+        if not match:
+            continue
+        named = os.path.normcase(os.path.realpath(match.group("file").strip()))
+        if named in by_resolved:
+            lines[by_resolved[named]].append(line)
+    return lines
+
+
+def _batch_cache_key(validator: dict, file_path: str, project_root: str) -> Optional[str]:
+    """Result-cache lookup key for one file of a batched validator."""
+    cmd = build_batch_command(validator["batch"]["command"], [file_path], project_root)
+    return _result_cache_lookup_key(get_result_cache(), validator, cmd, file_path, project_root)
+
+
+def _store_batch_results(validator: dict, lines: dict[str, list[str]], project_root: str) -> None:
+    """Cache each file's share of a batch run as if it had been validated alone."""
+    cache = get_result_cache()
+    if cache is None:
+        return
+    for file_path, found in lines.items():
+        key = result_cache_key(
+            validator,
+            build_batch_command(validator["batch"]["command"], [file_path], project_root),
+            file_path,
+            project_root,
+        )
+        if key:
+            cache.put(key, validator.get("name", "unknown"), 1 if found else 0, "\n".join(found))
+
+
+def _run_batch_chunk(
+    validator: dict, file_paths: list[str], project_root: str
+) -> dict[str, Optional[str]]:
+    """Validate several files with one process; return each file's formatted error."""
+    batch = validator["batch"]
+    cmd = build_batch_command(batch["command"], file_paths, project_root)
+    timeout = batch.get("timeout", validator.get("timeout", 8) * len(file_paths))
+    returncode, output = _run_validator_timed(
+        validator, cmd, project_root, timeout, files=len(file_paths)
+    )
+    if not _is_cacheable_result(returncode, output, timeout):
+        # Timed out or could not start: every file in the chunk gets the diagnostic.
+        return {path: _format_result(validator, path, 1, output) for path in file_paths}
+    if returncode == 0:
+        lines: dict[str, list[str]] = {path: [] for path in file_paths}
+    else:
+        lines = attribute_batch_output(output, file_paths, batch["file_pattern"])
+        if not any(lines.values()):
+            # A failure no line pins on a file (bad flag, config error): run each alone.
+            return {path: _run_one_validator(validator, path, project_root) for path in file_paths}
+    _store_batch_results(validator, lines, project_root)
+    return {
+        path: _format_result(validator, path, 1 if found else 0, "\n".join(found))
+        for path, found in lines.items()
+    }
+
+
+Jobs = list[tuple[dict, str, str]]
+
+
+def _single_job_task(jobs: Jobs, index: int) -> dict[int, Optional[str]]:
+    return _one_validator_task(index, *jobs[index])
+
+
+def _batch_chunk_task(jobs: Jobs, indices: list[int]) -> dict[int, Optional[str]]:
+    validator, _, project_root = jobs[indices[0]]
+    file_paths = list(dict.fromkeys(jobs[i][1] for i in indices))
+    by_file = _run_batch_chunk(validator, file_paths, project_root)
+    return {i: by_file[jobs[i][1]] for i in indices}
+
+
+def _plan_batch_group(
+    jobs: Jobs, indices: list[int], results: dict[int, Optional[str]]
+) -> list[list[int]]:
+    """Answer cached files of one (validator, project root) group; chunk the rest."""
+    validator, _, project_root = jobs[indices[0]]
+    cache = get_result_cache()
+    pending: dict[str, list[int]] = {}
+    for i in indices:
+        file_path = jobs[i][1]
+        key = _batch_cache_key(validator, file_path, project_root)
+        cached = cache.get(key) if cache is not None and key else None
+        if cached is None:
+            pending.setdefault(file_path, []).append(i)
+        else:
+            results[i] = _format_result(validator, file_path, *cached)
+    chunks = chunk_batch_files(validator["batch"]["command"], list(pending), project_root)
+    return [[i for file_path in chunk for i in pending[file_path]] for chunk in chunks]
+
+
+def _plan_changed_file_tasks(
+    jobs: Jobs, results: dict[int, Optional[str]]
+) -> list[tuple[Callable[[Jobs, Any], dict[int, Optional[str]]], Any]]:
+    """One task per unbatchable job, one per chunk of each batchable validator's files."""
+    tasks: list[tuple[Callable[[Jobs, Any], dict[int, Optional[str]]], Any]] = []
+    groups: dict[tuple[int, str], list[int]] = {}
+    for i, (validator, _, project_root) in enumerate(jobs):
+        if is_batchable(validator):
+            groups.setdefault((id(validator), project_root), []).append(i)
+        else:
+            tasks.append((_single_job_task, i))
+    for indices in groups.values():
+        tasks.extend(
+            (_batch_chunk_task, chunk) for chunk in _plan_batch_group(jobs, indices, results)
+        )
+    return tasks
+
+
+def _scheduled_changed_file_task(
+    jobs: Jobs, task: Callable[[Jobs, Any], dict[int, Optional[str]]], arg: Any
+) -> ScheduledTask:
+    """Wrap a planned job or batch chunk with its validator and expected duration."""
+    indices = arg if isinstance(arg, list) else [arg]
+    validator, file_path, project_root = jobs[indices[0]]
+    files = len({jobs[i][1] for i in indices})
+    label = os.path.basename(file_path) if files == 1 else f"{files} files"
+    return ScheduledTask(
+        run=partial(task, jobs, arg),
+        validator=validator,
+        label=label,
+        expected=expected_seconds(validator, project_root, files),
+        project_root=project_root,
+    )
+
+
+def _run_changed_file_jobs(jobs: Jobs, budget: Optional[float] = None) -> list[str]:
+    """Run validation jobs with bounded parallelism and ordered diagnostics.
+
+    Jobs of a batchable validator that share a project root run as a few
+    multi-file invocations; diagnostics still come back per (validator, file)
+    in job order.
+    """
     if not jobs:
         return []
-    with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_PARALLEL_VALIDATORS)) as executor:
-        future_to_index = {
-            executor.submit(_run_one_validator, validator, file_path, project_root): i
-            for i, (validator, file_path, project_root) in enumerate(jobs)
-        }
-        for future in as_completed(future_to_index):
-            results[future_to_index[future]] = future.result()
-    return [result for result in results if result is not None]
+    results: dict[int, Optional[str]] = {}
+    tasks = [
+        _scheduled_changed_file_task(jobs, task, arg)
+        for task, arg in _plan_changed_file_tasks(jobs, results)
+    ]
+    results.update(run_scheduled(tasks, budget))
+    return [result for _, result in sorted(results.items()) if result is not None]
 
 
 def run_changed_files(
-    file_paths: list[str], config: dict[str, Any]
+    file_paths: list[str],
+    config: dict[str, Any],
+    budget: Optional[float] = None,
+    changed_only: bool = False,
 ) -> tuple[list[str], list[str], list[str]]:
-    """Run configured validators for explicit files in deterministic result order."""
+    """Run configured validators for explicit files in deterministic result order.
+
+    changed_only limits incremental-capable validators to lines changed since HEAD.
+    """
+    enable_worker_pool(config)
     jobs, missing_tools, immutable_notices = _build_changed_file_jobs(file_paths, config)
-    return _run_changed_file_jobs(jobs), missing_tools, immutable_notices
+    if changed_only:
+        for file_path in dict.fromkeys(file_path for _, file_path, _ in jobs):
+            set_change_scope(file_path, git_changed_line_ranges(file_path))
+    return _run_changed_file_jobs(jobs, budget), missing_tools, immutable_notices
 
 
 def _load_changed_files_config(config_path: Path) -> dict[str, Any]:
@@ -457,26 +1541,98 @@ def _changed_files_exit_code(failures: list[str], missing_tools: list[str]) -> i
     return 1 if failures else 0
 
 
+def get_time_budget(config: dict[str, Any]) -> float:
+    """Hook time budget in seconds from validators.yaml, or DEFAULT_TIME_BUDGET."""
+    budget = config.get("time_budget_seconds", DEFAULT_TIME_BUDGET)
+    if isinstance(budget, (int, float)) and not isinstance(budget, bool) and budget > 0:
+        return float(budget)
+    return DEFAULT_TIME_BUDGET
+
+
+def format_duration_stats(rows: list[tuple]) -> list[str]:
+    """Table lines for DurationHistory.rows(), slowest validator first."""
+    lines = [f"{'validator':<22} {'runs':>6} {'avg s/file':>10} {'last s':>8}  last run  project"]
+    for validator, project_root, runs, seconds, last_seconds, last_run in rows:
+        day = time.strftime("%Y-%m-%d", time.localtime(last_run))
+        lines.append(
+            f"{validator:<22} {runs:>6} {seconds:>10.3f} {last_seconds:>8.3f}"
+            f"  {day}  {project_root}"
+        )
+    return lines
+
+
+def stats_main(argv: list[str]) -> int:
+    """Print recorded validator durations (--stats)."""
+    parser = argparse.ArgumentParser(description="Show recorded validator run times.")
+    parser.add_argument("--stats", action="store_true", required=True)
+    parser.add_argument("--project", help="only rows for this project root")
+    args = parser.parse_args(argv)
+    history = get_duration_history()
+    try:
+        rows = history.rows()
+    except sqlite3.Error as error:
+        print(f"Duration history error: {error}", file=sys.stderr)
+        return 2
+    finally:
+        history.close()
+    if args.project:
+        wanted = str(Path(args.project).resolve())
+        rows = [row for row in rows if row[1] == wanted]
+    if not rows:
+        print(f"No validator runs recorded in {history.path}")
+        return 0
+    print("\n".join(format_duration_stats(rows)))
+    return 0
+
+
 def changed_files_main(argv: list[str]) -> int:
     """Run validators for an explicit file list with stable exit codes."""
     parser = argparse.ArgumentParser(description="Validate explicit changed files.")
     parser.add_argument("--config", type=Path, default=CONFIG_FILE)
     parser.add_argument("--files", nargs="+", required=True, metavar="FILE")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="SECONDS",
+        help="defer priority: low validators that would run past this many seconds",
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="report only findings on lines changed since HEAD (or new since the last run)",
+    )
     args = parser.parse_args(argv)
     try:
         config = _load_changed_files_config(args.config)
-        failures, missing_tools, immutable_notices = run_changed_files(args.files, config)
+        failures, missing_tools, immutable_notices = run_changed_files(
+            args.files, config, args.budget, args.changed_only
+        )
     except ValueError as error:
         print(error, file=sys.stderr)
         return 2
+    finally:
+        close_caches(f"--files ({len(args.files)})")
 
     for message in immutable_notices:
         print(message)
-    for message in [*failures, *missing_tools]:
+    for message in [*take_deferral_notes(), *failures, *missing_tools]:
         print(message, file=sys.stderr)
     return _changed_files_exit_code(failures, missing_tools)
 
 
+def hook_output(errors: list[str], deferred: list[str]) -> dict[str, Any]:
+    """PostToolUse JSON: block on validator errors, report deferred validators as context."""
+    output: dict[str, Any] = {}
+    if errors:
+        output.update(decision="block", reason="\n\n".join(errors))
+    if deferred:
+        output["hookSpecificOutput"] = {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(deferred),
+        }
+    return output
+
+
 def main() -> None:
     try:
         input_data = json.load(sys.stdin)
@@ -497,10 +1653,24 @@ def main() -> None:
 
     _, lang_config, project_root = match
     validators = filter_validators_by_detection(lang_config.get("validators", []), project_root)
-    errors = run_validator_suite(validators, file_path, project_root, lang_config, load_skip_list())
+    if config.get("incremental") is True:
+        set_change_scope(file_path, hook_line_ranges(input_data, file_path))
+    enable_worker_pool(config)
+    try:
+        errors = run_validator_suite(
+            validators,
+            file_path,
+            project_root,
+            lang_config,
+            load_skip_list(),
+            budget=get_time_budget(config),
+        )
+        output = hook_output(errors, take_deferral_notes())
+    finally:
+        close_caches(file_path)
 
-    if errors:
-        print(json.dumps({"decision": "block", "reason": "\n\n".join(errors)}))
+    if output:
+        print(json.dumps(output))
 
     sys.exit(0)
 
@@ -508,6 +1678,8 @@ def main() -> None:
 if __name__ == "__main__":
     if "--files" in sys.argv[1:]:
         sys.exit(changed_files_main(sys.argv[1:]))
+    if "--stats" in sys.argv[1:]:
+        sys.exit(stats_main(sys.argv[1:]))
     try:
         main()
     except Exception as e:
@@ -0,0 +1,24 @@
+"""Pytest fixtures for quality-validation hook tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import quality_validation_hook as hook  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _isolated_result_cache(tmp_path, monkeypatch):
+    """Keep the result cache, timing history, baselines and logs out of the real ~/.claude."""
+    monkeypatch.setenv("QUALITY_VALIDATION_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("QUALITY_VALIDATION_CACHE", raising=False)
+    monkeypatch.setattr(hook, "LOG_DIR", tmp_path / "logs")
+    monkeypatch.setattr(hook, "_result_cache", None)
+    monkeypatch.setattr(hook, "_duration_history", None)
+    monkeypatch.setattr(hook, "_baseline_store", None)
+    monkeypatch.setattr(hook, "_change_scopes", {})
+    monkeypatch.setattr(hook, "_worker_pool_enabled", False)
+    yield
+    hook.close_caches("tests")
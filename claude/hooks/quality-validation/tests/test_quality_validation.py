@@ -4,6 +4,7 @@ import json
 import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -682,3 +683,366 @@ class TestChangedFilesCli:
         )
         output = capsys.readouterr().err
         assert output.index("first errors") < output.index("second errors")
+
+
+class TestResultCache:
+    """Tests for the content-hash validator result cache."""
+
+    @staticmethod
+    def _project(tmp_path):
+        (tmp_path / "pyproject.toml").write_text("[project]\n")
+        source = tmp_path / "source.py"
+        source.write_text("x = 1\n")
+        runs = tmp_path / "runs.txt"
+        validator = {
+            "name": "counting",
+            "command": [
+                sys.executable,
+                "-c",
+                "import sys; open(sys.argv[1], 'a').write('.'); print('bad'); sys.exit(1)",
+                str(runs),
+                "{file}",
+            ],
+        }
+        return source, runs, validator
+
+    def _run(self, validator, source, tmp_path):
+        return hook._run_one_validator(validator, str(source), str(tmp_path))
+
+    def test_unchanged_content_skips_subprocess(self, tmp_path):
+        source, runs, validator = self._project(tmp_path)
+        first = self._run(validator, source, tmp_path)
+        assert self._run(validator, source, tmp_path) == first
+        assert runs.read_text() == "."
+        assert "bad" in first
+        assert hook._result_cache.stats == {
+            "hits": 1,
+            "misses": 1,
+            "stored": 1,
+            "uncacheable": 0,
+        }
+
+    def test_content_or_config_change_reruns(self, tmp_path):
+        source, runs, validator = self._project(tmp_path)
+        self._run(validator, source, tmp_path)
+        source.write_text("x = 2\n")
+        self._run(validator, source, tmp_path)
+        (tmp_path / "pyproject.toml").write_text("[tool.ruff]\nline-length = 80\n")
+        self._run(validator, source, tmp_path)
+        assert runs.read_text() == "..."
+
+    def test_cache_false_and_disabled_always_run(self, tmp_path, monkeypatch):
+        source, runs, validator = self._project(tmp_path)
+        uncached = {**validator, "cache": False}
+        self._run(uncached, source, tmp_path)
+        self._run(uncached, source, tmp_path)
+        assert hook._result_cache.stats["uncacheable"] == 2
+        monkeypatch.setenv("QUALITY_VALIDATION_CACHE", "0")
+        self._run(validator, source, tmp_path)
+        self._run(validator, source, tmp_path)
+        assert runs.read_text() == "...."
+
+    def test_timeouts_are_not_cached(self, tmp_path):
+        source, _, validator = self._project(tmp_path)
+        with patch.object(
+            hook, "run_validator", return_value=(1, "Validator timed out after 8s")
+        ) as run:
+            self._run(validator, source, tmp_path)
+            self._run(validator, source, tmp_path)
+        assert run.call_count == 2
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        cache = hook.ResultCache(tmp_path / "lru.sqlite", max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, "v", 0, "")
+            time.sleep(0.01)
+        assert cache.get("a") is not None
+        cache.prune()
+        assert cache.get("b") is None
+        assert cache.get("a") == (0, "") and cache.get("c") == (0, "")
+        cache.close()
+
+    def test_stats_are_logged_on_close(self, tmp_path):
+        source, _, validator = self._project(tmp_path)
+        self._run(validator, source, tmp_path)
+        self._run(validator, source, tmp_path)
+        hook.close_caches(str(source))
+        line = (tmp_path / "logs" / "cache.log").read_text()
+        assert f"{source} hits=1 misses=1 stored=1 uncacheable=0" in line
+
+    def test_cache_log_is_rotated(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(hook, "MAX_LOG_BYTES", 100)
+        for run in range(5):
+            hook.log_cache_stats({"hits": run}, "target-with-a-long-enough-name")
+        log_dir = tmp_path / "logs"
+        assert (log_dir / "cache.log").stat().st_size < 200
+        assert "hits=" in (log_dir / "cache.log.1").read_text()
+        assert sorted(p.name for p in log_dir.iterdir()) == ["cache.log", "cache.log.1"]
+
+
+class TestBatchedValidators:
+    """Tests for multi-file validator runs in the --files CLI."""
+
+    # Reports "<path>:1:1: bad" for every file containing "bad"; logs one "." per process.
+    _LINT = (
+        "import sys\n"
+        "open(sys.argv[1], 'a').write('.')\n"
+        "bad = [p for p in sys.argv[2:] if 'bad' in open(p).read()]\n"
+        "for p in bad:\n"
+        "    print(f'{p}:1:1: bad')\n"
+        "print(f'Found {len(bad)} errors.')\n"
+        "sys.exit(1 if bad else 0)\n"
+    )
+
+    def _setup(self, tmp_path, names, batch_extra=None):
+        (tmp_path / "pyproject.toml").write_text("[project]\n")
+        runs = tmp_path / "runs.txt"
+        files = []
+        for name in names:
+            path = tmp_path / name
+            path.write_text("bad\n" if name.startswith("bad") else "ok\n")
+            files.append(str(path))
+        command = [sys.executable, "-c", self._LINT, str(runs)]
+        validator = {
+            "name": "lint",
+            "command": [*command, "{file}"],
+            "batch": {
+                "command": [*command, "{files}"],
+                "file_pattern": r"^(?P<file>.+?):\d+:\d+: ",
+                **(batch_extra or {}),
+            },
+        }
+        config = {"python": {"extensions": [".py"], "markers": ["pyproject.toml"]}}
+        config["python"]["validators"] = [validator]
+        config_path = tmp_path / "validators.yaml"
+        config_path.write_text(json.dumps(config))
+        return ["--config", str(config_path), "--files", *files], runs
+
+    def test_files_share_one_process_with_per_file_results(self, tmp_path, capsys):
+        argv, runs = self._setup(tmp_path, ["a.py", "bad1.py", "b.py", "bad2.py"])
+        assert hook.changed_files_main(argv) == 1
+        assert runs.read_text() == "."
+        err = capsys.readouterr().err
+        assert err.index("lint errors in bad1.py") < err.index("lint errors in bad2.py")
+        assert "a.py" not in err and "Found" not in err
+
+    def test_batch_results_are_cached_per_file(self, tmp_path):
+        argv, runs = self._setup(tmp_path, ["a.py", "bad1.py"])
+        assert hook.changed_files_main(argv) == 1
+        assert hook.changed_files_main(argv) == 1
+        assert runs.read_text() == "."
+
+    def test_unattributed_failure_reruns_each_file(self, tmp_path, capsys):
+        argv, runs = self._setup(
+            tmp_path, ["bad1.py", "b.py"], {"file_pattern": r"^(?P<file>nomatch):"}
+        )
+        assert hook.changed_files_main(argv) == 1
+        # One batch run, then the two files one at a time
+        assert runs.read_text() == "..."
+        err = capsys.readouterr().err
+        assert "lint errors in bad1.py" in err and "lint errors in b.py" not in err
+
+    def test_chunks_respect_argv_limit(self):
+        files = [f"/p/{i:03d}.py" for i in range(10)]
+        chunks = hook.chunk_batch_files(["tool", "{files}"], files, "/p", max_chars=40)
+        assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+        assert [path for chunk in chunks for path in chunk] == files
+
+    def test_output_lines_match_relative_or_absolute_paths(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        first, second = str(tmp_path / "a.py"), str(tmp_path / "b.py")
+        output = f"a.py:1:2: E1\n{second}:3:4: E2\nFound 2 errors.\nother.py:1:1: E3"
+        lines = hook.attribute_batch_output(output, [first, second], r"^(?P<file>.+?):\d+:\d+: ")
+        assert lines == {first: ["a.py:1:2: E1"], second: [f"{second}:3:4: E2"]}
+
+    def test_shipped_batch_blocks_are_valid(self):
+        config = hook.load_config()
+        validators = [
+            validator
+            for language in config.values()
+            if isinstance(language, dict)
+            for validator in language.get("validators", [])
+            if "batch" in validator
+        ]
+        assert validators and all(hook.is_batchable(validator) for validator in validators)
+
+
+class TestScheduler:
+    """Tests for duration history and the budgeted longest-first scheduler."""
+
+    @staticmethod
+    def _task(index, started, expected, priority="normal"):
+        def run():
+            started.append(index)
+            return {index: f"error {index}"}
+
+        validator = {"name": f"v{index}", "priority": priority}
+        return hook.ScheduledTask(run=run, validator=validator, label="x.py", expected=expected)
+
+    def test_longest_expected_runs_first(self, monkeypatch):
+        monkeypatch.setenv("QUALITY_VALIDATION_WORKERS", "1")
+        started = []
+        tasks = [self._task(i, started, expected) for i, expected in enumerate([0.1, 3.0, 1.0])]
+        results = hook.run_scheduled(tasks)
+        assert started == [1, 2, 0]
+        assert results == {0: "error 0", 1: "error 1", 2: "error 2"}
+
+    def test_low_priority_deferred_past_budget(self, capsys):
+        started = []
+        tasks = [self._task(0, started, 5.0), self._task(1, started, 5.0, priority="low")]
+        results = hook.run_scheduled(tasks, budget=1.0)
+        assert started == [0] and list(results) == [0]
+        [note] = hook.take_deferral_notes()
+        assert "deferred v1 for x.py: expected 5.0s" in note
+        assert hook.take_deferral_notes() == [] and capsys.readouterr().err == ""
+
+    def test_deferral_decays_expected_time(self):
+        history = hook.get_duration_history()
+        history.record("v1", "/p", 8.0, files=1)
+        assert history.expected("v1", "/p") == pytest.approx(8.0)
+        task = self._task(1, [], 8.0, priority="low")._replace(project_root="/p")
+        hook.run_scheduled([task], budget=1.0)
+        assert history.expected("v1", "/p") == pytest.approx(8.0 * hook.DEFERRAL_DECAY)
+        assert hook.get_duration_history().rows()[0][3] == pytest.approx(4.0)
+
+    def test_recorded_run_is_capped_at_budget(self):
+        hook.run_scheduled([self._task(0, [], 0.1)], budget=2.0)
+        hook.get_duration_history().record("slow", "/p", 30.0, files=2)
+        assert hook.get_duration_history().rows()[0][3] == pytest.approx(1.0)
+
+    def test_hook_output_carries_deferrals(self):
+        assert hook.hook_output([], []) == {}
+        output = hook.hook_output(["lint failed"], ["deferred v1"])
+        assert output["decision"] == "block" and output["reason"] == "lint failed"
+        assert output["hookSpecificOutput"] == {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "deferred v1",
+        }
+        assert "decision" not in hook.hook_output([], ["deferred v1"])
+
+    def test_workers_follow_env_and_task_count(self, monkeypatch):
+        monkeypatch.setenv("QUALITY_VALIDATION_WORKERS", "3")
+        assert hook.validator_workers(10) == 3
+        assert hook.validator_workers(2) == 2
+        monkeypatch.setenv("QUALITY_VALIDATION_WORKERS", "bogus")
+        assert hook.validator_workers(1000) == min(1000, hook.DEFAULT_MAX_WORKERS)
+
+    def test_only_real_runs_are_timed(self, tmp_path):
+        (tmp_path / "pyproject.toml").write_text("[project]\n")
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        validator = {"name": "quick", "command": [sys.executable, "-c", "pass", "{file}"]}
+        hook._run_one_validator(validator, str(source), str(tmp_path))
+        hook._run_one_validator(validator, str(source), str(tmp_path))
+        [row] = hook.get_duration_history().rows()
+        assert row[:3] == ("quick", str(tmp_path), 1)
+        fresh = hook.DurationHistory(hook.get_duration_history().path)
+        assert fresh.expected("quick", str(tmp_path)) == pytest.approx(row[3])
+        fresh.close()
+
+    def test_moving_average(self, tmp_path):
+        history = hook.DurationHistory(tmp_path / "durations.sqlite")
+        history.record("lizard", "/p", 10.0, files=5)
+        history.record("lizard", "/p", 4.0, files=1)
+        [row] = history.rows()
+        assert row[2] == 2 and row[3] == pytest.approx(2.0 + 0.3 * (4.0 - 2.0))
+        history.close()
+
+    def test_stats_report(self, capsys):
+        assert hook.stats_main(["--stats"]) == 0
+        assert "No validator runs recorded" in capsys.readouterr().out
+        hook.get_duration_history().record("ruff-check", "/proj", 0.25, files=1)
+        assert hook.stats_main(["--stats"]) == 0
+        out = capsys.readouterr().out.splitlines()
+        assert out[0].startswith("validator") and "avg s/file" in out[0]
+        assert out[1].split()[:4] == ["ruff-check", "1", "0.250", "0.250"]
+
+    def test_time_budget_from_config(self):
+        assert hook.get_time_budget({"time_budget_seconds": 5}) == 5.0
+        assert hook.get_time_budget({"time_budget_seconds": "soon"}) == hook.DEFAULT_TIME_BUDGET
+        assert hook.get_time_budget(hook.load_config()) == 12.0
+
+
+class TestIncrementalValidation:
+    """Tests for reporting only findings on changed lines or new since the baseline."""
+
+    PATTERN = r"^.+?:(?P<line>\d+):\d+: "
+
+    def _validator(self, *findings):
+        script = "import sys\n" + "".join(
+            f"print(sys.argv[1] + ':{line}:1: {message}')\n" for line, message in findings
+        )
+        return {
+            "name": "fake-lint",
+            "command": [sys.executable, "-c", script + "sys.exit(1)\n", "{file}"],
+            "incremental": {"line_pattern": self.PATTERN},
+        }
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = tmp_path / "a.py"
+        path.write_text("".join(f"line{i}\n" for i in range(1, 11)))
+        return str(path)
+
+    def test_diff_hunks_to_line_ranges(self):
+        diff = "@@ -3 +3 @@\n-a\n+b\n@@ -10,0 +11,2 @@\n+c\n+d\n@@ -20,2 +21,0 @@\n"
+        assert hook.parse_diff_line_ranges(diff) == [(3, 3), (11, 12), (21, 22)]
+
+    def test_edit_ranges_cover_every_occurrence(self):
+        content = "a\nx = 1\ny = 2\nb\nx = 1\ny = 2\n"
+        assert hook.edit_line_ranges(content, "x = 1\ny = 2\n") == [(2, 3), (5, 6)]
+        assert hook.edit_line_ranges(content, "missing") is None
+        assert hook.edit_line_ranges(content, "") is None
+
+    def test_only_changed_lines_reported(self, source, tmp_path):
+        validator = self._validator((2, "E1 in edit"), (9, "E2 elsewhere"))
+        hook.set_change_scope(source, [(1, 3)])
+        error = hook._run_one_validator(validator, source, str(tmp_path))
+        assert "E1 in edit" in error and "E2 elsewhere" not in error
+        assert "1 unchanged finding(s)" in error
+
+    def test_new_findings_outside_edit_are_reported(self, source, tmp_path):
+        hook.set_change_scope(source, [(1, 1)])
+        hook._run_one_validator(self._validator((9, "E2 old")), source, str(tmp_path))
+        validator = self._validator((8, "E2 old"), (9, "E3 new"))
+        error = hook._run_one_validator(validator, source, str(tmp_path))
+        assert "E3 new" in error and "E2 old" not in error
+
+    def test_suppressed_findings_pass(self, source, tmp_path):
+        validator = self._validator((9, "E2 old"))
+        hook.set_change_scope(source, None)
+        assert "E2 old" in hook._run_one_validator(validator, source, str(tmp_path))
+        hook.set_change_scope(source, [(1, 2)])
+        assert hook._run_one_validator(validator, source, str(tmp_path)) is None
+
+    def test_unparsed_output_reported_in_full(self, source, tmp_path):
+        validator = self._validator((9, "E2"))
+        validator["command"][2] = "print('crashed'); raise SystemExit(2)"
+        hook.set_change_scope(source, [(1, 1)])
+        assert "crashed" in hook._run_one_validator(validator, source, str(tmp_path))
+
+    def test_git_changed_line_ranges(self, tmp_path):
+        def git(*args):
+            subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+        git("init", "-q")
+        tracked = tmp_path / "t.sh"
+        tracked.write_text("a\nb\nc\n")
+        git("add", "t.sh")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+        assert hook.git_changed_line_ranges(str(tracked)) == []
+        tracked.write_text("a\nB\nc\nd\n")
+        assert hook.git_changed_line_ranges(str(tracked)) == [(2, 2), (4, 4)]
+        (tmp_path / "new.sh").write_text("x\n")
+        assert hook.git_changed_line_ranges(str(tmp_path / "new.sh")) is None
+
+    def test_edit_payload_ranges_and_config(self, source, tmp_path):
+        payload = {
+            "tool_name": "Edit",
+            "tool_input": {"file_path": source, "new_string": "line5\n"},
+        }
+        assert hook.hook_line_ranges(payload, source) == [(5, 5)]
+        config = hook.load_config()
+        assert config["incremental"] is False
+        ruff = config["python"]["validators"][0]
+        assert ruff["incremental"]["command"][-1] == "{file}"
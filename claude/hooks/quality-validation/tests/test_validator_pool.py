@@ -0,0 +1,240 @@
+"""Tests for the warm validator pool and the hook's use of it."""
+
+import importlib
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import quality_validation_hook as hook  # noqa: E402
+import validator_pool as pool  # noqa: E402
+
+requires_af_unix = pytest.mark.skipif(not pool.is_supported(), reason="requires AF_UNIX")
+
+
+class EchoWorker:
+    """Stand-in worker that reports the command it was given."""
+
+    closed = 0
+    released = threading.Event()
+
+    def run(self, command):
+        if command[:1] == ["unsupported"]:
+            raise pool.UnsupportedCommand("no")
+        if command[:1] == ["crash"]:
+            raise OSError("worker died")
+        if command[:1] == ["hang"]:
+            EchoWorker.released.wait(timeout=30)
+        return 1, " ".join(command)
+
+    def close(self):
+        EchoWorker.closed += 1
+
+
+@pytest.fixture
+def socket_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(pool.SOCKET_DIR_ENV, str(tmp_path / "run"))
+    return tmp_path / "run"
+
+
+@pytest.fixture
+def running_pool(tmp_path, socket_dir, monkeypatch):
+    """Serve a pool for tmp_path with an echo worker in a background thread."""
+    monkeypatch.setitem(pool.WORKER_FACTORIES, "echo", lambda server: EchoWorker())
+    server = pool.ValidatorPoolServer(pool.get_socket_path(str(tmp_path)), str(tmp_path), 30)
+    thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+    thread.start()
+    yield server
+    pool.send_request({"op": "shutdown"}, server.socket_path, 3.0)
+    thread.join(timeout=5)
+
+
+@requires_af_unix
+class TestPoolProtocol:
+    def test_ping_reports_project(self, running_pool, tmp_path):
+        reply = pool.send_request({"op": "ping"}, running_pool.socket_path, 1.0)
+        assert reply["ok"] and reply["project"] == str(tmp_path)
+
+    def test_run_on_warm_worker(self, running_pool, tmp_path):
+        assert pool.run_warm("echo", ["lint", "a.py"], str(tmp_path)) == (1, "lint a.py")
+        assert list(running_pool.workers) == ["echo"]
+
+    def test_unsupported_command_keeps_worker(self, running_pool, tmp_path):
+        pool.run_warm("echo", ["lint"], str(tmp_path))
+        assert pool.run_warm("echo", ["unsupported"], str(tmp_path)) is None
+        assert pool.run_warm("missing", ["lint"], str(tmp_path)) is None
+        assert "echo" in running_pool.workers
+
+    def test_failed_worker_is_dropped(self, running_pool, tmp_path):
+        closed = EchoWorker.closed
+        assert pool.run_warm("echo", ["crash"], str(tmp_path)) is None
+        assert running_pool.workers == {} and EchoWorker.closed == closed + 1
+
+    def test_slow_pool_is_not_waited_for(self, running_pool, tmp_path, monkeypatch):
+        monkeypatch.setattr(pool, "POOL_TIMEOUT", 0.2)
+        started = time.monotonic()
+        try:
+            assert pool.run_warm("echo", ["hang"], str(tmp_path)) is None
+        finally:
+            EchoWorker.released.set()
+        assert time.monotonic() - started < 5
+
+    def test_abandoned_request_is_dropped_quietly(self, running_pool, tmp_path, monkeypatch, capfd):
+        monkeypatch.setattr(pool, "POOL_TIMEOUT", 0.2)
+        EchoWorker.released.clear()
+        assert pool.run_warm("echo", ["hang"], str(tmp_path)) is None
+        EchoWorker.released.set()
+        time.sleep(0.3)
+        assert pool.run_warm("echo", ["lint"], str(tmp_path)) == (1, "lint")
+        assert "Traceback" not in capfd.readouterr().err
+
+    def test_missing_pool_is_spawned_once(self, tmp_path, socket_dir, monkeypatch):
+        started = []
+        monkeypatch.setattr(pool, "_spawned", set())
+        monkeypatch.setattr(pool.subprocess, "Popen", lambda cmd, **kw: started.append(cmd))
+        assert pool.run_warm("echo", ["lint"], str(tmp_path)) is None
+        assert pool.run_warm("echo", ["lint"], str(tmp_path)) is None
+        assert len(started) == 1 and started[0][-3:] == ["serve", "--project", str(tmp_path)]
+
+    def test_second_pool_refuses_live_socket(self, running_pool, tmp_path):
+        with pytest.raises(RuntimeError, match="already running"):
+            pool.ValidatorPoolServer(running_pool.socket_path, str(tmp_path))
+
+    def test_sockets_are_per_project(self, socket_dir):
+        assert pool.get_socket_path("/a") != pool.get_socket_path("/b")
+        assert pool.get_socket_path("/a").parent == socket_dir
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="requires ruff")
+class TestRuffWorker:
+    @pytest.fixture
+    def project(self, tmp_path):
+        (tmp_path / "ruff.toml").write_text('[lint]\nselect = ["F"]\n')
+        (tmp_path / "bad.py").write_text("import os\nx=1\n")
+        (tmp_path / "good.py").write_text("x = 1\n")
+        return tmp_path
+
+    @pytest.fixture
+    def session(self, project):
+        session = pool.RuffServerSession(str(project))
+        yield session
+        session.close()
+
+    def test_silent_server_is_closed_at_deadline(self, project, monkeypatch):
+        silent = project / "silent-ruff"
+        silent.write_text("#!/bin/sh\nexec sleep 60\n")
+        silent.chmod(0o755)
+        monkeypatch.setattr(pool.shutil, "which", lambda name: str(silent))
+        monkeypatch.setattr(pool, "LSP_TIMEOUT", 0.2)
+        started = []
+        popen = subprocess.Popen
+        monkeypatch.setattr(
+            pool.subprocess, "Popen", lambda *a, **kw: started.append(popen(*a, **kw)) or started[0]
+        )
+        with pytest.raises(OSError, match="did not answer"):
+            pool.RuffServerSession(str(project))
+        assert started[0].poll() is not None
+
+    def test_worker_on_closed_session_fails(self, project, session):
+        session.close()
+        with pytest.raises(OSError):
+            pool.RuffWorker(session, "check").run(["ruff", "check", str(project / "good.py")])
+
+    def _cli(self, *args):
+        result = subprocess.run(["ruff", *args], capture_output=True, text=True)
+        return [line for line in result.stdout.splitlines() if ": " in line]
+
+    def test_check_matches_cli(self, project, session):
+        worker = pool.RuffWorker(session, "check")
+        files = [str(project / "bad.py"), str(project / "good.py")]
+        returncode, output = worker.run(["ruff", "check", *files])
+        expected = self._cli("check", "--output-format=concise", *files)
+        assert returncode == 1
+        assert [line.replace(" [*]", "") for line in expected] == output.splitlines()
+        assert worker.run(["ruff", "check", files[1]]) == (0, "")
+
+    def test_format_check_matches_cli(self, project, session):
+        worker = pool.RuffWorker(session, "format")
+        bad = str(project / "bad.py")
+        returncode, output = worker.run(["ruff", "format", "--check", bad])
+        assert returncode == 1
+        assert output.splitlines() == self._cli("format", "--check", "--output-format=concise", bad)
+
+    def test_unknown_options_are_not_served(self, session):
+        with pytest.raises(pool.UnsupportedCommand):
+            pool.RuffWorker(session, "check").run(["ruff", "check", "--fix", "a.py"])
+        with pytest.raises(pool.UnsupportedCommand):
+            pool.RuffWorker(session, "format").run(["ruff", "format", "a.py"])
+
+
+@requires_af_unix
+class TestHookUsesPool:
+    VALIDATOR = {"name": "echo-lint", "command": ["echo-lint", "{file}"], "warm": "echo"}
+
+    def test_disabled_by_default(self):
+        hook.enable_worker_pool(hook.load_config())
+        assert hook._worker_pool_enabled is False
+
+    def test_warm_validator_runs_on_pool(self, running_pool, tmp_path):
+        hook.enable_worker_pool({"worker_pool": True})
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        error = hook._run_one_validator(self.VALIDATOR, str(source), str(tmp_path))
+        assert f"echo-lint {source}" in error
+
+    def test_falls_back_to_subprocess(self, tmp_path, socket_dir, monkeypatch):
+        monkeypatch.setattr(pool, "spawn_detached", lambda project_root: None)
+        hook.enable_worker_pool({"worker_pool": True})
+        validator = {**self.VALIDATOR, "command": [sys.executable, "-c", "print('cold')"]}
+        assert hook._run_validator_process(validator, validator["command"], str(tmp_path), 5) == (
+            0,
+            "cold",
+        )
+
+
+@requires_af_unix
+class TestIdleTimeout:
+    def test_idle_pool_exits_and_removes_socket(self, tmp_path, socket_dir):
+        server = pool.ValidatorPoolServer(pool.get_socket_path(str(tmp_path)), str(tmp_path), 0.2)
+        thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive() and not server.socket_path.exists()
+
+    def test_stuck_requests_do_not_keep_pool_alive(self, tmp_path, socket_dir, monkeypatch):
+        monkeypatch.setitem(pool.WORKER_FACTORIES, "echo", lambda server: EchoWorker())
+        monkeypatch.setattr(pool, "POOL_TIMEOUT", 0.1)
+        monkeypatch.setattr(pool, "spawn_detached", lambda project_root: None)
+        EchoWorker.released.clear()
+        server = pool.ValidatorPoolServer(pool.get_socket_path(str(tmp_path)), str(tmp_path), 0.5)
+        thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        try:
+            while thread.is_alive() and time.monotonic() < deadline:
+                assert pool.run_warm("echo", ["hang"], str(tmp_path)) is None
+        finally:
+            EchoWorker.released.set()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+class TestWithoutUnixSockets:
+    def test_hook_imports_and_runs_validators_itself(self, monkeypatch):
+        """Windows has no AF_UNIX (nor socketserver's Unix classes)."""
+        monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+        monkeypatch.delattr(socketserver, "UnixStreamServer", raising=False)
+        for name in ("quality_validation_hook", "validator_pool", "local_socket"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        fresh = importlib.import_module("quality_validation_hook")
+        fresh.enable_worker_pool({"worker_pool": True})
+        assert fresh._worker_pool_enabled is False
+        assert fresh.validator_pool.run_warm("lizard", ["lizard"], "/") is None
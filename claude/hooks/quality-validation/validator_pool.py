@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.9"
+# dependencies = ["lizard==1.21.3"]
+# ///
+"""
+Validator Pool - warm validator workers for the quality-validation hook.
+
+One process per project keeps validators warm behind a Unix socket, so a hook
+run pays for a socket round-trip instead of a tool launch:
+
+  lizard       lizard imported once; its CLI runs in-process, stdout captured
+  ruff-check   a `ruff server` (LSP) session rooted at the project, asked for
+  ruff-format  pull diagnostics / formatting of the file, printed the way
+               `ruff ... --output-format=concise` prints them
+
+A validator opts in with `warm: <worker>` in validators.yaml, and the hook uses
+the pool when `worker_pool: true`. Whenever the pool is missing, cannot answer
+within POOL_TIMEOUT or cannot serve a command, the hook runs the validator as a
+subprocess as before (starting a missing pool in the background). The pool
+exits after idle_timeout seconds without a completed request, or when its
+source changes.
+
+Usage:
+  uv run validator_pool.py serve --project ROOT [--idle-timeout SECONDS]
+  uv run validator_pool.py status --project ROOT
+  uv run validator_pool.py stop --project ROOT
+
+Protocol (../damage-control/local_socket.py: one request per connection, one
+JSON line each way):
+  {"op": "run", "warm": "lizard", "command": [...]}
+      -> {"returncode": 0|1, "output": "..."}
+  {"op": "ping"}      -> {"ok": true, "pid": 1234, "project": "..."}
+  {"op": "shutdown"}  -> {"ok": true}
+  Any failure         -> {"error": "..."}
+
+Environment variables:
+  QUALITY_VALIDATION_POOL_DIR - Override the socket directory
+                                (default: ~/.claude/run/quality-validation)
+
+Unix only: on platforms without AF_UNIX validators always run as subprocesses.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import queue
+import shutil
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# The socket protocol is shared with the damage-control daemon.
+SHARED_DIR = Path(__file__).parent.parent / "damage-control"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+local_socket = importlib.import_module("local_socket")
+
+SOCKET_DIR_ENV = "QUALITY_VALIDATION_POOL_DIR"
+DEFAULT_IDLE_TIMEOUT = 900.0
+# How long the hook waits for a pool reply before running the validator itself.
+# Warm runs take milliseconds; a pool slower than this is busy or hung.
+POOL_TIMEOUT = 1.0
+# How long the pool waits for one ruff server reply before dropping the session.
+LSP_TIMEOUT = 10.0
+# Requests are handled on their own threads, so the accept loop wakes up this
+# often to notice a shutdown or the idle timeout.
+POLL_INTERVAL = 0.25
+
+# Options the ruff workers understand; any other makes the hook run ruff itself.
+RUFF_OPTIONS = {"--check", "--output-format=concise"}
+RUFF_REQUIRED_OPTIONS = {"check": set(), "format": {"--check"}}
+
+_spawned: set[str] = set()
+_spawn_lock = threading.Lock()
+
+
+is_supported = local_socket.is_supported
+send_request = local_socket.send_request
+ping = local_socket.ping
+
+
+def get_socket_path(project_root: str) -> Path:
+    """Return the pool socket for a project (one pool per project root)."""
+    override = os.environ.get(SOCKET_DIR_ENV)
+    directory = (
+        Path(override)
+        if override
+        else Path(os.path.expanduser("~")) / ".claude" / "run" / "quality-validation"
+    )
+    digest = hashlib.sha256(os.path.abspath(project_root).encode("utf-8")).hexdigest()
+    return directory / f"{digest[:16]}.sock"
+
+
+def _serve_command(project_root: str) -> list[str]:
+    """Command starting a pool: through uv (which provides lizard) when available."""
+    script = str(Path(__file__).resolve())
+    args = ["serve", "--project", project_root]
+    uv = shutil.which("uv")
+    if uv:
+        return [uv, "run", "--quiet", "--script", script, *args]
+    return [sys.executable, script, *args]
+
+
+def spawn_detached(project_root: str) -> None:
+    """Fire-and-forget start of a project's pool in its own session, once per process."""
+    with _spawn_lock:
+        if not is_supported() or project_root in _spawned:
+            return
+        _spawned.add(project_root)
+    try:
+        subprocess.Popen(
+            _serve_command(project_root),
+            cwd=project_root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def run_warm(warm: str, command: list[str], project_root: str) -> Optional[tuple[int, str]]:
+    """Run command on the project's `warm` worker; None means run it as a subprocess.
+
+    Waits at most POOL_TIMEOUT, whatever the validator's own timeout, so a
+    busy or hung pool costs the hook little. A missing pool is started in the
+    background for the next validation.
+    """
+    socket_path = get_socket_path(project_root)
+    request = {"op": "run", "warm": warm, "command": command}
+    reply = send_request(request, socket_path, POOL_TIMEOUT)
+    if reply is None:
+        # A pool that is already healthy makes the new one exit at once.
+        spawn_detached(project_root)
+        return None
+    if not isinstance(reply.get("returncode"), int) or not isinstance(reply.get("output"), str):
+        return None
+    return reply["returncode"], reply["output"]
+
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+
+class UnsupportedCommand(ValueError):
+    """A command the warm worker cannot reproduce exactly."""
+
+
+class LizardWorker:
+    """lizard's command line run in-process; runs are serialized over captured stdout."""
+
+    def __init__(self) -> None:
+        import lizard
+
+        self._lizard = lizard
+        self._lock = threading.Lock()
+
+    def run(self, command: list[str]) -> tuple[int, str]:
+        if not command or Path(command[0]).stem != "lizard":
+            raise UnsupportedCommand(f"not a lizard command: {command[:1]}")
+        output = io.StringIO()
+        with self._lock, contextlib.redirect_stdout(output):
+            try:
+                returncode = self._lizard.main(command)
+            except SystemExit as error:
+                returncode = error.code if isinstance(error.code, int) else 2
+        return returncode, output.getvalue().strip()
+
+    def close(self) -> None:
+        pass
+
+
+def _parse_ruff_command(command: list[str], subcommand: str) -> list[str]:
+    """Files of a `ruff <subcommand> [options] files...` command the worker can serve."""
+    head = [Path(command[0]).stem, *command[1:2]] if command else []
+    if head != ["ruff", subcommand]:
+        raise UnsupportedCommand(f"not a ruff {subcommand} command")
+    options = {arg for arg in command[2:] if arg.startswith("-")}
+    if not RUFF_REQUIRED_OPTIONS[subcommand] <= options <= RUFF_OPTIONS:
+        raise UnsupportedCommand(f"unsupported ruff options: {sorted(options)}")
+    return [arg for arg in command[2:] if arg not in options]
+
+
+def _diagnostic_line(file_path: str, item: dict[str, Any]) -> str:
+    """One LSP diagnostic as ruff's concise output prints it."""
+    start = item["range"]["start"]
+    code = item.get("code") or "invalid-syntax"
+    message = item.get("message", "").split("\n", 1)[0]
+    separator = ":" if "-" in code else ""
+    return f"{file_path}:{start['line'] + 1}:{start['character'] + 1}: {code}{separator} {message}"
+
+
+class RuffServerSession:
+    """A `ruff server` LSP session rooted at the project; requests are serialized.
+
+    Files are opened with their current disk content for each request, so the
+    answers follow the project's ruff configuration exactly like the CLI. A
+    reader thread queues the server's messages; a reply that does not arrive
+    within LSP_TIMEOUT closes the session, and its workers are dropped.
+    """
+
+    def __init__(self, project_root: str) -> None:
+        executable = shutil.which("ruff")
+        if executable is None:
+            raise UnsupportedCommand("ruff is not installed")
+        self._process = subprocess.Popen(
+            [executable, "server"],
+            cwd=project_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._messages: queue.Queue[Optional[dict[str, Any]]] = queue.Queue()
+        threading.Thread(target=self._read_messages, daemon=True).start()
+        root_uri = Path(project_root).resolve().as_uri()
+        self._request(
+            "initialize",
+            {
+                "processId": os.getpid(),
+                "rootUri": root_uri,
+                "workspaceFolders": [{"uri": root_uri, "name": Path(project_root).name}],
+                "capabilities": {"textDocument": {"diagnostic": {}}},
+            },
+        )
+        self._notify("initialized", {})
+
+    def _send(self, message: dict[str, Any]) -> None:
+        body = json.dumps({"jsonrpc": "2.0", **message}).encode("utf-8")
+        self._process.stdin.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        self._process.stdin.flush()
+
+    def _read_message(self) -> dict[str, Any]:
+        length = 0
+        while True:
+            header = self._process.stdout.readline()
+            if not header:
+                raise OSError("ruff server exited")
+            if not header.strip():
+                break
+            name, _, value = header.decode("ascii").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return json.loads(self._process.stdout.read(length))
+
+    def _read_messages(self) -> None:
+        """Reader thread: queue every server message, then None once the server is gone."""
+        try:
+            while True:
+                self._messages.put(self._read_message())
+        except (OSError, ValueError):
+            self._messages.put(None)
+
+    def _receive(self, deadline: float) -> dict[str, Any]:
+        """Next server message; closes the session if none arrives by deadline."""
+        try:
+            message = self._messages.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            self.close()
+            raise OSError(f"ruff server did not answer within {LSP_TIMEOUT:.0f}s") from None
+        if message is None:
+            raise OSError("ruff server exited")
+        return message
+
+    def _notify(self, method: str, params: dict[str, Any]) -> None:
+        self._send({"method": method, "params": params})
+
+    def _request(self, method: str, params: dict[str, Any]) -> Any:
+        """Send a request and wait for its reply, skipping notifications in between."""
+        self._next_id += 1
+        self._send({"id": self._next_id, "method": method, "params": params})
+        deadline = time.monotonic() + LSP_TIMEOUT
+        while True:
+            message = self._receive(deadline)
+            if message.get("id") == self._next_id and "method" not in message:
+                break
+        if "error" in message:
+            # e.g. formatting a file with syntax errors: the CLI reports those itself.
+            raise UnsupportedCommand(f"ruff server {method}: {message['error'].get('message')}")
+        return message.get("result")
+
+    def _ask(self, file_path: str, method: str, params: dict[str, Any]) -> Any:
+        """Open file_path, send one request about it, and close it again."""
+        text = Path(file_path).read_text(encoding="utf-8")
+        document = {"uri": Path(file_path).resolve().as_uri()}
+        with self._lock:
+            self._notify(
+                "textDocument/didOpen",
+                {"textDocument": {**document, "languageId": "python", "version": 1, "text": text}},
+            )
+            try:
+                return self._request(method, {"textDocument": document, **params})
+            finally:
+                self._notify("textDocument/didClose", {"textDocument": document})
+
+    def diagnostics(self, file_path: str) -> list[str]:
+        result = self._ask(file_path, "textDocument/diagnostic", {}) or {}
+        return [_diagnostic_line(file_path, item) for item in result.get("items", [])]
+
+    def format_check(self, file_path: str) -> list[str]:
+        options = {"options": {"tabSize": 4, "insertSpaces": True}}
+        edits = self._ask(file_path, "textDocument/formatting", options)
+        if not edits:
+            return []
+        start = edits[0]["range"]["start"]
+        position = f"{start['line'] + 1}:{start['character'] + 1}"
+        return [f"{file_path}:{position}: unformatted: File would be reformatted"]
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def close(self) -> None:
+        if self.alive:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+class RuffWorker:
+    """ruff check / ruff format --check answered by a shared ruff server session."""
+
+    def __init__(self, session: RuffServerSession, subcommand: str) -> None:
+        self._session = session
+        self._subcommand = subcommand
+
+    def run(self, command: list[str]) -> tuple[int, str]:
+        files = _parse_ruff_command(command, self._subcommand)
+        if not self._session.alive:
+            raise OSError("ruff server exited")
+        ask = (
+            self._session.diagnostics if self._subcommand == "check" else self._session.format_check
+        )
+        lines = [line for file_path in files for line in ask(file_path)]
+        return (1 if lines else 0), "\n".join(lines)
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def _ruff_session(pool: "ValidatorPoolServer") -> RuffServerSession:
+    """The pool's ruff server session, shared by the check and format workers."""
+    for worker in pool.workers.values():
+        if isinstance(worker, RuffWorker) and worker._session.alive:
+            return worker._session
+    return RuffServerSession(pool.project_root)
+
+
+WORKER_FACTORIES: dict[str, Callable[["ValidatorPoolServer"], Any]] = {
+    "lizard": lambda pool: LizardWorker(),
+    "ruff-check": lambda pool: RuffWorker(_ruff_session(pool), "check"),
+    "ruff-format": lambda pool: RuffWorker(_ruff_session(pool), "format"),
+}
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+# The pool restarts itself when any of its own code changes.
+SOURCE_PATHS = (Path(__file__), SHARED_DIR / "local_socket.py")
+
+
+class ValidatorPoolServer(socketserver.ThreadingMixIn, local_socket.UnixStreamServer):
+    """Unix-socket server holding one project's warm validator workers.
+
+    Each connection is handled on its own thread, so the hook's parallel
+    validators do not queue behind each other; workers serialize internally.
+    Workers start on first use and are dropped (and restarted on the next
+    request) when they fail. Only completed runs count as activity, so a pool
+    whose requests hang on a stuck worker still exits when idle_timeout passes.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        project_root: str,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        self.socket_path = socket_path
+        self.project_root = os.path.abspath(project_root)
+        self.idle_timeout = idle_timeout
+        self.timeout = min(POLL_INTERVAL, idle_timeout)
+        self.running = True
+        self._last_completed = time.monotonic()
+        self.workers: dict[str, Any] = {}
+        self._workers_lock = threading.Lock()
+        self._source_stamps = [local_socket.file_stamp(path) for path in SOURCE_PATHS]
+        local_socket.prepare_socket_path(socket_path, "pool")
+        super().__init__(str(socket_path), local_socket.JsonLineHandler)
+        os.chmod(socket_path, 0o600)
+
+    def worker(self, warm: str) -> Any:
+        """Return the running `warm` worker, starting it if needed."""
+        factory = WORKER_FACTORIES.get(warm)
+        if factory is None:
+            raise UnsupportedCommand(f"unknown worker: {warm!r}")
+        with self._workers_lock:
+            if warm not in self.workers:
+                self.workers[warm] = factory(self)
+            return self.workers[warm]
+
+    def _drop_worker(self, warm: str) -> None:
+        with self._workers_lock:
+            worker = self.workers.pop(warm, None)
+        if worker is not None:
+            worker.close()
+
+    def _run(self, warm: str, command: list[str]) -> dict[str, Any]:
+        try:
+            returncode, output = self.worker(warm).run(command)
+        except UnsupportedCommand as e:
+            return {"error": str(e)}
+        except (OSError, ValueError, ImportError) as e:
+            self._drop_worker(warm)
+            return {"error": f"{warm} worker failed: {e}"}
+        finally:
+            self._last_completed = time.monotonic()
+        return {"returncode": returncode, "output": output}
+
+    def dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Handle a decoded request and return the reply payload."""
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "project": self.project_root}
+        if op == "shutdown":
+            self.running = False
+            return {"ok": True}
+        if op != "run":
+            return {"error": f"unknown op: {op!r}"}
+        if [local_socket.file_stamp(path) for path in SOURCE_PATHS] != self._source_stamps:
+            self.running = False
+            return {"error": "stale: pool source changed, pool exiting"}
+        return self._run(str(request.get("warm")), list(request.get("command") or []))
+
+    def handle_timeout(self) -> None:
+        """Exit after idle_timeout seconds without a completed run."""
+        if time.monotonic() - self._last_completed >= self.idle_timeout:
+            self.running = False
+
+    def serve_until_idle(self) -> None:
+        """Handle requests until shutdown, idle timeout, or a stale-source reply."""
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            for warm in list(self.workers):
+                self._drop_worker(warm)
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def serve(project_root: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> int:
+    """Run a project's pool in the foreground; return a process exit code."""
+    if not is_supported():
+        print("Error: Unix domain sockets are not supported on this platform", file=sys.stderr)
+        return 1
+    try:
+        server = ValidatorPoolServer(get_socket_path(project_root), project_root, idle_timeout)
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    server.serve_until_idle()
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quality-validation warm validator pool")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument("--project", default=os.getcwd(), help="project root (default: cwd)")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT:.0f})",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return serve(args.project, args.idle_timeout)
+    socket_path = get_socket_path(args.project)
+    if args.command == "status":
+        running = ping(socket_path)
+        print(f"{'running' if running else 'not running'}: {socket_path}")
+        return 0 if running else 1
+    reply = send_request({"op": "shutdown"}, socket_path, timeout=3.0)
+    print("stopped" if reply and reply.get("ok") else "not running")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())